@@ -0,0 +1,129 @@
+"""
+Expansion of batch uploads (plain XML files, tar and zip archives) into documents.
+"""
+
+import tarfile
+import zipfile
+from collections.abc import Iterator
+from typing import BinaryIO
+
+
+class BatchLimitError(Exception):
+    """Raised when a batch exceeds its member count or total size limit."""
+
+    pass
+
+
+class MemberTooLarge:
+    """
+    Placeholder yielded instead of content for a member above the size limit.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+
+
+def _read_limited(stream: BinaryIO, limit: int) -> bytes | MemberTooLarge:
+    """Read at most ``limit`` bytes, flagging streams that hold more."""
+    content = stream.read(limit + 1)
+    if len(content) > limit:
+        return MemberTooLarge(limit)
+    return content
+
+
+def is_archive(stream: BinaryIO) -> bool:
+    """
+    Whether a seekable stream holds a zip or tar archive; rewinds it either way.
+    """
+    try:
+        if zipfile.is_zipfile(stream):
+            return True
+        stream.seek(0)
+        return tarfile.is_tarfile(stream)
+    finally:
+        stream.seek(0)
+
+
+def _iter_members(
+    name: str, stream: BinaryIO, max_member_size: int
+) -> Iterator[tuple[str, bytes | MemberTooLarge]]:
+    """
+    Yield (name, content) for one upload, expanding tar and zip archives.
+
+    Archive formats are detected from their contents, not the filename.
+    Directories and other non-regular tar members are skipped. A compressed
+    document (e.g. ``.xml.gz``) is kept compressed; it is decompressed,
+    under the per-document size limit, when it is extracted.
+    """
+    if zipfile.is_zipfile(stream):
+        stream.seek(0)
+        with zipfile.ZipFile(stream) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, _read_limited(member, max_member_size)
+        return
+
+    stream.seek(0)
+    if tarfile.is_tarfile(stream):
+        stream.seek(0)
+        # Streaming mode ("r|*") reads members sequentially and handles compression
+        with tarfile.open(fileobj=stream, mode="r|*") as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                member = archive.extractfile(info)
+                yield info.name, _read_limited(member, max_member_size)
+        return
+
+    stream.seek(0)
+    yield name, _read_limited(stream, max_member_size)
+
+
+def expand_uploads(
+    uploads: list[tuple[str, BinaryIO]],
+    max_members: int,
+    max_total_size: int,
+    max_member_size: int,
+) -> list[tuple[str, bytes | MemberTooLarge]]:
+    """
+    Expand uploaded files into (name, content) documents.
+
+    Names are made unique by appending ``#<n>`` to repeats. Oversized members
+    are returned as MemberTooLarge so they can be reported per document.
+
+    Args:
+        uploads: (filename, seekable binary stream) for each uploaded file
+        max_members: Maximum number of documents in the batch
+        max_total_size: Maximum total size of the batch's documents in bytes,
+            after archive decompression
+        max_member_size: Maximum size of a single document in bytes
+
+    Returns:
+        List of (unique name, content or MemberTooLarge) in upload order
+
+    Raises:
+        BatchLimitError: If the batch has too many members or too many bytes
+    """
+    documents: list[tuple[str, bytes | MemberTooLarge]] = []
+    seen: dict[str, int] = {}
+    total_size = 0
+
+    for filename, stream in uploads:
+        for name, content in _iter_members(filename, stream, max_member_size):
+            if len(documents) >= max_members:
+                raise BatchLimitError(f"Batch has more than {max_members} documents")
+
+            if isinstance(content, bytes):
+                total_size += len(content)
+                if total_size > max_total_size:
+                    raise BatchLimitError(
+                        f"Batch exceeds {max_total_size / 1024 / 1024}MB of decompressed data"
+                    )
+
+            count = seen.get(name, 0)
+            seen[name] = count + 1
+            documents.append((f"{name}#{count}" if count else name, content))
+
+    return documents
@@ -0,0 +1,90 @@
+"""
+Runtime configuration read from environment variables.
+"""
+
+import os
+from dataclasses import dataclass, field
+
+from xml_extractor.priority import DEFAULT_SPEC
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to a default."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    API settings, overridable through environment variables.
+    """
+
+    # Maximum upload size in bytes (MAX_FILE_SIZE)
+    max_file_size: int = field(default_factory=lambda: _env_int("MAX_FILE_SIZE", 10 * 1024 * 1024))
+    # Extraction executor: "thread" or "process" (EXTRACT_EXECUTOR)
+    extract_executor: str = field(
+        default_factory=lambda: os.environ.get("EXTRACT_EXECUTOR", "thread")
+    )
+    # Concurrent extractions (EXTRACT_WORKERS)
+    extract_workers: int = field(
+        default_factory=lambda: _env_int("EXTRACT_WORKERS", min(4, os.cpu_count() or 1))
+    )
+    # Extractions allowed to wait for a worker before returning 503 (EXTRACT_QUEUE_DEPTH)
+    extract_queue_depth: int = field(default_factory=lambda: _env_int("EXTRACT_QUEUE_DEPTH", 16))
+    # Retry-After value in seconds sent with 503 responses (EXTRACT_RETRY_AFTER)
+    extract_retry_after: int = field(default_factory=lambda: _env_int("EXTRACT_RETRY_AFTER", 1))
+    # Maximum documents per /extract/batch request (BATCH_MAX_MEMBERS)
+    batch_max_members: int = field(default_factory=lambda: _env_int("BATCH_MAX_MEMBERS", 1000))
+    # Maximum decompressed bytes per /extract/batch request (BATCH_MAX_TOTAL_SIZE)
+    batch_max_total_size: int = field(
+        default_factory=lambda: _env_int("BATCH_MAX_TOTAL_SIZE", 100 * 1024 * 1024)
+    )
+    # Maximum request body, after any Content-Encoding is decoded (MAX_REQUEST_SIZE);
+    # defaults to the batch limit plus 1MB for multipart framing
+    max_request_size: int = field(
+        default_factory=lambda: _env_int(
+            "MAX_REQUEST_SIZE",
+            _env_int("BATCH_MAX_TOTAL_SIZE", 100 * 1024 * 1024) + 1024 * 1024,
+        )
+    )
+    # Result cache entries kept in memory; 0 disables caching (CACHE_MAX_ENTRIES)
+    cache_max_entries: int = field(default_factory=lambda: _env_int("CACHE_MAX_ENTRIES", 10_000))
+    # Approximate memory budget of the result cache in bytes (CACHE_MAX_BYTES)
+    cache_max_bytes: int = field(
+        default_factory=lambda: _env_int("CACHE_MAX_BYTES", 64 * 1024 * 1024)
+    )
+    # SQLite file shared by all workers as a second cache tier (CACHE_PATH)
+    cache_path: str | None = field(default_factory=lambda: os.environ.get("CACHE_PATH") or None)
+    # Doc-number order used unless a request selects another (PRIORITY_POLICY);
+    # see xml_extractor.priority for the syntax
+    priority_policy: str = field(
+        default_factory=lambda: os.environ.get("PRIORITY_POLICY") or DEFAULT_SPEC
+    )
+    # Reverse index written by "xml-extractor batch --index" and served by GET /lookup
+    # (INDEX_PATH)
+    index_path: str | None = field(default_factory=lambda: os.environ.get("INDEX_PATH") or None)
+    # Jobs run at once by the asynchronous job API (JOB_WORKERS)
+    job_workers: int = field(default_factory=lambda: _env_int("JOB_WORKERS", 2))
+    # Jobs allowed to wait for a job worker before POST /jobs returns 503 (JOB_QUEUE_DEPTH)
+    job_queue_depth: int = field(default_factory=lambda: _env_int("JOB_QUEUE_DEPTH", 100))
+    # Seconds a finished job and its result are kept (JOB_TTL)
+    job_ttl: int = field(default_factory=lambda: _env_int("JOB_TTL", 3600))
+    # SQLite file holding jobs, shared by all workers; in memory if unset (JOB_STORE_PATH)
+    job_store_path: str | None = field(
+        default_factory=lambda: os.environ.get("JOB_STORE_PATH") or None
+    )
+    # Directory for uploads waiting for their job; the system default if unset (JOB_SPOOL_DIR)
+    job_spool_dir: str | None = field(
+        default_factory=lambda: os.environ.get("JOB_SPOOL_DIR") or None
+    )
+    # Worker processes started by api.server; 0 sizes them from the cgroup CPU quota
+    # (WEB_WORKERS)
+    web_workers: int = field(default_factory=lambda: _env_int("WEB_WORKERS", 0))
+    # Requests after which api.server replaces a worker; 0 for never (WEB_MAX_REQUESTS)
+    web_max_requests: int = field(default_factory=lambda: _env_int("WEB_MAX_REQUESTS", 10_000))
+    # Record stage timings and counters for /metrics; 0 disables (METRICS_ENABLED)
+    metrics_enabled: bool = field(default_factory=lambda: _env_int("METRICS_ENABLED", 1) != 0)
+
+
+settings = Settings()
@@ -0,0 +1,291 @@
+"""
+Decoding of compressed request bodies (``Content-Encoding: gzip``), and
+size limits enforced on request bodies while they arrive.
+"""
+
+import zlib
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.metrics import record_error
+
+# Supported Content-Encoding values -> zlib window bits
+ENCODINGS = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "x-gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+
+# Decoded bytes handed to the application per receive() call
+CHUNK_SIZE = 64 * 1024
+
+# Allowance for the multipart framing around a single uploaded file
+FORM_OVERHEAD = 64 * 1024
+
+
+class BodyError(Exception):
+    """
+    Raised into the application when the request body cannot be decoded.
+    """
+
+    def __init__(self, status_code: int, error: str, message: str, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.error = error
+        self.message = message
+        self.detail = detail
+
+    def response(self) -> JSONResponse:
+        """
+        The error response sent in place of the application's.
+        """
+        record_error(self.error)
+        return JSONResponse(
+            status_code=self.status_code,
+            content={"error": self.error, "message": self.message, "detail": self.detail},
+        )
+
+
+def _too_large(max_size: int, what: str = "request size") -> BodyError:
+    """
+    The 413 error for a body of more than ``max_size`` bytes.
+    """
+    return BodyError(
+        413,
+        "PayloadTooLarge",
+        "Request body too large",
+        f"Maximum {what} is {max_size / 1024 / 1024}MB",
+    )
+
+
+class _DecodedBody:
+    """
+    ASGI receive callable that inflates the body of the wrapped one.
+
+    Each message carries at most CHUNK_SIZE decoded bytes, so memory use
+    does not depend on the compression ratio.
+    """
+
+    def __init__(self, receive: Receive, wbits: int, max_size: int):
+        self._receive = receive
+        self._wbits = wbits
+        self._inflater = zlib.decompressobj(wbits)
+        self._pending = b""
+        self._more = True
+        self._done = False
+        self.max_size = max_size
+        self.size = 0
+        self.error: BodyError | None = None
+
+    def _fail(self, error: BodyError) -> BodyError:
+        self.error = error
+        return error
+
+    async def __call__(self) -> Message:
+        if self._done:
+            # Starlette keeps listening for the client disconnecting
+            return await self._receive()
+        while not self._pending and self._more:
+            message = await self._receive()
+            if message["type"] != "http.request":
+                return message
+            self._pending = message.get("body", b"")
+            self._more = message.get("more_body", False)
+
+        flushed = not self._pending
+        try:
+            if flushed:
+                data = self._inflater.flush()
+            else:
+                data = self._inflater.decompress(self._pending, CHUNK_SIZE)
+                self._pending = self._inflater.unconsumed_tail
+                if self._inflater.eof and self._inflater.unused_data:
+                    # Concatenated gzip members form one stream
+                    self._pending = self._inflater.unused_data
+                    self._inflater = zlib.decompressobj(self._wbits)
+        except zlib.error as e:
+            raise self._fail(
+                BodyError(400, "CompressionError", "Failed to decompress request body", str(e))
+            ) from e
+
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise self._fail(_too_large(self.max_size, "decompressed request size"))
+
+        if flushed and not self._inflater.eof:
+            raise self._fail(
+                BodyError(
+                    400,
+                    "CompressionError",
+                    "Failed to decompress request body",
+                    "Compressed body ended early",
+                )
+            )
+        self._done = self._inflater.eof and not self._pending and not self._more
+        return {"type": "http.request", "body": data, "more_body": not self._done}
+
+
+class DecompressRequestMiddleware:
+    """
+    Decode request bodies sent with ``Content-Encoding: gzip`` or ``deflate``.
+
+    The body is inflated incrementally as the application reads it, and the
+    request is rejected with 413 as soon as more than ``max_size`` decoded
+    bytes have been read, so a decompression bomb is never held in memory.
+    Other encodings are rejected with 415; requests without a
+    Content-Encoding pass through untouched.
+
+    Args:
+        app: The wrapped ASGI application
+        max_size: Largest decoded request body accepted, in bytes
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"content-encoding":
+                    encoding = value.decode("latin-1").strip().lower()
+        if encoding is None or encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        if encoding not in ENCODINGS:
+            error = BodyError(
+                415,
+                "UnsupportedMediaType",
+                "Unsupported Content-Encoding",
+                f"Supported encodings: {', '.join(ENCODINGS)}. Received: {encoding}",
+            )
+            await error.response()(scope, receive, send)
+            return
+
+        # The decoded body has a different length and no encoding
+        headers = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        body = _DecodedBody(receive, ENCODINGS[encoding], self.max_size)
+        await _call_with_body(self.app, dict(scope, headers=headers), body, receive, send)
+
+
+def _file_too_large(max_size: int) -> BodyError:
+    """
+    The 422 error for an upload above a per-document limit, as the
+    endpoints' own size checks report it.
+    """
+    return BodyError(
+        422,
+        "ValidationError",
+        "File too large",
+        f"Maximum file size is {(max_size - FORM_OVERHEAD) / 1024 / 1024}MB",
+    )
+
+
+class _LimitedBody:
+    """
+    ASGI receive callable that fails once the wrapped one has delivered
+    more than ``max_size`` body bytes.
+    """
+
+    def __init__(self, receive: Receive, max_size: int, error: BodyError):
+        self._receive = receive
+        self.max_size = max_size
+        self.size = 0
+        self.error: BodyError | None = None
+        self._limit_error = error
+
+    async def __call__(self) -> Message:
+        if self.error is not None:
+            raise self.error
+        message = await self._receive()
+        if message["type"] == "http.request":
+            self.size += len(message.get("body", b""))
+            if self.size > self.max_size:
+                self.error = self._limit_error
+                raise self.error
+        return message
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies larger than a limit as they arrive.
+
+    A Content-Length above the limit is rejected before the body is read;
+    otherwise body bytes are counted as the application receives them, and
+    the request fails as soon as the count crosses the limit, so an
+    oversized upload is never spooled whole. Placed inside
+    DecompressRequestMiddleware, it counts decoded bytes.
+
+    Past ``max_size`` the answer is 413. A path limit caps the single
+    document a form carries (its size plus FORM_OVERHEAD), so crossing it
+    gives the endpoint's own 422 "File too large".
+
+    Args:
+        app: The wrapped ASGI application
+        max_size: Largest request body accepted, in bytes
+        path_limits: Tighter limits, framing included, for particular paths
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int, path_limits: dict[str, int] | None = None):
+        self.app = app
+        self.max_size = max_size
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_size = self.path_limits.get(scope["path"])
+        if max_size is None:
+            max_size, error = self.max_size, _too_large(self.max_size)
+        else:
+            error = _file_too_large(max_size)
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    too_large = int(value) > max_size
+                except ValueError:
+                    too_large = False
+                if too_large:
+                    await error.response()(scope, receive, send)
+                    return
+
+        body = _LimitedBody(receive, max_size, error)
+        await _call_with_body(self.app, scope, body, receive, send)
+
+
+async def _call_with_body(
+    app: ASGIApp,
+    scope: Scope,
+    body: _DecodedBody | _LimitedBody,
+    receive: Receive,
+    send: Send,
+) -> None:
+    """
+    Run the application on a wrapped body, answering with the body's error if it fails.
+    """
+    started = False
+
+    async def send_unless_failed(message: Message) -> None:
+        # Once the body failed, the application only sees a broken body;
+        # its response is replaced by the body's error
+        nonlocal started
+        if body.error is None:
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+    try:
+        await app(scope, body, send_unless_failed)
+    except Exception:
+        if body.error is None or started:
+            raise
+    if body.error is not None and not started:
+        await body.error.response()(scope, receive, send)
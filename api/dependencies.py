@@ -3,6 +3,16 @@ Shared dependencies for API endpoints.
 """
 
 import logging
+import os
+import sqlite3
+import time
+
+from api import metrics
+from api.config import settings
+from api.jobs import JobManager, JobStore, MemoryJobStore, SQLiteJobStore
+from api.workers import ExtractionPool
+from xml_extractor.cache import ResultCache
+from xml_extractor.index import DocNumberIndex
 
 # Configure logging
 logging.basicConfig(
@@ -18,3 +28,125 @@ def get_logger():
     Dependency to get logger instance.
     """
     return logger
+
+
+_extraction_pool: ExtractionPool | None = None
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """
+    Dependency to get the shared extraction pool, created on first use.
+    """
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ExtractionPool(
+            max_workers=settings.extract_workers,
+            queue_depth=settings.extract_queue_depth,
+            kind=settings.extract_executor,
+            # Threads share this process's recorder; processes need their own
+            initializer=metrics.install if settings.metrics_enabled else None,
+        )
+    return _extraction_pool
+
+
+def shutdown_extraction_pool() -> None:
+    """
+    Shut down the shared extraction pool if it was started.
+    """
+    global _extraction_pool
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown()
+        _extraction_pool = None
+
+
+_result_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache | None:
+    """
+    Dependency to get the shared result cache, or None if caching is disabled.
+    """
+    global _result_cache
+    if _result_cache is None and settings.cache_max_entries > 0:
+        _result_cache = ResultCache(
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+            path=settings.cache_path,
+        )
+    return _result_cache
+
+
+def peek_result_cache() -> ResultCache | None:
+    """
+    The shared result cache if it has been created, without creating it.
+    """
+    return _result_cache
+
+
+# Seconds between attempts to open a reverse index that is not available
+INDEX_RETRY_INTERVAL = 30.0
+
+_doc_index: DocNumberIndex | None = None
+_doc_index_retry_at = 0.0
+
+
+def get_doc_index() -> DocNumberIndex | None:
+    """
+    Dependency to get the reverse index, or None if INDEX_PATH is unset or not built yet.
+
+    An index that is missing or cannot be opened is looked for again at most
+    every INDEX_RETRY_INTERVAL seconds, so a batch run may create it after
+    the server starts without every request retrying and logging.
+    """
+    global _doc_index, _doc_index_retry_at
+    if _doc_index is not None or not settings.index_path:
+        return _doc_index
+    now = time.monotonic()
+    if now < _doc_index_retry_at:
+        return None
+    _doc_index_retry_at = now + INDEX_RETRY_INTERVAL
+    if not os.path.exists(settings.index_path):
+        logger.info("Reverse index %s has not been built yet", settings.index_path)
+        return None
+    try:
+        _doc_index = DocNumberIndex(settings.index_path, readonly=True)
+    except sqlite3.Error as e:
+        logger.warning("Reverse index %s is not available: %s", settings.index_path, e)
+    return _doc_index
+
+
+_job_manager: JobManager | None = None
+
+
+def get_job_manager() -> JobManager:
+    """
+    Dependency to get the shared job manager, started on first use.
+    """
+    global _job_manager
+    if _job_manager is None:
+        store: JobStore = (
+            SQLiteJobStore(settings.job_store_path, ttl=settings.job_ttl)
+            if settings.job_store_path
+            else MemoryJobStore(ttl=settings.job_ttl)
+        )
+        _job_manager = JobManager(
+            store, workers=settings.job_workers, queue_depth=settings.job_queue_depth
+        )
+    return _job_manager
+
+
+def peek_job_manager() -> JobManager | None:
+    """
+    The shared job manager if it has been started, without starting it.
+    """
+    return _job_manager
+
+
+def shutdown_job_manager() -> None:
+    """
+    Stop the shared job manager if it was started.
+    """
+    global _job_manager
+    if _job_manager is not None:
+        _job_manager.shutdown()
+        _job_manager = None
@@ -0,0 +1,155 @@
+"""
+Fleet-wide request and cache counters for pre-forked server workers.
+
+The launcher (``api.server``) maps an anonymous shared-memory segment before
+forking, so every worker process sees the same pages. Each worker owns one
+row of 64-bit words and is its only writer, so no lock is needed; readers
+sum the rows. A recycled worker's replacement takes over its row and keeps
+counting from where the old process stopped, so totals never go backwards.
+
+Without the launcher, ``stats`` is None and /health reports this process
+only.
+"""
+
+import mmap
+import os
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.dependencies import peek_result_cache
+
+# Monotonic totals, carried over when a worker is replaced
+COUNTERS = ("requests", "errors", "hits", "disk_hits", "misses", "evictions")
+# Current values of the worker's own result cache, reset with the process
+GAUGES = ("entries", "bytes")
+# Layout of a worker's row
+FIELDS = ("pid", "started_at", *COUNTERS, *GAUGES)
+
+_WORD = 8
+_ROW = len(FIELDS)
+_INDEX = {name: index for index, name in enumerate(FIELDS)}
+
+# Cache statistics published per worker; the rest are request counters
+_CACHE_FIELDS = ("hits", "disk_hits", "misses", "evictions", "entries", "bytes")
+
+
+class FleetStats:
+    """
+    Counters shared by a fixed number of worker slots.
+
+    Create it in the parent before forking; each child then calls
+    ``attach`` with its slot. Row 0 belongs to the launcher and counts
+    worker restarts.
+
+    Args:
+        slots: Number of worker processes
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.slot: int | None = None
+        self._buffer = mmap.mmap(-1, (slots + 1) * _ROW * _WORD)
+        self._words = memoryview(self._buffer).cast("Q")
+        self._baseline: dict[str, int] = {}
+
+    def _offset(self, slot: int, name: str) -> int:
+        return (slot + 1) * _ROW + _INDEX[name]
+
+    def attach(self, slot: int) -> None:
+        """
+        Make this process the writer of ``slot``.
+        """
+        self.slot = slot
+        words = self._words
+        words[self._offset(slot, "pid")] = os.getpid()
+        words[self._offset(slot, "started_at")] = int(time.time())
+        for name in GAUGES:
+            words[self._offset(slot, name)] = 0
+        # The previous occupant's cache counters keep counting from here
+        self._baseline = {name: words[self._offset(slot, name)] for name in _CACHE_FIELDS}
+
+    def restarted(self) -> None:
+        """
+        Count one worker restart; called by the launcher.
+        """
+        self._words[0] += 1
+
+    def record_request(self, error: bool, cache: dict[str, int | float] | None) -> None:
+        """
+        Count one request of the attached worker and publish its cache statistics.
+
+        Args:
+            error: Whether the response was a server error
+            cache: ``ResultCache.stats()`` of this process, or None without a cache
+        """
+        if self.slot is None:
+            return
+        words = self._words
+        words[self._offset(self.slot, "requests")] += 1
+        if error:
+            words[self._offset(self.slot, "errors")] += 1
+        if cache is not None:
+            for name in _CACHE_FIELDS:
+                words[self._offset(self.slot, name)] = self._baseline[name] + int(cache[name])
+
+    def snapshot(self) -> dict:
+        """
+        Totals over every worker, shaped for /health.
+        """
+        words = self._words
+        totals = dict.fromkeys(COUNTERS + GAUGES, 0)
+        workers = 0
+        for slot in range(self.slots):
+            if words[self._offset(slot, "pid")]:
+                workers += 1
+            for name in totals:
+                totals[name] += words[self._offset(slot, name)]
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            "workers": workers,
+            "restarts": words[0],
+            "requests": totals["requests"],
+            "errors": totals["errors"],
+            "cache": {
+                "entries": totals["entries"],
+                "bytes": totals["bytes"],
+                "hits": totals["hits"],
+                "disk_hits": totals["disk_hits"],
+                "misses": totals["misses"],
+                "hit_rate": round(totals["hits"] / lookups, 4) if lookups else 0.0,
+                "evictions": totals["evictions"],
+            },
+        }
+
+
+# Set by the launcher before the workers are forked
+stats: FleetStats | None = None
+
+
+class FleetStatsMiddleware:
+    """
+    Count every HTTP request of this worker in the shared counters.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or stats is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            cache = peek_result_cache()
+            stats.record_request(status >= 500, cache.stats() if cache is not None else None)
@@ -0,0 +1,439 @@
+"""
+Asynchronous extraction jobs: a job store and a prioritized worker pool.
+
+A job is submitted with a task and a priority and runs later on one of a
+fixed number of worker threads; clients poll its status and fetch its
+result once it has finished. Everything runs in the server process, so no
+broker is needed.
+
+Jobs are kept in memory by default. With a SQLite store, every server
+process on the host sees the status and results of every job, though a
+queued job only runs in the process that accepted it. Finished jobs are
+evicted once they are older than the store's TTL, and opening a SQLite
+store fails the unfinished jobs of processes that have died.
+"""
+
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields, replace
+
+from api.workers import PoolSaturatedError
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = frozenset({SUCCEEDED, FAILED})
+
+# Lowest and highest job priority; lower values run first
+PRIORITY_MIN = 0
+PRIORITY_MAX = 9
+DEFAULT_PRIORITY = 5
+
+# Seconds between sweeps of expired jobs
+EVICTION_INTERVAL = 60.0
+
+# Reports (documents done, documents in total or None while unknown)
+Progress = Callable[[int, int | None], None]
+
+# Runs a job; returns (HTTP status code, JSON body) of its result
+Task = Callable[[Progress], tuple[int, str]]
+
+# Releases what a job holds (such as spooled uploads) once it has run or
+# has been discarded without running
+Cleanup = Callable[[], None]
+
+
+@dataclass
+class Job:
+    """
+    State of one job; times are Unix timestamps.
+    """
+
+    id: str
+    priority: int
+    status: str = QUEUED
+    created_at: float = 0.0
+    started_at: float | None = None
+    finished_at: float | None = None
+    done: int = 0
+    total: int | None = None
+    # Status code and JSON body of the result, once finished
+    status_code: int | None = None
+    result: str | None = None
+    # Process that accepted the job, the only one that can run it
+    owner: int | None = field(default_factory=os.getpid)
+
+    @property
+    def error(self) -> dict | None:
+        """
+        The ErrorResponse body of a failed job.
+        """
+        return json.loads(self.result) if self.status == FAILED else None
+
+
+def _interrupted(message: str) -> dict:
+    """
+    Fields that fail a job the server stopped before it could finish.
+    """
+    return {
+        "status": FAILED,
+        "finished_at": time.time(),
+        "status_code": 503,
+        "result": json.dumps(
+            {"error": "ServiceUnavailable", "message": message, "detail": "Submit the job again"}
+        ),
+    }
+
+
+def _process_alive(pid: int) -> bool:
+    """
+    Whether a process with this id exists on the host.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, under another user
+        return True
+    return True
+
+
+class JobStore(ABC):
+    """
+    Base class of job stores: TTL bookkeeping shared by every backend.
+
+    Args:
+        ttl: Seconds a finished job is kept after it finished
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._last_eviction = time.monotonic()
+
+    def expired(self, job: Job, now: float | None = None) -> bool:
+        """
+        Whether a finished job has outlived the TTL.
+        """
+        return job.finished_at is not None and job.finished_at + self.ttl < (now or time.time())
+
+    def maybe_evict(self) -> None:
+        """
+        Evict expired jobs if the last sweep is more than EVICTION_INTERVAL old.
+        """
+        if time.monotonic() - self._last_eviction >= EVICTION_INTERVAL:
+            self._last_eviction = time.monotonic()
+            self.evict()
+
+    @abstractmethod
+    def add(self, job: Job) -> None:
+        """
+        Store a new job.
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Job | None:
+        """
+        A job's current state, or None if it is unknown or expired.
+        """
+
+    @abstractmethod
+    def update(self, job_id: str, **changes) -> None:
+        """
+        Change fields of a job; unknown jobs are ignored.
+        """
+
+    @abstractmethod
+    def evict(self, now: float | None = None) -> int:
+        """
+        Delete expired jobs; returns how many were deleted.
+        """
+
+
+class MemoryJobStore(JobStore):
+    """
+    Jobs held in a dictionary of this process. Thread-safe.
+    """
+
+    def __init__(self, ttl: float):
+        super().__init__(ttl)
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def add(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = replace(job)
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # A copy, so callers never see a half-applied update
+            job = replace(job) if job is not None else None
+        return None if job is None or self.expired(job) else job
+
+    def update(self, job_id: str, **changes) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                for name, value in changes.items():
+                    setattr(job, name, value)
+
+    def evict(self, now: float | None = None) -> int:
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if self.expired(job, now)]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+_COLUMNS = tuple(field.name for field in fields(Job))
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Jobs in a SQLite file shared by every server process on the host.
+
+    Uses WAL mode and one connection per thread, like the result cache's
+    disk tier. Opening the store fails the queued and running jobs of
+    processes that no longer exist, which would otherwise never finish.
+    """
+
+    def __init__(self, path: str | os.PathLike, ttl: float):
+        super().__init__(ttl)
+        self.path = os.fspath(path)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, priority INTEGER, "
+                "status TEXT, created_at REAL, started_at REAL, finished_at REAL, "
+                "done INTEGER, total INTEGER, status_code INTEGER, result TEXT, owner INTEGER)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                # Written before jobs recorded their process; any unfinished
+                # ones are swept below
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+        self.fail_orphaned()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, job: Job) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                tuple(getattr(job, name) for name in _COLUMNS),
+            )
+
+    def get(self, job_id: str) -> Job | None:
+        row = (
+            self._connection()
+            .execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        job = Job(**dict(zip(_COLUMNS, row, strict=True)))
+        return None if self.expired(job) else job
+
+    def update(self, job_id: str, **changes) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in changes)
+        with self._connection() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*changes.values(), job_id))
+
+    def evict(self, now: float | None = None) -> int:
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE finished_at < ?", ((now or time.time()) - self.ttl,)
+            )
+        return cursor.rowcount
+
+    def fail_orphaned(self) -> int:
+        """
+        Fail unfinished jobs whose process has died; returns how many were failed.
+        """
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT id, owner FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+        ).fetchall()
+        orphans = [job_id for job_id, owner in rows if owner is None or not _process_alive(owner)]
+        changes = _interrupted("The server stopped before the job finished")
+        assignments = ", ".join(f"{name} = ?" for name in changes)
+        with conn:
+            # The status check skips jobs that finished after the SELECT
+            conn.executemany(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status IN (?, ?)",
+                [(*changes.values(), job_id, QUEUED, RUNNING) for job_id in orphans],
+            )
+        if orphans:
+            logger.warning("Failed %d jobs left unfinished by stopped processes", len(orphans))
+        return len(orphans)
+
+
+class JobManager:
+    """
+    Runs submitted jobs on a fixed set of worker threads, by priority.
+
+    Jobs wait in a priority queue holding at most ``queue_depth`` of them;
+    lower priorities run first and equal priorities in submission order.
+    Submitting to a full queue fails fast with PoolSaturatedError.
+
+    Args:
+        store: Where job state and results are kept
+        workers: Number of jobs run at once
+        queue_depth: Jobs allowed to wait for a worker
+    """
+
+    def __init__(self, store: JobStore, workers: int, queue_depth: int):
+        self.store = store
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.running = 0
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self, task: Task, priority: int = DEFAULT_PRIORITY, cleanup: Cleanup | None = None
+    ) -> Job:
+        """
+        Queue ``task`` as a new job.
+
+        Args:
+            task: Runs the job
+            priority: Queue priority; lower runs first
+            cleanup: Called exactly once after the task has run, or when the
+                job is discarded by shutdown; not called if submitting fails
+
+        Returns:
+            The queued job
+
+        Raises:
+            PoolSaturatedError: If ``queue_depth`` jobs are already waiting
+        """
+        with self._lock:
+            if self._closed:
+                raise PoolSaturatedError("The job queue is shutting down")
+            if self._queue.qsize() >= self.queue_depth:
+                raise PoolSaturatedError(f"{self.queue_depth} jobs are already queued")
+            job = Job(id=uuid.uuid4().hex, priority=priority, created_at=time.time())
+            self.store.add(job)
+            self._queue.put((priority, next(self._sequence), job.id, task, cleanup))
+        self.store.maybe_evict()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """
+        The current state of a job, or None if it is unknown or expired.
+        """
+        return self.store.get(job_id)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Counters for monitoring: queued and running jobs, and workers.
+        """
+        return {"queued": self._queue.qsize(), "running": self.running, "workers": self.workers}
+
+    def _work(self) -> None:
+        """
+        Worker thread: run jobs until a stop marker is dequeued.
+        """
+        while True:
+            _, _, job_id, task, cleanup = self._queue.get()
+            if task is None:
+                return
+            with self._lock:
+                self.running += 1
+            try:
+                self._run(job_id, task)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                self._cleanup(cleanup)
+
+    @staticmethod
+    def _cleanup(cleanup: Cleanup | None) -> None:
+        """
+        Call a job's cleanup hook; a failing hook must not stop a worker.
+        """
+        if cleanup is None:
+            return
+        try:
+            cleanup()
+        except Exception:
+            logger.exception("Job cleanup failed")
+
+    def _run(self, job_id: str, task: Task) -> None:
+        """
+        Run one job, recording its progress and outcome.
+        """
+        self.store.update(job_id, status=RUNNING, started_at=time.time())
+
+        def progress(done: int, total: int | None) -> None:
+            self.store.update(job_id, done=done, total=total)
+
+        try:
+            status_code, result = task(progress)
+        except Exception as e:
+            status_code, result = 500, json.dumps(
+                {
+                    "error": "InternalServerError",
+                    "message": "An unexpected error occurred",
+                    "detail": str(e),
+                }
+            )
+        self.store.update(
+            job_id,
+            status=SUCCEEDED if status_code == 200 else FAILED,
+            finished_at=time.time(),
+            status_code=status_code,
+            result=result,
+        )
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers once running jobs finish; queued jobs fail with 503.
+
+        The cleanup hooks of the queued jobs are called as they are discarded.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                _, _, job_id, _, cleanup = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._cleanup(cleanup)
+            self.store.update(job_id, **_interrupted("The server stopped before the job ran"))
+        for _ in self._threads:
+            self._queue.put((PRIORITY_MAX + 1, next(self._sequence), None, None, None))
+        for thread in self._threads:
+            thread.join()
@@ -3,11 +3,34 @@ FastAPI application entry point.
 """
 
 import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
+from api import fleet, metrics
+from api.config import settings
+from api.decompression import FORM_OVERHEAD, DecompressRequestMiddleware, RequestSizeLimitMiddleware
+from api.dependencies import (
+    get_result_cache,
+    peek_job_manager,
+    shutdown_extraction_pool,
+    shutdown_job_manager,
+)
 from api.routes import router
+from xml_extractor.cache import ResultCache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Release the job workers and extraction pool when the server stops.
+    """
+    yield
+    shutdown_job_manager()
+    shutdown_extraction_pool()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -17,6 +40,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware (configure as needed for production)
@@ -28,9 +52,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized (decoded) bodies while they arrive: MAX_REQUEST_SIZE, and
+# MAX_FILE_SIZE plus form framing for the single-document endpoint
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_size=settings.max_request_size,
+    path_limits={"/extract": settings.max_file_size + FORM_OVERHEAD},
+)
+
+# Decode gzip request bodies as they are read, bounded by MAX_REQUEST_SIZE
+app.add_middleware(DecompressRequestMiddleware, max_size=settings.max_request_size)
+
+# Count requests in the shared counters of api.server's workers
+app.add_middleware(fleet.FleetStatsMiddleware)
+
 # Track application start time for uptime calculation
 app.state.start_time = time.time()
 
+# Record extraction stage timings for /metrics
+if settings.metrics_enabled:
+    metrics.install()
+
 # Include API routes
 app.include_router(router)
 
@@ -48,19 +90,57 @@ async def root():
         "openapi_url": "/openapi.json",
         "endpoints": {
             "extract": "POST /extract - Upload XML file and extract doc-numbers",
+            "extract_batch": "POST /extract/batch - Upload many XML files or a tar/zip archive",
+            "jobs": "POST /jobs - Queue an extraction job, then poll GET /jobs/{id}",
+            "job_result": "GET /jobs/{id}/result - Result of a finished job",
+            "lookup": "GET /lookup/{doc_number} - Source documents mentioning a doc-number",
             "health": "GET /health - Health check endpoint",
+            "metrics": "GET /metrics - Prometheus metrics",
         },
     }
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(cache: ResultCache | None = Depends(get_result_cache)):
     """
     Health check endpoint for container orchestration.
+
+    Includes result cache statistics (hit rate, evictions, size) when the
+    cache is enabled, and job queue statistics once a job was submitted.
+    Under ``api.server``, ``fleet`` adds up requests, server errors and cache
+    statistics over every worker process.
     """
     uptime = time.time() - app.state.start_time
-    return {
+    health = {
         "status": "healthy",
         "version": "0.1.0",
         "uptime_seconds": round(uptime, 2),
     }
+    if cache is not None:
+        health["cache"] = cache.stats()
+    jobs = peek_job_manager()
+    if jobs is not None:
+        health["jobs"] = jobs.stats()
+    if fleet.stats is not None:
+        health["fleet"] = fleet.stats.snapshot()
+    return health
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """
+    Prometheus metrics: per-stage latency histograms and extraction counters.
+
+    Aggregated across all worker processes when PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    if not settings.metrics_enabled:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "error": "NotFound",
+                "message": "Metrics are disabled",
+                "detail": "Set METRICS_ENABLED=1 to enable /metrics",
+            },
+        )
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
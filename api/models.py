@@ -2,6 +2,8 @@
 Pydantic models for request validation and response serialization.
 """
 
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 
@@ -19,6 +21,9 @@ class ExtractionResponse(BaseModel):
     processing_time_ms: float = Field(
         ..., description="Processing time in milliseconds", example=12.5
     )
+    cached: bool = Field(
+        default=False, description="Whether the result came from the result cache", example=False
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -37,3 +42,102 @@ class ErrorResponse(BaseModel):
         description="Technical details for debugging",
         example="Line 5: Opening and ending tag mismatch",
     )
+
+
+class BatchExtractionResponse(BaseModel):
+    """
+    Response model for batch extraction, with one result per document.
+    """
+
+    results: dict[str, ExtractionResponse | ErrorResponse] = Field(
+        ...,
+        description="Per-document result keyed by filename (archive member name for archives)",
+    )
+    count: int = Field(..., description="Number of documents processed", example=2)
+    error_count: int = Field(..., description="Number of documents that failed", example=0)
+    processing_time_ms: float = Field(
+        ..., description="Total processing time in milliseconds", example=25.0
+    )
+
+
+class DocNumberGroup(BaseModel):
+    """
+    NDJSON line carrying the next group of doc-numbers of a streamed extraction.
+    """
+
+    doc_numbers: list[str] = Field(
+        ..., description="Next doc-numbers, continuing the overall priority order"
+    )
+
+
+class StreamSummary(BaseModel):
+    """
+    Final NDJSON line of a streamed single-document extraction.
+    """
+
+    count: int = Field(..., description="Total number of doc-numbers streamed", example=2)
+    processing_time_ms: float = Field(
+        ..., description="Processing time in milliseconds", example=12.5
+    )
+    cached: bool = Field(
+        default=False, description="Whether the result came from the result cache", example=False
+    )
+
+
+class BatchResultLine(BaseModel):
+    """
+    NDJSON line with the result for one document of a streamed batch.
+    """
+
+    filename: str = Field(..., description="Filename or archive member name", example="a.xml")
+    result: ExtractionResponse | ErrorResponse
+
+
+class JobProgress(BaseModel):
+    """
+    Documents processed so far by a job.
+    """
+
+    done: int = Field(..., description="Documents extracted so far", example=40)
+    total: int | None = Field(
+        default=None,
+        description="Documents in the job, once known (archives are counted as they expand)",
+        example=100,
+    )
+
+
+class JobStatus(BaseModel):
+    """
+    Status of an asynchronous extraction job.
+    """
+
+    id: str = Field(..., description="Job identifier", example="3f2c9a6e0b8d4e51a7c2d9e4f1b06a3c")
+    status: str = Field(..., description="queued, running, succeeded or failed", example="running")
+    priority: int = Field(..., description="Queue priority; lower runs first", example=5)
+    progress: JobProgress
+    created_at: datetime = Field(..., description="When the job was submitted")
+    started_at: datetime | None = Field(default=None, description="When a worker started it")
+    finished_at: datetime | None = Field(default=None, description="When it finished")
+    result_url: str = Field(..., description="Where to fetch the result once the job has finished")
+    error: ErrorResponse | None = Field(default=None, description="Why the job failed")
+
+
+class LookupEntry(BaseModel):
+    """
+    One source document that mentions a doc-number.
+    """
+
+    source: str = Field(..., description="File path, URI or path#n of the document")
+    priority: int = Field(..., description="Priority of the document-id in that document")
+    position: int = Field(..., description="Index of the document-id in document order")
+    format: str | None = Field(default=None, description="Its format attribute")
+
+
+class LookupResponse(BaseModel):
+    """
+    Response model for a reverse index lookup.
+    """
+
+    doc_number: str = Field(..., description="The doc-number looked up", example="999000888")
+    count: int = Field(..., description="Number of entries returned", example=1)
+    sources: list[LookupEntry]
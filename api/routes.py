@@ -2,19 +2,190 @@
 API route handlers for XML extraction endpoints.
 """
 
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
 import time
+from collections.abc import AsyncIterator, Iterable
+from functools import partial
+from typing import BinaryIO
 
-from fastapi import APIRouter, File, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, File, Form, Header, Query, UploadFile
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from api.models import ErrorResponse, ExtractionResponse
-from xml_extractor.exceptions import InvalidDocumentError, XMLParseError
+from api.archives import BatchLimitError, MemberTooLarge, expand_uploads, is_archive
+from api.config import settings
+from api.dependencies import (
+    get_doc_index,
+    get_extraction_pool,
+    get_job_manager,
+    get_result_cache,
+)
+from api.jobs import (
+    DEFAULT_PRIORITY,
+    FINISHED,
+    PRIORITY_MAX,
+    PRIORITY_MIN,
+    Job,
+    JobManager,
+    Progress,
+    Task,
+)
+from api.metrics import record_error, record_result, timed
+from api.models import (
+    BatchExtractionResponse,
+    BatchResultLine,
+    DocNumberGroup,
+    ErrorResponse,
+    ExtractionResponse,
+    JobProgress,
+    JobStatus,
+    LookupEntry,
+    LookupResponse,
+    StreamSummary,
+)
+from api.workers import ExtractionPool, PoolSaturatedError
+from xml_extractor.cache import ResultCache
+from xml_extractor.exceptions import (
+    CompressionError,
+    EncodingError,
+    InputTooLargeError,
+    InvalidDocumentError,
+    StorageError,
+    XMLParseError,
+)
 from xml_extractor.extractor import extract_doc_numbers
+from xml_extractor.index import DEFAULT_LIMIT, DocNumberIndex
+from xml_extractor.priority import PriorityPolicy, parse_policy
+from xml_extractor.storage import list_uris, prefetch, read_uri, split_uri
+from xml_extractor.streaming import iter_doc_numbers_streaming
 
 router = APIRouter()
 
-# Maximum file size: 10MB
-MAX_FILE_SIZE = 10 * 1024 * 1024
+# Maximum file size: 10MB unless MAX_FILE_SIZE is set; applies to
+# compressed uploads once decompressed
+MAX_FILE_SIZE = settings.max_file_size
+
+# Upload content types accepted besides XML: compressed XML, detected from
+# its magic bytes when extracted
+XML_CONTENT_TYPES = {"text/xml", "application/xml", None}
+COMPRESSED_CONTENT_TYPES = {
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-bzip2",
+    "application/zstd",
+}
+XML_SUFFIXES = (".xml", ".xml.gz", ".xml.bz2", ".xml.zst")
+
+# Media type for streamed newline-delimited JSON responses
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Doc-numbers per line when streaming a single document
+NDJSON_GROUP_SIZE = 1000
+
+# Exception type -> (status code, error, message), most specific first
+ERROR_MAP = [
+    (PoolSaturatedError, 503, "ServiceUnavailable", "Extraction queue is full, retry later"),
+    (EncodingError, 400, "EncodingError", "Failed to decode file"),
+    (CompressionError, 400, "CompressionError", "Failed to decompress file"),
+    (InputTooLargeError, 422, "ValidationError", "File too large"),
+    (XMLParseError, 400, "XMLParseError", "Failed to parse XML document"),
+    (InvalidDocumentError, 400, "InvalidDocumentError", "Invalid document structure"),
+    (StorageError, 502, "StorageError", "Failed to read from storage"),
+]
+
+
+def error_response(exc: Exception) -> tuple[int, ErrorResponse]:
+    """
+    Map an extraction failure to its HTTP status code and error body.
+    """
+    for exc_type, status_code, error, message in ERROR_MAP:
+        if isinstance(exc, exc_type):
+            record_error(error)
+            return status_code, ErrorResponse(error=error, message=message, detail=str(exc))
+    record_error("InternalServerError")
+    return 500, ErrorResponse(
+        error="InternalServerError",
+        message="An unexpected error occurred",
+        detail=str(exc),
+    )
+
+
+def wants_ndjson(accept: str | None) -> bool:
+    """
+    Whether the client asked for a streamed NDJSON response.
+    """
+    return accept is not None and NDJSON_MEDIA_TYPE in accept
+
+
+def ndjson_line(model: BaseModel) -> bytes:
+    """
+    Serialize one model as an NDJSON line.
+    """
+    with timed("serialize"):
+        return model.model_dump_json().encode("utf-8") + b"\n"
+
+
+def json_response(model: BaseModel) -> Response:
+    """
+    Serialize a response model, timing it as the serialize stage.
+    """
+    with timed("serialize"):
+        body = model.model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+def validation_error(message: str, detail: str) -> JSONResponse:
+    """
+    Build a 422 response for a rejected upload.
+    """
+    record_error("ValidationError")
+    return JSONResponse(
+        status_code=422,
+        content={"error": "ValidationError", "message": message, "detail": detail},
+    )
+
+
+def error_json_response(exc: Exception) -> JSONResponse:
+    """
+    Build the JSON error response for an extraction failure.
+    """
+    status_code, body = error_response(exc)
+    headers = {"Retry-After": str(settings.extract_retry_after)} if status_code == 503 else None
+    return JSONResponse(status_code=status_code, content=body.model_dump(), headers=headers)
+
+
+def resolve_policy(query: str | None, header: str | None) -> PriorityPolicy:
+    """
+    The priority policy of a request: the query parameter, else the header,
+    else PRIORITY_POLICY.
+
+    Raises:
+        ValueError: If the selected spec is malformed
+    """
+    return parse_policy(query or header or settings.priority_policy)
+
+
+def invalid_policy(exc: ValueError) -> JSONResponse:
+    """
+    Build the 422 response for a malformed priority policy.
+    """
+    return validation_error("Invalid priority policy", str(exc))
+
+
+# Per-request selection of the doc-number order
+POLICY_QUERY = Query(
+    default=None,
+    description=(
+        "Priority policy, e.g. 'docdb|original,epo,other,none'; "
+        "overrides X-Priority-Policy and PRIORITY_POLICY"
+    ),
+)
+POLICY_HEADER = Header(default=None, description="Priority policy, if no policy query parameter")
 
 
 @router.post(
@@ -24,15 +195,21 @@ MAX_FILE_SIZE = 10 * 1024 * 1024
         400: {"model": ErrorResponse, "description": "XML parsing error"},
         422: {"model": ErrorResponse, "description": "Validation error"},
         500: {"model": ErrorResponse, "description": "Internal server error"},
+        503: {"model": ErrorResponse, "description": "Extraction queue is full"},
     },
     summary="Extract doc-numbers from XML",
     description=(
-        "Upload an XML file and extract all doc-numbers in priority order "
-        "(epo first, then patent-office)"
+        "Upload an XML file, optionally gzip, bzip2 or zstd compressed, and extract "
+        "all doc-numbers in priority order (epo first, then patent-office)"
     ),
 )
 async def extract_doc_numbers_endpoint(
-    file: UploadFile = File(..., description="XML file to process")
+    file: UploadFile = File(..., description="XML file to process"),
+    pool: ExtractionPool = Depends(get_extraction_pool),
+    cache: ResultCache | None = Depends(get_result_cache),
+    accept: str | None = Header(default=None),
+    policy: str | None = POLICY_QUERY,
+    x_priority_policy: str | None = POLICY_HEADER,
 ):
     """
     Extract doc-numbers from uploaded XML file.
@@ -44,97 +221,829 @@ async def extract_doc_numbers_endpoint(
     3. Other format values
     4. No format attribute (lowest priority)
 
-    Within each priority level, document order is preserved.
+    Within each priority level, document order is preserved. Another order
+    can be selected with the ``policy`` query parameter or the
+    ``X-Priority-Policy`` header (see ``xml_extractor.priority``); results
+    are cached per policy.
+
+    Compressed uploads are detected from their magic bytes and decompressed
+    while they are parsed; MAX_FILE_SIZE applies to the decompressed bytes,
+    so a decompression bomb is rejected without being inflated in memory.
+    RequestSizeLimitMiddleware cuts the upload off while it arrives once
+    it exceeds MAX_FILE_SIZE plus the form framing, so an oversized file is
+    never spooled whole. The spooled upload is fed to lxml's incremental
+    parser in 64KB chunks; only one chunk and the partial tree are held in
+    memory.
+
+    Extraction runs on a bounded worker pool so large documents never
+    block the event loop; when the pool's queue is full the request is
+    rejected with 503 and a Retry-After header.
+
+    With ``Accept: application/x-ndjson`` the doc-numbers are streamed as
+    DocNumberGroup lines followed by a StreamSummary line, so large results
+    are never serialized as one JSON document. On the thread executor the
+    response starts while the document is still being parsed: doc-numbers
+    of the policy's first level are sent as soon as they are read.
 
     Args:
         file: Uploaded XML file (multipart/form-data)
+        pool: Worker pool that runs the CPU-bound extraction
+        cache: Result cache keyed by content hash, or None if disabled
+        accept: Accept header, used to select NDJSON streaming
+        policy: Priority policy spec from the query string
+        x_priority_policy: Priority policy spec from the X-Priority-Policy header
 
     Returns:
         ExtractionResponse with doc-numbers, count, format breakdown, and processing time
 
     Raises:
         HTTPException: 400 for XML parsing errors, 422 for validation errors,
-                       500 for unexpected errors
+                       500 for unexpected errors, 503 when the queue is full
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
+
+    try:
+        priority_policy = resolve_policy(policy, x_priority_policy)
+    except ValueError as e:
+        return invalid_policy(e)
 
     # Validate file type
-    if file.content_type not in ["text/xml", "application/xml", None]:
+    if file.content_type not in XML_CONTENT_TYPES | COMPRESSED_CONTENT_TYPES:
         # Allow None for cases where content type isn't set
-        if not file.filename.endswith(".xml"):
-            return JSONResponse(
-                status_code=422,
-                content={
-                    "error": "ValidationError",
-                    "message": "Invalid file type",
-                    "detail": f"Only XML files are accepted. Received: {file.content_type}",
-                },
+        if not file.filename.endswith(XML_SUFFIXES):
+            return validation_error(
+                "Invalid file type",
+                f"Only XML files are accepted. Received: {file.content_type}",
             )
 
     try:
-        # Read file content
-        content = await file.read()
-
-        # Check file size
-        if len(content) > MAX_FILE_SIZE:
-            return JSONResponse(
-                status_code=422,
-                content={
-                    "error": "ValidationError",
-                    "message": "File too large",
-                    "detail": f"Maximum file size is {MAX_FILE_SIZE / 1024 / 1024}MB",
-                },
+        # Check file size; compressed uploads are checked again once
+        # decompressed, as they are parsed
+        if file.size is not None and file.size > MAX_FILE_SIZE:
+            return validation_error(
+                "File too large", f"Maximum file size is {MAX_FILE_SIZE / 1024 / 1024}MB"
+            )
+
+        if wants_ndjson(accept) and pool.kind == "thread":
+            return await _stream_extraction(pool, cache, file.file, priority_policy, start_time)
+
+        # Starlette has already spooled the upload to a temporary file; it
+        # is fed to lxml in chunks rather than read into one bytes object,
+        # and lxml decodes it according to the XML declaration
+        doc_numbers, cached = await extract_cached(pool, cache, file.file, priority_policy)
+
+        # Calculate processing time
+        processing_time = (time.perf_counter() - start_time) * 1000  # Convert to ms
+
+        if wants_ndjson(accept):
+            return StreamingResponse(
+                _stream_doc_numbers(doc_numbers, processing_time, cached),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+
+        return json_response(
+            ExtractionResponse(
+                doc_numbers=doc_numbers,
+                count=len(doc_numbers),
+                processing_time_ms=round(processing_time, 2),
+                cached=cached,
+            )
+        )
+
+    except Exception as e:
+        return error_json_response(e)
+
+
+async def extract_cached(
+    pool: ExtractionPool,
+    cache: ResultCache | None,
+    content: bytes | BinaryIO,
+    policy: PriorityPolicy,
+) -> tuple[list[str], bool]:
+    """
+    Extract doc-numbers, serving byte-identical documents from the cache.
+
+    Hashing and cache I/O run on Starlette's thread pool and only misses
+    take a slot on the extraction pool, so the cache also works with the
+    process executor. Compressed documents are cached under the hash of
+    their compressed bytes.
+
+    A binary file (a spooled upload) is hashed and parsed in chunks from
+    its start, so its content is never held in memory at once; the process
+    executor cannot receive a file and gets its bytes instead.
+
+    Returns:
+        Tuple of (doc-numbers, whether the result came from the cache)
+    """
+    if isinstance(content, bytes):
+        size = len(content)
+    else:
+        size = content.seek(0, os.SEEK_END)
+        content.seek(0)
+        if pool.kind == "process":
+            with timed("read"):
+                content = await run_in_threadpool(content.read)
+
+    if cache is None:
+        doc_numbers = await pool.run(extract_doc_numbers, content, MAX_FILE_SIZE, policy)
+        cached = False
+    else:
+        key, doc_numbers = await run_in_threadpool(cache.lookup, content, policy.fingerprint)
+        cached = doc_numbers is not None
+        if not cached:
+            if not isinstance(content, bytes):
+                content.seek(0)
+            doc_numbers = await pool.run(extract_doc_numbers, content, MAX_FILE_SIZE, policy)
+            await run_in_threadpool(cache.put, key, doc_numbers)
+
+    record_result(size, len(doc_numbers))
+    return doc_numbers, cached
+
+
+async def _stream_extraction(
+    pool: ExtractionPool,
+    cache: ResultCache | None,
+    file: BinaryIO,
+    policy: PriorityPolicy,
+    start_time: float,
+) -> Response:
+    """
+    Extract an upload into an NDJSON response that starts before extraction ends.
+
+    The document is parsed on the pool by ``iter_doc_numbers_streaming``,
+    whose groups are sent as they arrive, in lines of NDJSON_GROUP_SIZE. A
+    failure before the first group keeps its status code and ErrorResponse
+    body; one after it ends the stream with an ErrorResponse line instead
+    of the StreamSummary. Cache hits stream the cached list.
+    """
+    size = file.seek(0, os.SEEK_END)
+    file.seek(0)
+    key = None
+    if cache is not None:
+        key, doc_numbers = await run_in_threadpool(cache.lookup, file, policy.fingerprint)
+        if doc_numbers is not None:
+            record_result(size, len(doc_numbers))
+            processing_time = (time.perf_counter() - start_time) * 1000
+            return StreamingResponse(
+                _stream_doc_numbers(doc_numbers, processing_time, True),
+                media_type=NDJSON_MEDIA_TYPE,
             )
+        file.seek(0)
+
+    loop = asyncio.get_running_loop()
+    # Groups as the pool thread reads them; None once extraction has ended
+    groups: asyncio.Queue[list[str] | None] = asyncio.Queue()
+    stopped = threading.Event()
 
-        # Decode content
+    def produce() -> list[str]:
+        kept: list[str] = []
+        for group in iter_doc_numbers_streaming(file, MAX_FILE_SIZE, policy):
+            if stopped.is_set():
+                # The client went away
+                break
+            if cache is not None:
+                kept.extend(group)
+            loop.call_soon_threadsafe(groups.put_nowait, group)
+        return kept
+
+    async def run() -> list[str]:
+        try:
+            return await pool.run(produce)
+        finally:
+            groups.put_nowait(None)
+
+    extraction = asyncio.ensure_future(run())
+    group = await groups.get()
+    if group is None and extraction.exception() is not None:
+        return error_json_response(extraction.exception())
+
+    async def lines() -> AsyncIterator[bytes]:
+        nonlocal group
+        count = 0
         try:
-            xml_content = content.decode("utf-8")
-        except UnicodeDecodeError:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "error": "EncodingError",
-                    "message": "Failed to decode file",
-                    "detail": "File must be UTF-8 encoded",
-                },
+            while group is not None:
+                # Send everything read so far; group is left None at the end
+                ready = list(group)
+                while not groups.empty() and (group := groups.get_nowait()) is not None:
+                    ready.extend(group)
+                for start in range(0, len(ready), NDJSON_GROUP_SIZE):
+                    group_line = DocNumberGroup(
+                        doc_numbers=ready[start : start + NDJSON_GROUP_SIZE]
+                    )
+                    yield ndjson_line(group_line)
+                count += len(ready)
+                if group is not None:
+                    group = await groups.get()
+            try:
+                doc_numbers = extraction.result()
+            except Exception as e:
+                yield ndjson_line(error_response(e)[1])
+                return
+            record_result(size, count)
+            if cache is not None:
+                await run_in_threadpool(cache.put, key, doc_numbers)
+            yield ndjson_line(
+                StreamSummary(
+                    count=count,
+                    processing_time_ms=round((time.perf_counter() - start_time) * 1000, 2),
+                    cached=False,
+                )
             )
+        finally:
+            stopped.set()
 
-        # Extract doc-numbers
-        doc_numbers = extract_doc_numbers(xml_content)
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
 
-        # Calculate processing time
-        processing_time = (time.time() - start_time) * 1000  # Convert to ms
 
-        return ExtractionResponse(
-            doc_numbers=doc_numbers,
+async def _stream_doc_numbers(
+    doc_numbers: list[str], processing_time: float, cached: bool
+) -> AsyncIterator[bytes]:
+    """
+    Yield doc-numbers in NDJSON groups, then a summary line.
+    """
+    for start in range(0, len(doc_numbers), NDJSON_GROUP_SIZE):
+        group = doc_numbers[start : start + NDJSON_GROUP_SIZE]
+        yield ndjson_line(DocNumberGroup(doc_numbers=group))
+    yield ndjson_line(
+        StreamSummary(
             count=len(doc_numbers),
             processing_time_ms=round(processing_time, 2),
+            cached=cached,
         )
+    )
 
-    except XMLParseError as e:
-        return JSONResponse(
-            status_code=400,
-            content={
-                "error": "XMLParseError",
-                "message": "Failed to parse XML document",
-                "detail": str(e),
-            },
+
+def _member_too_large(content: MemberTooLarge) -> ErrorResponse:
+    """
+    The per-document error for a batch member above the size limit.
+    """
+    record_error("ValidationError")
+    return ErrorResponse(
+        error="ValidationError",
+        message="File too large",
+        detail=f"Maximum file size is {content.limit / 1024 / 1024}MB",
+    )
+
+
+async def _extract_one(
+    pool: ExtractionPool,
+    cache: ResultCache | None,
+    content: bytes | MemberTooLarge,
+    slots: asyncio.Semaphore,
+    policy: PriorityPolicy,
+) -> ExtractionResponse | ErrorResponse:
+    """
+    Extract one batch member, turning failures into an ErrorResponse.
+    """
+    if isinstance(content, MemberTooLarge):
+        return _member_too_large(content)
+
+    async with slots:
+        start_time = time.perf_counter()
+        try:
+            doc_numbers, cached = await extract_cached(pool, cache, content, policy)
+        except Exception as e:
+            return error_response(e)[1]
+
+    return ExtractionResponse(
+        doc_numbers=doc_numbers,
+        count=len(doc_numbers),
+        processing_time_ms=round((time.perf_counter() - start_time) * 1000, 2),
+        cached=cached,
+    )
+
+
+@router.post(
+    "/extract/batch",
+    response_model=BatchExtractionResponse,
+    responses={
+        422: {"model": ErrorResponse, "description": "Batch limit exceeded"},
+    },
+    summary="Extract doc-numbers from many XML files",
+    description=(
+        "Upload several XML files, or tar/zip archives of XML files, and extract "
+        "doc-numbers from every document concurrently"
+    ),
+)
+async def extract_batch_endpoint(
+    files: list[UploadFile] = File(..., description="XML files and/or tar/zip archives"),
+    pool: ExtractionPool = Depends(get_extraction_pool),
+    cache: ResultCache | None = Depends(get_result_cache),
+    accept: str | None = Header(default=None),
+    policy: str | None = POLICY_QUERY,
+    x_priority_policy: str | None = POLICY_HEADER,
+):
+    """
+    Extract doc-numbers from every document in a batch upload.
+
+    Archives are detected from their contents and expanded; each member is a
+    separate document. Documents are extracted concurrently on the worker
+    pool, using at most as many slots as the pool has workers so a single
+    batch cannot fill the queue for other clients.
+
+    Each result uses the ExtractionResponse or ErrorResponse shape, keyed by
+    filename (archive member name for archives; repeats get a ``#<n>`` suffix).
+
+    With ``Accept: application/x-ndjson`` each document's BatchResultLine is
+    written as soon as it finishes, in completion order, instead of waiting
+    for the slowest document.
+
+    Args:
+        files: Uploaded XML files and/or archives (multipart/form-data)
+        pool: Worker pool that runs the CPU-bound extraction
+        cache: Result cache keyed by content hash, or None if disabled
+        accept: Accept header, used to select NDJSON streaming
+        policy: Priority policy spec from the query string
+        x_priority_policy: Priority policy spec from the X-Priority-Policy header
+
+    Returns:
+        BatchExtractionResponse with per-document results
+
+    Raises:
+        HTTPException: 422 when the batch exceeds its member or size limits,
+                       or the priority policy is malformed
+    """
+    start_time = time.perf_counter()
+
+    try:
+        priority_policy = resolve_policy(policy, x_priority_policy)
+    except ValueError as e:
+        return invalid_policy(e)
+
+    try:
+        # Reading and decompressing is blocking I/O, keep it off the event loop
+        with timed("read"):
+            documents = await run_in_threadpool(
+                expand_uploads,
+                [(file.filename or "upload", file.file) for file in files],
+                max_members=settings.batch_max_members,
+                max_total_size=settings.batch_max_total_size,
+                max_member_size=MAX_FILE_SIZE,
+            )
+    except BatchLimitError as e:
+        return validation_error("Batch limit exceeded", str(e))
+    except Exception as e:
+        return validation_error("Failed to read batch upload", str(e))
+
+    slots = asyncio.Semaphore(pool.max_workers)
+
+    if wants_ndjson(accept):
+        return StreamingResponse(
+            _stream_batch(pool, cache, documents, slots, priority_policy),
+            media_type=NDJSON_MEDIA_TYPE,
         )
-    except InvalidDocumentError as e:
+
+    results = await asyncio.gather(
+        *(_extract_one(pool, cache, content, slots, priority_policy) for _, content in documents)
+    )
+
+    return json_response(
+        BatchExtractionResponse(
+            results={name: result for (name, _), result in zip(documents, results, strict=True)},
+            count=len(results),
+            error_count=sum(isinstance(result, ErrorResponse) for result in results),
+            processing_time_ms=round((time.perf_counter() - start_time) * 1000, 2),
+        )
+    )
+
+
+async def _stream_batch(
+    pool: ExtractionPool,
+    cache: ResultCache | None,
+    documents: list[tuple[str, bytes | MemberTooLarge]],
+    slots: asyncio.Semaphore,
+    policy: PriorityPolicy,
+) -> AsyncIterator[bytes]:
+    """
+    Yield one BatchResultLine per document as each extraction completes.
+    """
+
+    async def run(name: str, content: bytes | MemberTooLarge) -> BatchResultLine:
+        return BatchResultLine(
+            filename=name, result=await _extract_one(pool, cache, content, slots, policy)
+        )
+
+    tasks = [asyncio.ensure_future(run(name, content)) for name, content in documents]
+    # Each task now holds its own content, released as soon as it finishes
+    documents.clear()
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield ndjson_line(await next_done)
+    finally:
+        # The client may disconnect mid-stream; don't leave work queued
+        for task in tasks:
+            task.cancel()
+
+
+def not_found(job_id: str) -> JSONResponse:
+    """
+    Build the 404 response for an unknown or expired job.
+    """
+    record_error("NotFound")
+    return JSONResponse(
+        status_code=404,
+        content={
+            "error": "NotFound",
+            "message": "Job not found",
+            "detail": f"No job {job_id}; finished jobs expire after {settings.job_ttl}s",
+        },
+    )
+
+
+def job_status(job: Job) -> JobStatus:
+    """
+    The public view of a job's state.
+    """
+    return JobStatus(
+        id=job.id,
+        status=job.status,
+        priority=job.priority,
+        progress=JobProgress(done=job.done, total=job.total),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        result_url=f"/jobs/{job.id}/result",
+        error=job.error,
+    )
+
+
+def _extract_document(
+    cache: ResultCache | None, content: bytes | BinaryIO, policy: PriorityPolicy
+) -> tuple[int, ExtractionResponse | ErrorResponse]:
+    """
+    Extract one document of a job on the calling (job worker) thread.
+
+    Returns:
+        Tuple of (HTTP status code, ExtractionResponse or ErrorResponse)
+    """
+    start_time = time.perf_counter()
+    try:
+        if isinstance(content, bytes):
+            size = len(content)
+        else:
+            size = content.seek(0, os.SEEK_END)
+            content.seek(0)
+        if cache is None:
+            doc_numbers, cached = extract_doc_numbers(content, MAX_FILE_SIZE, policy), False
+        else:
+            key, doc_numbers = cache.lookup(content, policy.fingerprint)
+            cached = doc_numbers is not None
+            if not cached:
+                if not isinstance(content, bytes):
+                    content.seek(0)
+                doc_numbers = extract_doc_numbers(content, MAX_FILE_SIZE, policy)
+                cache.put(key, doc_numbers)
+    except Exception as e:
+        return error_response(e)
+    record_result(size, len(doc_numbers))
+    return 200, ExtractionResponse(
+        doc_numbers=doc_numbers,
+        count=len(doc_numbers),
+        processing_time_ms=round((time.perf_counter() - start_time) * 1000, 2),
+        cached=cached,
+    )
+
+
+def _extract_documents(
+    cache: ResultCache | None,
+    documents: Iterable[tuple[str, bytes | MemberTooLarge | Exception]],
+    total: int,
+    progress: Progress,
+    policy: PriorityPolicy,
+) -> tuple[int, str]:
+    """
+    Extract the documents of a batch job one after another.
+
+    Returns:
+        Tuple of (200, BatchExtractionResponse JSON)
+    """
+    start_time = time.perf_counter()
+    results: dict[str, ExtractionResponse | ErrorResponse] = {}
+    progress(0, total)
+    for name, content in documents:
+        if isinstance(content, MemberTooLarge):
+            results[name] = _member_too_large(content)
+        elif isinstance(content, Exception):
+            results[name] = error_response(content)[1]
+        else:
+            results[name] = _extract_document(cache, content, policy)[1]
+        progress(len(results), total)
+    return (
+        200,
+        BatchExtractionResponse(
+            results=results,
+            count=len(results),
+            error_count=sum(isinstance(result, ErrorResponse) for result in results.values()),
+            processing_time_ms=round((time.perf_counter() - start_time) * 1000, 2),
+        ).model_dump_json(),
+    )
+
+
+def _upload_task(
+    cache: ResultCache | None, uploads: list[tuple[str, BinaryIO]], policy: PriorityPolicy
+) -> Task:
+    """
+    The job for spooled uploads; the route closes the spool files through
+    the job's cleanup hook.
+
+    A single plain XML file gives an ExtractionResponse; several files, or
+    tar/zip archives, give a BatchExtractionResponse.
+    """
+
+    def run(progress: Progress) -> tuple[int, str]:
+        if len(uploads) == 1 and not is_archive(uploads[0][1]):
+            progress(0, 1)
+            status_code, response = _extract_document(cache, uploads[0][1], policy)
+            progress(1, 1)
+            return status_code, response.model_dump_json()
+        try:
+            documents = expand_uploads(
+                uploads,
+                max_members=settings.batch_max_members,
+                max_total_size=settings.batch_max_total_size,
+                max_member_size=MAX_FILE_SIZE,
+            )
+        except BatchLimitError as e:
+            record_error("ValidationError")
+            return (
+                422,
+                ErrorResponse(
+                    error="ValidationError", message="Batch limit exceeded", detail=str(e)
+                ).model_dump_json(),
+            )
+        return _extract_documents(cache, documents, len(documents), progress, policy)
+
+    return run
+
+
+def _uri_task(cache: ResultCache | None, uri: str, policy: PriorityPolicy) -> Task:
+    """
+    The job for a storage URI.
+
+    A ``gs://bucket/key`` URI names one object and gives an
+    ExtractionResponse; one ending in ``/`` names every ``*.xml`` object
+    under that prefix and gives a BatchExtractionResponse keyed by URI.
+    Downloads stop as soon as an object proves larger than MAX_FILE_SIZE.
+    """
+
+    def run(progress: Progress) -> tuple[int, str]:
+        try:
+            if not uri.endswith("/"):
+                progress(0, 1)
+                content = read_uri(uri, MAX_FILE_SIZE)
+                status_code, response = _extract_document(cache, content, policy)
+                progress(1, 1)
+                return status_code, response.model_dump_json()
+            uris = list(list_uris(uri))
+        except (StorageError, InputTooLargeError) as e:
+            status_code, body = error_response(e)
+            return status_code, body.model_dump_json()
+        if len(uris) > settings.batch_max_members:
+            record_error("ValidationError")
+            return (
+                422,
+                ErrorResponse(
+                    error="ValidationError",
+                    message="Batch limit exceeded",
+                    detail=f"Batch has more than {settings.batch_max_members} documents",
+                ).model_dump_json(),
+            )
+        documents = prefetch(uris, fetch=partial(read_uri, max_size=MAX_FILE_SIZE))
+        return _extract_documents(cache, documents, len(uris), progress, policy)
+
+    return run
+
+
+def _spool(files: list[UploadFile]) -> list[tuple[str, BinaryIO]]:
+    """
+    Copy uploads to temporary files that outlive the request.
+
+    Raises:
+        BatchLimitError: If the uploads add up to more than BATCH_MAX_TOTAL_SIZE
+    """
+    uploads: list[tuple[str, BinaryIO]] = []
+    total_size = 0
+    try:
+        for file in files:
+            spooled = tempfile.TemporaryFile(dir=settings.job_spool_dir)
+            uploads.append((file.filename or "upload", spooled))
+            file.file.seek(0)
+            shutil.copyfileobj(file.file, spooled)
+            total_size += spooled.tell()
+            if total_size > settings.batch_max_total_size:
+                raise BatchLimitError(
+                    f"Uploads exceed {settings.batch_max_total_size / 1024 / 1024}MB"
+                )
+            spooled.seek(0)
+    except BaseException:
+        _close_uploads(uploads)
+        raise
+    return uploads
+
+
+def _close_uploads(uploads: list[tuple[str, BinaryIO]]) -> None:
+    """
+    Close (and so delete) spooled uploads.
+    """
+    for _, spooled in uploads:
+        spooled.close()
+
+
+@router.post(
+    "/jobs",
+    status_code=202,
+    response_model=JobStatus,
+    responses={
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        503: {"model": ErrorResponse, "description": "Job queue is full"},
+    },
+    summary="Submit an asynchronous extraction job",
+    description=(
+        "Queue the extraction of uploaded XML files and archives, or of a gs:// object "
+        "or prefix, and return a job id to poll immediately"
+    ),
+)
+async def submit_job_endpoint(
+    files: list[UploadFile] | None = File(default=None, description="XML files and/or archives"),
+    uri: str | None = Form(default=None, description="gs://bucket/key, or gs://bucket/prefix/"),
+    priority: int = Form(
+        default=DEFAULT_PRIORITY,
+        ge=PRIORITY_MIN,
+        le=PRIORITY_MAX,
+        description="Queue priority; lower runs first",
+    ),
+    manager: JobManager = Depends(get_job_manager),
+    cache: ResultCache | None = Depends(get_result_cache),
+    policy: str | None = POLICY_QUERY,
+    x_priority_policy: str | None = POLICY_HEADER,
+):
+    """
+    Submit an extraction job and return its status right away.
+
+    For documents and archives too large to extract within a gateway
+    timeout. Uploads are copied to temporary files (JOB_SPOOL_DIR) that the
+    job deletes when it finishes; a URI is only read when the job runs. Jobs
+    wait in a queue of JOB_QUEUE_DEPTH, by priority then submission order,
+    for one of JOB_WORKERS workers; when the queue is full the request is
+    rejected with 503 and a Retry-After header.
+
+    Args:
+        files: Uploaded XML files and/or archives (multipart/form-data)
+        uri: Storage URI to read instead of uploads
+        priority: 0 (first) to 9 (last)
+        manager: Job queue and store
+        cache: Result cache keyed by content hash, or None if disabled
+        policy: Priority policy spec from the query string
+        x_priority_policy: Priority policy spec from the X-Priority-Policy header
+
+    Returns:
+        202 with the queued job's JobStatus and a Location header
+
+    Raises:
+        HTTPException: 422 for invalid input, 503 when the queue is full
+    """
+    try:
+        priority_policy = resolve_policy(policy, x_priority_policy)
+    except ValueError as e:
+        return invalid_policy(e)
+
+    if bool(files) == bool(uri):
+        return validation_error("Invalid job input", "Send either files or a uri, not both")
+
+    if uri:
+        # Never let clients read the server's own files through file:// URIs
+        if not uri.startswith("gs://"):
+            return validation_error("Invalid job input", f"Only gs:// URIs are supported: {uri}")
+        try:
+            split_uri(uri)
+        except ValueError as e:
+            return validation_error("Invalid job input", str(e))
+        task = _uri_task(cache, uri, priority_policy)
+        uploads: list[tuple[str, BinaryIO]] = []
+    else:
+        try:
+            uploads = await run_in_threadpool(_spool, files)
+        except BatchLimitError as e:
+            return validation_error("Batch limit exceeded", str(e))
+        task = _upload_task(cache, uploads, priority_policy)
+
+    try:
+        job = await run_in_threadpool(
+            manager.submit, task, priority, partial(_close_uploads, uploads)
+        )
+    except Exception as e:
+        _close_uploads(uploads)
+        return error_json_response(e)
+
+    response = json_response(job_status(job))
+    response.status_code = 202
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return response
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatus,
+    responses={404: {"model": ErrorResponse, "description": "Unknown or expired job"}},
+    summary="Get the status and progress of a job",
+)
+async def job_status_endpoint(job_id: str, manager: JobManager = Depends(get_job_manager)):
+    """
+    Report a job's status, priority, progress and timestamps.
+
+    Args:
+        job_id: Id returned by POST /jobs
+        manager: Job queue and store
+
+    Returns:
+        JobStatus; 404 once a finished job has been evicted (JOB_TTL)
+    """
+    job = await run_in_threadpool(manager.get, job_id)
+    if job is None:
+        return not_found(job_id)
+    return json_response(job_status(job))
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_model=ExtractionResponse | BatchExtractionResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "Unknown or expired job"},
+        409: {"model": ErrorResponse, "description": "Job has not finished"},
+    },
+    summary="Fetch the result of a finished job",
+)
+async def job_result_endpoint(job_id: str, manager: JobManager = Depends(get_job_manager)):
+    """
+    Return a finished job's result as /extract or /extract/batch would have.
+
+    A failed job returns the status code and ErrorResponse the synchronous
+    endpoint would have returned.
+
+    Args:
+        job_id: Id returned by POST /jobs
+        manager: Job queue and store
+
+    Returns:
+        ExtractionResponse or BatchExtractionResponse; 409 while the job is
+        queued or running
+    """
+    job = await run_in_threadpool(manager.get, job_id)
+    if job is None:
+        return not_found(job_id)
+    if job.status not in FINISHED:
         return JSONResponse(
-            status_code=400,
+            status_code=409,
             content={
-                "error": "InvalidDocumentError",
-                "message": "Invalid document structure",
-                "detail": str(e),
+                "error": "Conflict",
+                "message": "Job has not finished",
+                "detail": f"Job {job_id} is {job.status}",
             },
+            headers={"Retry-After": str(settings.extract_retry_after)},
         )
-    except Exception as e:
+    return Response(content=job.result, status_code=job.status_code, media_type="application/json")
+
+
+@router.get(
+    "/lookup/{doc_number}",
+    response_model=LookupResponse,
+    responses={404: {"model": ErrorResponse, "description": "No reverse index is configured"}},
+    summary="List the source documents that mention a doc-number",
+)
+async def lookup_endpoint(
+    doc_number: str,
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=10 * DEFAULT_LIMIT),
+    index: DocNumberIndex | None = Depends(get_doc_index),
+):
+    """
+    Answer from the reverse index built by ``xml-extractor batch --index``.
+
+    The lookup runs on the event loop: it is a single read of a
+    memory-mapped, WAL-mode SQLite file, which never waits for the writer.
+
+    Args:
+        doc_number: Doc-number as extracted
+        limit: Most entries returned
+        index: Reverse index at INDEX_PATH, or None if unavailable
+
+    Returns:
+        LookupResponse, with no sources if the doc-number was never seen
+    """
+    if index is None:
+        record_error("NotFound")
         return JSONResponse(
-            status_code=500,
+            status_code=404,
             content={
-                "error": "InternalServerError",
-                "message": "An unexpected error occurred",
-                "detail": str(e),
+                "error": "NotFound",
+                "message": "Lookup is not available",
+                "detail": "Set INDEX_PATH to an index written by 'xml-extractor batch --index'",
             },
         )
+    entries = index.lookup(doc_number, limit)
+    return json_response(
+        LookupResponse(
+            doc_number=doc_number,
+            count=len(entries),
+            sources=[LookupEntry(**entry._asdict()) for entry in entries],
+        )
+    )
@@ -0,0 +1,263 @@
+"""
+Production launcher: one listening socket served by pre-forked uvicorn workers.
+
+Run ``python -m api.server``. The parent process binds the socket, imports
+the application and warms lxml (parser set-up, XPath and scanner
+compilation), freezes the garbage collector's view of those objects, then
+forks the workers. The workers therefore share the imported code and
+warmed state copy-on-write instead of each building their own. A worker
+that has served ``--max-requests`` requests exits and is replaced, which
+returns fragmented memory to the system; a worker that dies is replaced
+too.
+
+The worker count defaults to the CPU quota of the container's cgroup (v2
+``cpu.max`` or v1 ``cpu.cfs_quota_us``), capped by the CPUs the process may
+run on, so a container limited to 2 CPUs on a 64-core host starts 2
+workers. Request and cache counters of all workers are kept in shared
+memory (``api.fleet``) and reported by /health under ``fleet``. Without
+``JOB_STORE_PATH``, several workers share jobs through a SQLite store in a
+temporary directory, since a job polled on a worker other than the one that
+accepted it would otherwise be unknown there.
+"""
+
+import argparse
+import dataclasses
+import gc
+import logging
+import math
+import os
+import random
+import shutil
+import signal
+import socket
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+from api import config
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Document parsed by the parent so lxml is initialized before forking
+WARMUP_XML = (
+    b'<root><document-id format="epo" load-source="docdb"><country>EP</country>'
+    b"<doc-number>1</doc-number></document-id></root>"
+)
+
+# A worker that exits sooner than this after starting is restarted only
+# after this long, so a crashing worker does not spin
+MIN_WORKER_LIFETIME = 1.0
+
+# Connections the kernel queues while every worker is busy
+BACKLOG = 2048
+
+
+def cpu_limit(cgroup_root: str | os.PathLike = "/sys/fs/cgroup") -> int:
+    """
+    CPUs this process may use: its affinity mask, capped by the cgroup CPU quota.
+
+    A fractional quota is rounded up, so 1.5 CPUs gives 2.
+    """
+    try:
+        available = len(os.sched_getaffinity(0))
+    except AttributeError:
+        available = os.cpu_count() or 1
+    quota = _cgroup_quota(Path(cgroup_root))
+    if quota is not None:
+        available = min(available, math.ceil(quota))
+    return max(1, available)
+
+
+def _cgroup_quota(root: Path) -> float | None:
+    """
+    The cgroup CPU quota in CPUs, or None if unlimited or unknown.
+    """
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        quota, period = (root / "cpu.max").read_text().split()
+        return int(quota) / int(period) if quota != "max" else None
+    except (OSError, ValueError):
+        pass
+    # cgroup v1: a quota of -1 means unlimited
+    for directory in ("cpu", "cpu,cpuacct"):
+        try:
+            quota = int((root / directory / "cpu.cfs_quota_us").read_text())
+            period = int((root / directory / "cpu.cfs_period_us").read_text())
+        except (OSError, ValueError):
+            continue
+        return quota / period if quota > 0 and period > 0 else None
+    return None
+
+
+def warm_up() -> None:
+    """
+    Import the application and exercise the extractor before forking.
+    """
+    import api.main  # noqa: F401
+    from xml_extractor.extractor import Extractor, extract_doc_numbers
+
+    extract_doc_numbers(WARMUP_XML)
+    Extractor(fast_path=True).extract_doc_numbers(WARMUP_XML)
+    # Keep the collector from touching (and so copying) the shared objects
+    gc.collect()
+    gc.freeze()
+
+
+def _run_worker(sock: socket.socket, slot: int, max_requests: int, log_level: str) -> None:
+    """
+    Body of a forked worker: serve until recycled or stopped, then exit.
+    """
+    import uvicorn
+
+    from api import fleet
+    from api.main import app
+
+    code = 0
+    try:
+        # uvicorn installs its own handlers for a graceful shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        random.seed()
+        fleet.stats.attach(slot)
+        # Jitter keeps the workers from being recycled all at once
+        limit = max_requests + random.randint(0, max_requests // 10) if max_requests else None
+        config = uvicorn.Config(app, log_level=log_level, limit_max_requests=limit)
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def serve(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int | None = None,
+    max_requests: int = 0,
+    log_level: str = "info",
+) -> None:
+    """
+    Serve the API on pre-forked workers until SIGTERM or SIGINT.
+
+    Args:
+        host: Address to listen on
+        port: Port to listen on; 0 picks a free one
+        workers: Worker processes; None for ``cpu_limit()``
+        max_requests: Requests after which a worker is replaced; 0 for never
+        log_level: uvicorn log level
+    """
+    workers = workers or cpu_limit()
+
+    # Prometheus needs a shared directory to aggregate several processes,
+    # set before prometheus_client is imported
+    metrics_dir = None
+    if settings.metrics_enabled and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        metrics_dir = tempfile.mkdtemp(prefix="xml-extractor-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    # Every worker must see every job, so an in-memory store will not do;
+    # set before the application binds its settings
+    jobs_dir = None
+    if workers > 1 and not settings.job_store_path:
+        jobs_dir = tempfile.mkdtemp(prefix="xml-extractor-jobs-")
+        os.environ["JOB_STORE_PATH"] = os.path.join(jobs_dir, "jobs.sqlite")
+        config.settings = dataclasses.replace(settings, job_store_path=os.environ["JOB_STORE_PATH"])
+
+    from prometheus_client import multiprocess
+
+    from api import fleet
+
+    sock = socket.create_server((host, port), backlog=BACKLOG)
+    sock.set_inheritable(True)
+    fleet.stats = fleet.FleetStats(workers)
+    warm_up()
+
+    children: dict[int, tuple[int, float]] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(sock, slot, max_requests, log_level)
+        children[pid] = (slot, time.monotonic())
+
+    def stop(signum: int, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(workers):
+        spawn(slot)
+    logger.info("Listening on http://%s:%d with %d workers", host, sock.getsockname()[1], workers)
+
+    try:
+        while children:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            slot, started = children.pop(pid)
+            multiprocess.mark_process_dead(pid)
+            if stopping:
+                continue
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            fleet.stats.restarted()
+            spawn(slot)
+    finally:
+        sock.close()
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+        if jobs_dir is not None:
+            shutil.rmtree(jobs_dir, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Command-line entry point of the launcher.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m api.server",
+        description="Serve the extraction API on pre-forked worker processes",
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.web_workers or None,
+        help="Worker processes (default: $WEB_WORKERS, else the cgroup CPU quota)",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=settings.web_max_requests,
+        help=(
+            "Replace a worker after about this many requests; 0 for never "
+            f"(default: $WEB_MAX_REQUESTS or {settings.web_max_requests})"
+        ),
+    )
+    parser.add_argument("--log-level", default="info", help="uvicorn log level")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.max_requests < 0:
+        parser.error("--max-requests cannot be negative")
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    serve(args.host, args.port, args.workers, args.max_requests, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Bounded executor that keeps CPU-bound extraction off the event loop.
+"""
+
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class PoolSaturatedError(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+    pass
+
+
+class ExtractionPool:
+    """
+    Runs blocking calls on a thread or process pool with a bounded backlog.
+
+    At most ``max_workers`` calls run at once and at most ``queue_depth``
+    more wait for a worker; anything beyond that is rejected immediately
+    with PoolSaturatedError instead of piling up in memory. A call counts
+    against the limit until it finishes on the pool, even if the request
+    awaiting it is cancelled first. ``initializer`` runs once in each worker;
+    it must be picklable for the process pool.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        queue_depth: int,
+        kind: str = "thread",
+        initializer: Callable[[], None] | None = None,
+    ):
+        if kind == "process":
+            self._executor: Executor = ProcessPoolExecutor(
+                max_workers=max_workers, initializer=initializer
+            )
+        elif kind == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="extract", initializer=initializer
+            )
+        else:
+            raise ValueError(f"Unknown executor kind: {kind!r}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.capacity = max_workers + queue_depth
+        # Released from the executor's threads when a call finishes
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run ``fn(*args)`` on the pool and await its result.
+
+        Raises:
+            PoolSaturatedError: If the pool and its queue are full
+        """
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                raise PoolSaturatedError(
+                    f"{self.in_flight} extractions in progress or queued (limit {self.capacity})"
+                )
+            self.in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Not released when the awaiting request is cancelled: the call
+        # keeps its worker until it returns (a queued one is cancelled)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Future | None = None) -> None:
+        """
+        Free the capacity held by one call.
+        """
+        with self._lock:
+            self.in_flight -= 1
+
+    def shutdown(self) -> None:
+        """
+        Stop the pool, waiting for running extractions to finish.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
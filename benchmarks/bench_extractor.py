@@ -0,0 +1,48 @@
+"""Microbenchmark: per-document extraction overhead on the test fixtures.
+
+Usage:
+    python benchmarks/bench_extractor.py [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from xml_extractor.exceptions import ExtractionError  # noqa: E402
+from xml_extractor.extractor import extract_doc_numbers  # noqa: E402
+
+FIXTURES_DIR = ROOT / "tests" / "fixtures"
+
+
+def bench_fixture(content: bytes, repeat: int) -> float:
+    """Return mean microseconds per extraction of one document."""
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        try:
+            extract_doc_numbers(content)
+        except ExtractionError:
+            pass
+    return (time.perf_counter_ns() - start) / repeat / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    fixtures = sorted(p for p in FIXTURES_DIR.iterdir() if p.is_dir())
+    total = 0.0
+    for fixture in fixtures:
+        content = (fixture / "input.xml").read_bytes()
+        mean_us = bench_fixture(content, args.repeat)
+        total += mean_us
+        print(f"{fixture.name:<32} {mean_us:8.2f} us/doc")
+    print(f"{'mean over fixtures':<32} {total / len(fixtures):8.2f} us/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Shared fixtures for the benchmark suite.
+
+Run with:
+    pytest benchmarks --benchmark-autosave          # saves JSON under .benchmarks/
+    pytest benchmarks --benchmark-compare           # compares with the last saved run
+
+Document sizes default to 1KB, 100KB and 10MB; set ``BENCH_SIZES`` (e.g.
+``1KB,500MB``) to choose others.
+"""
+
+import os
+from collections.abc import Callable
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, generate_document, parse_size
+from benchmarks.memory import peak_rss_mb, reset_peak_rss
+
+pytest.importorskip("pytest_benchmark")
+
+SIZES = os.environ.get("BENCH_SIZES", "1KB,100KB,10MB").split(",")
+
+# Each round processes at least this many bytes, so small documents are
+# measured over many calls
+ROUND_BYTES = 1024 * 1024
+
+# Documents above this size get a fixed small number of rounds
+LARGE_DOCUMENT = 16 * 1024 * 1024
+
+MB = 1024 * 1024
+
+
+def spec_for(size: int) -> CorpusSpec:
+    """Document shape for a given size: more document-ids in larger documents."""
+    return CorpusSpec(size=size, document_ids=max(2, min(size // 2048, 100_000)))
+
+
+@pytest.fixture(scope="session", params=SIZES)
+def documents(request) -> list[bytes]:
+    """Distinct generated documents of one size totalling about ROUND_BYTES."""
+    size = parse_size(request.param)
+    count = max(1, ROUND_BYTES // size)
+    spec = spec_for(size)
+    return [generate_document(spec, seed).content for seed in range(count)]
+
+
+@pytest.fixture
+def measure(benchmark) -> Callable[..., object]:
+    """Run a benchmark and record throughput and peak RSS in its JSON extra_info.
+
+    Call as ``measure(fn, docs=..., nbytes=...)``; pass ``peak_rss`` to report
+    a value measured elsewhere (e.g. in a subprocess) instead of this process.
+    """
+
+    def run(
+        fn: Callable[[], object],
+        docs: int,
+        nbytes: int,
+        peak_rss: Callable[[], float] | None = None,
+    ) -> object:
+        reset_peak_rss()
+        if nbytes > LARGE_DOCUMENT:
+            result = benchmark.pedantic(fn, rounds=3, iterations=1)
+        else:
+            result = benchmark(fn)
+        if benchmark.disabled or benchmark.stats is None:
+            # --benchmark-disable runs each function once, untimed
+            return result
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info.update(
+            docs=docs,
+            bytes=nbytes,
+            docs_per_s=round(docs / mean, 1),
+            mb_per_s=round(nbytes / MB / mean, 2),
+            peak_rss_mb=round((peak_rss or peak_rss_mb)(), 1),
+        )
+        return result
+
+    return run
@@ -0,0 +1,276 @@
+"""Deterministic generator for synthetic patent-like XML.
+
+Documents look like full-text patent records: a ``patent-document`` root
+with bibliographic data holding the ``document-id`` elements, followed by
+abstract and description text padding the document to the requested size.
+The same spec and seed always produce the same bytes, so benchmark results
+are comparable between commits.
+
+Usage:
+    python -m benchmarks.corpus OUT_DIR [--count N] [--size 100KB] [--document-ids N]
+        [--namespaces] [--malformed-rate R] [--dump] [--seed S]
+"""
+
+import argparse
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import BinaryIO
+
+# Relative frequency of each format attribute value; None omits the attribute
+DEFAULT_FORMATS = {"epo": 0.4, "patent-office": 0.3, "original": 0.2, None: 0.1}
+
+MALFORMATIONS = ("unclosed-tag", "invalid-char", "truncated")
+
+NAMESPACES = (
+    b' xmlns:m="http://www.w3.org/1998/Math/MathML"' b' xmlns:xlink="http://www.w3.org/1999/xlink"'
+)
+
+_PRIORITY = {"epo": 1, "patent-office": 2, None: 4}
+
+_WORDS = (
+    "apparatus method system device composition wherein comprising said first second "
+    "layer substrate signal module configured receive transmit coupled portion surface "
+    "plurality member assembly housing control unit data processing circuit element"
+).split()
+
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Shape of the generated documents.
+
+    Attributes:
+        size: Approximate size of each document in bytes
+        document_ids: Number of ``document-id`` elements per document
+        formats: Relative frequency of each ``format`` value (None = no attribute)
+        namespaces: Declare namespaces and add namespaced MathML and xlink markup
+        malformed_rate: Fraction of documents given a defect (see ``MALFORMATIONS``)
+    """
+
+    size: int = 10 * 1024
+    document_ids: int = 8
+    formats: dict[str | None, float] = field(default_factory=lambda: dict(DEFAULT_FORMATS))
+    namespaces: bool = False
+    malformed_rate: float = 0.0
+
+
+@dataclass
+class GeneratedDocument:
+    """One generated document and its expected extraction result.
+
+    Attributes:
+        content: Raw XML bytes
+        doc_numbers: Expected ``extract_doc_numbers`` output, or None if malformed
+        malformation: Kind of defect introduced, if any
+    """
+
+    content: bytes
+    doc_numbers: list[str] | None
+    malformation: str | None = None
+
+
+def parse_size(value: str) -> int:
+    """Parse a size such as ``512``, ``10KB`` or ``1.5MB`` into bytes."""
+    value = value.strip().upper()
+    for unit in sorted(_UNITS, key=len, reverse=True):
+        if value.endswith(unit):
+            return int(float(value[: -len(unit)]) * _UNITS[unit])
+    return int(value)
+
+
+def _paragraphs(rng: random.Random, count: int = 64) -> list[bytes]:
+    """Build a pool of filler paragraphs to draw from."""
+    return [
+        b"<p>" + " ".join(rng.choices(_WORDS, k=rng.randint(40, 120))).encode() + b".</p>\n"
+        for _ in range(count)
+    ]
+
+
+def _document_id(rng: random.Random, spec: CorpusSpec, namespaced: bool) -> tuple[bytes, str, int]:
+    """Return (element bytes, doc-number, priority) for one document-id."""
+    fmt = rng.choices(list(spec.formats), weights=list(spec.formats.values()))[0]
+    doc_number = f"{rng.choice(('US', 'EP', 'JP', 'WO'))}{rng.randrange(10**9):09d}"
+    attrs = b"" if fmt is None else f' format="{fmt}"'.encode()
+    if namespaced:
+        attrs += b' xlink:type="simple"'
+    element = (
+        b"<document-id" + attrs + b"><country>" + doc_number[:2].encode() + b"</country>"
+        b"<doc-number>" + doc_number.encode() + b"</doc-number>"
+        b"<kind>A1</kind><date>20" + f"{rng.randrange(100):02d}0101".encode() + b"</date>"
+        b"</document-id>\n"
+    )
+    return element, doc_number, _PRIORITY.get(fmt, 3)
+
+
+def iter_document(
+    spec: CorpusSpec, rng: random.Random, found: list[tuple[str, int, int]] | None = None
+) -> Iterator[bytes]:
+    """Yield the bytes of one well-formed document in pieces.
+
+    Pieces are small, so arbitrarily large documents can be written without
+    holding them in memory.
+
+    Args:
+        spec: Shape of the document
+        rng: Random source; consumed deterministically
+        found: If given, (doc_number, priority, position) is appended per document-id
+
+    Yields:
+        Consecutive pieces of the document
+    """
+    written = 0
+
+    def emit(piece: bytes) -> bytes:
+        nonlocal written
+        written += len(piece)
+        return piece
+
+    ucid = f"US-{rng.randrange(10**7):07d}-A1"
+    yield emit(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+    yield emit(
+        f'<patent-document ucid="{ucid}" lang="EN" country="US" kind="A1"'.encode()
+        + (NAMESPACES if spec.namespaces else b"")
+        + b">\n<bibliographic-data>\n"
+    )
+
+    # Three document-ids per reference, like publication/application/priority blocks
+    for position in range(spec.document_ids):
+        if position % 3 == 0:
+            if position:
+                yield emit(b"</application-reference>\n")
+            yield emit(f'<application-reference ucid="{ucid}">\n'.encode())
+        element, doc_number, priority = _document_id(rng, spec, spec.namespaces)
+        if found is not None:
+            found.append((doc_number, priority, position))
+        yield emit(element)
+    if spec.document_ids:
+        yield emit(b"</application-reference>\n")
+
+    yield emit(b'</bibliographic-data>\n<abstract lang="EN">\n')
+    paragraphs = _paragraphs(rng)
+    yield emit(rng.choice(paragraphs))
+    yield emit(b'</abstract>\n<description lang="EN">\n')
+
+    footer = b"</description>\n</patent-document>\n"
+    math = b"<m:math><m:mi>x</m:mi><m:mo>=</m:mo><m:mn>1</m:mn></m:math>\n"
+    while written + len(footer) < spec.size:
+        yield emit(rng.choice(paragraphs))
+        if spec.namespaces:
+            yield emit(math)
+    yield emit(footer)
+
+
+def _malform(content: bytes, kind: str, rng: random.Random) -> bytes:
+    """Introduce one defect of the given kind."""
+    if kind == "unclosed-tag":
+        return content.replace(b"</bibliographic-data>", b"", 1)
+    if kind == "invalid-char":
+        cut = rng.randrange(len(content) // 2, len(content))
+        return content[:cut] + b"\x01" + content[cut:]
+    return content[: rng.randrange(len(content) // 4, len(content) * 3 // 4)]
+
+
+def generate_document(spec: CorpusSpec, seed: int = 0) -> GeneratedDocument:
+    """Generate one document in memory.
+
+    Args:
+        spec: Shape of the document
+        seed: Random seed; the same seed always gives the same bytes
+
+    Returns:
+        The document and its expected doc-numbers
+    """
+    rng = random.Random(seed)
+    found: list[tuple[str, int, int]] = []
+    content = b"".join(iter_document(spec, rng, found))
+
+    if rng.random() < spec.malformed_rate:
+        kind = rng.choice(MALFORMATIONS)
+        return GeneratedDocument(_malform(content, kind, rng), None, kind)
+
+    found.sort(key=lambda item: (item[1], item[2]))
+    return GeneratedDocument(content, [doc_number for doc_number, _, _ in found])
+
+
+def write_document(output: BinaryIO, spec: CorpusSpec, seed: int = 0) -> int:
+    """Stream one well-formed document to ``output`` without buffering it.
+
+    Use this for documents too large to build in memory; malformation is
+    not applied.
+
+    Returns:
+        Number of bytes written
+    """
+    written = 0
+    for piece in iter_document(spec, random.Random(seed)):
+        output.write(piece)
+        written += len(piece)
+    return written
+
+
+def write_corpus(directory: str | Path, count: int, spec: CorpusSpec, seed: int = 0) -> list[Path]:
+    """Write ``count`` documents as ``doc-NNNNNN.xml`` files.
+
+    Document ``i`` is ``generate_document(spec, seed + i)``. Without
+    malformation, documents are streamed so any size can be written.
+
+    Returns:
+        Paths of the written files, in order
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = directory / f"doc-{index:06d}.xml"
+        if spec.malformed_rate:
+            path.write_bytes(generate_document(spec, seed + index).content)
+        else:
+            with open(path, "wb") as output:
+                write_document(output, spec, seed + index)
+        paths.append(path)
+    return paths
+
+
+def write_dump(path: str | Path, count: int, spec: CorpusSpec, seed: int = 0) -> int:
+    """Write ``count`` documents concatenated into one dump file.
+
+    Returns:
+        Number of bytes written
+    """
+    written = 0
+    with open(path, "wb") as output:
+        for index in range(count):
+            written += output.write(generate_document(spec, seed + index).content)
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="Output directory (or file with --dump)")
+    parser.add_argument("--count", type=int, default=100, help="Number of documents")
+    parser.add_argument("--size", type=parse_size, default="10KB", help="Size of each document")
+    parser.add_argument("--document-ids", type=int, default=8, help="document-ids per document")
+    parser.add_argument("--namespaces", action="store_true", help="Add namespaced markup")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--dump", action="store_true", help="Write one concatenated file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    spec = replace(
+        CorpusSpec(),
+        size=args.size,
+        document_ids=args.document_ids,
+        namespaces=args.namespaces,
+        malformed_rate=args.malformed_rate,
+    )
+    if args.dump:
+        write_dump(args.output, args.count, spec, args.seed)
+    else:
+        write_corpus(args.output, args.count, spec, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Load test: small-document latency on /extract while large documents are in flight.
+
+Runs the ASGI app in-process and keeps a steady stream of small uploads and
+/health probes going for as long as a few concurrent near-limit uploads are
+in flight, then reports latency percentiles for each kind of request.
+
+Usage:
+    python benchmarks/load_extract.py [--large N] [--large-mb MB]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from api.main import app  # noqa: E402
+
+SMALL_XML = (ROOT / "tests" / "fixtures" / "01_basic_sample" / "input.xml").read_bytes()
+
+
+def make_large_xml(size_mb: float) -> bytes:
+    """Build a document of roughly ``size_mb`` megabytes."""
+    entry = b'<document-id format="epo"><doc-number>123456789</doc-number></document-id>'
+    count = int(size_mb * 1024 * 1024) // len(entry)
+    return b"<root>" + entry * count + b"</root>"
+
+
+async def timed(
+    client: httpx.AsyncClient, method: str, url: str, start: float | None = None, **kwargs
+) -> float:
+    """Issue one request and return its latency in milliseconds.
+
+    ``start`` is the time the request was scheduled for; measuring from it
+    instead of from the actual send avoids hiding event-loop stalls.
+    """
+    start = time.perf_counter() if start is None else start
+    response = await client.request(method, url, **kwargs)
+    if response.status_code == 503:
+        # Shed by the extraction pool; counted separately from latencies
+        return float("nan")
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+async def open_loop(done: asyncio.Event, interval: float, request) -> list[float]:
+    """Schedule ``request(start)`` every ``interval`` seconds until ``done`` is set."""
+    tasks = []
+    start = time.perf_counter()
+    while not done.is_set():
+        scheduled = start + len(tasks) * interval
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        tasks.append(asyncio.create_task(request(scheduled)))
+    return list(await asyncio.gather(*tasks))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name: str, latencies: list[float]) -> None:
+    served = [value for value in latencies if value == value]
+    print(
+        f"{name:<8} n={len(served):<5} p50={statistics.median(served):8.2f}ms "
+        f"p99={percentile(served, 99):8.2f}ms max={max(served):8.2f}ms "
+        f"rejected={len(latencies) - len(served)}"
+    )
+
+
+async def run(large: int, large_mb: float) -> None:
+    large_xml = make_large_xml(large_mb)
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        def small_request(start: float):
+            files = {"file": ("small.xml", SMALL_XML, "text/xml")}
+            return timed(client, "POST", "/extract", start, files=files)
+
+        def health_request(start: float):
+            return timed(client, "GET", "/health", start)
+
+        async def large_uploads() -> list[float]:
+            files = {"file": ("large.xml", large_xml, "text/xml")}
+            latencies = await asyncio.gather(
+                *(timed(client, "POST", "/extract", files=files) for _ in range(large))
+            )
+            done.set()
+            return latencies
+
+        small_lat, health_lat, large_lat = await asyncio.gather(
+            open_loop(done, 0.005, small_request),
+            open_loop(done, 0.02, health_request),
+            large_uploads(),
+        )
+
+    report("small", small_lat)
+    report("health", health_lat)
+    report("large", large_lat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--large", type=int, default=4, help="Concurrent large uploads")
+    parser.add_argument("--large-mb", type=float, default=9.5, help="Size of each large upload")
+    args = parser.parse_args()
+    asyncio.run(run(args.large, args.large_mb))
+
+
+if __name__ == "__main__":
+    main()
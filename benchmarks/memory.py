@@ -0,0 +1,75 @@
+"""Peak resident memory measurement for benchmarks.
+
+On Linux the peak (``VmHWM``) can be reset between benchmarks by writing to
+``/proc/self/clear_refs``; elsewhere the process-lifetime peak is reported.
+"""
+
+import resource
+import subprocess
+import sys
+
+_STATUS = "/proc/self/status"
+
+
+def reset_peak_rss() -> None:
+    """Reset this process's peak RSS to its current RSS, where supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process in MB since the last reset."""
+    try:
+        with open(_STATUS) as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return _maxrss_mb(resource.getrusage(resource.RUSAGE_SELF))
+
+
+def _maxrss_mb(usage: resource.struct_rusage) -> float:
+    """Convert ``ru_maxrss`` (KB on Linux, bytes on macOS) to MB."""
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+# Runs a script and reports its own peak RSS on stderr when it exits
+_WRAPPER = """
+import atexit, runpy, sys
+from benchmarks.memory import PEAK_MARKER, peak_rss_mb
+atexit.register(lambda: sys.__stderr__.write(f"\\n{PEAK_MARKER}{peak_rss_mb()}\\n"))
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+PEAK_MARKER = "peak-rss-mb="
+
+
+def run_script(script: str, args: list[str], cwd: str) -> float:
+    """Run a Python script in a fresh interpreter and return its peak RSS in MB.
+
+    The child measures itself: ``wait4``/``RUSAGE_CHILDREN`` would include
+    the memory of this (forking) process on Linux. Pool workers started by
+    the script are not included. Output is discarded.
+
+    Args:
+        script: Path of the script
+        args: Command-line arguments for the script
+        cwd: Working directory; must contain the ``benchmarks`` package
+
+    Raises:
+        subprocess.CalledProcessError: If the script exits non-zero
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _WRAPPER, script, *args],
+        cwd=cwd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    return float(result.stderr.rpartition(PEAK_MARKER)[2])
@@ -0,0 +1,30 @@
+"""Benchmarks for the /extract endpoint through an in-process ASGI client."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.config import settings
+from api.dependencies import get_result_cache
+from api.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Measure extraction, not cache hits on repeated uploads
+    app.dependency_overrides[get_result_cache] = lambda: None
+    with TestClient(app) as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+def test_extract_endpoint(measure, documents, client):
+    """Multipart upload, extraction on the worker pool and JSON response."""
+    if len(documents[0]) > settings.max_file_size:
+        pytest.skip("document larger than MAX_FILE_SIZE")
+
+    def upload_all():
+        for document in documents:
+            response = client.post("/extract", files={"file": ("doc.xml", document, "text/xml")})
+            response.raise_for_status()
+
+    measure(upload_all, docs=len(documents), nbytes=sum(len(d) for d in documents))
@@ -0,0 +1,51 @@
+"""Benchmarks for the command line, run as a subprocess.
+
+Timings include interpreter start-up and imports, which dominate for small
+inputs. Peak RSS is that of the main CLI process.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.memory import run_script
+
+ROOT = Path(__file__).resolve().parent.parent
+MAIN = str(ROOT / "main.py")
+
+
+@pytest.fixture(scope="module")
+def corpus_dir(tmp_path_factory, documents) -> Path:
+    """The session documents written out as one file each."""
+    directory = tmp_path_factory.mktemp("corpus")
+    for index, document in enumerate(documents):
+        (directory / f"doc-{index:06d}.xml").write_bytes(document)
+    return directory
+
+
+def run_cli(args: list[str], peaks: list[float]) -> None:
+    peaks.append(run_script(MAIN, args, cwd=str(ROOT)))
+
+
+def test_cli_single_file(measure, documents, corpus_dir):
+    """One process per file, as a shell loop would run it."""
+    path = str(corpus_dir / "doc-000000.xml")
+    peaks: list[float] = []
+    measure(
+        lambda: run_cli([path], peaks),
+        docs=1,
+        nbytes=len(documents[0]),
+        peak_rss=lambda: max(peaks),
+    )
+
+
+@pytest.mark.parametrize("workers", [["--workers", "1"], []], ids=["serial", "parallel"])
+def test_cli_batch(measure, documents, corpus_dir, workers):
+    """Batch mode over the whole corpus directory, inline and on all CPUs."""
+    peaks: list[float] = []
+    measure(
+        lambda: run_cli(["batch", str(corpus_dir), *workers], peaks),
+        docs=len(documents),
+        nbytes=sum(len(document) for document in documents),
+        peak_rss=lambda: max(peaks),
+    )
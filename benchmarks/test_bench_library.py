@@ -0,0 +1,75 @@
+"""Benchmarks for parse_xml and the extraction functions."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from xml_extractor import Extractor, extract_doc_numbers, extract_doc_numbers_streaming
+from xml_extractor.manifest import content_hash
+from xml_extractor.mapping import read_file
+from xml_extractor.parser import parse_xml
+
+
+def total_bytes(documents: list[bytes]) -> int:
+    return sum(len(document) for document in documents)
+
+
+def test_parse_xml(measure, documents):
+    """Tree parsing alone."""
+    measure(
+        lambda: [parse_xml(document) for document in documents],
+        docs=len(documents),
+        nbytes=total_bytes(documents),
+    )
+
+
+def test_extract_doc_numbers(measure, documents):
+    """Tree-based extraction, including priority ordering."""
+    measure(
+        lambda: [extract_doc_numbers(document) for document in documents],
+        docs=len(documents),
+        nbytes=total_bytes(documents),
+    )
+
+
+def test_extract_doc_numbers_fast_path(measure, documents):
+    """Byte-level scanner, falling back to the tree for documents it cannot read."""
+    extractor = Extractor(fast_path=True)
+    measure(
+        lambda: [extractor.extract_doc_numbers(document) for document in documents],
+        docs=len(documents),
+        nbytes=total_bytes(documents),
+    )
+
+
+def test_extract_doc_numbers_streaming(measure, documents):
+    """Streaming extraction."""
+    measure(
+        lambda: [extract_doc_numbers_streaming(document) for document in documents],
+        docs=len(documents),
+        nbytes=total_bytes(documents),
+    )
+
+
+@pytest.fixture(scope="module")
+def document_files(tmp_path_factory, documents) -> list[Path]:
+    """The session documents written out as one file each."""
+    directory = tmp_path_factory.mktemp("files")
+    paths = [directory / f"doc-{index:06d}.xml" for index in range(len(documents))]
+    for path, document in zip(paths, documents, strict=True):
+        path.write_bytes(document)
+    return paths
+
+
+@pytest.mark.parametrize("threshold", [sys.maxsize, 0], ids=["read", "mapped"])
+def test_read_hash_extract(measure, documents, document_files, threshold):
+    """Hash and extract files as batch --cache or --resume does: read whole, or mapped."""
+
+    def run():
+        for path in document_files:
+            with read_file(path, threshold) as content:
+                content_hash(content)
+                extract_doc_numbers(content)
+
+    measure(run, docs=len(documents), nbytes=total_bytes(documents))
@@ -0,0 +1,37 @@
+"""Benchmarks for batch extraction from gs:// inputs against a local emulator.
+
+Each response from the fake GCS server is delayed by ``LATENCY`` seconds to
+stand in for a remote store, so the serial case shows the cost of waiting
+on every download and the prefetched cases show how much of it overlaps
+with parsing.
+"""
+
+import pytest
+
+from tests.fake_gcs import FakeGCS
+from xml_extractor.batch import run_batch
+from xml_extractor.storage import list_uris, prefetch
+
+LATENCY = 0.005
+
+
+@pytest.fixture
+def gcs(monkeypatch, documents):
+    """Emulator holding the session documents under ``corpus/``."""
+    objects = {f"corpus/doc-{index:06d}.xml": doc for index, doc in enumerate(documents)}
+    with FakeGCS({"bench": objects}, latency=LATENCY) as fake:
+        monkeypatch.setenv("STORAGE_EMULATOR_HOST", fake.endpoint)
+        yield fake
+
+
+@pytest.mark.parametrize("concurrency", [1, 8, 32])
+def test_gcs_batch(measure, benchmark, documents, gcs, concurrency):
+    """List, download and extract every object inline, with N downloads in flight."""
+    uris = list(list_uris("gs://bench/corpus/"))
+
+    def run():
+        for record in run_batch(prefetch(uris, concurrency=concurrency), workers=1):
+            assert record["error"] is None
+
+    measure(run, docs=len(documents), nbytes=sum(len(document) for document in documents))
+    benchmark.extra_info.update(max_in_flight=gcs.max_in_flight, connections=gcs.connections)
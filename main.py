@@ -1,39 +1,589 @@
-"""CLI entry point for XML doc-number extraction."""
+"""CLI entry point for XML doc-number extraction.
 
+Only argument parsing is imported up front; lxml and the batch machinery are
+imported by the commands that use them, so a run that hands its document to
+the extraction daemon (``--socket``) starts in a few milliseconds.
+"""
+
+import argparse
+import io
+import json
+import os
+import signal
+import sqlite3
 import sys
+import time
+from functools import partial
 from pathlib import Path
+from typing import BinaryIO
+
+from xml_extractor.exceptions import ExtractionError, StorageError
+from xml_extractor.priority import DEFAULT_SPEC, PriorityPolicy, parse_policy
+from xml_extractor.sinks import SINK_KINDS, Sink, open_sink, record_rows
+
+
+def policy_argument(spec: str) -> PriorityPolicy:
+    """Compile a --priority-policy value, reporting errors as usage errors."""
+    try:
+        return parse_policy(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def add_policy_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the option that selects the doc-number ordering."""
+    parser.add_argument(
+        "--priority-policy",
+        type=policy_argument,
+        default=os.environ.get("PRIORITY_POLICY") or DEFAULT_SPEC,
+        metavar="SPEC",
+        help=(
+            "Doc-number order as comma-separated levels, e.g. 'docdb|original,epo,other,none' "
+            "or 'load-source=docdb+format=epo,other,none' "
+            f"(default: $PRIORITY_POLICY or {DEFAULT_SPEC!r})"
+        ),
+    )
+
+
+def add_sink_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options that select and configure an output sink."""
+    group = parser.add_argument_group(
+        "output sinks", "Write (source, priority, position, doc_number, format) rows"
+    )
+    group.add_argument("--sink", choices=SINK_KINDS, help="Row output format")
+    group.add_argument("--gzip", action="store_true", help="gzip-compress CSV/NDJSON output")
+    group.add_argument("--shard-records", type=int, help="Rows per output shard")
+    group.add_argument("--shard-bytes", type=int, help="Approximate bytes per output shard")
+
+
+def check_sink_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Reject sink option combinations that cannot work."""
+    if args.sink is None:
+        if args.gzip or args.shard_records or args.shard_bytes:
+            parser.error("--gzip, --shard-records and --shard-bytes require --sink")
+        return
+    if args.cache:
+        parser.error("--sink cannot be combined with --cache")
+    if args.sink == "parquet" and not args.output:
+        parser.error("--sink parquet requires --output")
+    if (args.shard_records or args.shard_bytes) and not args.output:
+        parser.error("sharding requires --output")
+
+
+def open_output_sink(args: argparse.Namespace, append: bool = False):
+    """Open the sink selected on the command line."""
+    return open_sink(
+        args.sink,
+        args.output,
+        compress=args.gzip,
+        max_records=args.shard_records,
+        max_bytes=args.shard_bytes,
+        append=append,
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="xml-extractor",
+        description="Extract doc-numbers from patent XML in priority order",
+    )
+    parser.add_argument("file", nargs="?", help="XML file to read (defaults to stdin)")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Use streaming extraction (flat memory for very large documents)",
+    )
+    parser.add_argument("--cache", help="SQLite result cache file shared between runs")
+    parser.add_argument(
+        "--records",
+        action="store_true",
+        help="Print one JSON record per document-id (format, country, kind, date, ...)",
+    )
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    parser.add_argument(
+        "--socket",
+        default=os.environ.get("XML_EXTRACTOR_SOCKET") or None,
+        help=(
+            "Send the document to the daemon started by 'xml-extractor serve' on this socket, "
+            "extracting in-process if none is running (default: $XML_EXTRACTOR_SOCKET)"
+        ),
+    )
+    add_policy_argument(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.records and (args.cache or args.sink):
+        parser.error("--records cannot be combined with --cache or --sink")
+    if args.socket and (args.cache or args.sink):
+        parser.error("--socket cannot be combined with --cache or --sink; see 'serve --cache'")
+    check_sink_arguments(parser, args)
+    return args
+
+
+def parse_batch_args(argv: list[str]) -> argparse.Namespace:
+    """Parse arguments for the batch subcommand."""
+    from xml_extractor.dedup import DEFAULT_MEMORY_BUDGET
+    from xml_extractor.storage import DEFAULT_CONCURRENCY
+
+    parser = argparse.ArgumentParser(
+        prog="xml-extractor batch",
+        description="Extract doc-numbers from many files in parallel, one JSON line per file",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help=(
+            "Directories, globs, files, @filelist files containing one path per line, "
+            "or gs://bucket/prefix and file:///dir/prefix URIs"
+        ),
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: CPU count)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=64, help="Files per worker task")
+    parser.add_argument(
+        "--pattern", default="*.xml", help="Filename pattern when walking directories"
+    )
+    parser.add_argument(
+        "--output", help="Write JSON lines (or --sink rows) to this file instead of stdout"
+    )
+    parser.add_argument(
+        "--stream", action="store_true", help="Use streaming extraction for each file"
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Treat inputs as concatenated XML dumps and extract each document separately",
+    )
+    parser.add_argument("--cache", help="SQLite result cache file shared by all workers")
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Concurrent downloads for URI inputs (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Checkpoint progress in a manifest; when it exists, skip inputs it records "
+            "as finished and unchanged, and append to --output"
+        ),
+    )
+    parser.add_argument(
+        "--manifest", help="Checkpoint manifest file (default with --resume: OUTPUT.manifest)"
+    )
+    parser.add_argument(
+        "--index",
+        help=(
+            "Add each input's doc-numbers to this reverse index file for 'xml-extractor lookup' "
+            "and GET /lookup, replacing what it recorded for the input before"
+        ),
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help=(
+            "Keep each doc-number only in the first input that mentions it; JSON records "
+            "map the dropped ones to that input under 'duplicates'"
+        ),
+    )
+    parser.add_argument(
+        "--dedup-memory",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+        help=(
+            "Memory budget of --dedup in MiB; beyond it seen doc-numbers spill to disk "
+            f"(default: {DEFAULT_MEMORY_BUDGET // (1024 * 1024)})"
+        ),
+    )
+    add_policy_argument(parser)
+    add_sink_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.prefetch < 1:
+        parser.error("--prefetch must be at least 1")
+    if args.index and args.cache:
+        parser.error("--index cannot be combined with --cache")
+    if args.dedup_memory < 1:
+        parser.error("--dedup-memory must be at least 1")
+    check_sink_arguments(parser, args)
+    if args.resume or args.manifest:
+        if not args.output:
+            parser.error("--resume and --manifest require --output")
+        if args.gzip or args.shard_records or args.shard_bytes or args.sink == "parquet":
+            parser.error(
+                "--resume and --manifest need uncompressed, unsharded JSON-lines, "
+                "CSV or NDJSON output"
+            )
+        args.manifest = args.manifest or f"{args.output}.manifest"
+    return args
+
+
+def sync_output(out) -> int:
+    """Flush and fsync batch output; returns its size for a manifest checkpoint."""
+    if isinstance(out, Sink):
+        return out.sync()
+    out.flush()
+    os.fsync(out.fileno())
+    return out.tell()
+
+
+def doc_numbers_record(record: dict) -> dict:
+    """Turn a batch record with rows into the record of a run without ``--sink``."""
+    plain = {
+        "path": record["path"],
+        # Rows are in priority order, like doc-numbers
+        "doc_numbers": [row[3] for row in record["rows"]],
+        "error": record["error"],
+        "message": record["message"],
+        "cached": False,
+        "elapsed_ms": record["elapsed_ms"],
+    }
+    if "hash" in record:
+        plain["hash"] = record["hash"]
+    if "duplicates" in record:
+        plain["duplicates"] = record["duplicates"]
+    return plain
+
+
+def drop_duplicates(record: dict, dedup) -> dict:
+    """Remove doc-numbers an earlier input mentioned from a batch record.
+
+    The record gets a ``duplicates`` map from each removed doc-number to the
+    input it was first seen in; the rest keep their priority order.
+    """
+    record["duplicates"] = {}
+    if record["error"] is not None:
+        return record
+    if "rows" in record:
+        duplicates = dedup.add(record["path"], (row[3] for row in record["rows"]))
+        record["rows"] = [row for row in record["rows"] if row[3] not in duplicates]
+    else:
+        duplicates = dedup.add(record["path"], record["doc_numbers"])
+        record["doc_numbers"] = [n for n in record["doc_numbers"] if n not in duplicates]
+    record["duplicates"] = duplicates
+    return record
+
+
+def batch_main(argv: list[str]):
+    """Batch CLI function: one JSON record per input file, or rows to a sink."""
+    from xml_extractor.batch import BatchOptions, expand_inputs, iter_split_documents, run_batch
+    from xml_extractor.dedup import Deduplicator
+    from xml_extractor.index import DocNumberIndex
+    from xml_extractor.manifest import Manifest, rewind_output
+    from xml_extractor.storage import prefetch
+
+    args = parse_batch_args(argv)
+
+    manifest = None
+    if args.manifest:
+        manifest = Manifest(args.manifest, resume=args.resume)
+        if args.resume:
+            try:
+                # Output written after the last checkpoint is redone
+                rewind_output(args.output, manifest.end)
+            except ValueError as e:
+                manifest.close()
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+
+    if args.sink:
+        # Per-file errors go to stderr; rows go to the sink
+        out = open_output_sink(args, append=args.resume)
+    elif args.output:
+        out = open(args.output, "a" if args.resume else "w", encoding="utf-8")
+    else:
+        out = sys.stdout
+    index = DocNumberIndex(args.index) if args.index else None
+    dedup = None
+    if args.dedup:
+        # With a manifest the seen doc-numbers are checkpointed alongside it
+        dedup = Deduplicator(
+            f"{args.manifest}.dedup" if manifest is not None else None,
+            memory_budget=args.dedup_memory * 1024 * 1024,
+            reset=not args.resume,
+        )
+    start = time.perf_counter()
+    total = errors = 0
+
+    try:
+        paths = expand_inputs(args.inputs, pattern=args.pattern)
+        # Download objects named by URIs in the background while workers parse
+        paths = prefetch(paths, concurrency=args.prefetch)
+        if args.split:
+            paths = iter_split_documents(paths)
+        if manifest is not None:
+            paths = manifest.filter(paths)
+        options = BatchOptions(
+            stream=args.stream,
+            cache_path=args.cache,
+            # The index is built from rows
+            rows=args.sink is not None or index is not None,
+            checksum=manifest is not None,
+            policy=args.priority_policy,
+        )
+        for record in run_batch(
+            paths, workers=args.workers, chunk_size=args.chunk_size, options=options
+        ):
+            total += 1
+            if record["error"] is not None:
+                errors += 1
+                if args.sink:
+                    print(
+                        f"{record['path']}: {record['error']}: {record['message']}", file=sys.stderr
+                    )
+            elif index is not None:
+                # A failed input keeps the postings of its last good run
+                index.add(record["path"], record["rows"])
+            if dedup is not None:
+                # The index above still lists every input mentioning a doc-number
+                record = drop_duplicates(record, dedup)
+            if args.sink:
+                out.write_rows(record["rows"])
+            elif index is not None:
+                out.write(json.dumps(doc_numbers_record(record)) + "\n")
+            else:
+                out.write(json.dumps(record) + "\n")
+            if manifest is not None:
+                manifest.complete(record)
+                if manifest.due:
+                    if index is not None:
+                        index.flush()
+                    if dedup is not None:
+                        dedup.checkpoint()
+                    manifest.commit(sync_output(out))
+        if index is not None:
+            index.flush()
+        if dedup is not None:
+            dedup.checkpoint()
+        if manifest is not None:
+            manifest.commit(sync_output(out))
+    except (OSError, StorageError) as e:
+        print(f"Error reading inputs: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if manifest is not None:
+            manifest.close()
+        if index is not None:
+            index.close()
+        if dedup is not None:
+            dedup.close()
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else 0.0
+    skipped = f", {manifest.skipped} skipped" if manifest is not None else ""
+    print(
+        f"Processed {total} documents ({errors} errors{skipped}) in {elapsed:.2f}s "
+        f"({rate:.0f} docs/s)",
+        file=sys.stderr,
+    )
+    if dedup is not None:
+        counts = dedup.stats()
+        print(
+            f"Dropped {counts['duplicates']} repeated doc-numbers "
+            f"({counts['distinct']} distinct, {counts['spills']} spills to disk)",
+            file=sys.stderr,
+        )
+
+
+def serve_main(argv: list[str]):
+    """Serve CLI function: run the extraction daemon until interrupted."""
+    from xml_extractor.daemon import ExtractionServer
+
+    parser = argparse.ArgumentParser(
+        prog="xml-extractor serve",
+        description=(
+            "Keep warm parsers in a daemon answering 'xml-extractor --socket PATH' "
+            "over a Unix domain socket"
+        ),
+    )
+    parser.add_argument("--socket", required=True, help="Path of the socket to listen on")
+    parser.add_argument("--cache", help="SQLite result cache file shared with other runs")
+    add_policy_argument(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        server = ExtractionServer(
+            args.socket, policy=args.priority_policy.fingerprint, cache_path=args.cache
+        )
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    # Stop on SIGTERM as on Ctrl-C, removing the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Listening on {args.socket}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def lookup_main(argv: list[str]):
+    """Lookup CLI function: one JSON line per source mentioning each doc-number."""
+    from xml_extractor.index import DEFAULT_LIMIT, DocNumberIndex
+
+    parser = argparse.ArgumentParser(
+        prog="xml-extractor lookup",
+        description="List the sources that mention doc-numbers, from an index built by batch",
+    )
+    parser.add_argument("doc_numbers", nargs="+", metavar="DOC_NUMBER")
+    parser.add_argument(
+        "--index",
+        default=os.environ.get("INDEX_PATH") or None,
+        help="Index file written by 'batch --index' (default: $INDEX_PATH)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=DEFAULT_LIMIT,
+        help=f"Most sources listed per doc-number (default: {DEFAULT_LIMIT})",
+    )
+    args = parser.parse_args(argv)
+    if not args.index:
+        parser.error("--index or INDEX_PATH is required")
+
+    try:
+        index = DocNumberIndex(args.index, readonly=True)
+    except sqlite3.Error as e:
+        print(f"Error: cannot open index {args.index}: {e}", file=sys.stderr)
+        sys.exit(1)
+    found = False
+    with index:
+        for doc_number in args.doc_numbers:
+            for entry in index.lookup(doc_number, args.limit):
+                found = True
+                sys.stdout.write(json.dumps({"doc_number": doc_number, **entry._asdict()}) + "\n")
+    # Like grep: 1 when nothing was found
+    if not found:
+        sys.exit(1)
+
+
+COMMANDS = {
+    "batch": batch_main,
+    "lookup": lookup_main,
+    "serve": serve_main,
+}
 
-from xml_extractor.exceptions import ExtractionError
-from xml_extractor.extractor import extract_doc_numbers
 
+def extract_remote(args: argparse.Namespace, source: Path | io.BytesIO) -> list[str] | None:
+    """Have the daemon on ``args.socket`` extract the document.
 
-def main():
+    Returns:
+        Output lines, or None if no daemon answers on the socket
+
+    Raises:
+        ExtractionError: If the daemon could not extract the document
+        RuntimeError: If the daemon failed unexpectedly
+    """
+    from xml_extractor.daemon import request
+
+    fields = {
+        "policy": args.priority_policy.fingerprint,
+        "records": args.records,
+        "stream": args.stream,
+    }
+    body = None
+    if isinstance(source, Path):
+        fields["path"] = str(source.resolve())
+    else:
+        body = source.getvalue()
+    try:
+        response = request(args.socket, fields, body)
+    except OSError:
+        return None
+    if "error" in response:
+        error = ExtractionError if response["extraction"] else RuntimeError
+        raise error(response["message"])
+    if args.records:
+        return [json.dumps(record) for record in response["records"]]
+    return response["doc_numbers"]
+
+
+def extract_local(args: argparse.Namespace, source: Path | BinaryIO) -> list[str] | None:
+    """Extract the document in this process.
+
+    Returns:
+        Output lines, or None if rows were written to the ``--sink``
+    """
+    from xml_extractor.cache import ResultCache
+    from xml_extractor.extractor import extract_doc_numbers, extract_records
+    from xml_extractor.mapping import read_file
+    from xml_extractor.streaming import extract_doc_numbers_streaming, extract_records_streaming
+
+    policy = args.priority_policy
+    if args.records or args.sink:
+        extract_all = extract_records_streaming if args.stream else extract_records
+        records = extract_all(source, policy=policy)
+        if args.sink:
+            with open_output_sink(args) as sink:
+                sink.write_rows(record_rows(args.file or "-", records))
+            return None
+        return [json.dumps(record._asdict()) for record in records]
+
+    extract = partial(
+        extract_doc_numbers_streaming if args.stream else extract_doc_numbers,
+        policy=policy,
+    )
+    if args.cache:
+        cache = ResultCache(path=args.cache)
+        if not isinstance(source, Path):
+            lines, _ = cache.extract(source.read(), extract, policy.fingerprint)
+            return lines
+        # Large files are hashed and parsed from a mapping, not a copy
+        with read_file(source) as content:
+            lines, _ = cache.extract(content, extract, policy.fingerprint)
+        return lines
+    return extract(source)
+
+
+def main(argv: list[str] | None = None):
     """Main CLI function."""
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # Subcommands; anything else is the single-document mode
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    args = parse_args(argv)
+
     # Check for file argument
-    if len(sys.argv) > 1:
-        # Read from file
-        file_path = Path(sys.argv[1])
+    if args.file:
+        file_path = Path(args.file)
 
         if not file_path.exists():
             print(f"Error: File not found: {file_path}", file=sys.stderr)
             sys.exit(1)
 
-        try:
-            xml_content = file_path.read_text(encoding="utf-8")
-        except Exception as e:
-            print(f"Error reading file: {e}", file=sys.stderr)
-            sys.exit(1)
+        # Hand the path to lxml so it reads the raw bytes itself
+        source = file_path
     else:
-        # Read from stdin
-        xml_content = sys.stdin.read()
+        # Read raw bytes from stdin
+        source = sys.stdin.buffer
+
+    if args.socket and not isinstance(source, Path):
+        # Read stdin once: it is still needed if no daemon answers
+        source = io.BytesIO(source.read())
 
     # Extract doc-numbers
     try:
-        doc_numbers = extract_doc_numbers(xml_content)
+        lines = extract_remote(args, source) if args.socket else None
+        if lines is None:
+            lines = extract_local(args, source)
+        if lines is None:
+            # Rows went to the sink
+            return
 
-        # Output results (one per line)
-        for doc_num in doc_numbers:
-            print(doc_num)
+        # Output results (one per line), in a single buffered write
+        text = "".join(f"{line}\n" for line in lines)
+        if args.output:
+            Path(args.output).write_text(text, encoding="utf-8")
+        else:
+            sys.stdout.write(text)
 
     except ExtractionError as e:
         print(f"Extraction error: {e}", file=sys.stderr)
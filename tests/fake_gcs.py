@@ -0,0 +1,136 @@
+"""In-process fake of the GCS JSON API for storage tests and benchmarks.
+
+Serves object listing and media downloads for in-memory buckets over
+keep-alive HTTP/1.1. Upcoming requests can be made to fail, and a fixed
+latency can be added to each response to mimic a remote store.
+"""
+
+import json
+import socket
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+OBJECTS_PATH = "/storage/v1/b/"
+
+# Closes the connection without sending a response
+DROP = "drop"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for every client connection to arrive at once
+    request_queue_size = 128
+
+
+class FakeGCS:
+    """Fake GCS server, used as a context manager.
+
+    Args:
+        buckets: Objects by bucket name, then by object name
+        page_size: Names per listing page
+        latency: Seconds added to every response
+    """
+
+    def __init__(
+        self,
+        buckets: dict[str, dict[str, bytes]] | None = None,
+        page_size: int = 1000,
+        latency: float = 0.0,
+    ):
+        self.buckets = {bucket: dict(objects) for bucket, objects in (buckets or {}).items()}
+        self.page_size = page_size
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures: deque = deque()
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self.endpoint = ""
+
+    def fail(self, *outcomes: int | str) -> None:
+        """Answer the next requests with these HTTP statuses, or ``DROP`` them."""
+        with self._lock:
+            self._failures.extend(outcomes)
+
+    def __enter__(self) -> "FakeGCS":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    outcome = fake._failures.popleft() if fake._failures else None
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    if outcome == DROP:
+                        self.close_connection = True
+                    elif outcome is not None:
+                        self._send(outcome, b'{"error": {"message": "injected failure"}}')
+                    else:
+                        self._route()
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def _route(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                bucket, _, rest = parts.path.removeprefix(OBJECTS_PATH).partition("/o")
+                objects = fake.buckets.get(unquote(bucket))
+                if not parts.path.startswith(OBJECTS_PATH) or objects is None:
+                    self._send(404, b'{"error": {"message": "Not Found"}}')
+                elif not rest:
+                    self._list(objects, query)
+                else:
+                    content = objects.get(unquote(rest.removeprefix("/")))
+                    if content is None:
+                        self._send(404, b'{"error": {"message": "No such object"}}')
+                    else:
+                        self._send(200, content, "application/octet-stream")
+
+            def _list(self, objects, query):
+                prefix = query.get("prefix", [""])[0]
+                names = sorted(name for name in objects if name.startswith(prefix))
+                start = int(query.get("pageToken", ["0"])[0])
+                page = {"items": [{"name": name} for name in names[start : start + fake.page_size]]}
+                if start + fake.page_size < len(names):
+                    page["nextPageToken"] = str(start + fake.page_size)
+                self._send(200, json.dumps(page).encode())
+
+            def _send(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        self.endpoint = f"http://127.0.0.1:{self._server.server_port}"
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
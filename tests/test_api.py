@@ -1,11 +1,36 @@
 """Tests for the API endpoints."""
 
+import asyncio
+import dataclasses
+import gzip
+import io
+import json
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
-
+from prometheus_client.parser import text_string_to_metric_families
+
+import api.dependencies
+import api.main
+import api.routes
+from api.dependencies import (
+    get_doc_index,
+    get_extraction_pool,
+    get_job_manager,
+    get_result_cache,
+)
+from api.jobs import JobManager, MemoryJobStore
 from api.main import app
+from api.workers import ExtractionPool
+from tests.fake_gcs import FakeGCS
+from xml_extractor.cache import ResultCache
+from xml_extractor.extractor import extract_doc_numbers
+from xml_extractor.index import DocNumberIndex
 
 client = TestClient(app)
 
@@ -103,6 +128,38 @@ class TestExtractEndpoint:
         data = response.json()
         assert data["doc_numbers"] == ["111", "222"]
 
+    def test_extract_with_priority_policy(self):
+        """The policy query parameter wins over the X-Priority-Policy header."""
+        xml_content = """<root>
+          <document-id format="epo"><doc-number>111</doc-number></document-id>
+          <document-id><doc-number>333</doc-number></document-id>
+          <document-id format="patent-office"><doc-number>222</doc-number></document-id>
+        </root>"""
+        files = {"file": ("test.xml", xml_content, "text/xml")}
+
+        by_header = client.post(
+            "/extract", files=files, headers={"X-Priority-Policy": "none,patent-office"}
+        )
+        by_query = client.post(
+            "/extract",
+            files=files,
+            params={"policy": "patent-office|epo,none"},
+            headers={"X-Priority-Policy": "none"},
+        )
+
+        assert by_header.json()["doc_numbers"] == ["333", "222", "111"]
+        assert by_query.json()["doc_numbers"] == ["111", "222", "333"]
+
+    def test_extract_with_invalid_priority_policy(self):
+        response = client.post(
+            "/extract",
+            files={"file": ("test.xml", "<root/>", "text/xml")},
+            params={"policy": "lang=en"},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["message"] == "Invalid priority policy"
+
     def test_extract_with_empty_xml(self):
         """Test extraction with XML containing no document-ids."""
         xml_content = "<root></root>"
@@ -152,8 +209,8 @@ class TestExtractEndpoint:
 
     def test_extract_with_invalid_encoding(self):
         """Test that files with invalid encoding are rejected."""
-        # Create invalid UTF-8 bytes
-        invalid_bytes = b"\xff\xfe\xfd"
+        # Create invalid UTF-8 bytes inside an otherwise valid document
+        invalid_bytes = b"<root>\xff\xfe\xfd</root>"
 
         response = client.post("/extract", files={"file": ("test.xml", invalid_bytes, "text/xml")})
 
@@ -162,6 +219,18 @@ class TestExtractEndpoint:
         assert "error" in data
         assert "Encoding" in data["error"] or "decode" in data["message"].lower()
 
+    def test_extract_honours_declared_encoding(self):
+        """Test that the XML declaration's encoding is used to decode the upload."""
+        xml_content = (
+            '<?xml version="1.0" encoding="ISO-8859-1"?>'
+            "<root><document-id><doc-number>N\xba123</doc-number></document-id></root>"
+        ).encode("latin-1")
+
+        response = client.post("/extract", files={"file": ("test.xml", xml_content, "text/xml")})
+
+        assert response.status_code == 200
+        assert response.json()["doc_numbers"] == ["N\xba123"]
+
     def test_extract_with_large_file(self):
         """Test that files exceeding size limit are rejected."""
         # Create a file larger than 10MB
@@ -266,3 +335,716 @@ class TestErrorHandling:
 
         # Should NOT return 500 for valid request
         assert response.status_code != 500
+
+
+class TestExtractBatchEndpoint:
+    """Tests for the batch extract endpoint."""
+
+    XML = b"""<root>
+      <document-id format="patent-office"><doc-number>222</doc-number></document-id>
+      <document-id format="epo"><doc-number>111</doc-number></document-id>
+    </root>"""
+
+    def test_batch_of_files(self):
+        """Each uploaded file gets its own result keyed by filename."""
+        files = [
+            ("files", ("a.xml", self.XML, "text/xml")),
+            ("files", ("b.xml", b"<root></root>", "text/xml")),
+        ]
+
+        response = client.post("/extract/batch", files=files)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 2
+        assert data["error_count"] == 0
+        assert data["results"]["a.xml"]["doc_numbers"] == ["111", "222"]
+        assert data["results"]["b.xml"]["doc_numbers"] == []
+
+    def test_zip_archive(self):
+        """Zip members are extracted as separate documents."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("one.xml", self.XML)
+            zf.writestr("broken.xml", b"")
+
+        response = client.post(
+            "/extract/batch", files={"files": ("batch.zip", archive.getvalue(), "application/zip")}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["results"]["one.xml"]["doc_numbers"] == ["111", "222"]
+        assert data["results"]["broken.xml"]["error"] == "XMLParseError"
+        assert data["error_count"] == 1
+
+    def test_member_limit_returns_422(self, monkeypatch):
+        """Batches over the member limit are rejected."""
+        limited = dataclasses.replace(api.routes.settings, batch_max_members=1)
+        monkeypatch.setattr(api.routes, "settings", limited)
+        files = [
+            ("files", ("a.xml", self.XML, "text/xml")),
+            ("files", ("b.xml", self.XML, "text/xml")),
+        ]
+
+        response = client.post("/extract/batch", files=files)
+
+        assert response.status_code == 422
+        assert response.json()["message"] == "Batch limit exceeded"
+
+
+class TestCompressedInput:
+    """Tests for compressed uploads and gzip request bodies."""
+
+    XML = b'<root><document-id format="epo"><doc-number>111</doc-number></document-id></root>'
+
+    def test_gzip_upload(self):
+        """A compressed upload is detected from its content and decompressed."""
+        response = client.post(
+            "/extract",
+            files={"file": ("a.xml.gz", gzip.compress(self.XML), "application/gzip")},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["doc_numbers"] == ["111"]
+
+    def test_size_limit_applies_after_decompression(self, monkeypatch):
+        """An upload under the limit that inflates past it is rejected."""
+        monkeypatch.setattr(api.routes, "MAX_FILE_SIZE", 10_000)
+        bomb = gzip.compress(b"<root>" + b" " * 1_000_000 + b"</root>")
+
+        response = client.post(
+            "/extract", files={"file": ("bomb.xml.gz", bomb, "application/gzip")}
+        )
+
+        assert response.status_code == 422
+        assert response.json()["message"] == "File too large"
+
+    def test_corrupt_upload(self):
+        response = client.post(
+            "/extract",
+            files={"file": ("a.xml.gz", gzip.compress(self.XML)[:-8], "application/gzip")},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "CompressionError"
+
+    def test_gzip_content_encoding(self):
+        """A gzip-encoded multipart body is decoded before the form is parsed."""
+        body = (
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="a.xml"\r\n'
+            b"Content-Type: text/xml\r\n\r\n" + self.XML + b"\r\n--boundary--\r\n"
+        )
+
+        response = client.post(
+            "/extract",
+            content=gzip.compress(body),
+            headers={
+                "Content-Type": "multipart/form-data; boundary=boundary",
+                "Content-Encoding": "gzip",
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["doc_numbers"] == ["111"]
+
+    def test_batch_with_compressed_member(self):
+        files = [("files", ("a.xml.gz", gzip.compress(self.XML), "application/gzip"))]
+
+        response = client.post("/extract/batch", files=files)
+
+        assert response.json()["results"]["a.xml.gz"]["doc_numbers"] == ["111"]
+
+
+class TestNDJSONStreaming:
+    """Tests for NDJSON streaming responses."""
+
+    NDJSON = {"Accept": "application/x-ndjson"}
+
+    def test_extract_streams_groups_and_summary(self, monkeypatch):
+        """Doc-numbers arrive in groups, followed by a summary line."""
+        monkeypatch.setattr(api.routes, "NDJSON_GROUP_SIZE", 2)
+        xml_content = (
+            "<root>"
+            + "".join(f"<document-id><doc-number>{i}</doc-number></document-id>" for i in range(5))
+            + "</root>"
+        )
+
+        response = client.post(
+            "/extract", files={"file": ("test.xml", xml_content, "text/xml")}, headers=self.NDJSON
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line.get("doc_numbers") for line in lines[:-1]] == [["0", "1"], ["2", "3"], ["4"]]
+        assert lines[-1]["count"] == 5
+
+    def test_extract_streams_before_parsing_ends(self, monkeypatch):
+        """The first doc-numbers are sent while the document is still being parsed."""
+        first_line_sent = threading.Event()
+        waited = []
+
+        def groups(source, max_size, policy):
+            yield ["111"]
+            waited.append(first_line_sent.wait(5))
+            yield ["222"]
+
+        monkeypatch.setattr(api.routes, "iter_doc_numbers_streaming", groups)
+        body = (
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="a.xml"\r\n'
+            b"Content-Type: text/xml\r\n\r\n<root/>\r\n--boundary--\r\n"
+        )
+        sent = []
+
+        requests = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            # The client stays connected
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_line_sent.set()
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/extract",
+            "raw_path": b"/extract",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (b"content-type", b"multipart/form-data; boundary=boundary"),
+                (b"content-length", str(len(body)).encode()),
+                (b"accept", b"application/x-ndjson"),
+            ],
+        }
+        asyncio.run(app(scope, receive, send))
+
+        assert waited == [True]
+        assert sent[0]["status"] == 200
+        lines = [
+            json.loads(line)
+            for message in sent[1:]
+            for line in message.get("body", b"").splitlines()
+        ]
+        assert [line.get("doc_numbers") for line in lines[:-1]] == [["111"], ["222"]]
+        assert lines[-1]["count"] == 2
+
+    def test_extract_error_after_first_line(self):
+        """A failure once streaming has started ends the stream with an ErrorResponse line."""
+        xml_content = (
+            '<?xml version="1.0" encoding="UTF-8"?><root>'
+            '<document-id format="epo"><doc-number>1</doc-number></document-id>'
+            + "<p>"
+            + "x" * 200_000
+            + "</p>\xff</root>"
+        ).encode("latin-1")
+
+        response = client.post(
+            "/extract", files={"file": ("test.xml", xml_content, "text/xml")}, headers=self.NDJSON
+        )
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {"doc_numbers": ["1"]}
+        assert lines[-1]["error"] == "EncodingError"
+
+    def test_extract_error_uses_error_shape(self):
+        """Parse failures keep their status code and ErrorResponse body."""
+        response = client.post(
+            "/extract", files={"file": ("test.xml", "", "text/xml")}, headers=self.NDJSON
+        )
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "XMLParseError"
+
+    def test_batch_streams_one_line_per_document(self):
+        """Each document's result is a line; errors are inline ErrorResponses."""
+        files = [
+            (
+                "files",
+                (
+                    "a.xml",
+                    "<root><document-id><doc-number>1</doc-number></document-id></root>",
+                    "text/xml",
+                ),
+            ),
+            ("files", ("b.xml", "", "text/xml")),
+        ]
+
+        response = client.post("/extract/batch", files=files, headers=self.NDJSON)
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        results = {line["filename"]: line["result"] for line in lines}
+        assert results["a.xml"]["doc_numbers"] == ["1"]
+        assert results["b.xml"]["error"] == "XMLParseError"
+
+
+class TestResultCache:
+    """Tests for the content-hash result cache in the API."""
+
+    @pytest.fixture
+    def cache(self):
+        """A fresh cache for each test."""
+        cache = ResultCache(max_entries=10)
+        app.dependency_overrides[get_result_cache] = lambda: cache
+        yield cache
+        app.dependency_overrides.clear()
+
+    def test_repeated_document_is_served_from_cache(self, cache):
+        """The second upload of identical bytes is a cache hit."""
+        files = {
+            "file": (
+                "test.xml",
+                "<root><document-id><doc-number>1</doc-number>" "</document-id></root>",
+                "text/xml",
+            )
+        }
+
+        first = client.post("/extract", files=files).json()
+        second = client.post("/extract", files=files).json()
+
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["doc_numbers"] == first["doc_numbers"] == ["1"]
+
+    def test_errors_are_not_cached(self, cache):
+        """Failed extractions are retried every time."""
+        files = {"file": ("test.xml", "", "text/xml")}
+
+        assert client.post("/extract", files=files).status_code == 400
+        assert client.post("/extract", files=files).status_code == 400
+        assert cache.stats()["entries"] == 0
+
+    def test_policies_are_cached_separately(self, cache):
+        """A cached result is only reused for the policy it was ordered by."""
+        files = {
+            "file": (
+                "test.xml",
+                '<root><document-id format="epo"><doc-number>1</doc-number></document-id>'
+                "<document-id><doc-number>2</doc-number></document-id></root>",
+                "text/xml",
+            )
+        }
+
+        client.post("/extract", files=files)
+        reordered = client.post("/extract", files=files, params={"policy": "none"}).json()
+
+        assert (reordered["doc_numbers"], reordered["cached"]) == (["2", "1"], False)
+        assert client.post("/extract", files=files, params={"policy": "none"}).json()["cached"]
+
+    def test_health_reports_cache_stats(self, cache):
+        """The health endpoint exposes hit rate and evictions."""
+        files = {"file": ("test.xml", "<root/>", "text/xml")}
+        client.post("/extract", files=files)
+        client.post("/extract", files=files)
+
+        stats = client.get("/health").json()["cache"]
+
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["evictions"] == 0
+
+
+class TestExtractionOffload:
+    """Tests for running extraction on the bounded worker pool."""
+
+    @pytest.fixture
+    def blocked_pool(self, monkeypatch):
+        """A one-slot pool whose extractions block until released."""
+        pool = ExtractionPool(max_workers=1, queue_depth=0)
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking_extract(content, max_size=None, policy=None):
+            started.set()
+            release.wait(timeout=10)
+            return ["1"]
+
+        monkeypatch.setattr(api.routes, "extract_doc_numbers", blocking_extract)
+        app.dependency_overrides[get_extraction_pool] = lambda: pool
+        app.dependency_overrides[get_result_cache] = lambda: None
+        yield started, release
+        release.set()
+        app.dependency_overrides.clear()
+        pool.shutdown()
+
+    def test_health_responds_while_extraction_in_flight(self, blocked_pool):
+        """A long extraction must not block other requests on the worker."""
+        started, release = blocked_pool
+        files = {"file": ("test.xml", "<root/>", "text/xml")}
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(client.post, "/extract", files=files)
+            assert started.wait(timeout=5)
+
+            assert client.get("/health").status_code == 200
+
+            release.set()
+            assert pending.result().json()["doc_numbers"] == ["1"]
+
+    def test_full_queue_returns_503_with_retry_after(self, blocked_pool):
+        """When the pool is saturated the endpoint sheds load with 503."""
+        started, release = blocked_pool
+        files = {"file": ("test.xml", "<root/>", "text/xml")}
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(client.post, "/extract", files=files)
+            assert started.wait(timeout=5)
+
+            response = client.post("/extract", files=files)
+
+            release.set()
+            assert pending.result().status_code == 200
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert response.json()["error"] == "ServiceUnavailable"
+
+
+class TestStreamedUpload:
+    """Tests for feeding uploads to the parser without reading them into memory."""
+
+    XML = b'<root><document-id format="epo"><doc-number>111</doc-number></document-id></root>'
+
+    @pytest.fixture(autouse=True)
+    def no_cache(self):
+        app.dependency_overrides[get_result_cache] = lambda: None
+        yield
+        app.dependency_overrides.clear()
+
+    def test_upload_is_passed_as_a_file(self, monkeypatch):
+        """The thread pool parses the spooled upload itself, not a bytes copy."""
+        received = []
+
+        def recording_extract(content, max_size=None, policy=None):
+            received.append(type(content))
+            return extract_doc_numbers(content, max_size, policy)
+
+        monkeypatch.setattr(api.routes, "extract_doc_numbers", recording_extract)
+
+        response = client.post("/extract", files={"file": ("a.xml", self.XML, "text/xml")})
+
+        assert response.json()["doc_numbers"] == ["111"]
+        assert received and received[0] is not bytes
+
+    def test_cached_upload_is_parsed_from_its_start(self):
+        """Hashing a file for the cache does not leave it read to the end."""
+        cache = ResultCache(max_entries=10)
+        app.dependency_overrides[get_result_cache] = lambda: cache
+        files = {"file": ("a.xml", self.XML, "text/xml")}
+
+        first = client.post("/extract", files=files).json()
+        second = client.post("/extract", files=files).json()
+
+        assert first["doc_numbers"] == second["doc_numbers"] == ["111"]
+        assert cache.hits == 1
+
+    def test_process_executor_receives_bytes(self):
+        """Files cannot be sent to worker processes, so their bytes are read first."""
+        pool = ExtractionPool(max_workers=1, queue_depth=0, kind="process")
+        app.dependency_overrides[get_extraction_pool] = lambda: pool
+        try:
+            response = client.post("/extract", files={"file": ("a.xml", self.XML, "text/xml")})
+        finally:
+            pool.shutdown()
+
+        assert response.json()["doc_numbers"] == ["111"]
+
+
+def metric_value(name: str, **labels: str) -> float:
+    """Read one sample from /metrics, or 0 if it is not exported yet."""
+    text = client.get("/metrics").text
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == name and all(sample.labels.get(k) == v for k, v in labels.items()):
+                return sample.value
+    return 0.0
+
+
+class TestMetrics:
+    """Tests for the /metrics endpoint."""
+
+    @pytest.fixture(autouse=True)
+    def no_cache(self):
+        """Extract every upload so the stage histograms are exercised."""
+        app.dependency_overrides[get_result_cache] = lambda: None
+        yield
+        app.dependency_overrides.clear()
+
+    def test_prometheus_text_format(self):
+        """/metrics is served in the Prometheus exposition format."""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "xml_extractor_stage_seconds" in response.text
+
+    def test_stage_histograms(self):
+        """An extraction is timed in every stage it passes through."""
+        before = {
+            stage: metric_value("xml_extractor_stage_seconds_count", stage=stage)
+            for stage in ("read", "parse", "locate", "sort", "serialize")
+        }
+
+        files = {"file": ("test.xml", "<root/>", "text/xml")}
+        assert client.post("/extract", files=files).status_code == 200
+
+        for stage, count in before.items():
+            assert metric_value("xml_extractor_stage_seconds_count", stage=stage) == count + 1
+
+    def test_counters(self):
+        """Bytes, doc-numbers, recovered parses and errors are counted."""
+        xml = "<root><document-id><doc-number>1</doc-number></document-id>"
+        bytes_before = metric_value("xml_extractor_bytes_total")
+        doc_numbers_before = metric_value("xml_extractor_doc_numbers_total")
+        recovered_before = metric_value("xml_extractor_recovered_parses_total")
+        errors_before = metric_value("xml_extractor_errors_total", error="XMLParseError")
+
+        client.post("/extract", files={"file": ("test.xml", xml, "text/xml")})
+        client.post("/extract", files={"file": ("test.xml", "", "text/xml")})
+
+        assert metric_value("xml_extractor_bytes_total") == bytes_before + len(xml)
+        assert metric_value("xml_extractor_doc_numbers_total") == doc_numbers_before + 1
+        assert metric_value("xml_extractor_recovered_parses_total") == recovered_before + 1
+        assert (
+            metric_value("xml_extractor_errors_total", error="XMLParseError") == errors_before + 1
+        )
+
+    def test_disabled(self, monkeypatch):
+        """With METRICS_ENABLED=0 the endpoint is not available."""
+        monkeypatch.setattr(
+            api.main, "settings", dataclasses.replace(api.main.settings, metrics_enabled=False)
+        )
+        assert client.get("/metrics").status_code == 404
+
+
+class TestJobs:
+    """Tests for the asynchronous job endpoints."""
+
+    XML = TestExtractBatchEndpoint.XML
+
+    @pytest.fixture(autouse=True)
+    def manager(self, monkeypatch):
+        """A fresh job manager and no result cache for each test."""
+        manager = JobManager(MemoryJobStore(ttl=60), workers=1, queue_depth=4)
+        monkeypatch.setattr(api.dependencies, "_job_manager", manager)
+        app.dependency_overrides[get_job_manager] = lambda: manager
+        app.dependency_overrides[get_result_cache] = lambda: None
+        yield manager
+        app.dependency_overrides.clear()
+        manager.shutdown()
+
+    @staticmethod
+    def wait_for(job_id: str) -> dict:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            status = client.get(f"/jobs/{job_id}").json()
+            if status["status"] in ("succeeded", "failed"):
+                return status
+            time.sleep(0.01)
+        raise AssertionError(f"Job {job_id} did not finish")
+
+    def test_single_upload(self):
+        """A plain XML upload gives the /extract response shape."""
+        response = client.post("/jobs", files={"files": ("a.xml", self.XML, "text/xml")})
+
+        assert response.status_code == 202
+        job = response.json()
+        assert response.headers["Location"] == f"/jobs/{job['id']}"
+        assert job["status"] == "queued"
+        assert job["result_url"] == f"/jobs/{job['id']}/result"
+
+        status = self.wait_for(job["id"])
+        assert status["status"] == "succeeded"
+        assert status["progress"] == {"done": 1, "total": 1}
+
+        result = client.get(job["result_url"])
+        assert result.status_code == 200
+        assert result.json()["doc_numbers"] == ["111", "222"]
+
+    def test_archive_upload(self):
+        """An archive gives the /extract/batch response shape."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("one.xml", self.XML)
+            zf.writestr("broken.xml", b"")
+
+        job = client.post(
+            "/jobs", files={"files": ("batch.zip", archive.getvalue(), "application/zip")}
+        ).json()
+        status = self.wait_for(job["id"])
+        result = client.get(job["result_url"]).json()
+
+        assert status["progress"] == {"done": 2, "total": 2}
+        assert result["results"]["one.xml"]["doc_numbers"] == ["111", "222"]
+        assert result["results"]["broken.xml"]["error"] == "XMLParseError"
+
+    def test_failed_job_keeps_the_error_status(self):
+        job = client.post("/jobs", files={"files": ("a.xml", b"", "text/xml")}).json()
+        status = self.wait_for(job["id"])
+        result = client.get(job["result_url"])
+
+        assert status["status"] == "failed"
+        assert status["error"]["error"] == "XMLParseError"
+        assert result.status_code == 400
+        assert result.json()["error"] == "XMLParseError"
+
+    def test_storage_uris(self, monkeypatch):
+        """Object URIs give one result; prefix URIs a batch keyed by URI."""
+        objects = {"docs/a.xml": self.XML, "docs/b.xml": b"<root/>"}
+        with FakeGCS({"patents": objects}) as fake:
+            monkeypatch.setenv("STORAGE_EMULATOR_HOST", fake.endpoint)
+            single = client.post("/jobs", data={"uri": "gs://patents/docs/a.xml"}).json()
+            prefix = client.post("/jobs", data={"uri": "gs://patents/docs/"}).json()
+            missing = client.post("/jobs", data={"uri": "gs://patents/docs/c.xml"}).json()
+            for job in (single, prefix, missing):
+                self.wait_for(job["id"])
+
+        assert client.get(single["result_url"]).json()["doc_numbers"] == ["111", "222"]
+        results = client.get(prefix["result_url"]).json()["results"]
+        assert list(results) == ["gs://patents/docs/a.xml", "gs://patents/docs/b.xml"]
+        assert results["gs://patents/docs/a.xml"]["doc_numbers"] == ["111", "222"]
+        assert client.get(missing["result_url"]).status_code == 502
+
+    def test_storage_objects_over_the_size_limit(self, monkeypatch):
+        """Oversized objects are rejected while downloading, alone or in a batch."""
+        monkeypatch.setattr(api.routes, "MAX_FILE_SIZE", 1000)
+        objects = {"docs/a.xml": self.XML, "docs/big.xml": b"<root>" + b" " * 2000 + b"</root>"}
+        with FakeGCS({"patents": objects}) as fake:
+            monkeypatch.setenv("STORAGE_EMULATOR_HOST", fake.endpoint)
+            single = client.post("/jobs", data={"uri": "gs://patents/docs/big.xml"}).json()
+            prefix = client.post("/jobs", data={"uri": "gs://patents/docs/"}).json()
+            for job in (single, prefix):
+                self.wait_for(job["id"])
+
+        result = client.get(single["result_url"])
+        assert result.status_code == 422
+        assert result.json()["message"] == "File too large"
+        results = client.get(prefix["result_url"]).json()["results"]
+        assert results["gs://patents/docs/a.xml"]["doc_numbers"] == ["111", "222"]
+        assert results["gs://patents/docs/big.xml"]["error"] == "ValidationError"
+
+    @pytest.mark.parametrize(
+        "request_kwargs",
+        [
+            {},
+            {"data": {"uri": "/etc/passwd"}},
+            {"data": {"uri": "file:///etc/passwd"}},
+            {
+                "data": {"uri": "gs://patents/a.xml"},
+                "files": {"files": ("a.xml", b"<root/>", "text/xml")},
+            },
+        ],
+    )
+    def test_invalid_input(self, request_kwargs):
+        """Exactly one of files or a gs:// URI is required."""
+        response = client.post("/jobs", **request_kwargs)
+        assert response.status_code == 422
+        assert response.json()["error"] == "ValidationError"
+
+    def test_unfinished_and_unknown_jobs(self, manager):
+        release = threading.Event()
+        manager.submit(lambda progress: (release.wait(), (200, "{}"))[1])
+        try:
+            job = client.post("/jobs", files={"files": ("a.xml", self.XML, "text/xml")}).json()
+            result = client.get(job["result_url"])
+            assert result.status_code == 409
+            assert result.headers["Retry-After"] == "1"
+            assert client.get("/health").json()["jobs"]["queued"] == 1
+        finally:
+            release.set()
+
+        assert client.get("/jobs/unknown").status_code == 404
+        assert client.get("/jobs/unknown/result").status_code == 404
+
+    def test_full_queue_returns_503(self, manager):
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocker(progress):
+            started.set()
+            release.wait()
+            return 200, "{}"
+
+        manager.submit(blocker)
+        try:
+            assert started.wait(5)
+            for _ in range(manager.queue_depth):
+                manager.submit(blocker)
+            response = client.post("/jobs", files={"files": ("a.xml", self.XML, "text/xml")})
+        finally:
+            release.set()
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+
+class TestLookup:
+    """Tests for the reverse index lookup endpoint."""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        with DocNumberIndex(tmp_path / "index.db") as writer:
+            writer.add("a.xml", [("a.xml", 0, 1, "111", "epo"), ("a.xml", 1, 0, "222", None)])
+            writer.add("b.xml", [("b.xml", 2, 0, "111", "original")])
+        index = DocNumberIndex(tmp_path / "index.db", readonly=True)
+        app.dependency_overrides[get_doc_index] = lambda: index
+        yield index
+        app.dependency_overrides.clear()
+        index.close()
+
+    def test_lookup(self, index):
+        response = client.get("/lookup/111")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "doc_number": "111",
+            "count": 2,
+            "sources": [
+                {"source": "a.xml", "priority": 0, "position": 1, "format": "epo"},
+                {"source": "b.xml", "priority": 2, "position": 0, "format": "original"},
+            ],
+        }
+
+    def test_limit_and_unknown_doc_number(self, index):
+        assert client.get("/lookup/111", params={"limit": 1}).json()["count"] == 1
+        assert client.get("/lookup/999").json() == {"doc_number": "999", "count": 0, "sources": []}
+        assert client.get("/lookup/111", params={"limit": 0}).status_code == 422
+
+    def test_index_built_after_startup(self, tmp_path, monkeypatch, caplog):
+        """A missing index is looked for again only after INDEX_RETRY_INTERVAL."""
+        path = tmp_path / "index.db"
+        deps = api.dependencies
+        monkeypatch.setattr(
+            deps, "settings", dataclasses.replace(deps.settings, index_path=str(path))
+        )
+        monkeypatch.setattr(deps, "_doc_index", None)
+        monkeypatch.setattr(deps, "_doc_index_retry_at", 0.0)
+
+        with caplog.at_level("INFO", logger=deps.__name__):
+            assert get_doc_index() is None
+            assert get_doc_index() is None
+        assert len(caplog.records) == 1
+        assert not path.exists()
+
+        DocNumberIndex(path).close()
+        assert get_doc_index() is None
+        monkeypatch.setattr(deps, "_doc_index_retry_at", 0.0)
+        index = get_doc_index()
+        assert isinstance(index, DocNumberIndex)
+        index.close()
+
+    def test_without_index(self):
+        response = client.get("/lookup/111")
+
+        assert response.status_code == 404
+        assert response.json()["error"] == "NotFound"
@@ -0,0 +1,92 @@
+"""Tests for batch upload expansion."""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from api.archives import BatchLimitError, MemberTooLarge, expand_uploads
+
+XML = b"<root><document-id><doc-number>1</doc-number></document-id></root>"
+
+
+def make_zip(members: dict[str, bytes]) -> io.BytesIO:
+    """Build an in-memory zip archive."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def make_tar(members: dict[str, bytes], mode: str = "w:gz") -> io.BytesIO:
+    """Build an in-memory tar archive."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    buffer.seek(0)
+    return buffer
+
+
+def expand(uploads, max_members=100, max_total_size=1 << 20, max_member_size=1 << 16):
+    """Call expand_uploads with generous default limits."""
+    return expand_uploads(uploads, max_members, max_total_size, max_member_size)
+
+
+class TestExpandUploads:
+    """Tests for expand_uploads function."""
+
+    def test_plain_files_pass_through(self):
+        """Non-archive uploads are single documents named after the upload."""
+        assert expand([("a.xml", io.BytesIO(XML))]) == [("a.xml", XML)]
+
+    def test_zip_members_are_expanded(self):
+        """Zip members become documents named after the member."""
+        archive = make_zip({"a.xml": XML, "dir/b.xml": XML})
+
+        documents = expand([("batch.zip", archive)])
+
+        assert documents == [("a.xml", XML), ("dir/b.xml", XML)]
+
+    @pytest.mark.parametrize("mode", ["w", "w:gz", "w:bz2"])
+    def test_tar_members_are_expanded(self, mode):
+        """Plain and compressed tar archives are detected from their contents."""
+        archive = make_tar({"a.xml": XML, "b.xml": XML}, mode)
+
+        documents = expand([("upload.bin", archive)])
+
+        assert documents == [("a.xml", XML), ("b.xml", XML)]
+
+    def test_repeated_names_are_made_unique(self):
+        """Repeated names get a #<n> suffix."""
+        documents = expand([("a.xml", io.BytesIO(XML)), ("a.xml", io.BytesIO(XML))])
+
+        assert [name for name, _ in documents] == ["a.xml", "a.xml#1"]
+
+    def test_oversized_member_is_flagged(self):
+        """Members above the per-document limit are not read in full."""
+        archive = make_zip({"big.xml": b"x" * 1000, "small.xml": XML})
+
+        documents = expand([("batch.zip", archive)], max_member_size=500)
+
+        assert isinstance(documents[0][1], MemberTooLarge)
+        assert documents[1] == ("small.xml", XML)
+
+    def test_member_count_limit(self):
+        """Batches with too many documents are rejected."""
+        archive = make_zip({f"{i}.xml": XML for i in range(5)})
+
+        with pytest.raises(BatchLimitError):
+            expand([("batch.zip", archive)], max_members=4)
+
+    def test_total_size_limit_counts_decompressed_bytes(self):
+        """Highly compressible members cannot get around the total size limit."""
+        archive = make_zip({f"{i}.xml": b" " * 400 for i in range(5)})
+
+        with pytest.raises(BatchLimitError):
+            expand([("batch.zip", archive)], max_total_size=1000)
@@ -0,0 +1,279 @@
+"""Tests for the batch module and the batch CLI."""
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from main import main
+from xml_extractor.batch import (
+    BatchOptions,
+    expand_inputs,
+    iter_split_documents,
+    process_file,
+    run_batch,
+)
+from xml_extractor.splitter import DEFAULT_CHUNK_SIZE
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+GOOD_XML = b"""<root>
+  <document-id format="patent-office"><doc-number>222</doc-number></document-id>
+  <document-id format="epo"><doc-number>111</doc-number></document-id>
+</root>"""
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Directory with two valid files, one empty file and a non-XML file."""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.xml").write_bytes(GOOD_XML)
+    (tmp_path / "sub" / "b.xml").write_bytes(GOOD_XML)
+    (tmp_path / "sub" / "empty.xml").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("not an input")
+    return tmp_path
+
+
+class TestExpandInputs:
+    """Tests for expand_inputs function."""
+
+    def test_directory_is_walked_recursively(self, corpus):
+        """Directories yield matching files in sorted order."""
+        paths = list(expand_inputs([str(corpus)]))
+        assert paths == [
+            str(corpus / "a.xml"),
+            str(corpus / "sub" / "b.xml"),
+            str(corpus / "sub" / "empty.xml"),
+        ]
+
+    def test_glob(self, corpus):
+        """Glob specs are expanded."""
+        paths = list(expand_inputs([str(corpus / "**" / "b*.xml")]))
+        assert paths == [str(corpus / "sub" / "b.xml")]
+
+    def test_file_list(self, corpus):
+        """@filelist specs read one path per line, skipping blanks and comments."""
+        file_list = corpus / "inputs.txt"
+        file_list.write_text(f"# inputs\n{corpus / 'a.xml'}\n\n{corpus / 'sub' / 'b.xml'}\n")
+
+        paths = list(expand_inputs([f"@{file_list}"]))
+        assert paths == [str(corpus / "a.xml"), str(corpus / "sub" / "b.xml")]
+
+    def test_plain_path_is_passed_through(self):
+        """Plain paths are yielded even if they do not exist."""
+        assert list(expand_inputs(["missing.xml"])) == ["missing.xml"]
+
+
+class TestProcessFile:
+    """Tests for process_file function."""
+
+    def test_success_record(self, corpus):
+        """A valid file gives its doc-numbers and no error."""
+        record = process_file(str(corpus / "a.xml"))
+        assert record["doc_numbers"] == ["111", "222"]
+        assert record["error"] is None
+        assert record["elapsed_ms"] >= 0
+
+    def test_failure_becomes_error_record(self, corpus):
+        """Parse failures are reported, not raised."""
+        record = process_file(str(corpus / "sub" / "empty.xml"))
+        assert record["doc_numbers"] == []
+        assert record["error"] == "XMLParseError"
+        assert record["message"]
+
+    def test_streaming_mode(self, corpus):
+        """The streaming extractor gives the same doc-numbers."""
+        record = process_file(str(corpus / "a.xml"), BatchOptions(stream=True))
+        assert record["doc_numbers"] == ["111", "222"]
+
+    def test_shared_cache(self, corpus, tmp_path):
+        """With a cache path, identical files are served from the cache."""
+        options = BatchOptions(cache_path=str(tmp_path / "cache.sqlite"))
+
+        first = process_file(str(corpus / "a.xml"), options)
+        second = process_file(str(corpus / "sub" / "b.xml"), options)
+
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["doc_numbers"] == ["111", "222"]
+
+
+class TestRunBatch:
+    """Tests for run_batch function."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_results_follow_input_order(self, workers):
+        """Every fixture produces one record, in input order."""
+        paths = sorted(str(p) for p in FIXTURES_DIR.glob("*/input.xml"))
+
+        records = list(run_batch(paths, workers=workers, chunk_size=3))
+
+        assert [r["path"] for r in records] == paths
+        assert all(r["error"] is None for r in records)
+
+    def test_errors_do_not_abort_run(self, corpus):
+        """Bad and missing files become error records and processing continues."""
+        paths = [str(corpus / "sub" / "empty.xml"), "missing.xml", str(corpus / "a.xml")]
+
+        records = list(run_batch(paths, workers=2, chunk_size=1))
+
+        assert [r["error"] is None for r in records] == [False, False, True]
+        assert records[2]["doc_numbers"] == ["111", "222"]
+
+
+class TestSplitBatch:
+    """Tests for batch processing of concatenated dump files."""
+
+    def test_split_documents_are_processed_in_parallel(self, tmp_path):
+        """Every document in a dump becomes its own keyed record."""
+        dump = tmp_path / "dump.xml"
+        dump.write_bytes(b'<?xml version="1.0"?>' + GOOD_XML + b'\n<?xml version="1.0"?><root/>')
+
+        items = iter_split_documents([str(dump), str(tmp_path / "missing.xml")])
+        records = list(run_batch(items, workers=2, chunk_size=1))
+
+        assert [r["path"] for r in records] == [
+            f"{dump}#0",
+            f"{dump}#1",
+            str(tmp_path / "missing.xml"),
+        ]
+        assert records[0]["doc_numbers"] == ["111", "222"]
+        assert records[1]["doc_numbers"] == []
+        assert records[2]["error"] == "XMLParseError"
+
+    def test_compressed_dump_and_corrupt_input(self, tmp_path):
+        """Gzip dumps are split after decompression; a corrupt one becomes an error record."""
+        dump = tmp_path / "dump.xml.gz"
+        dump.write_bytes(gzip.compress(b'<?xml version="1.0"?>' + GOOD_XML) * 2)
+        corrupt = tmp_path / "corrupt.xml.gz"
+        corrupt.write_bytes(gzip.compress(GOOD_XML)[:-8])
+
+        records = list(run_batch(iter_split_documents([str(dump), str(corrupt)]), workers=1))
+
+        assert [r["path"] for r in records] == [f"{dump}#0", f"{dump}#1", str(corrupt)]
+        assert records[1]["doc_numbers"] == ["111", "222"]
+        assert records[2]["error"] == "CompressionError"
+
+    def test_error_after_split_documents(self, tmp_path):
+        """A dump failing part way reports the rest once, without redoing the documents yielded."""
+        dump = tmp_path / "dump.xml.gz"
+        whole = gzip.compress(b'<?xml version="1.0"?>' + GOOD_XML)
+        # Fails only after the first read, which holds both complete documents
+        repeats = DEFAULT_CHUNK_SIZE // len(GOOD_XML) + 1
+        truncated = gzip.compress(b'<?xml version="1.0"?>' + GOOD_XML * repeats)[:-8]
+        dump.write_bytes(whole + whole + truncated)
+
+        records = list(run_batch(iter_split_documents([str(dump)]), workers=1))
+
+        assert [r["path"] for r in records] == [f"{dump}#0", f"{dump}#1", f"{dump}#2"]
+        assert records[1]["doc_numbers"] == ["111", "222"]
+        assert records[2]["error"] == "CompressionError"
+
+
+class TestBatchCLI:
+    """Tests for the batch subcommand."""
+
+    def test_writes_one_json_line_per_file(self, corpus, capsys):
+        """Batch mode prints one JSON record per input and a summary on stderr."""
+        main(["batch", str(corpus), "--workers", "1"])
+
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert [Path(r["path"]).name for r in records] == ["a.xml", "b.xml", "empty.xml"]
+        assert records[0]["doc_numbers"] == ["111", "222"]
+        assert "3 documents (1 errors)" in captured.err
+
+    def test_csv_sink(self, corpus, tmp_path, capsys):
+        """--sink writes rows to the sink and reports errors on stderr."""
+        output = tmp_path / "rows.csv"
+        main(["batch", str(corpus), "--workers", "2", "--sink", "csv", "--output", str(output)])
+
+        lines = output.read_text().splitlines()
+        assert lines[0] == "source,priority,position,doc_number,format"
+        assert lines[1] == f"{corpus / 'a.xml'},0,1,111,epo"
+        assert len(lines) == 5
+        assert "empty.xml: XMLParseError" in capsys.readouterr().err
+
+    def test_priority_policy(self, corpus, tmp_path, capsys, monkeypatch):
+        """--priority-policy, or PRIORITY_POLICY, reorders the doc-numbers."""
+        main(["batch", str(corpus / "a.xml"), "--priority-policy", "patent-office,epo"])
+        assert json.loads(capsys.readouterr().out)["doc_numbers"] == ["222", "111"]
+
+        monkeypatch.setenv("PRIORITY_POLICY", "patent-office,epo")
+        main(["batch", str(corpus / "a.xml"), "--cache", str(tmp_path / "c.sqlite")])
+        main(["batch", str(corpus / "a.xml"), "--cache", str(tmp_path / "c.sqlite")])
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [r["doc_numbers"] for r in records] == [["222", "111"]] * 2
+
+    def test_invalid_priority_policy(self, corpus):
+        with pytest.raises(SystemExit):
+            main(["batch", str(corpus), "--priority-policy", "lang=en"])
+
+    def test_sink_rejects_cache(self, corpus):
+        """Rows are not cached, so --sink and --cache are exclusive."""
+        with pytest.raises(SystemExit):
+            main(["batch", str(corpus), "--sink", "csv", "--cache", "c.sqlite"])
+
+    def test_output_file(self, corpus, tmp_path):
+        """--output writes records to a file."""
+        output = tmp_path / "out.jsonl"
+        main(["batch", str(corpus / "a.xml"), "--workers", "1", "--output", str(output)])
+
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert records[0]["doc_numbers"] == ["111", "222"]
+
+
+class TestResume:
+    """Tests for checkpointed, resumable batch runs."""
+
+    def test_second_run_skips_finished_files(self, corpus, tmp_path, capsys):
+        """Resuming a finished run processes nothing and keeps the output."""
+        output = tmp_path / "out.jsonl"
+        args = ["batch", str(corpus), "--workers", "1", "--output", str(output), "--resume"]
+        main(args)
+        first = output.read_text()
+        assert all("hash" in json.loads(line) for line in first.splitlines())
+
+        main(args)
+        assert output.read_text() == first
+        assert "0 documents (0 errors, 3 skipped)" in capsys.readouterr().err
+
+    def test_changed_file_is_appended(self, corpus, tmp_path):
+        """Only inputs that changed since the checkpoint are processed again."""
+        output = tmp_path / "out.jsonl"
+        args = ["batch", str(corpus), "--workers", "1", "--output", str(output), "--resume"]
+        main(args)
+        (corpus / "sub" / "empty.xml").write_bytes(GOOD_XML)
+
+        main(args)
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [Path(r["path"]).name for r in records] == [
+            "a.xml",
+            "b.xml",
+            "empty.xml",
+            "empty.xml",
+        ]
+        assert records[-1]["doc_numbers"] == ["111", "222"]
+
+    def test_output_after_checkpoint_is_redone(self, corpus, tmp_path):
+        """Output written after the last checkpoint is truncated, not duplicated."""
+        fresh = tmp_path / "fresh.csv"
+        main(["batch", str(corpus), "--workers", "1", "--sink", "csv", "--output", str(fresh)])
+
+        output = tmp_path / "rows.csv"
+        args = ["--workers", "1", "--sink", "csv", "--output", str(output), "--resume"]
+        main(["batch", str(corpus / "a.xml"), *args])
+        # Rows written for a file the manifest never recorded, as after a crash
+        with open(output, "a") as file:
+            file.write(f"{corpus / 'sub' / 'b.xml'},0,1,111,epo\ntorn,ro")
+
+        main(["batch", str(corpus), *args])
+        assert output.read_text() == fresh.read_text()
+
+    def test_resume_requires_plain_output_file(self, corpus):
+        """Compressed, sharded or Parquet output cannot be checkpointed."""
+        with pytest.raises(SystemExit):
+            main(["batch", str(corpus), "--resume"])
+        with pytest.raises(SystemExit):
+            main(["batch", str(corpus), "--resume", "--sink", "csv", "--gzip", "--output", "x"])
@@ -0,0 +1,113 @@
+"""Tests for the cache module."""
+
+import io
+
+import pytest
+
+from xml_extractor import XMLParseError
+from xml_extractor.cache import ResultCache, content_key
+from xml_extractor.extractor import extract_doc_numbers
+from xml_extractor.priority import PriorityPolicy
+
+XML = b"<root><document-id><doc-number>1</doc-number></document-id></root>"
+
+
+def document(doc_number: str) -> bytes:
+    return f"<root><document-id><doc-number>{doc_number}</doc-number></document-id></root>".encode()
+
+
+class TestContentKey:
+    """Tests for content_key function."""
+
+    def test_key_depends_on_content_and_config(self):
+        """Different bytes or a different priority config give a different key."""
+        assert content_key(XML, "a") == content_key(bytearray(XML), "a")
+        assert content_key(XML, "a") != content_key(XML + b" ", "a")
+        assert content_key(XML, "a") != content_key(XML, "b")
+
+    def test_file_key_matches_bytes_key(self):
+        """A file is hashed in chunks to the same key as its bytes."""
+        assert content_key(io.BytesIO(XML), "a") == content_key(XML, "a")
+
+
+class TestResultCache:
+    """Tests for ResultCache class."""
+
+    def test_hit_after_miss(self):
+        """The second extraction of identical bytes is served from the cache."""
+        cache = ResultCache()
+
+        assert cache.extract(XML) == (["1"], False)
+        assert cache.extract(XML) == (["1"], True)
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_cached_result_is_a_copy(self):
+        """Mutating a returned list does not corrupt the cache."""
+        cache = ResultCache()
+        cache.extract(XML)
+        cache.extract(XML)[0].append("x")
+
+        assert cache.extract(XML) == (["1"], True)
+
+    def test_errors_are_not_cached(self):
+        """Failed extractions raise every time."""
+        cache = ResultCache()
+        for _ in range(2):
+            with pytest.raises(XMLParseError):
+                cache.extract(b"")
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used_by_count(self):
+        """Beyond max_entries the least recently used entry is dropped."""
+        cache = ResultCache(max_entries=2)
+        cache.extract(document("1"))
+        cache.extract(document("2"))
+        cache.extract(document("1"))
+        cache.extract(document("3"))
+
+        assert cache.extract(document("1"))[1] is True
+        assert cache.extract(document("2"))[1] is False
+        assert cache.stats()["evictions"] >= 1
+
+    def test_evicts_by_size(self):
+        """The approximate byte budget bounds the number of entries."""
+        cache = ResultCache(max_bytes=600)
+        for n in range(10):
+            cache.extract(document(str(n)))
+
+        stats = cache.stats()
+        assert stats["bytes"] <= 600
+        assert stats["entries"] < 10
+
+    def test_disk_tier_is_shared(self, tmp_path):
+        """A second cache over the same file sees the first cache's results."""
+        path = tmp_path / "cache.sqlite"
+        ResultCache(path=path).extract(XML)
+
+        other = ResultCache(path=path)
+        assert other.extract(XML) == (["1"], True)
+        assert other.stats()["disk_hits"] == 1
+
+    def test_config_separates_results(self, tmp_path):
+        """Results computed under another priority config are not reused."""
+        path = tmp_path / "cache.sqlite"
+        ResultCache(path=path, config="a").extract(XML)
+
+        assert ResultCache(path=path, config="b").extract(XML)[1] is False
+
+    def test_lookup_config_overrides_the_cache_config(self):
+        """Results under another policy are cached alongside the default ones."""
+        cache = ResultCache()
+        xml = (
+            b'<root><document-id format="epo"><doc-number>1</doc-number></document-id>'
+            b"<document-id><doc-number>2</doc-number></document-id></root>"
+        )
+        policy = PriorityPolicy("none,other")
+
+        def reordered(content):
+            return extract_doc_numbers(content, policy=policy)
+
+        assert cache.extract(xml) == (["1", "2"], False)
+        assert cache.extract(xml, reordered, policy.fingerprint) == (["2", "1"], False)
+        assert cache.extract(xml, reordered, policy.fingerprint) == (["2", "1"], True)
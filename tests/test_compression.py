@@ -0,0 +1,135 @@
+"""Tests for the compression module."""
+
+import bz2
+import gzip
+import io
+import sys
+
+import pytest
+
+from xml_extractor.compression import (
+    CHUNK_SIZE,
+    DecompressingReader,
+    decompress,
+    detect,
+    open_stream,
+)
+from xml_extractor.exceptions import CompressionError, InputTooLargeError
+
+XML = b"<root><document-id><doc-number>1</doc-number></document-id></root>"
+
+
+def zstd_compress(data: bytes) -> bytes:
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+COMPRESSORS = {"gzip": gzip.compress, "bzip2": bz2.compress, "zstd": zstd_compress}
+
+
+def gzip_bomb(megabytes: int) -> bytes:
+    """Gzip stream of ``megabytes`` MB of zeros, as repeats of one 1MB member."""
+    return gzip.compress(bytes(1024 * 1024)) * megabytes
+
+
+class TestDetect:
+    """Tests for detect function."""
+
+    @pytest.mark.parametrize("fmt", COMPRESSORS)
+    def test_formats(self, fmt):
+        assert detect(COMPRESSORS[fmt](XML)[:4]) == fmt
+
+    def test_uncompressed(self):
+        assert detect(XML[:4]) is None
+        assert detect(b"") is None
+
+
+class TestDecompress:
+    """Tests for decompress function."""
+
+    @pytest.mark.parametrize("fmt", COMPRESSORS)
+    def test_round_trip(self, fmt):
+        assert decompress(COMPRESSORS[fmt](XML)) == XML
+
+    def test_uncompressed_is_returned_as_is(self):
+        view = memoryview(XML)
+        assert decompress(view) is view
+
+    def test_concatenated_gzip_members(self):
+        assert decompress(gzip.compress(XML[:10]) + gzip.compress(XML[10:])) == XML
+
+    def test_bomb_is_stopped_at_the_limit(self):
+        """Decompression stops once the limit is passed, not at the end of the data."""
+        bomb = gzip_bomb(256)
+        reader = DecompressingReader(io.BytesIO(bomb), "gzip", max_size=1024 * 1024)
+        with pytest.raises(InputTooLargeError) as excinfo:
+            reader.read()
+        assert excinfo.value.limit == 1024 * 1024
+        assert reader.size <= 1024 * 1024 + CHUNK_SIZE
+
+    def test_uncompressed_limit(self):
+        with pytest.raises(InputTooLargeError):
+            decompress(XML, max_size=10)
+
+    @pytest.mark.parametrize("fmt", COMPRESSORS)
+    def test_corrupt_data(self, fmt):
+        data = COMPRESSORS[fmt](XML * 100)
+        with pytest.raises(CompressionError, match=fmt):
+            decompress(data[:8] + b"\xff" * 64 + data[72:])
+
+    def test_zstd_without_zstandard(self, monkeypatch):
+        """A missing optional dependency is reported, with the extra to install."""
+        monkeypatch.setitem(sys.modules, "zstandard", None)
+        with pytest.raises(CompressionError, match=r"xml-extractor\[zstd\]"):
+            decompress(b"\x28\xb5\x2f\xfd" + bytes(16))
+
+
+class TestOpenStream:
+    """Tests for open_stream function."""
+
+    def test_uncompressed_path_is_left_to_lxml(self, tmp_path):
+        path = tmp_path / "a.xml"
+        path.write_bytes(XML)
+        with open_stream(path) as source:
+            assert source is path
+
+    def test_uncompressed_path_above_limit(self, tmp_path):
+        path = tmp_path / "a.xml"
+        path.write_bytes(XML)
+        with pytest.raises(InputTooLargeError):
+            with open_stream(path, max_size=10):
+                pass
+
+    def test_compressed_path(self, tmp_path):
+        path = tmp_path / "a.xml.gz"
+        path.write_bytes(gzip.compress(XML))
+        with open_stream(str(path)) as source:
+            assert source.read() == XML
+        assert source.closed
+
+    def test_stream_is_not_consumed_or_closed(self):
+        stream = io.BytesIO(XML)
+        with open_stream(stream) as source:
+            assert source is stream
+        with open_stream(stream, max_size=10) as source:
+            with pytest.raises(InputTooLargeError):
+                source.read()
+        assert not stream.closed
+
+    def test_unseekable_stream(self):
+        """Streams without peek or seek are buffered to read the magic bytes."""
+
+        class Pipe(io.RawIOBase):
+            def __init__(self, data: bytes):
+                self._data = io.BytesIO(data)
+
+            def readable(self) -> bool:
+                return True
+
+            def readinto(self, buffer) -> int:
+                return self._data.readinto(buffer)
+
+        with open_stream(Pipe(gzip.compress(XML))) as source:
+            assert source.read() == XML
+        with open_stream(Pipe(XML)) as source:
+            assert source.read() == XML
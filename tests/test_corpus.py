@@ -0,0 +1,76 @@
+"""Tests for the synthetic corpus generator used by the benchmarks."""
+
+import io
+
+import pytest
+
+from benchmarks.corpus import (
+    CorpusSpec,
+    generate_document,
+    parse_size,
+    write_corpus,
+    write_document,
+    write_dump,
+)
+from xml_extractor import extract_doc_numbers
+from xml_extractor.splitter import split_documents
+
+
+class TestGenerateDocument:
+    """Tests for generate_document function."""
+
+    def test_deterministic(self):
+        """The same spec and seed give the same bytes."""
+        spec = CorpusSpec()
+        assert generate_document(spec, 7).content == generate_document(spec, 7).content
+        assert generate_document(spec, 7).content != generate_document(spec, 8).content
+
+    @pytest.mark.parametrize("namespaces", [False, True])
+    def test_expected_doc_numbers_match_extractor(self, namespaces):
+        """The ground truth agrees with the extractor for well-formed documents."""
+        for seed in range(10):
+            spec = CorpusSpec(size=2048, document_ids=seed, namespaces=namespaces)
+            document = generate_document(spec, seed)
+            assert extract_doc_numbers(document.content) == document.doc_numbers
+
+    def test_size_and_document_ids(self):
+        """Documents reach the requested size with the requested document-ids."""
+        document = generate_document(CorpusSpec(size=100 * 1024, document_ids=50))
+        assert 100 * 1024 <= len(document.content) < 110 * 1024
+        assert len(document.doc_numbers) == 50
+
+    def test_malformed_rate(self):
+        """With a rate of 1 every document is malformed and has no ground truth."""
+        document = generate_document(CorpusSpec(malformed_rate=1.0))
+        assert document.malformation is not None
+        assert document.doc_numbers is None
+
+    def test_streamed_document_matches(self):
+        """write_document produces the same bytes as generate_document."""
+        spec = CorpusSpec(size=50 * 1024)
+        output = io.BytesIO()
+        assert write_document(output, spec, 3) == len(output.getvalue())
+        assert output.getvalue() == generate_document(spec, 3).content
+
+
+class TestWriters:
+    """Tests for write_corpus and write_dump functions."""
+
+    def test_write_corpus(self, tmp_path):
+        """One file per document, in seed order."""
+        paths = write_corpus(tmp_path, 3, CorpusSpec(size=1024), seed=5)
+        assert [p.name for p in paths] == ["doc-000000.xml", "doc-000001.xml", "doc-000002.xml"]
+        assert paths[1].read_bytes() == generate_document(CorpusSpec(size=1024), 6).content
+
+    def test_write_dump_splits_back(self, tmp_path):
+        """A dump splits back into the generated documents."""
+        path = tmp_path / "dump.xml"
+        write_dump(path, 4, CorpusSpec(size=1024))
+        assert len(list(split_documents(path))) == 4
+
+
+def test_parse_size():
+    """Sizes accept plain bytes and KB/MB/GB suffixes."""
+    assert parse_size("512") == 512
+    assert parse_size("10KB") == 10 * 1024
+    assert parse_size("1.5mb") == 1536 * 1024
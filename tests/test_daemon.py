@@ -0,0 +1,123 @@
+"""Tests for the extraction daemon and the CLI's client mode."""
+
+import io
+import socket
+import sys
+import threading
+
+import pytest
+
+from main import main
+from xml_extractor.daemon import ExtractionServer, request
+
+XML = b"""<root>
+  <document-id format="patent-office"><doc-number>222</doc-number></document-id>
+  <document-id format="epo"><doc-number>111</doc-number></document-id>
+</root>"""
+
+
+@pytest.fixture
+def socket_path(tmp_path_factory):
+    # Socket paths are limited to about 100 bytes, so keep it short
+    return str(tmp_path_factory.mktemp("d") / "x.sock")
+
+
+@pytest.fixture
+def server(socket_path, tmp_path):
+    server = ExtractionServer(socket_path, cache_path=tmp_path / "cache.sqlite")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class TestExtractionServer:
+    """Tests for ExtractionServer class and the request function."""
+
+    def test_path_and_body_requests(self, server, socket_path, tmp_path):
+        path = tmp_path / "a.xml"
+        path.write_bytes(XML)
+
+        assert request(socket_path, {"path": str(path)}) == {"doc_numbers": ["111", "222"]}
+        assert request(socket_path, {"stream": True}, XML) == {"doc_numbers": ["111", "222"]}
+        assert server.cache.stats()["misses"] == 1
+
+    def test_cache_hit(self, server, socket_path):
+        request(socket_path, {}, XML)
+        request(socket_path, {}, XML)
+        assert server.cache.stats()["hits"] == 1
+
+    def test_records_and_policy(self, socket_path, server):
+        response = request(socket_path, {"records": True, "policy": "patent-office,epo"}, XML)
+        assert [r["doc_number"] for r in response["records"]] == ["222", "111"]
+
+    def test_errors(self, server, socket_path, tmp_path):
+        empty = request(socket_path, {}, b"")
+        assert (empty["error"], empty["extraction"]) == ("XMLParseError", True)
+        assert empty["message"].startswith("Failed to parse XML")
+        missing = request(socket_path, {"path": str(tmp_path / "missing.xml")})
+        assert (missing["error"], missing["extraction"]) == ("FileNotFoundError", False)
+        assert request(socket_path, {"policy": "lang=en"}, XML)["error"] == "ValueError"
+
+    def test_several_requests_per_connection(self, server, socket_path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(b'{"size": %d}\n%s{"size": 0}\n' % (len(XML), XML))
+            with sock.makefile("rb") as responses:
+                assert b"111" in responses.readline()
+                assert b"XMLParseError" in responses.readline()
+
+    def test_malformed_request_line(self, server, socket_path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(b"[1]\n")
+            with sock.makefile("rb") as responses:
+                assert b"JSON object" in responses.readline()
+                assert responses.readline() == b""
+
+    def test_running_daemon_is_not_replaced(self, server, socket_path):
+        with pytest.raises(OSError, match="already listening"):
+            ExtractionServer(socket_path)
+
+    def test_stale_socket_is_replaced(self, socket_path):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+
+        server = ExtractionServer(socket_path)
+        server.server_close()
+
+
+class TestClientMode:
+    """Tests for xml-extractor --socket."""
+
+    def test_file_and_stdin(self, server, socket_path, tmp_path, capsys, monkeypatch):
+        path = tmp_path / "a.xml"
+        path.write_bytes(XML)
+        main(["--socket", socket_path, str(path)])
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(XML)))
+        main(["--socket", socket_path, "--priority-policy", "patent-office"])
+
+        assert capsys.readouterr().out == "111\n222\n222\n111\n"
+        assert server.cache.stats()["misses"] == 2
+
+    def test_extraction_error_exit_code(self, server, socket_path, capsys, monkeypatch):
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"")))
+        with pytest.raises(SystemExit) as exc_info:
+            main(["--socket", socket_path])
+
+        assert exc_info.value.code == 2
+        assert "Extraction error: Failed to parse XML" in capsys.readouterr().err
+
+    def test_falls_back_without_daemon(self, socket_path, capsys, monkeypatch):
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(XML)))
+        main(["--socket", socket_path, "--records"])
+
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split('"')[3] for line in lines] == ["111", "222"]
+
+    def test_socket_rejects_cache(self, socket_path):
+        with pytest.raises(SystemExit):
+            main(["--socket", socket_path, "--cache", "c.sqlite"])
@@ -0,0 +1,167 @@
+"""Tests for the request body decompression middleware."""
+
+import asyncio
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api.decompression import (
+    CHUNK_SIZE,
+    FORM_OVERHEAD,
+    DecompressRequestMiddleware,
+    RequestSizeLimitMiddleware,
+)
+
+MAX_SIZE = 1024 * 1024
+
+GZIPPED = gzip.compress(b"x" * 1000)
+
+echo = FastAPI()
+
+
+@echo.post("/echo")
+@echo.post("/small")
+async def echo_body(request: Request):
+    """Report the decoded body and the largest chunk it arrived in."""
+    largest = size = 0
+    async for chunk in request.stream():
+        largest = max(largest, len(chunk))
+        size += len(chunk)
+    return {
+        "size": size,
+        "largest_chunk": largest,
+        "content_encoding": request.headers.get("content-encoding"),
+    }
+
+
+echo.add_middleware(DecompressRequestMiddleware, max_size=MAX_SIZE)
+client = TestClient(echo)
+
+
+def post(body: bytes, encoding: str | None):
+    headers = {"Content-Encoding": encoding} if encoding else {}
+    return client.post("/echo", content=body, headers=headers)
+
+
+class TestDecompressRequestMiddleware:
+    """Tests for DecompressRequestMiddleware class."""
+
+    @pytest.mark.parametrize(
+        "encoding, compress",
+        [("gzip", gzip.compress), ("deflate", zlib.compress), (None, bytes)],
+    )
+    def test_body_is_decoded(self, encoding, compress):
+        response = post(compress(b"x" * 200_000), encoding)
+
+        assert response.status_code == 200
+        assert response.json()["size"] == 200_000
+        assert response.json()["content_encoding"] is None
+
+    def test_body_is_decoded_in_bounded_chunks(self):
+        response = post(gzip.compress(bytes(MAX_SIZE)), "gzip")
+
+        assert response.json()["largest_chunk"] <= CHUNK_SIZE
+
+    def test_bomb_is_rejected_with_413(self):
+        """Decoding stops at the limit instead of inflating the whole body."""
+        response = post(gzip.compress(bytes(1024 * 1024)) * 64, "gzip")
+
+        assert response.status_code == 413
+        assert response.json()["error"] == "PayloadTooLarge"
+
+    @pytest.mark.parametrize(
+        "body",
+        [GZIPPED[:-8], GZIPPED[:10] + b"\xff" * 4 + GZIPPED[14:]],
+        ids=["truncated", "corrupt"],
+    )
+    def test_truncated_or_corrupt_body_is_rejected_with_400(self, body):
+        response = post(body, "gzip")
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "CompressionError"
+
+    def test_unsupported_encoding_is_rejected_with_415(self):
+        response = post(b"data", "br")
+
+        assert response.status_code == 415
+        assert "gzip" in response.json()["detail"]
+
+
+limited = RequestSizeLimitMiddleware(
+    echo, max_size=MAX_SIZE, path_limits={"/small": 1000 + FORM_OVERHEAD}
+)
+
+
+def call(app, path: str, chunks: list[bytes], headers: list[tuple[bytes, bytes]] = ()):
+    """Send a body in chunks straight to an ASGI app.
+
+    Returns:
+        Tuple of (response status, JSON body, number of chunks the app received)
+    """
+    received = 0
+    sent = []
+
+    async def receive():
+        nonlocal received
+        if received < len(chunks):
+            received += 1
+            return {
+                "type": "http.request",
+                "body": chunks[received - 1],
+                "more_body": received < len(chunks),
+            }
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": list(headers),
+        "http_version": "1.1",
+        "scheme": "http",
+        "server": ("test", 80),
+        "client": ("test", 1),
+    }
+    asyncio.run(app(scope, receive, send))
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return sent[0]["status"], json.loads(body), received
+
+
+class TestRequestSizeLimitMiddleware:
+    """Tests for RequestSizeLimitMiddleware class."""
+
+    def test_body_within_the_limit(self):
+        status, body, _ = call(limited, "/echo", [b"x" * 1000] * 4)
+        assert status == 200
+        assert body["size"] == 4000
+
+    def test_streamed_body_is_rejected_as_the_limit_is_crossed(self):
+        """Without a Content-Length the body is counted as it arrives."""
+        status, body, received = call(limited, "/echo", [bytes(CHUNK_SIZE)] * 64)
+
+        assert status == 413
+        assert body["error"] == "PayloadTooLarge"
+        assert received == MAX_SIZE // CHUNK_SIZE + 1
+
+    def test_content_length_is_rejected_before_reading(self):
+        headers = [(b"content-length", str(MAX_SIZE + 1).encode())]
+        status, _, received = call(limited, "/echo", [b"x"], headers)
+
+        assert status == 413
+        assert received == 0
+
+    def test_path_limit_fails_like_the_endpoint(self):
+        status, body, _ = call(limited, "/small", [bytes(FORM_OVERHEAD + 1001)])
+
+        assert status == 422
+        assert body["message"] == "File too large"
@@ -0,0 +1,169 @@
+"""Tests for corpus-wide deduplication and batch --dedup."""
+
+import csv
+import json
+import random
+import tracemalloc
+
+import pytest
+
+from main import main
+from xml_extractor.dedup import Deduplicator
+
+
+def document(*doc_numbers, fmt="epo"):
+    ids = "".join(
+        f'<document-id format="{fmt}"><doc-number>{doc}</doc-number></document-id>'
+        for doc in doc_numbers
+    )
+    return f"<root>{ids}</root>".encode()
+
+
+class TestDeduplicator:
+    """Tests for Deduplicator class."""
+
+    def test_first_seen_provenance(self):
+        with Deduplicator() as dedup:
+            assert dedup.add("a.xml", ["1", "2", "1"]) == {}
+            assert dedup.add("b.xml", ["3", "2", "1"]) == {"2": "a.xml", "1": "a.xml"}
+            assert dedup.add("c.xml", ["3", "4"]) == {"3": "b.xml"}
+            assert dedup.stats() == {
+                "documents": 3,
+                "distinct": 4,
+                "duplicates": 3,
+                "spills": 0,
+                "probes": 0,
+            }
+
+    def test_source_seen_again_is_not_its_own_duplicate(self):
+        with Deduplicator() as dedup:
+            dedup.add("a.xml", ["1"])
+            assert dedup.add("a.xml", ["1", "2"]) == {}
+
+    def test_spilling_stays_exact(self):
+        """A budget far below the corpus spills to disk without changing any answer."""
+        rng = random.Random(7)
+        documents = [
+            (f"{n}.xml", [str(rng.randrange(20_000)) for _ in range(rng.randrange(1, 20))])
+            for n in range(3000)
+        ]
+        first_seen = {}
+        with Deduplicator(memory_budget=64 * 1024) as dedup:
+            for source, doc_numbers in documents:
+                expected = {
+                    doc: first_seen[doc]
+                    for doc in dict.fromkeys(doc_numbers)
+                    if doc in first_seen and first_seen[doc] != source
+                }
+                assert dedup.add(source, doc_numbers) == expected
+                for doc in doc_numbers:
+                    first_seen.setdefault(doc, source)
+            stats = dedup.stats()
+        assert stats["spills"] > 1
+        assert stats["probes"] > 0
+        assert stats["distinct"] == len(first_seen)
+
+    def test_memory_is_bounded_by_the_budget(self):
+        budget = 256 * 1024
+        with Deduplicator(memory_budget=budget) as dedup:
+            tracemalloc.start()
+            try:
+                for n in range(2000):
+                    dedup.add(f"{n}.xml", [f"EP{n:07d}{i}" for i in range(50)])
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert dedup.stats()["distinct"] == 100_000
+        # 100,000 doc-numbers would take several MB in a plain set
+        assert peak < 2 * budget
+
+    def test_checkpoint_persists_state(self, tmp_path):
+        path = tmp_path / "state.dedup"
+        with Deduplicator(path) as dedup:
+            dedup.add("a.xml", ["1"])
+            dedup.checkpoint()
+            # Not checkpointed, so forgotten like the output after the checkpoint
+            dedup.add("b.xml", ["2"])
+
+        with Deduplicator(path) as dedup:
+            assert dedup.add("c.xml", ["1", "2"]) == {"1": "a.xml"}
+        with Deduplicator(path, reset=True) as dedup:
+            assert dedup.add("c.xml", ["1"]) == {}
+        assert path.exists()
+
+    def test_temporary_state_is_deleted(self):
+        dedup = Deduplicator()
+        dedup.add("a.xml", ["1"])
+        dedup.checkpoint()
+        dedup.close()
+        with pytest.raises(FileNotFoundError):
+            open(dedup.path)
+
+
+class TestDedupCLI:
+    """Tests for batch --dedup."""
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        (tmp_path / "a.xml").write_bytes(document("111", "222"))
+        (tmp_path / "b.xml").write_bytes(document("333", "111"))
+        (tmp_path / "c.xml").write_bytes(b"")
+        (tmp_path / "d.xml").write_bytes(document("222", "444", "444", fmt="patent-office"))
+        return tmp_path
+
+    def test_json_records(self, corpus, capsys):
+        main(["batch", str(corpus), "--workers", "1", "--dedup"])
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        a = str(corpus / "a.xml")
+
+        assert [record["doc_numbers"] for record in records] == [
+            ["111", "222"],
+            ["333"],
+            [],
+            # Repeats within a document are kept
+            ["444", "444"],
+        ]
+        assert [record["duplicates"] for record in records] == [{}, {"111": a}, {}, {"222": a}]
+        assert records[2]["error"] == "XMLParseError"
+        assert "Dropped 2 repeated doc-numbers (4 distinct" in captured.err
+
+    def test_sink_rows(self, corpus, tmp_path, capsys):
+        output = tmp_path / "rows.csv"
+        main(["batch", str(corpus), "--dedup", "--sink", "csv", "--output", str(output)])
+        with open(output, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [(row["source"], row["doc_number"]) for row in rows] == [
+            (str(corpus / "a.xml"), "111"),
+            (str(corpus / "a.xml"), "222"),
+            (str(corpus / "b.xml"), "333"),
+            (str(corpus / "d.xml"), "444"),
+            (str(corpus / "d.xml"), "444"),
+        ]
+
+    def test_index_keeps_every_mention(self, corpus, tmp_path, capsys):
+        index = tmp_path / "index.db"
+        main(["batch", str(corpus), "--dedup", "--index", str(index)])
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert records[1]["doc_numbers"] == ["333"]
+
+        main(["lookup", "--index", str(index), "111"])
+        sources = [json.loads(line)["source"] for line in capsys.readouterr().out.splitlines()]
+        assert sources == [str(corpus / "a.xml"), str(corpus / "b.xml")]
+
+    def test_resume_remembers_seen_doc_numbers(self, corpus, tmp_path, capsys):
+        output = tmp_path / "out.jsonl"
+        args = ["batch", str(corpus), "--dedup", "--resume", "--output", str(output)]
+        main(args)
+        (corpus / "e.xml").write_bytes(document("333", "555"))
+        main(args)
+        capsys.readouterr()
+
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert records[-1]["path"] == str(corpus / "e.xml")
+        assert records[-1]["doc_numbers"] == ["555"]
+        assert records[-1]["duplicates"] == {"333": str(corpus / "b.xml")}
+
+    def test_invalid_memory_budget(self, corpus):
+        with pytest.raises(SystemExit):
+            main(["batch", str(corpus), "--dedup", "--dedup-memory", "0"])
@@ -1,6 +1,15 @@
 """Tests for the extractor module."""
 
-from xml_extractor.extractor import extract_doc_numbers, get_priority
+from concurrent.futures import ThreadPoolExecutor
+
+from xml_extractor.extractor import (
+    DocumentIdRecord,
+    Extractor,
+    extract_doc_numbers,
+    extract_records,
+    get_priority,
+)
+from xml_extractor.priority import PriorityPolicy
 
 
 class TestGetPriority:
@@ -106,3 +115,126 @@ class TestExtractDocNumbers:
 
         result = extract_doc_numbers(xml)
         assert result == ["123456"]
+
+    def test_bytes_input(self):
+        """Test that raw bytes are accepted without decoding first."""
+        xml = b"""<root>
+          <document-id format="patent-office"><doc-number>222</doc-number></document-id>
+          <document-id format="epo"><doc-number>111</doc-number></document-id>
+        </root>"""
+
+        assert extract_doc_numbers(xml) == ["111", "222"]
+        assert extract_doc_numbers(memoryview(xml)) == ["111", "222"]
+
+
+RECORD_XML = b"""<patent-document>
+  <application-reference ucid="US-1-A">
+    <document-id format="patent-office" mxw-id="PA1" load-source="docdb">
+      <country> US </country><doc-number>111</doc-number><kind>A</kind><date>20200101</date>
+    </document-id>
+  </application-reference>
+  <priority-claims>
+    <priority-claim><document-id><doc-number>222</doc-number><kind></kind></document-id></priority-claim>
+  </priority-claims>
+  <application-reference ucid="US-3-A">
+    <document-id format="epo">
+      <doc-number>333</doc-number><doc-number>ignored</doc-number>
+    </document-id>
+    <document-id format="epo"><doc-number>  </doc-number></document-id>
+  </application-reference>
+</patent-document>"""
+
+
+class TestExtractRecords:
+    """Tests for extract_records function."""
+
+    def test_fields(self):
+        """Every field of a document-id is read in one pass."""
+        record = extract_records(RECORD_XML)[1]
+        assert record == DocumentIdRecord(
+            doc_number="111",
+            format="patent-office",
+            country="US",
+            kind="A",
+            date="20200101",
+            mxw_id="PA1",
+            load_source="docdb",
+            ucid="US-1-A",
+            priority=1,
+            position=0,
+        )
+
+    def test_priority_order_matches_doc_numbers(self):
+        """Records follow the same order extract_doc_numbers returns."""
+        records = extract_records(RECORD_XML)
+        assert [r.doc_number for r in records] == extract_doc_numbers(RECORD_XML)
+        assert [r.doc_number for r in records] == ["333", "111", "222"]
+
+    def test_missing_values_are_none(self):
+        """Absent or empty children and attributes become None."""
+        record = extract_records(RECORD_XML)[2]
+        assert (record.format, record.country, record.kind, record.ucid) == (None, None, None, None)
+
+    def test_first_doc_number_wins(self):
+        """Only the first doc-number child is used, and blank ones are skipped."""
+        records = extract_records(RECORD_XML)
+        assert records[0].doc_number == "333"
+        assert records[0].position == 2
+        assert len(records) == 3
+
+
+class TestExtractor:
+    """Tests for the reusable Extractor class."""
+
+    def test_reuse_across_documents(self):
+        """One instance should give independent results for successive documents."""
+        extractor = Extractor()
+        first = b"<root><document-id><doc-number>1</doc-number></document-id></root>"
+        malformed = b"<root><document-id><doc-number>2</doc-number></document-id><x></root>"
+        second = b"<root><document-id format='epo'><doc-number>3</doc-number></document-id></root>"
+
+        assert extractor.extract_doc_numbers(first) == ["1"]
+        assert extractor.extract_doc_numbers(malformed) == ["2"]
+        assert extractor.extract_doc_numbers(second) == ["3"]
+
+    def test_shared_across_threads(self):
+        """One instance can be used from several threads at once."""
+        extractor = Extractor()
+        docs = [
+            f"<root><document-id><doc-number>{i}</doc-number></document-id></root>".encode()
+            for i in range(200)
+        ]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(extractor.extract_doc_numbers, docs))
+
+        assert results == [[str(i)] for i in range(200)]
+
+
+class TestPriorityPolicies:
+    """Tests for extraction under a non-default PriorityPolicy."""
+
+    XML = """<root>
+      <document-id format="epo"><doc-number>1</doc-number></document-id>
+      <document-id format="original" load-source="docdb"><doc-number>2</doc-number></document-id>
+      <document-id><doc-number>3</doc-number></document-id>
+      <document-id format="original"><doc-number>4</doc-number></document-id>
+    </root>"""
+
+    def test_format_levels(self):
+        policy = PriorityPolicy("original,none,other")
+        assert extract_doc_numbers(self.XML, policy=policy) == ["2", "4", "3", "1"]
+
+    def test_load_source_levels(self):
+        policy = PriorityPolicy("load-source=docdb,epo,other,none")
+        records = extract_records(self.XML, policy=policy)
+
+        assert [r.doc_number for r in records] == ["2", "1", "4", "3"]
+        assert [r.priority for r in records] == [0, 1, 2, 3]
+
+    def test_fast_path_agrees(self):
+        policy = PriorityPolicy("load-source=docdb,none,epo")
+        fast = Extractor(fast_path=True)
+        assert fast.extract_doc_numbers(self.XML, policy=policy) == extract_doc_numbers(
+            self.XML, policy=policy
+        )
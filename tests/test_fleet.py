@@ -0,0 +1,101 @@
+"""Tests for the shared-memory fleet counters."""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.dependencies
+from api import fleet
+from api.fleet import FleetStats
+from api.main import app
+from xml_extractor.cache import ResultCache
+
+CACHE_STATS = {
+    "entries": 2,
+    "bytes": 100,
+    "hits": 3,
+    "disk_hits": 1,
+    "misses": 2,
+    "hit_rate": 0.6,
+    "evictions": 0,
+}
+
+
+class TestFleetStats:
+    """Tests for FleetStats class."""
+
+    def test_counters_are_shared_with_forked_workers(self):
+        stats = FleetStats(slots=2)
+        pids = []
+        for slot in range(2):
+            pid = os.fork()
+            if pid == 0:
+                stats.attach(slot)
+                for _ in range(slot + 1):
+                    stats.record_request(error=slot == 1, cache=CACHE_STATS)
+                os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+        snapshot = stats.snapshot()
+        assert (snapshot["workers"], snapshot["requests"], snapshot["errors"]) == (2, 3, 2)
+        assert snapshot["cache"]["hits"] == 6
+        assert snapshot["cache"]["hit_rate"] == 0.6
+
+    def test_replacement_worker_keeps_counting(self):
+        """Counters survive a recycled worker; its cache's size does not."""
+        stats = FleetStats(slots=1)
+        stats.attach(0)
+        stats.record_request(error=False, cache=CACHE_STATS)
+        stats.restarted()
+
+        stats.attach(0)
+        stats.record_request(error=False, cache=dict(CACHE_STATS, hits=1, entries=1))
+
+        snapshot = stats.snapshot()
+        assert (snapshot["requests"], snapshot["restarts"]) == (2, 1)
+        assert (snapshot["cache"]["hits"], snapshot["cache"]["entries"]) == (4, 1)
+
+    def test_unattached_process_records_nothing(self):
+        stats = FleetStats(slots=1)
+        stats.record_request(error=True, cache=None)
+        assert stats.snapshot()["requests"] == 0
+
+
+class TestFleetStatsMiddleware:
+    """Tests for the request counting middleware and /health."""
+
+    @pytest.fixture
+    def stats(self, monkeypatch):
+        stats = FleetStats(slots=1)
+        stats.attach(0)
+        monkeypatch.setattr(fleet, "stats", stats)
+        monkeypatch.setattr(api.dependencies, "_result_cache", ResultCache())
+        return stats
+
+    def test_health_reports_the_fleet(self, stats):
+        client = TestClient(app)
+        client.post("/extract", files={"file": ("a.xml", "<root/>", "text/xml")})
+        client.get("/missing")
+
+        health = client.get("/health").json()
+
+        # The /health request is counted once its response has been sent
+        assert (health["fleet"]["workers"], health["fleet"]["requests"]) == (1, 2)
+        assert health["fleet"]["cache"]["misses"] == 1
+        assert stats.snapshot()["requests"] == 3
+
+    def test_server_errors_are_counted(self, stats, monkeypatch):
+        def broken(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr("api.routes.extract_doc_numbers", broken)
+        client = TestClient(app, raise_server_exceptions=False)
+        client.post("/extract", files={"file": ("a.xml", "<root/>", "text/xml")})
+
+        assert stats.snapshot()["errors"] == 1
+
+    def test_without_launcher(self):
+        assert "fleet" not in TestClient(app).get("/health").json()
@@ -0,0 +1,121 @@
+"""Tests for the reverse index and the lookup CLI."""
+
+import json
+import sqlite3
+
+import pytest
+
+from main import main
+from xml_extractor.index import DocNumberIndex, IndexEntry
+
+GOOD_XML = b"""<root>
+  <document-id format="patent-office"><doc-number>222</doc-number></document-id>
+  <document-id format="epo"><doc-number>111</doc-number></document-id>
+</root>"""
+
+
+def rows(source, *doc_numbers):
+    return [(source, 0, position, doc, "epo") for position, doc in enumerate(doc_numbers)]
+
+
+class TestDocNumberIndex:
+    """Tests for DocNumberIndex class."""
+
+    def test_lookup(self, tmp_path):
+        with DocNumberIndex(tmp_path / "index.db") as index:
+            index.add("b.xml", [("b.xml", 1, 0, "1", "patent-office"), ("b.xml", 2, 3, "1", None)])
+            index.add("a.xml", rows("a.xml", "1", "2"))
+
+            assert index.lookup("1") == [
+                IndexEntry("a.xml", 0, 0, "epo"),
+                IndexEntry("b.xml", 1, 0, "patent-office"),
+                IndexEntry("b.xml", 2, 3, None),
+            ]
+            assert index.lookup("1", limit=1) == [IndexEntry("a.xml", 0, 0, "epo")]
+            assert index.lookup("3") == []
+            assert index.stats() == {"sources": 2, "postings": 4}
+
+    def test_reindexing_replaces_a_source(self, tmp_path):
+        """An incremental run rewrites changed sources and keeps the rest."""
+        with DocNumberIndex(tmp_path / "index.db") as index:
+            index.add("a.xml", rows("a.xml", "1", "2"))
+            index.add("b.xml", rows("b.xml", "2"))
+        with DocNumberIndex(tmp_path / "index.db") as index:
+            index.add("a.xml", rows("a.xml", "3"))
+
+            assert index.lookup("1") == []
+            assert [entry.source for entry in index.lookup("2")] == ["b.xml"]
+            assert [entry.source for entry in index.lookup("3")] == ["a.xml"]
+
+    def test_readers_see_committed_sources(self, tmp_path):
+        writer = DocNumberIndex(tmp_path / "index.db", commit_every=2)
+        reader = DocNumberIndex(tmp_path / "index.db", readonly=True)
+
+        writer.add("a.xml", rows("a.xml", "1"))
+        assert reader.lookup("1") == []
+        writer.add("b.xml", rows("b.xml", "1"))
+        assert len(reader.lookup("1")) == 2
+
+        writer.close()
+        reader.close()
+
+    def test_readonly_index_must_exist(self, tmp_path):
+        with pytest.raises(sqlite3.OperationalError):
+            DocNumberIndex(tmp_path / "missing.db", readonly=True)
+
+
+class TestIndexCLI:
+    """Tests for batch --index and the lookup subcommand."""
+
+    @pytest.fixture
+    def index_path(self, tmp_path, capsys):
+        (tmp_path / "a.xml").write_bytes(GOOD_XML)
+        (tmp_path / "empty.xml").write_bytes(b"")
+        path = tmp_path / "index.db"
+        main(["batch", str(tmp_path), "--workers", "1", "--index", str(path)])
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert records[0]["doc_numbers"] == ["111", "222"]
+        assert records[1]["error"] == "XMLParseError"
+        return path
+
+    def test_batch_builds_index(self, index_path, tmp_path, capsys):
+        main(["lookup", "--index", str(index_path), "111", "222"])
+
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert lines == [
+            {
+                "doc_number": "111",
+                "source": str(tmp_path / "a.xml"),
+                "priority": 0,
+                "position": 1,
+                "format": "epo",
+            },
+            {
+                "doc_number": "222",
+                "source": str(tmp_path / "a.xml"),
+                "priority": 1,
+                "position": 0,
+                "format": "patent-office",
+            },
+        ]
+
+    def test_incremental_batch(self, index_path, tmp_path, capsys):
+        """A later batch over new files adds to the index."""
+        (tmp_path / "new").mkdir()
+        (tmp_path / "new" / "b.xml").write_bytes(GOOD_XML.replace(b"111", b"333"))
+        main(["batch", str(tmp_path / "new"), "--index", str(index_path)])
+        capsys.readouterr()
+
+        main(["lookup", "--index", str(index_path), "222"])
+        sources = [json.loads(line)["source"] for line in capsys.readouterr().out.splitlines()]
+        assert sources == [str(tmp_path / "a.xml"), str(tmp_path / "new" / "b.xml")]
+
+    def test_not_found_exit_code(self, index_path, monkeypatch):
+        monkeypatch.setenv("INDEX_PATH", str(index_path))
+        with pytest.raises(SystemExit) as exc_info:
+            main(["lookup", "999"])
+        assert exc_info.value.code == 1
+
+    def test_index_rejects_cache(self, tmp_path):
+        with pytest.raises(SystemExit):
+            main(["batch", str(tmp_path), "--index", "i.db", "--cache", "c.sqlite"])
@@ -0,0 +1,69 @@
+"""Tests for the instrumentation hooks."""
+
+import pytest
+
+from xml_extractor import extract_doc_numbers, extract_doc_numbers_streaming, instrumentation
+
+XML = b"<root><document-id><doc-number>1</doc-number></document-id></root>"
+
+
+class ListRecorder:
+    """Recorder that keeps every observation."""
+
+    def __init__(self):
+        self.stages: list[str] = []
+        self.durations: list[int] = []
+        self.events: list[str] = []
+
+    def observe(self, stage, duration_ns):
+        self.stages.append(stage)
+        self.durations.append(duration_ns)
+
+    def count(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def recorder():
+    """Install a ListRecorder for one test, restoring the previous recorder."""
+    previous = instrumentation.recorder
+    recorder = ListRecorder()
+    instrumentation.set_recorder(recorder)
+    yield recorder
+    instrumentation.set_recorder(previous)
+
+
+class TestHooks:
+    """Tests for the stage hooks in the extractors."""
+
+    def test_tree_extraction_stages(self, recorder):
+        """Tree extraction reports parse, locate and sort in order."""
+        assert extract_doc_numbers(XML) == ["1"]
+        assert recorder.stages == ["parse", "locate", "sort"]
+        assert all(duration >= 0 for duration in recorder.durations)
+        assert recorder.events == []
+
+    def test_text_input_is_decoded(self, recorder):
+        """Text input adds a decode stage before parsing."""
+        extract_doc_numbers(XML.decode())
+        assert recorder.stages[:2] == ["decode", "parse"]
+
+    def test_streaming_stages(self, recorder):
+        """Streaming extraction reports parse and sort."""
+        assert extract_doc_numbers_streaming(XML) == ["1"]
+        assert recorder.stages == ["parse", "sort"]
+
+    @pytest.mark.parametrize("extract", [extract_doc_numbers, extract_doc_numbers_streaming])
+    def test_recovered_parse_is_counted(self, recorder, extract):
+        """Documents salvaged by recover mode are counted."""
+        extract(b"<root><document-id><doc-number>1</doc-number></document-id>")
+        assert recorder.events == ["recovered_parse"]
+
+    def test_disabled_by_default(self):
+        """Without a recorder nothing is measured."""
+        previous = instrumentation.recorder
+        instrumentation.set_recorder(None)
+        try:
+            assert extract_doc_numbers(XML) == ["1"]
+        finally:
+            instrumentation.set_recorder(previous)
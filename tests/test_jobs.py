@@ -0,0 +1,244 @@
+"""Tests for the asynchronous job store and manager."""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from api.jobs import (
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    Job,
+    JobManager,
+    JobStore,
+    MemoryJobStore,
+    SQLiteJobStore,
+)
+from api.workers import PoolSaturatedError
+
+
+def wait_until_finished(manager: JobManager, job_id: str, timeout: float = 5.0) -> Job:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job.status in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore(ttl=60)
+    return SQLiteJobStore(tmp_path / "jobs.db", ttl=60)
+
+
+class TestJobStore:
+    """Tests for MemoryJobStore and SQLiteJobStore classes."""
+
+    def test_add_get_update(self, store):
+        store.add(Job(id="a", priority=3, created_at=time.time()))
+        store.update("a", status=RUNNING, done=2, total=5)
+
+        job = store.get("a")
+        assert (job.status, job.priority, job.done, job.total) == (RUNNING, 3, 2, 5)
+        assert store.get("missing") is None
+
+    def test_finished_jobs_expire(self, store):
+        """Expired jobs are hidden at once and deleted by the next sweep."""
+        now = time.time()
+        store.add(Job(id="old", priority=5, created_at=now - 120))
+        store.update("old", status=SUCCEEDED, finished_at=now - 61, status_code=200, result="{}")
+        store.add(Job(id="new", priority=5, created_at=now))
+        store.update("new", status=SUCCEEDED, finished_at=now, status_code=200, result="{}")
+        store.add(Job(id="queued", priority=5, created_at=now - 120))
+
+        assert store.get("old") is None
+        assert store.evict() == 1
+        assert store.get("new") is not None
+        assert store.get("queued") is not None
+
+    def test_sqlite_store_is_shared(self, tmp_path):
+        """Another process's store on the same file sees every job."""
+        SQLiteJobStore(tmp_path / "jobs.db", ttl=60).add(Job(id="a", priority=5))
+        assert SQLiteJobStore(tmp_path / "jobs.db", ttl=60).get("a").status == QUEUED
+
+    def test_incomplete_store_cannot_be_created(self):
+        class NoEviction(JobStore):
+            def add(self, job):
+                pass
+
+            def get(self, job_id):
+                return None
+
+            def update(self, job_id, **changes):
+                pass
+
+        with pytest.raises(TypeError):
+            NoEviction(ttl=60)
+
+    def test_sqlite_store_fails_jobs_of_dead_processes(self, tmp_path):
+        """Opening the store fails unfinished jobs left by a process that has exited."""
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        store = SQLiteJobStore(tmp_path / "jobs.db", ttl=60)
+        store.add(Job(id="orphan", priority=5, owner=dead.pid))
+        store.update("orphan", status=RUNNING)
+        store.add(Job(id="live", priority=5))
+        store.add(Job(id="done", priority=5, owner=dead.pid, status=SUCCEEDED, finished_at=1e10))
+
+        # A restarted server opens the store
+        SQLiteJobStore(tmp_path / "jobs.db", ttl=60)
+        orphan = store.get("orphan")
+        assert (orphan.status, orphan.status_code) == (FAILED, 503)
+        assert orphan.error["error"] == "ServiceUnavailable"
+        assert store.get("live").status == QUEUED
+        assert store.get("done").status == SUCCEEDED
+
+    def test_sqlite_store_upgrades_old_files(self, tmp_path):
+        """Files written before jobs recorded their process gain the column."""
+        path = tmp_path / "jobs.db"
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE jobs (id TEXT PRIMARY KEY, priority INTEGER, status TEXT, "
+                "created_at REAL, started_at REAL, finished_at REAL, done INTEGER, "
+                "total INTEGER, status_code INTEGER, result TEXT)"
+            )
+            conn.execute("INSERT INTO jobs (id, priority, status) VALUES ('old', 5, 'queued')")
+        conn.close()
+
+        store = SQLiteJobStore(path, ttl=60)
+        assert store.get("old").status == FAILED
+        store.add(Job(id="new", priority=5))
+        assert store.get("new").owner == os.getpid()
+
+
+class TestJobManager:
+    """Tests for JobManager class."""
+
+    def test_runs_task_and_records_progress(self, store):
+        manager = JobManager(store, workers=1, queue_depth=4)
+        try:
+
+            def task(progress):
+                progress(1, 2)
+                progress(2, 2)
+                return 200, '{"ok": true}'
+
+            job = manager.submit(task)
+            assert job.status == QUEUED
+            job = wait_until_finished(manager, job.id)
+        finally:
+            manager.shutdown()
+
+        assert (job.status, job.status_code, job.result) == (SUCCEEDED, 200, '{"ok": true}')
+        assert (job.done, job.total) == (2, 2)
+        assert job.started_at is not None and job.finished_at >= job.started_at
+
+    def test_failures(self, store):
+        """Error results and exceptions both mark the job failed."""
+        manager = JobManager(store, workers=1, queue_depth=4)
+        try:
+            rejected = manager.submit(lambda progress: (400, '{"error": "XMLParseError"}'))
+            crashed = manager.submit(lambda progress: 1 / 0)
+            rejected = wait_until_finished(manager, rejected.id)
+            crashed = wait_until_finished(manager, crashed.id)
+        finally:
+            manager.shutdown()
+
+        assert (rejected.status, rejected.status_code) == (FAILED, 400)
+        assert rejected.error == {"error": "XMLParseError"}
+        assert (crashed.status, crashed.status_code) == (FAILED, 500)
+        assert crashed.error["error"] == "InternalServerError"
+
+    def test_priority_order(self, store):
+        """Queued jobs run lowest priority first, then in submission order."""
+        manager = JobManager(store, workers=1, queue_depth=8)
+        release = threading.Event()
+        order = []
+
+        def task(name):
+            def run(progress):
+                order.append(name)
+                return 200, "{}"
+
+            return run
+
+        try:
+            blocker = manager.submit(lambda progress: (release.wait(), (200, "{}"))[1])
+            jobs = [
+                manager.submit(task("late"), priority=9),
+                manager.submit(task("first"), priority=0),
+                manager.submit(task("second"), priority=5),
+                manager.submit(task("third"), priority=5),
+            ]
+            release.set()
+            for job in [blocker, *jobs]:
+                wait_until_finished(manager, job.id)
+        finally:
+            release.set()
+            manager.shutdown()
+
+        assert order == ["first", "second", "third", "late"]
+
+    def test_failing_cleanup_keeps_the_worker(self, store):
+        manager = JobManager(store, workers=1, queue_depth=4)
+        try:
+            first = manager.submit(lambda progress: (200, "{}"), cleanup=lambda: 1 / 0)
+            second = manager.submit(lambda progress: (200, "{}"))
+            assert wait_until_finished(manager, first.id).status == SUCCEEDED
+            assert wait_until_finished(manager, second.id).status == SUCCEEDED
+        finally:
+            manager.shutdown()
+
+    def test_full_queue_is_rejected(self, store):
+        manager = JobManager(store, workers=1, queue_depth=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocker(progress):
+            started.set()
+            release.wait()
+            return 200, "{}"
+
+        try:
+            manager.submit(blocker)
+            assert started.wait(5)
+            manager.submit(blocker)
+            with pytest.raises(PoolSaturatedError):
+                manager.submit(blocker)
+            assert manager.stats() == {"queued": 1, "running": 1, "workers": 1}
+        finally:
+            release.set()
+            manager.shutdown()
+
+    def test_shutdown_fails_queued_jobs(self, store):
+        manager = JobManager(store, workers=1, queue_depth=4)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocker(progress):
+            started.set()
+            release.wait()
+            return 200, "{}"
+
+        cleaned = []
+        running = manager.submit(blocker, cleanup=lambda: cleaned.append("running"))
+        queued = manager.submit(blocker, cleanup=lambda: cleaned.append("queued"))
+        assert started.wait(5)
+        threading.Timer(0.05, release.set).start()
+        manager.shutdown()
+
+        assert manager.get(running.id).status == SUCCEEDED
+        assert manager.get(queued.id).status_code == 503
+        # Discarded jobs release what they hold, as jobs that ran do
+        assert sorted(cleaned) == ["queued", "running"]
+        with pytest.raises(PoolSaturatedError):
+            manager.submit(blocker)
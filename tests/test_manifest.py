@@ -0,0 +1,169 @@
+"""Tests for the manifest module."""
+
+import os
+
+import pytest
+
+from xml_extractor.exceptions import StorageError
+from xml_extractor.manifest import Manifest, content_hash, rewind_output
+
+
+def record(key: str, error: str | None = None, digest: str | None = "abc") -> dict:
+    return {"path": key, "error": error, "hash": digest}
+
+
+def run(manifest: Manifest, items: list, offset: int = 0) -> list:
+    """Pass items through the manifest as a batch run would; returns those processed."""
+    processed = list(manifest.filter(items))
+    for item in processed:
+        if isinstance(item, str):
+            manifest.complete(record(item))
+        else:
+            key, content = item
+            digest = None if isinstance(content, Exception) else content_hash(content)
+            manifest.complete(record(key, digest=digest))
+    manifest.commit(offset)
+    return processed
+
+
+@pytest.fixture
+def files(tmp_path):
+    """Two local input files."""
+    for name in ("a.xml", "b.xml"):
+        (tmp_path / name).write_bytes(b"<root/>")
+    return [str(tmp_path / "a.xml"), str(tmp_path / "b.xml")]
+
+
+class TestManifest:
+    """Tests for Manifest class."""
+
+    def test_resume_skips_finished_files(self, tmp_path, files):
+        """Files recorded in an earlier run are skipped while unchanged."""
+        path = tmp_path / "run.manifest"
+        manifest = Manifest(path)
+        assert run(manifest, files[:1], offset=10) == files[:1]
+        manifest.close()
+
+        resumed = Manifest(path)
+        assert len(resumed) == 1
+        assert resumed.end == 10
+        assert run(resumed, files) == files[1:]
+        assert resumed.skipped == 1
+
+    def test_changed_file_is_processed_again(self, tmp_path, files):
+        """A new size or mtime marks a file as unfinished."""
+        path = tmp_path / "run.manifest"
+        run(Manifest(path), files)
+
+        os.utime(files[0], ns=(0, 0))
+        assert run(Manifest(path), files) == files[:1]
+
+    def test_documents_are_matched_by_content_hash(self, tmp_path):
+        """In-memory documents are skipped only while their content is unchanged."""
+        path = tmp_path / "run.manifest"
+        run(Manifest(path), [("gs://b/a.xml", b"<a/>"), ("gs://b/b.xml", b"<b/>")])
+
+        items = [("gs://b/a.xml", b"<a/>"), ("gs://b/b.xml", b"<changed/>")]
+        assert run(Manifest(path), items) == items[1:]
+
+    def test_failed_downloads_are_never_skipped(self, tmp_path):
+        """A document that could not be fetched has no content to compare."""
+        path = tmp_path / "run.manifest"
+        failed = ("gs://b/a.xml", StorageError("gs://b/a.xml: HTTP 503", 503))
+        run(Manifest(path), [failed])
+
+        assert run(Manifest(path), [failed]) == [failed]
+
+    def test_without_resume_the_manifest_starts_afresh(self, tmp_path, files):
+        """resume=False discards earlier entries."""
+        path = tmp_path / "run.manifest"
+        run(Manifest(path), files, offset=5)
+
+        manifest = Manifest(path, resume=False)
+        assert len(manifest) == 0
+        assert manifest.end == 0
+
+    def test_torn_line_is_dropped(self, tmp_path, files):
+        """A partial line from a crash mid-write is ignored and overwritten."""
+        path = tmp_path / "run.manifest"
+        run(Manifest(path), files[:1], offset=7)
+        with open(path, "ab") as file:
+            file.write(b"partial\tline")
+
+        manifest = Manifest(path)
+        assert run(manifest, files, offset=9) == files[1:]
+        manifest.close()
+        assert b"partial" not in path.read_bytes()
+        assert Manifest(path).end == 9
+
+    def test_keys_with_tabs_and_newlines(self, tmp_path):
+        """Keys are escaped so they cannot break the line format."""
+        path = tmp_path / "run.manifest"
+        item = ("odd\tname\n.xml", b"<a/>")
+        run(Manifest(path), [item])
+        assert len(path.read_bytes().splitlines()) == 2
+        assert run(Manifest(path), [item]) == []
+
+    @pytest.mark.parametrize("damage", ["delete", "truncate", "corrupt"])
+    def test_index_sidecar_is_rebuilt(self, tmp_path, files, damage):
+        """A missing, lagging or corrupt sidecar is rebuilt from the text manifest."""
+        path = tmp_path / "run.manifest"
+        run(Manifest(path), files[:1])
+        index = tmp_path / "run.manifest.idx"
+        stale = index.read_bytes()
+        run(Manifest(path), files)
+        if damage == "delete":
+            index.unlink()
+        elif damage == "truncate":
+            index.write_bytes(stale)
+        else:
+            index.write_bytes(b"garbage")
+
+        assert run(Manifest(path), files) == []
+        assert index.read_bytes()[16:] != b""
+        assert run(Manifest(path), files) == []
+
+    def test_uncommitted_results_are_not_recorded(self, tmp_path, files):
+        """Results completed after the last commit are processed again on resume."""
+        path = tmp_path / "run.manifest"
+        manifest = Manifest(path)
+        for item in manifest.filter(files):
+            manifest.complete(record(item))
+        manifest.close()
+
+        assert run(Manifest(path), files) == files
+
+    def test_due(self, tmp_path):
+        """A checkpoint is due after checkpoint_records results."""
+        manifest = Manifest(tmp_path / "run.manifest", checkpoint_records=2)
+        items = manifest.filter([("a", b"1"), ("b", b"2")])
+        manifest.complete(record(next(items)[0]))
+        assert not manifest.due
+        manifest.complete(record(next(items)[0]))
+        assert manifest.due
+
+    def test_results_must_follow_input_order(self, tmp_path):
+        """A result for an unexpected key is rejected."""
+        manifest = Manifest(tmp_path / "run.manifest")
+        list(manifest.filter([("a", b"1")]))
+        with pytest.raises(ValueError):
+            manifest.complete(record("b"))
+
+
+class TestHelpers:
+    """Tests for content_hash and rewind_output functions."""
+
+    def test_content_hash(self):
+        assert content_hash(b"<a/>") == content_hash(b"<a/>")
+        assert content_hash(b"<a/>") != content_hash(b"<b/>")
+
+    def test_rewind_output(self, tmp_path):
+        """Output is cut back to the checkpoint, and must be at least that long."""
+        output = tmp_path / "out.jsonl"
+        output.write_bytes(b"committed\nlost")
+        rewind_output(output, 10)
+        assert output.read_bytes() == b"committed\n"
+
+        with pytest.raises(ValueError):
+            rewind_output(output, 100)
+        rewind_output(tmp_path / "new.jsonl", 0)
@@ -0,0 +1,105 @@
+"""Tests for memory-mapped file input."""
+
+import gzip
+
+import pytest
+
+from main import main
+from xml_extractor.batch import BatchOptions, process_file
+from xml_extractor.cache import ResultCache
+from xml_extractor.extractor import extract_doc_numbers, extract_records
+from xml_extractor.mapping import BufferReader, read_file
+from xml_extractor.streaming import extract_doc_numbers_streaming, extract_records_streaming
+
+XML = b"""<root>
+  <document-id format="patent-office"><doc-number>222</doc-number></document-id>
+  <document-id format="epo"><doc-number>111</doc-number></document-id>
+</root>"""
+
+
+@pytest.fixture
+def large_file(tmp_path):
+    """A document above the default mapping threshold."""
+    path = tmp_path / "large.xml"
+    padding = b"<p>" + b"x" * 1024 + b"</p>\n"
+    path.write_bytes(XML.replace(b"</root>", padding * 1100 + b"</root>"))
+    return path
+
+
+class TestReadFile:
+    """Tests for read_file function."""
+
+    def test_small_file_is_read(self, tmp_path):
+        path = tmp_path / "small.xml"
+        path.write_bytes(XML)
+        with read_file(path) as content:
+            assert content == XML
+            assert isinstance(content, bytes)
+
+    def test_large_file_is_mapped(self, large_file):
+        with read_file(large_file) as content:
+            assert isinstance(content, memoryview)
+            assert content.readonly
+            assert content == large_file.read_bytes()
+        with pytest.raises(ValueError):
+            content.tobytes()
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.xml"
+        path.write_bytes(b"")
+        with read_file(path, threshold=0) as content:
+            assert content == b""
+
+    def test_slice_kept_by_caller(self, tmp_path):
+        path = tmp_path / "doc.xml"
+        path.write_bytes(XML)
+        with read_file(path, threshold=0) as content:
+            kept = content[:5]
+        assert kept == b"<root"
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            with read_file(tmp_path / "missing.xml"):
+                pass
+
+    @pytest.mark.parametrize("compress", [False, True], ids=["plain", "gzip"])
+    def test_extractors_accept_mapped_content(self, tmp_path, compress):
+        path = tmp_path / "doc.xml"
+        path.write_bytes(gzip.compress(XML) if compress else XML)
+        with read_file(path, threshold=0) as content:
+            assert extract_doc_numbers(content) == ["111", "222"]
+            assert extract_doc_numbers_streaming(content) == ["111", "222"]
+            assert extract_records_streaming(content) == extract_records(XML)
+
+
+class TestBufferReader:
+    """Tests for BufferReader class."""
+
+    def test_reads_in_chunks(self):
+        with BufferReader(memoryview(XML)) as reader:
+            assert reader.read(5) == b"<root"
+            assert reader.read() == XML[5:]
+            assert reader.read(5) == b""
+
+
+class TestMappedBatchInput:
+    """Batch and CLI reads that hash or cache large files go through a mapping."""
+
+    def test_checksum_and_cache(self, large_file, tmp_path):
+        options = BatchOptions(checksum=True, cache_path=str(tmp_path / "cache.sqlite"))
+        first = process_file(str(large_file), options)
+        second = process_file(str(large_file), options)
+
+        assert first["doc_numbers"] == second["doc_numbers"] == ["111", "222"]
+        assert first["hash"] == second["hash"]
+        assert second["cached"]
+
+    def test_rows_with_checksum(self, large_file):
+        record = process_file(str(large_file), BatchOptions(rows=True, checksum=True, stream=True))
+        assert [row[3] for row in record["rows"]] == ["111", "222"]
+
+    def test_cli_cache(self, large_file, tmp_path, capsys):
+        cache = tmp_path / "cache.sqlite"
+        main([str(large_file), "--cache", str(cache)])
+        assert capsys.readouterr().out.split() == ["111", "222"]
+        assert ResultCache(path=cache).lookup(large_file.read_bytes())[1] == ["111", "222"]
@@ -1,10 +1,21 @@
 """Tests for the parser module."""
 
+import gzip
+import io
+from pathlib import Path
+
 import pytest
 from lxml import etree
 
-from xml_extractor.exceptions import XMLParseError
-from xml_extractor.parser import parse_xml
+from xml_extractor import parser
+from xml_extractor.exceptions import (
+    CompressionError,
+    EncodingError,
+    InputTooLargeError,
+    XMLParseError,
+)
+from xml_extractor.mapping import read_file
+from xml_extractor.parser import get_parser, parse_xml
 
 
 class TestParseXML:
@@ -60,3 +71,112 @@ class TestParseXML:
         assert result is not None
         child = result.find("child")
         assert child.text == "<>&"
+
+    def test_parse_unrecoverable_input_raises(self):
+        """Test that input with no recoverable root raises XMLParseError."""
+        with pytest.raises(XMLParseError):
+            parse_xml("not xml at all")
+
+
+class TestParseXMLSources:
+    """Tests for the non-str input types accepted by parse_xml."""
+
+    def test_parse_bytes(self):
+        """Test parsing raw bytes."""
+        result = parse_xml(b"<root><child>text</child></root>")
+        assert result.find("child").text == "text"
+
+    def test_parse_memoryview(self):
+        """Test parsing a memoryview without copying it to bytes first."""
+        result = parse_xml(memoryview(b"<root><child>text</child></root>"))
+        assert result.find("child").text == "text"
+
+    def test_parse_mapped_file(self, tmp_path):
+        """Test parsing the memoryview read_file gives for a memory-mapped file."""
+        xml_file = tmp_path / "input.xml"
+        xml_file.write_bytes(b"<root><child>text</child></root>")
+        with read_file(xml_file, threshold=0) as content:
+            assert isinstance(content, memoryview)
+            result = parse_xml(content)
+        assert result.find("child").text == "text"
+
+    def test_parse_path(self, tmp_path):
+        """Test parsing from a filesystem path."""
+        xml_file = tmp_path / "input.xml"
+        xml_file.write_bytes(b"<root><child>text</child></root>")
+        result = parse_xml(xml_file)
+        assert result.find("child").text == "text"
+
+    def test_parse_binary_file_object(self):
+        """Test parsing from a binary file object."""
+        result = parse_xml(io.BytesIO(b"<root><child>text</child></root>"))
+        assert result.find("child").text == "text"
+
+    def test_parse_bytes_honours_declared_encoding(self):
+        """Test that bytes are decoded using the XML declaration's encoding."""
+        xml = '<?xml version="1.0" encoding="ISO-8859-1"?><root>caf\xe9</root>'
+        result = parse_xml(xml.encode("latin-1"))
+        assert result.text == "caf\xe9"
+
+    def test_parse_bytes_with_invalid_encoding(self):
+        """Test that undecodable bytes raise EncodingError instead of being dropped."""
+        with pytest.raises(EncodingError):
+            parse_xml(b"<root>\xff\xfe</root>")
+
+    def test_parse_file_object_fed_in_chunks(self, monkeypatch):
+        """A file is fed to lxml in chunks; the declared encoding spans them."""
+        monkeypatch.setattr(parser, "FEED_CHUNK_SIZE", 4)
+        xml = '<?xml version="1.0" encoding="ISO-8859-1"?><root>caf\xe9</root>'
+        assert parse_xml(io.BytesIO(xml.encode("latin-1"))).text == "caf\xe9"
+
+    def test_parse_file_object_with_invalid_encoding(self):
+        with pytest.raises(EncodingError):
+            parse_xml(io.BytesIO(b"<root>\xff\xfe</root>"))
+
+    def test_parser_is_reusable_after_aborted_feed(self):
+        """A feed stopped by the size limit leaves the parser ready for the next document."""
+        xml_parser = get_parser()
+        with pytest.raises(InputTooLargeError):
+            parse_xml(io.BytesIO(b"<root>" + b" " * 1000), parser=xml_parser, max_size=100)
+        result = parse_xml(io.BytesIO(b"<root><child>text</child></root>"), parser=xml_parser)
+        assert result.find("child").text == "text"
+
+    def test_parse_missing_path(self):
+        """Test that a missing file raises XMLParseError."""
+        with pytest.raises(XMLParseError):
+            parse_xml(Path("/nonexistent/input.xml"))
+
+
+class TestParseCompressedXML:
+    """Tests for gzip, bzip2 and zstd input to parse_xml."""
+
+    XML = b"<root><child>text</child></root>"
+
+    def test_parse_gzip_bytes(self):
+        assert parse_xml(gzip.compress(self.XML)).find("child").text == "text"
+
+    def test_parse_gzip_path(self, tmp_path):
+        """The format comes from the content, not the file name."""
+        xml_file = tmp_path / "input.xml"
+        xml_file.write_bytes(gzip.compress(self.XML))
+        assert parse_xml(xml_file).find("child").text == "text"
+
+    def test_parse_gzip_file_object(self):
+        assert parse_xml(io.BytesIO(gzip.compress(self.XML))).find("child").text == "text"
+
+    def test_parse_zstd_bytes(self):
+        zstandard = pytest.importorskip("zstandard")
+        data = zstandard.ZstdCompressor().compress(self.XML)
+        assert parse_xml(data).find("child").text == "text"
+
+    @pytest.mark.parametrize("wrap", [bytes, io.BytesIO])
+    def test_max_size_applies_to_decompressed_bytes(self, wrap):
+        """A small compressed document that inflates past the limit is rejected."""
+        data = gzip.compress(b"<root>" + b" " * 100_000 + b"</root>")
+        assert len(data) < 1000
+        with pytest.raises(InputTooLargeError):
+            parse_xml(wrap(data), max_size=1000)
+
+    def test_corrupt_gzip(self):
+        with pytest.raises(CompressionError):
+            parse_xml(gzip.compress(self.XML)[:-8] + b"\0" * 8)
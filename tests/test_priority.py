@@ -0,0 +1,117 @@
+"""Tests for the priority module."""
+
+import pickle
+
+import pytest
+
+from xml_extractor.cache import DEFAULT_PRIORITY_CONFIG
+from xml_extractor.priority import (
+    DEFAULT_POLICY,
+    MAX_ALTERNATIVES,
+    MAX_LEVELS,
+    PriorityPolicy,
+    parse_policy,
+)
+
+
+class TestPriorityPolicy:
+    """Tests for PriorityPolicy class."""
+
+    def test_default_policy(self):
+        """The default ranks epo, patent-office, other formats, then none."""
+        policy = PriorityPolicy()
+        assert [policy.priority(value) for value in ("epo", "patent-office", "x", None)] == [
+            0,
+            1,
+            2,
+            3,
+        ]
+        assert policy == DEFAULT_POLICY
+
+    def test_default_fingerprint_is_unchanged(self):
+        """Cache keys written before policies existed stay valid."""
+        assert (
+            DEFAULT_POLICY.fingerprint == DEFAULT_PRIORITY_CONFIG == "epo,patent-office,other,none"
+        )
+
+    def test_alternatives_share_a_level(self):
+        policy = PriorityPolicy("docdb|original,epo,other,none")
+        assert policy.priority("docdb") == policy.priority("original") == 0
+        assert (policy.priority("epo"), policy.priority("x"), policy.priority(None)) == (1, 2, 3)
+
+    def test_unmatched_values_come_last(self):
+        """Without catch-alls, unmatched document-ids rank after every level."""
+        policy = PriorityPolicy("original")
+        assert (policy.priority("original"), policy.priority("epo"), policy.priority(None)) == (
+            0,
+            1,
+            1,
+        )
+
+    def test_load_source_conditions(self):
+        """Every condition of an alternative must hold; the first match wins."""
+        policy = PriorityPolicy("format=epo+load-source=docdb,load-source=sipo,epo,other,none")
+        assert policy.uses_load_source
+        assert policy.priority("epo", "docdb") == 0
+        assert policy.priority("x", "sipo") == policy.priority(None, "sipo") == 1
+        assert policy.priority("epo", "sipo") == 1
+        assert policy.priority("epo") == policy.priority("epo", "other") == 2
+        assert policy.priority("x", "docdb") == 3
+        assert policy.priority(None, "docdb") == 4
+
+    def test_fingerprint_is_canonical(self):
+        """Equivalent spellings compile to the same policy."""
+        a = PriorityPolicy(" format = epo , load-source=docdb+format=x | y ,other")
+        b = PriorityPolicy("epo,format=x+load-source=docdb|y,other")
+        assert a.fingerprint == "epo,format=x+load-source=docdb|y,other"
+        assert a == b and hash(a) == hash(b)
+
+    def test_lookups_beyond_the_table(self, monkeypatch):
+        """Values first seen after the table is full are still resolved."""
+        monkeypatch.setattr("xml_extractor.priority._TABLE_SIZE", 0)
+        policy = PriorityPolicy("a,other,none")
+        assert (policy.priority("a"), policy.priority("b"), policy.priority(None)) == (0, 1, 2)
+
+    def test_compiling_does_not_resolve_combinations(self):
+        """Compiling a request's spec costs no more than parsing it."""
+        spec = "|".join(f"format=f{i}+load-source=s{i}" for i in range(MAX_ALTERNATIVES))
+        policy = PriorityPolicy(spec)
+        assert policy._table == {}
+        assert policy.priority(f"f{MAX_ALTERNATIVES - 1}", f"s{MAX_ALTERNATIVES - 1}") == 0
+        assert policy.priority("f0", "s1") == 1
+
+    def test_pickle_round_trip(self):
+        policy = PriorityPolicy("load-source=docdb,epo,none")
+        copy = pickle.loads(pickle.dumps(policy))
+        assert copy == policy
+        assert copy.priority("x", "docdb") == 0
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            "",
+            "epo,,other",
+            "epo|",
+            "lang=en",
+            "format=",
+            "format=a+format=b",
+            "other,other",
+            "none,epo,none",
+            ",".join(f"f{index}" for index in range(MAX_LEVELS + 1)),
+            "|".join(f"f{index}" for index in range(MAX_ALTERNATIVES + 1)),
+            "x" * 5000,
+        ],
+    )
+    def test_malformed_specs_are_rejected(self, spec):
+        with pytest.raises(ValueError):
+            PriorityPolicy(spec)
+
+
+class TestParsePolicy:
+    """Tests for parse_policy function."""
+
+    def test_blank_spec_is_the_default(self):
+        assert parse_policy(None) is parse_policy("  ") is DEFAULT_POLICY
+
+    def test_compiled_policies_are_reused(self):
+        assert parse_policy("original,other") is parse_policy("original,other")
@@ -0,0 +1,171 @@
+"""Tests for the scanner module and the extractor's fast path."""
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+from benchmarks.corpus import CorpusSpec, generate_document
+from xml_extractor.extractor import Extractor, extract_doc_numbers
+from xml_extractor.scanner import scan_document_ids
+
+FIXTURES = sorted(Path(__file__).parent.glob("fixtures/*/input.xml"))
+
+FAST = Extractor(fast_path=True)
+
+
+def outcome(extract, content):
+    """Result of an extraction, or the type of the error it raised."""
+    try:
+        return extract(content)
+    except Exception as e:
+        return type(e)
+
+
+def assert_same_as_tree_path(content):
+    assert outcome(FAST.extract_doc_numbers, content) == outcome(extract_doc_numbers, content)
+
+
+class TestDifferential:
+    """The fast path gives the tree path's result on every input."""
+
+    @pytest.mark.parametrize("path", FIXTURES, ids=lambda path: path.parent.name)
+    def test_fixtures(self, path):
+        assert_same_as_tree_path(path.read_bytes())
+
+    @pytest.mark.parametrize("malformed_rate", [0.0, 1.0])
+    @pytest.mark.parametrize("namespaces", [False, True])
+    def test_corpus(self, namespaces, malformed_rate):
+        for seed in range(20):
+            spec = CorpusSpec(
+                size=4096,
+                document_ids=seed % 8,
+                namespaces=namespaces,
+                malformed_rate=malformed_rate,
+            )
+            assert_same_as_tree_path(generate_document(spec, seed).content)
+
+    def test_fixtures_are_scanned(self):
+        """Well-formed fixtures are read by the scanner itself, without a tree."""
+        scanned = [path for path in FIXTURES if scan_document_ids(path.read_bytes()) is not None]
+        assert len(scanned) >= 10
+
+
+class TestScanDocumentIds:
+    """Tests for scan_document_ids function."""
+
+    def test_format_and_doc_number(self):
+        xml = (
+            b'<root><document-id format="epo"><country>EP</country>'
+            b"<doc-number> 1 </doc-number><kind>A1</kind></document-id>"
+            b"<document-id><doc-number>2</doc-number></document-id></root>"
+        )
+        assert scan_document_ids(xml) == [("1", "epo", None), ("2", None, None)]
+
+    @pytest.mark.parametrize(
+        "attributes",
+        [
+            b" format='epo' lang=\"en\"",
+            b' lang="en" format="epo"',
+            b"\n  format = 'epo'\t",
+        ],
+    )
+    def test_attribute_order_and_quoting(self, attributes):
+        xml = b"<root><document-id" + attributes + b"><doc-number>1</doc-number></document-id>"
+        assert scan_document_ids(xml) == [("1", "epo", None)]
+
+    def test_entities_and_character_references(self):
+        xml = (
+            b'<root><document-id format="a&amp;b">'
+            b"<doc-number>1&lt;2&#x41;&#66;</doc-number></document-id></root>"
+        )
+        assert scan_document_ids(xml) == [("1<2AB", "a&b", None)]
+
+    def test_cdata(self):
+        xml = b"<root><document-id><doc-number><![CDATA[1<2]]>3</doc-number></document-id></root>"
+        assert scan_document_ids(xml) == [("1<23", None, None)]
+
+    def test_first_doc_number_only(self):
+        xml = (
+            b"<root><document-id><doc-number>1</doc-number>"
+            b"<doc-number>2</doc-number></document-id></root>"
+        )
+        assert scan_document_ids(xml) == [("1", None, None)]
+
+    def test_empty_doc_numbers_are_skipped(self):
+        xml = (
+            b"<root><document-id><doc-number> </doc-number></document-id>"
+            b"<document-id><doc-number/></document-id><document-id/></root>"
+        )
+        assert scan_document_ids(xml) == []
+
+    def test_similar_element_names(self):
+        xml = (
+            b"<root><document-ids><document-id-extra/></document-ids>"
+            b"<document-id><doc-number>1</doc-number></document-id></root>"
+        )
+        assert scan_document_ids(xml) == [("1", None, None)]
+
+    def test_prolog_and_bom(self):
+        xml = (
+            b'\xef\xbb\xbf<?xml version="1.0" encoding="UTF-8"?>\n<!-- c --><?pi x?>'
+            b"<root><document-id><doc-number>1</doc-number></document-id></root>"
+        )
+        assert scan_document_ids(xml) == [("1", None, None)]
+
+    def test_markup_after_last_document_id_is_not_read(self):
+        xml = b"<root><document-id><doc-number>1</doc-number></document-id><p a='x'b='y'>"
+        assert scan_document_ids(xml) == [("1", None, None)]
+
+    @pytest.mark.parametrize(
+        "xml",
+        [
+            # Default namespace on the root or around the document-id
+            b'<root xmlns="urn:x"><document-id><doc-number>1</doc-number></document-id></root>',
+            b'<root><a xmlns="urn:x"><document-id><doc-number>1</doc-number></document-id></a>',
+            b'<root><document-id xmlns="urn:x"><doc-number>1</doc-number></document-id></root>',
+            # Prefixed names and comments or PIs inside a document-id
+            b"<root><document-id><a:doc-number>1</a:doc-number></document-id></root>",
+            b"<root><document-id><!-- c --><doc-number>1</doc-number></document-id></root>",
+            b"<root><document-id><doc-number>1<?pi?></doc-number></document-id></root>",
+            # Nested elements
+            b"<root><document-id><doc-number><b>1</b></doc-number></document-id></root>",
+            b"<root><document-id><document-id><doc-number>1</doc-number></document-id>"
+            b"</document-id></root>",
+            # Malformed markup before a document-id
+            b"<root><p a='x'b='y'/><document-id><doc-number>1</doc-number></document-id></root>",
+            b"<root></root><document-id><doc-number>1</doc-number></document-id>",
+            b"<root><document-id><doc-number>1 & 2</doc-number></document-id></root>",
+            b"<root><document-id><doc-number>1\x03</doc-number></document-id></root>",
+            b'<root><document-id a="1" a="2"><doc-number>1</doc-number></document-id></root>',
+            # Encodings and DTDs the tree path handles
+            b'<?xml version="1.0" encoding="latin-1"?><root><document-id>'
+            b"<doc-number>\xe9</doc-number></document-id></root>",
+            b"<!DOCTYPE root><root><document-id><doc-number>1</doc-number></document-id></root>",
+            b"<root><document-id><doc-number>\xff</doc-number></document-id></root>",
+        ],
+    )
+    def test_unsupported_input_falls_back(self, xml):
+        assert scan_document_ids(xml) is None
+        assert_same_as_tree_path(xml)
+
+
+class TestFastPath:
+    """Tests for Extractor(fast_path=True)."""
+
+    XML = (
+        b"<root><document-id><doc-number>3</doc-number></document-id>"
+        b'<document-id format="epo"><doc-number>1</doc-number></document-id>'
+        b'<document-id format="patent-office"><doc-number>2</doc-number></document-id></root>'
+    )
+
+    def test_priority_order(self):
+        assert FAST.extract_doc_numbers(self.XML) == ["1", "2", "3"]
+
+    def test_str_and_compressed_input(self):
+        assert FAST.extract_doc_numbers(self.XML.decode()) == ["1", "2", "3"]
+        assert FAST.extract_doc_numbers(gzip.compress(self.XML)) == ["1", "2", "3"]
+
+    def test_fallback_uses_the_decompressed_content(self):
+        xml = self.XML.replace(b"<root>", b'<root xmlns="urn:x">')
+        assert FAST.extract_doc_numbers(gzip.compress(xml)) == []
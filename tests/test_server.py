@@ -0,0 +1,128 @@
+"""Tests for the pre-forking server launcher."""
+
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from api.server import cpu_limit
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def cgroup(tmp_path: Path, files: dict[str, str]) -> Path:
+    for name, text in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return tmp_path
+
+
+class TestCpuLimit:
+    """Tests for cpu_limit function."""
+
+    @pytest.fixture(autouse=True)
+    def many_cpus(self, monkeypatch):
+        monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(64)))
+
+    @pytest.mark.parametrize(
+        "files, expected",
+        [
+            ({"cpu.max": "200000 100000\n"}, 2),
+            ({"cpu.max": "150000 100000\n"}, 2),
+            ({"cpu.max": "10000 100000\n"}, 1),
+            ({"cpu.max": "max 100000\n"}, 64),
+            ({"cpu/cpu.cfs_quota_us": "400000\n", "cpu/cpu.cfs_period_us": "100000\n"}, 4),
+            ({"cpu/cpu.cfs_quota_us": "-1\n", "cpu/cpu.cfs_period_us": "100000\n"}, 64),
+            ({}, 64),
+        ],
+    )
+    def test_quota(self, tmp_path, files, expected):
+        assert cpu_limit(cgroup(tmp_path, files)) == expected
+
+    def test_affinity_caps_the_quota(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1})
+        assert cpu_limit(cgroup(tmp_path, {"cpu.max": "800000 100000"})) == 2
+
+
+def get_json(port: int, path: str) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=10) as response:
+        return json.loads(response.read())
+
+
+def test_launcher_recycles_workers_and_reports_the_fleet():
+    """Two workers replaced every few requests keep fleet-wide totals."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "api.server"]
+        + ["--host", "127.0.0.1", "--port", "0", "--workers", "2", "--max-requests", "3"]
+        + ["--log-level", "warning"],
+        cwd=ROOT,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        line = process.stderr.readline()
+        port = int(re.search(r":(\d+) with 2 workers", line).group(1))
+        for _ in range(12):
+            get_json(port, "/")
+        # Let the last recycled workers come back
+        deadline = time.monotonic() + 10
+        while (fleet := get_json(port, "/health")["fleet"])["restarts"] < 2:
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+
+    assert fleet["workers"] == 2
+    assert fleet["requests"] >= 12
+    assert fleet["errors"] == 0
+
+
+def test_jobs_are_shared_between_workers():
+    """A job submitted to one worker can be polled on every other worker."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "api.server"]
+        + ["--host", "127.0.0.1", "--port", "0", "--workers", "2", "--log-level", "warning"],
+        cwd=ROOT,
+        env={key: value for key, value in os.environ.items() if key != "JOB_STORE_PATH"},
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        line = process.stderr.readline()
+        port = int(re.search(r":(\d+) with 2 workers", line).group(1))
+        body = (
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="files"; filename="a.xml"\r\n'
+            b"Content-Type: text/xml\r\n\r\n"
+            b"<root><document-id><doc-number>111</doc-number></document-id></root>\r\n"
+            b"--boundary--\r\n"
+        )
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/jobs",
+            data=body,
+            headers={"Content-Type": "multipart/form-data; boundary=boundary"},
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            job = json.loads(response.read())
+        # Each request opens a new connection, accepted by either worker
+        statuses = [get_json(port, f"/jobs/{job['id']}")["status"] for _ in range(20)]
+        deadline = time.monotonic() + 10
+        while get_json(port, f"/jobs/{job['id']}")["status"] != "succeeded":
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        results = [get_json(port, job["result_url"])["doc_numbers"] for _ in range(20)]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+
+    assert set(statuses) <= {"queued", "running", "succeeded"}
+    assert results == [["111"]] * 20
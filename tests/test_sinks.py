@@ -0,0 +1,147 @@
+"""Tests for the sinks module."""
+
+import csv
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from xml_extractor.extractor import extract_records
+from xml_extractor.sinks import ROW_FIELDS, TextSink, open_sink, record_rows, shard_path
+
+ROWS = [(f"doc-{n}.xml", n % 4, n, str(1000 + n), "epo" if n % 2 else None) for n in range(25)]
+
+
+def read_csv(path: Path) -> list[list[str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+class TestShardPath:
+    """Tests for shard_path function."""
+
+    def test_number_goes_before_all_suffixes(self):
+        assert shard_path(Path("out/rows.csv.gz"), 3) == Path("out/rows-00003.csv.gz")
+        assert shard_path(Path("rows"), 0) == Path("rows-00000")
+
+
+class TestTextSinks:
+    """Tests for the CSV and NDJSON sinks."""
+
+    def test_csv(self, tmp_path):
+        """CSV output has a header and one line per row; None is empty."""
+        path = tmp_path / "rows.csv"
+        with open_sink("csv", path) as sink:
+            sink.write_rows(ROWS[:2])
+
+        assert read_csv(path) == [
+            list(ROW_FIELDS),
+            ["doc-0.xml", "0", "0", "1000", ""],
+            ["doc-1.xml", "1", "1", "1001", "epo"],
+        ]
+
+    def test_incomplete_sink_fails_when_created(self, tmp_path):
+        """A text sink without an encoder is rejected before it writes anything."""
+
+        class NoEncoder(TextSink):
+            pass
+
+        with pytest.raises(TypeError):
+            NoEncoder(tmp_path / "rows.txt")
+        assert not (tmp_path / "rows.txt").exists()
+
+    def test_ndjson_gzip(self, tmp_path):
+        """NDJSON can be gzip-compressed."""
+        path = tmp_path / "rows.ndjson.gz"
+        with open_sink("ndjson", path, compress=True) as sink:
+            sink.write_rows(ROWS)
+
+        lines = gzip.decompress(path.read_bytes()).decode().splitlines()
+        assert len(lines) == 25
+        assert json.loads(lines[1]) == dict(zip(ROW_FIELDS, ROWS[1], strict=True))
+
+    def test_rollover_by_records(self, tmp_path):
+        """Shards hold at most max_records rows, each with its own header."""
+        sink = open_sink("csv", tmp_path / "rows.csv", max_records=10)
+        for row in ROWS:
+            sink.write_rows([row])
+        sink.close()
+
+        assert [p.name for p in sink.shards] == [
+            "rows-00000.csv",
+            "rows-00001.csv",
+            "rows-00002.csv",
+        ]
+        assert [len(read_csv(p)) - 1 for p in sink.shards] == [10, 10, 5]
+
+    def test_rollover_by_bytes(self, tmp_path):
+        """A shard is closed once it reaches max_bytes."""
+        sink = open_sink("ndjson", tmp_path / "rows.ndjson", max_bytes=200)
+        sink.batch_size = 1
+        with sink:
+            sink.write_rows(ROWS)
+            sink.write_rows(ROWS)
+
+        assert len(sink.shards) == 2
+        assert sum(len(p.read_text().splitlines()) for p in sink.shards) == 50
+
+    def test_empty_sink_leaves_header(self, tmp_path):
+        """A sink without rows still writes one file."""
+        path = tmp_path / "rows.csv"
+        open_sink("csv", path).close()
+        assert read_csv(path) == [list(ROW_FIELDS)]
+
+    def test_sync_and_append(self, tmp_path):
+        """sync() writes queued rows and returns the size; append keeps one header."""
+        path = tmp_path / "rows.csv"
+        with open_sink("csv", path) as sink:
+            sink.write_rows(ROWS[:2])
+            assert sink.sync() == path.stat().st_size
+        with open_sink("csv", path, append=True) as sink:
+            sink.write_rows(ROWS[2:3])
+        assert len(read_csv(path)) == 4
+
+        with pytest.raises(ValueError):
+            open_sink("csv", path, compress=True).sync()
+
+    def test_stdout(self, capsysbinary):
+        """Without a path, rows go to stdout."""
+        with open_sink("ndjson", None) as sink:
+            sink.write_rows(ROWS[:1])
+        assert json.loads(capsysbinary.readouterr().out)["doc_number"] == "1000"
+
+    def test_unknown_kind(self):
+        with pytest.raises(ValueError, match="Unknown sink"):
+            open_sink("xlsx", None)
+
+
+class TestParquetSink:
+    """Tests for the Parquet sink."""
+
+    def test_schema_and_row_groups(self, tmp_path):
+        """Rows are written in row groups with the fixed schema."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        path = tmp_path / "rows.parquet"
+        sink = open_sink("parquet", path)
+        sink.row_group_size = 10
+        sink.batch_size = 10
+        with sink:
+            sink.write_rows(ROWS)
+
+        parquet = pq.ParquetFile(path)
+        assert parquet.schema_arrow.names == list(ROW_FIELDS)
+        assert parquet.metadata.num_row_groups == 3
+        assert parquet.read().to_pylist()[1] == dict(zip(ROW_FIELDS, ROWS[1], strict=True))
+
+
+def test_record_rows():
+    """Records become (source, priority, position, doc_number, format) rows."""
+    records = extract_records(
+        b'<root><document-id format="patent-office"><doc-number>2</doc-number></document-id>'
+        b'<document-id format="epo"><doc-number>1</doc-number></document-id></root>'
+    )
+    assert record_rows("a.xml", records) == [
+        ("a.xml", 0, 1, "1", "epo"),
+        ("a.xml", 1, 0, "2", "patent-office"),
+    ]
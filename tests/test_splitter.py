@@ -0,0 +1,73 @@
+"""Tests for the concatenated-XML splitter."""
+
+import gzip
+import io
+
+import pytest
+
+from xml_extractor.extractor import extract_doc_numbers
+from xml_extractor.splitter import split_documents
+
+
+def make_dump(count: int) -> tuple[list[bytes], bytes]:
+    """Build ``count`` small documents and their concatenation."""
+    docs = [
+        b'<?xml version="1.0" encoding="UTF-8"?>\n'
+        b"<root><document-id format='epo'><doc-number>%d</doc-number></document-id></root>\n" % i
+        for i in range(count)
+    ]
+    return docs, b"".join(docs)
+
+
+class TestSplitDocuments:
+    """Tests for split_documents function."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 7, 64, 1 << 20])
+    def test_boundaries_independent_of_chunk_size(self, chunk_size):
+        """Declarations straddling read boundaries are still found."""
+        docs, dump = make_dump(30)
+
+        assert list(split_documents(io.BytesIO(dump), chunk_size)) == docs
+
+    def test_documents_feed_extractor(self):
+        """Each slice is a complete document for extract_doc_numbers."""
+        _, dump = make_dump(5)
+
+        results = [extract_doc_numbers(doc) for doc in split_documents(io.BytesIO(dump))]
+
+        assert results == [["0"], ["1"], ["2"], ["3"], ["4"]]
+
+    def test_single_document_without_declaration(self):
+        """Input without any declaration is a single document."""
+        assert list(split_documents(io.BytesIO(b"<root/>"))) == [b"<root/>"]
+
+    def test_whitespace_between_documents_is_skipped(self):
+        """Whitespace-only fragments are not yielded as documents."""
+        dump = b"\n  <?xml version='1.0'?><a/>\n\n"
+
+        assert list(split_documents(io.BytesIO(dump), 4)) == [b"<?xml version='1.0'?><a/>\n\n"]
+
+    def test_processing_instructions_are_not_boundaries(self):
+        """Only real declarations start a document, not <?xml-stylesheet ...?>."""
+        dump = b'<?xml version="1.0"?><?xml-stylesheet href="a.xsl"?><a/><?xml version="1.0"?><b/>'
+
+        assert list(split_documents(io.BytesIO(dump), 3)) == [
+            b'<?xml version="1.0"?><?xml-stylesheet href="a.xsl"?><a/>',
+            b'<?xml version="1.0"?><b/>',
+        ]
+
+    def test_path_source(self, tmp_path):
+        """A path is opened and read in chunks."""
+        docs, dump = make_dump(3)
+        dump_file = tmp_path / "dump.xml"
+        dump_file.write_bytes(dump)
+
+        assert list(split_documents(dump_file, 16)) == docs
+
+    def test_compressed_dump(self, tmp_path):
+        """A gzip-compressed dump is split after decompression."""
+        docs, dump = make_dump(3)
+        dump_file = tmp_path / "dump.xml.gz"
+        dump_file.write_bytes(gzip.compress(dump))
+
+        assert list(split_documents(dump_file, 16)) == docs
@@ -0,0 +1,54 @@
+"""Import-time budget of the CLI and the package."""
+
+import subprocess
+import sys
+
+import pytest
+
+import xml_extractor
+
+# Cumulative microseconds allowed for "import main" (about 15ms when measured;
+# importing lxml and the batch machinery took about 200ms)
+IMPORT_BUDGET_US = 60_000
+
+# Modules the light import path must not load
+HEAVY_MODULES = ("lxml", "http.client", "concurrent.futures.process", "fastapi")
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module loaded by importing ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["main", "xml_extractor", "xml_extractor.daemon"])
+def test_heavy_modules_are_not_imported(module):
+    loaded = import_times(module)
+    assert module in loaded
+    assert not [name for name in loaded if name.startswith(HEAVY_MODULES)]
+
+
+def test_cli_import_budget():
+    # Best of three, to ride out a busy machine
+    best = min(import_times("main")["main"] for _ in range(3))
+    assert best < IMPORT_BUDGET_US
+
+
+def test_lazy_names_resolve():
+    assert xml_extractor.extract_doc_numbers(
+        b"<r><document-id><doc-number>1</doc-number></document-id></r>"
+    ) == ["1"]
+    assert "Extractor" in dir(xml_extractor)
+    with pytest.raises(AttributeError):
+        getattr(xml_extractor, "missing")  # noqa: B009
@@ -0,0 +1,295 @@
+"""Tests for the storage module and gs:// batch inputs."""
+
+import json
+import time
+
+import pytest
+
+from main import main
+from tests.fake_gcs import DROP, FakeGCS
+from xml_extractor.batch import expand_inputs, iter_split_documents, run_batch
+from xml_extractor.exceptions import InputTooLargeError, StorageError
+from xml_extractor.storage import (
+    FileSystemSource,
+    GCSSource,
+    RetryPolicy,
+    is_transient,
+    list_uris,
+    open_source,
+    prefetch,
+    read_uri,
+    split_uri,
+)
+
+FAST_RETRY = RetryPolicy(attempts=3, base_delay=0.001, max_delay=0.01)
+
+
+def document(doc_number: str) -> bytes:
+    return f"<root><document-id><doc-number>{doc_number}</doc-number></document-id></root>".encode()
+
+
+@pytest.fixture
+def gcs(monkeypatch):
+    """Fake GCS with a "patents" bucket, set as the storage emulator."""
+    objects = {f"docs/{index}.xml": document(str(index)) for index in range(5)}
+    objects["docs/readme.txt"] = b"not XML"
+    objects["other/9.xml"] = document("9")
+    with FakeGCS({"patents": objects}, page_size=2) as fake:
+        monkeypatch.setenv("STORAGE_EMULATOR_HOST", fake.endpoint)
+        yield fake
+
+
+class TestRetryPolicy:
+    """Tests for RetryPolicy class."""
+
+    def test_transient_failures_are_retried(self):
+        """A call that fails transiently succeeds on a later attempt."""
+        outcomes = [ConnectionResetError(), StorageError("busy", 503), b"ok"]
+
+        def call():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        assert FAST_RETRY.call(call) == b"ok"
+
+    def test_permanent_failure_is_not_retried(self):
+        """Errors such as HTTP 404 are raised after one attempt."""
+        calls = []
+
+        def call():
+            calls.append(1)
+            raise StorageError("missing", 404)
+
+        with pytest.raises(StorageError):
+            FAST_RETRY.call(call)
+        assert len(calls) == 1
+
+    def test_gives_up_after_attempts(self):
+        """The last error is raised once attempts run out."""
+        calls = []
+
+        def call():
+            calls.append(1)
+            raise TimeoutError("slow")
+
+        with pytest.raises(TimeoutError):
+            FAST_RETRY.call(call)
+        assert len(calls) == 3
+
+    def test_delay_is_jittered_exponential_backoff(self):
+        """Delays stay within [0, min(max_delay, base_delay * 2**n)]."""
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        for attempt, bound in [(0, 1.0), (1, 2.0), (2, 4.0), (5, 5.0)]:
+            delays = [policy.delay(attempt) for _ in range(50)]
+            assert all(0 <= delay <= bound for delay in delays)
+            assert len(set(delays)) > 1
+
+    def test_is_transient(self):
+        """Connection errors and 408/429/5xx are transient; other statuses are not."""
+        assert is_transient(ConnectionRefusedError())
+        assert is_transient(StorageError("x", 429))
+        assert not is_transient(StorageError("x", 403))
+        assert not is_transient(ValueError())
+
+
+class TestGCSSource:
+    """Tests for GCSSource against the fake server."""
+
+    def test_list_follows_pages(self, gcs):
+        """Listing returns every name under the prefix across pages."""
+        source = GCSSource("patents")
+        assert list(source.list("docs/")) == [
+            "docs/0.xml",
+            "docs/1.xml",
+            "docs/2.xml",
+            "docs/3.xml",
+            "docs/4.xml",
+            "docs/readme.txt",
+        ]
+
+    def test_read(self, gcs):
+        """Objects are downloaded whole."""
+        assert GCSSource("patents").read("other/9.xml") == document("9")
+
+    def test_connections_are_reused(self, gcs):
+        """Sequential requests share one keep-alive connection."""
+        source = GCSSource("patents")
+        for index in range(5):
+            source.read(f"docs/{index}.xml")
+        assert gcs.connections == 1
+
+    def test_transient_errors_are_retried(self, gcs):
+        """5xx responses and dropped connections are retried transparently."""
+        gcs.fail(503, DROP, 429)
+        source = GCSSource("patents", retry=RetryPolicy(attempts=4, base_delay=0.001))
+        assert source.read("docs/1.xml") == document("1")
+        assert gcs.requests == 4
+
+    def test_missing_object(self, gcs):
+        """A 404 raises StorageError at once, naming the object."""
+        source = GCSSource("patents", retry=FAST_RETRY)
+        with pytest.raises(StorageError, match="gs://patents/docs/missing.xml") as excinfo:
+            source.read("docs/missing.xml")
+        assert excinfo.value.status == 404
+        assert gcs.requests == 1
+
+    def test_bearer_token(self, gcs):
+        """A token is sent as an Authorization header."""
+        source = GCSSource("patents", token="secret")
+        assert source._headers == {"Authorization": "Bearer secret"}
+
+    def test_read_stops_at_max_size(self, gcs):
+        """An object above the limit fails without retries; its connection is dropped."""
+        source = GCSSource("patents", retry=FAST_RETRY)
+        size = len(document("0"))
+        assert source.read("docs/0.xml", max_size=size) == document("0")
+        requests = gcs.requests
+        with pytest.raises(InputTooLargeError, match="gs://patents/docs/0.xml"):
+            source.read("docs/0.xml", max_size=size - 1)
+        assert gcs.requests == requests + 1
+        assert source.read("docs/1.xml", max_size=size) == document("1")
+
+
+class TestFileSystemSource:
+    """Tests for FileSystemSource class."""
+
+    def test_list_and_read(self, tmp_path):
+        """Keys are relative, /-separated paths filtered by prefix."""
+        (tmp_path / "docs" / "sub").mkdir(parents=True)
+        (tmp_path / "docs" / "a.xml").write_bytes(b"a")
+        (tmp_path / "docs" / "sub" / "b.xml").write_bytes(b"b")
+        (tmp_path / "other.xml").write_bytes(b"o")
+
+        source = FileSystemSource(tmp_path)
+        assert list(source.list("docs/")) == ["docs/a.xml", "docs/sub/b.xml"]
+        assert source.read("docs/sub/b.xml") == b"b"
+        with pytest.raises(InputTooLargeError):
+            source.read("docs/a.xml", max_size=0)
+        assert source.uri("docs/a.xml") == (tmp_path / "docs" / "a.xml").as_uri()
+
+
+class TestURIs:
+    """Tests for URI helpers and batch input expansion."""
+
+    def test_split_uri(self):
+        """URIs split into bucket and key; other schemes are rejected."""
+        assert split_uri("gs://bucket/a/b.xml") == ("bucket", "a/b.xml")
+        assert split_uri("gs://bucket") == ("bucket", "")
+        assert split_uri("file:///data/a%20b.xml") == ("", "data/a b.xml")
+        for uri in ["s3://bucket/key", "gs:///key", "file://host/data/a.xml"]:
+            with pytest.raises(ValueError):
+                split_uri(uri)
+
+    def test_sources_by_scheme(self, gcs, tmp_path):
+        """gs:// and file:// URIs list and read through their ObjectSource."""
+        source, key = open_source("gs://patents/docs/1.xml")
+        assert isinstance(source, GCSSource)
+        assert key == "docs/1.xml"
+        assert read_uri("gs://patents/docs/1.xml") == document("1")
+
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "docs" / "a.xml").write_bytes(document("a"))
+        (tmp_path / "docs" / "b.txt").write_bytes(b"not XML")
+        uri = (tmp_path / "docs" / "a.xml").as_uri()
+        assert isinstance(open_source(uri)[0], FileSystemSource)
+        assert list(list_uris(f"{tmp_path.as_uri()}/docs/")) == [uri]
+        assert read_uri(uri) == document("a")
+
+    def test_list_uris_applies_pattern(self, gcs):
+        """Only names matching the pattern are listed."""
+        assert list(list_uris("gs://patents/docs/", "*.txt")) == ["gs://patents/docs/readme.txt"]
+
+    def test_expand_inputs_mixes_local_and_remote(self, gcs):
+        """gs:// specs expand to object URIs alongside plain paths."""
+        assert list(expand_inputs(["local.xml", "gs://patents/other/"])) == [
+            "local.xml",
+            "gs://patents/other/9.xml",
+        ]
+
+    def test_file_uris_are_read_through_prefetch(self, tmp_path):
+        """file:// specs expand and download like objects in a bucket."""
+        (tmp_path / "a.xml").write_bytes(document("1"))
+        [(uri, content)] = prefetch(expand_inputs([tmp_path.as_uri() + "/"]))
+        assert uri == (tmp_path / "a.xml").as_uri()
+        assert content == document("1")
+
+
+class TestPrefetch:
+    """Tests for prefetch function."""
+
+    def test_order_and_passthrough(self, gcs):
+        """URIs become (uri, content) pairs; local paths pass through, in input order."""
+        items = ["a.xml", "gs://patents/docs/1.xml", "b.xml", "gs://patents/docs/0.xml"]
+        assert list(prefetch(items, concurrency=2)) == [
+            "a.xml",
+            ("gs://patents/docs/1.xml", document("1")),
+            "b.xml",
+            ("gs://patents/docs/0.xml", document("0")),
+        ]
+
+    def test_failures_are_yielded(self, gcs):
+        """A failed download is yielded with its error instead of raised."""
+        [(uri, error)] = prefetch(["gs://patents/docs/missing.xml"])
+        assert uri == "gs://patents/docs/missing.xml"
+        assert isinstance(error, StorageError)
+
+    def test_concurrency_is_bounded(self):
+        """No more than ``concurrency`` downloads run at once."""
+        running = []
+        peak = []
+
+        def fetch(uri):
+            running.append(uri)
+            peak.append(len(running))
+            time.sleep(0.01)
+            running.remove(uri)
+            return b""
+
+        uris = [f"gs://bucket/{index}.xml" for index in range(20)]
+        assert len(list(prefetch(uris, concurrency=3, fetch=fetch))) == 20
+        assert max(peak) <= 3
+
+    def test_downloads_overlap(self):
+        """Downloads run in parallel instead of one after another."""
+        uris = [f"gs://bucket/{index}.xml" for index in range(8)]
+        start = time.perf_counter()
+        list(prefetch(uris, concurrency=8, fetch=lambda uri: time.sleep(0.1) or b""))
+        assert time.perf_counter() - start < 0.5
+
+
+class TestBatchFromGCS:
+    """Tests for batch runs over gs:// inputs."""
+
+    def test_run_batch_reports_download_errors(self, gcs):
+        """Downloaded objects are extracted; failed downloads become error records."""
+        items = prefetch(["gs://patents/other/9.xml", "gs://patents/docs/missing.xml"])
+        records = list(run_batch(items, workers=2, chunk_size=1))
+
+        assert records[0]["path"] == "gs://patents/other/9.xml"
+        assert records[0]["doc_numbers"] == ["9"]
+        assert records[1]["error"] == "StorageError"
+
+    def test_split_downloaded_dump(self, gcs):
+        """Downloaded dumps are split like local ones."""
+        gcs.buckets["patents"]["dump.xml"] = b"<?xml version='1.0'?><a/><?xml version='1.0'?><b/>"
+        items = iter_split_documents(prefetch(["gs://patents/dump.xml"]))
+        assert [key for key, _ in items] == ["gs://patents/dump.xml#0", "gs://patents/dump.xml#1"]
+
+    def test_cli(self, gcs, capsys):
+        """The batch CLI lists, downloads and extracts gs:// prefixes."""
+        main(["batch", "gs://patents/docs/", "--workers", "1", "--prefetch", "2"])
+
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert [r["path"] for r in records] == [f"gs://patents/docs/{i}.xml" for i in range(5)]
+        assert [r["doc_numbers"] for r in records] == [[str(i)] for i in range(5)]
+        assert "5 documents (0 errors)" in captured.err
+
+    def test_cli_listing_error(self, gcs, capsys):
+        """A bucket that cannot be listed is an input error."""
+        with pytest.raises(SystemExit) as excinfo:
+            main(["batch", "gs://missing-bucket/", "--workers", "1"])
+        assert excinfo.value.code == 1
+        assert "Error reading inputs" in capsys.readouterr().err
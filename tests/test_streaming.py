@@ -0,0 +1,207 @@
+"""Tests for the streaming extraction module."""
+
+import gzip
+import io
+from pathlib import Path
+
+import pytest
+
+from xml_extractor.exceptions import InputTooLargeError, XMLParseError
+from xml_extractor.extractor import extract_doc_numbers, extract_records
+from xml_extractor.priority import PriorityPolicy
+from xml_extractor.streaming import (
+    extract_doc_numbers_streaming,
+    extract_records_streaming,
+    iter_doc_numbers_streaming,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def stream(xml: str) -> list[str]:
+    """Run streaming extraction over an in-memory XML string."""
+    return extract_doc_numbers_streaming(io.BytesIO(xml.encode("utf-8")))
+
+
+class TestExtractDocNumbersStreaming:
+    """Tests for extract_doc_numbers_streaming function."""
+
+    @pytest.mark.parametrize(
+        "fixture", sorted(p.name for p in FIXTURES_DIR.iterdir() if p.is_dir())
+    )
+    def test_matches_tree_extraction_on_fixtures(self, fixture):
+        """Streaming output should be identical to the tree-based extractor."""
+        input_file = FIXTURES_DIR / fixture / "input.xml"
+        expected = extract_doc_numbers(input_file.read_text(encoding="utf-8"))
+
+        assert extract_doc_numbers_streaming(input_file) == expected
+
+    def test_priority_ordering(self):
+        """Test that epo comes before patent-office."""
+        xml = """<root>
+          <document-id format="patent-office">
+            <doc-number>222</doc-number>
+          </document-id>
+          <document-id format="epo">
+            <doc-number>111</doc-number>
+          </document-id>
+        </root>"""
+
+        assert stream(xml) == ["111", "222"]
+
+    def test_only_first_doc_number_is_used(self):
+        """Only the first doc-number child of a document-id is extracted."""
+        xml = """<root>
+          <document-id format="epo">
+            <doc-number>111</doc-number>
+            <doc-number>222</doc-number>
+          </document-id>
+        </root>"""
+
+        assert stream(xml) == ["111"]
+
+    def test_nested_document_ids_keep_document_order(self):
+        """Nested document-ids are ordered by start tag, like the XPath search."""
+        xml = """<root>
+          <document-id>
+            <doc-number>OUTER</doc-number>
+            <document-id><doc-number>INNER</doc-number></document-id>
+          </document-id>
+        </root>"""
+
+        assert stream(xml) == extract_doc_numbers(xml) == ["OUTER", "INNER"]
+
+    def test_priority_policy(self):
+        """A custom policy orders nested document-ids like the tree path."""
+        xml = """<root>
+          <document-id format="epo">
+            <doc-number>OUTER</doc-number>
+            <document-id load-source="docdb"><doc-number>INNER</doc-number></document-id>
+          </document-id>
+          <document-id><doc-number>LAST</doc-number></document-id>
+        </root>"""
+        policy = PriorityPolicy("none,load-source=docdb")
+
+        streamed = extract_doc_numbers_streaming(io.BytesIO(xml.encode()), policy=policy)
+        assert streamed == extract_doc_numbers(xml, policy=policy) == ["LAST", "INNER", "OUTER"]
+
+    def test_namespaced_document_ids_are_ignored(self):
+        """Namespaced elements are not matched, as in the tree-based path."""
+        xml = """<root xmlns="http://example.com">
+          <document-id><doc-number>111</doc-number></document-id>
+        </root>"""
+
+        assert stream(xml) == extract_doc_numbers(xml) == []
+
+    def test_malformed_xml_is_recovered(self):
+        """Test that recover mode salvages doc-numbers before the damage."""
+        xml = """<root>
+          <document-id format="epo">
+            <doc-number>111111111</doc-number>
+          </document-id>
+          <unclosed-tag>
+        </root>"""
+
+        assert stream(xml) == ["111111111"]
+
+    def test_finished_elements_are_released(self):
+        """Processed document-ids should not accumulate in the partial tree."""
+        count = 1000
+        body = "".join(
+            f"<document-id format='epo'><doc-number>{i}</doc-number></document-id>"
+            for i in range(count)
+        )
+        xml = f"<root><application-reference>{body}</application-reference></root>"
+
+        assert stream(xml) == [str(i) for i in range(count)]
+
+    def test_empty_input_raises(self):
+        """Test that empty input raises XMLParseError."""
+        with pytest.raises(XMLParseError):
+            stream("")
+
+    def test_unrecoverable_input_raises(self):
+        """Test that input with no recoverable root raises XMLParseError."""
+        with pytest.raises(XMLParseError):
+            stream("not xml at all")
+
+    def test_compressed_path(self, tmp_path):
+        """Compressed files are decompressed while they are parsed."""
+        input_file = FIXTURES_DIR / "02_priority_ordering" / "input.xml"
+        compressed = tmp_path / "input.xml.gz"
+        compressed.write_bytes(gzip.compress(input_file.read_bytes()))
+
+        assert extract_doc_numbers_streaming(compressed) == extract_doc_numbers(input_file)
+
+    def test_decompression_bomb_is_stopped(self):
+        """The size limit applies to decompressed bytes as they stream."""
+        bomb = gzip.compress(b"<root>" + b" " * (8 * 1024 * 1024) + b"</root>")
+        with pytest.raises(InputTooLargeError):
+            extract_doc_numbers_streaming(bomb, max_size=1024 * 1024)
+
+
+class TestIterDocNumbersStreaming:
+    """Tests for iter_doc_numbers_streaming function."""
+
+    @pytest.mark.parametrize(
+        "fixture", sorted(p.name for p in FIXTURES_DIR.iterdir() if p.is_dir())
+    )
+    def test_groups_join_to_streaming_extraction(self, fixture):
+        input_file = FIXTURES_DIR / fixture / "input.xml"
+        try:
+            expected = extract_doc_numbers_streaming(input_file)
+        except XMLParseError:
+            return
+        groups = list(iter_doc_numbers_streaming(input_file))
+        assert [doc for group in groups for doc in group] == expected
+
+    def test_first_level_is_yielded_while_parsing(self):
+        """epo doc-numbers arrive before the rest of the input has been read."""
+        head = (
+            b'<root><document-id format="patent-office"><doc-number>2</doc-number></document-id>'
+            b'<document-id format="epo"><doc-number>1</doc-number></document-id>'
+            + b"<p>"
+            + b"x" * (1024 * 1024)
+        )
+
+        class Truncated(io.RawIOBase):
+            """Serves ``head``, then fails like a dropped connection."""
+
+            def __init__(self):
+                self._source = io.BytesIO(head)
+
+            def readable(self):
+                return True
+
+            def readinto(self, buffer):
+                size = self._source.readinto(buffer)
+                if not size:
+                    raise OSError("connection reset")
+                return size
+
+        groups = iter_doc_numbers_streaming(Truncated())
+        assert next(groups) == ["1"]
+        with pytest.raises(XMLParseError):
+            next(groups)
+
+    def test_nested_document_ids_keep_document_order(self):
+        xml = b"""<root>
+          <document-id format="epo"><doc-number>1</doc-number>
+            <document-id format="epo"><doc-number>2</doc-number></document-id>
+          </document-id>
+          <document-id><doc-number>4</doc-number></document-id>
+          <document-id format="epo"><doc-number>3</doc-number></document-id>
+        </root>"""
+        assert list(iter_doc_numbers_streaming(xml)) == [["1", "2"], ["3"], ["4"]]
+        assert extract_doc_numbers_streaming(xml) == ["1", "2", "3", "4"]
+
+
+def test_records_match_tree_records():
+    """Streaming records, including the application-reference ucid, match the tree path."""
+    for fixture in sorted(FIXTURES_DIR.glob("*/input.xml")):
+        content = fixture.read_bytes()
+        try:
+            expected = extract_records(content)
+        except XMLParseError:
+            continue
+        assert extract_records_streaming(content) == expected, fixture.parent.name
@@ -0,0 +1,78 @@
+"""Tests for the API extraction pool."""
+
+import asyncio
+import threading
+
+import pytest
+
+from api.workers import ExtractionPool, PoolSaturatedError
+
+
+class TestExtractionPool:
+    """Tests for ExtractionPool class."""
+
+    def test_runs_function_off_the_event_loop(self):
+        """Calls run on a pool thread, not the loop's thread."""
+        pool = ExtractionPool(max_workers=1, queue_depth=0)
+        try:
+            thread_name = asyncio.run(pool.run(lambda: threading.current_thread().name))
+        finally:
+            pool.shutdown()
+
+        assert thread_name.startswith("extract")
+
+    def test_rejects_when_queue_is_full(self):
+        """Calls beyond workers + queue depth fail fast with PoolSaturatedError."""
+        pool = ExtractionPool(max_workers=1, queue_depth=1)
+        release = threading.Event()
+
+        async def scenario():
+            running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(PoolSaturatedError):
+                await pool.run(release.wait)
+            release.set()
+            await asyncio.gather(*running)
+            # Capacity is released once calls finish
+            assert pool.in_flight == 0
+            assert await pool.run(lambda: "ok") == "ok"
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            release.set()
+            pool.shutdown()
+
+    def test_cancelled_call_holds_capacity_until_it_finishes(self):
+        """A cancelled request (a client disconnect) keeps its slot until its call returns."""
+        pool = ExtractionPool(max_workers=1, queue_depth=0)
+        release = threading.Event()
+        started = threading.Event()
+
+        def work():
+            started.set()
+            release.wait()
+
+        async def scenario():
+            call = asyncio.ensure_future(pool.run(work))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            assert pool.in_flight == 1
+            with pytest.raises(PoolSaturatedError):
+                await pool.run(lambda: "too many")
+
+        try:
+            asyncio.run(scenario())
+            release.set()
+            pool.shutdown()
+            assert pool.in_flight == 0
+        finally:
+            release.set()
+            pool.shutdown()
+
+    def test_unknown_kind_is_rejected(self):
+        """Only thread and process executors are supported."""
+        with pytest.raises(ValueError):
+            ExtractionPool(max_workers=1, queue_depth=0, kind="fiber")
@@ -2,10 +2,60 @@
 
 This package provides functionality to extract doc-number values from patent XML
 documents with priority-based ordering.
+
+The extraction functions are imported on first use, so importing the package
+(or a light submodule such as ``priority``) does not load lxml. Command-line
+runs that only talk to the extraction daemon never pay for it.
 """
 
-from .exceptions import ExtractionError, InvalidDocumentError, XMLParseError
-from .extractor import extract_doc_numbers
+from importlib import import_module
+
+from .exceptions import (
+    CompressionError,
+    EncodingError,
+    ExtractionError,
+    InputTooLargeError,
+    InvalidDocumentError,
+    XMLParseError,
+)
+
+# Public names provided by submodules that import lxml
+_LAZY = {
+    "DocumentIdRecord": ".extractor",
+    "Extractor": ".extractor",
+    "extract_doc_numbers": ".extractor",
+    "extract_records": ".extractor",
+    "extract_doc_numbers_streaming": ".streaming",
+    "extract_records_streaming": ".streaming",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # Later lookups find the name directly, without coming back here
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY])
+
 
 __version__ = "0.1.0"
-__all__ = ["extract_doc_numbers", "ExtractionError", "XMLParseError", "InvalidDocumentError"]
+__all__ = [
+    "extract_doc_numbers",
+    "extract_doc_numbers_streaming",
+    "extract_records",
+    "extract_records_streaming",
+    "DocumentIdRecord",
+    "Extractor",
+    "ExtractionError",
+    "XMLParseError",
+    "InvalidDocumentError",
+    "EncodingError",
+    "CompressionError",
+    "InputTooLargeError",
+]
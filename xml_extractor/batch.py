@@ -0,0 +1,337 @@
+"""Parallel batch extraction over many input files."""
+
+import glob
+import io
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from . import storage
+from .cache import ResultCache
+from .exceptions import CompressionError
+from .extractor import extract_doc_numbers, extract_records
+from .manifest import content_hash
+from .mapping import read_file
+from .priority import DEFAULT_POLICY, PriorityPolicy
+from .sinks import record_rows
+from .splitter import split_documents
+from .streaming import extract_doc_numbers_streaming, extract_records_streaming
+
+GLOB_CHARS = frozenset("*?[")
+
+
+@dataclass(frozen=True)
+class BatchOptions:
+    """Per-run settings shipped to every worker process.
+
+    Attributes:
+        stream: Use the streaming extractor instead of the tree-based one
+        cache_path: SQLite result cache shared by all workers, if any
+        rows: Return sink rows (see ``sinks.ROW_FIELDS``) instead of doc-numbers;
+            the cache is not used for rows
+        checksum: Add the content hash of each input to its record as ``hash``,
+            for the resume manifest
+        policy: Rules that order each document's doc-numbers
+    """
+
+    stream: bool = False
+    cache_path: str | None = None
+    rows: bool = False
+    checksum: bool = False
+    policy: PriorityPolicy = DEFAULT_POLICY
+
+
+# One result cache per worker process, opened on first use
+_caches: dict[str, ResultCache] = {}
+
+
+def _get_cache(path: str) -> ResultCache:
+    """Return this process's cache backed by the shared store at ``path``."""
+    cache = _caches.get(path)
+    if cache is None:
+        cache = _caches[path] = ResultCache(path=path)
+    return cache
+
+
+def expand_inputs(specs: Iterable[str], pattern: str = "*.xml") -> Iterator[str]:
+    """Expand input specs into individual file paths, lazily.
+
+    Each spec may be:
+    - ``@list.txt``: a file containing one path per line
+    - ``gs://bucket/prefix`` or ``file:///dir/prefix``: objects under the prefix
+      whose names match ``pattern``
+    - a directory: searched recursively for files matching ``pattern``
+    - a glob such as ``data/**/*.xml``
+    - a plain file path
+
+    Args:
+        specs: Input specs from the command line
+        pattern: Filename pattern used when walking directories
+
+    Yields:
+        File paths (or object URIs) in a deterministic order
+
+    Raises:
+        StorageError: If a bucket cannot be listed
+    """
+    for spec in specs:
+        if storage.is_uri(spec):
+            yield from storage.list_uris(spec, pattern)
+        elif spec.startswith("@"):
+            with open(spec[1:], encoding="utf-8") as file_list:
+                for line in file_list:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        yield line
+        elif os.path.isdir(spec):
+            for dirpath, dirnames, filenames in os.walk(spec):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if Path(filename).match(pattern):
+                        yield os.path.join(dirpath, filename)
+        elif GLOB_CHARS.intersection(spec):
+            yield from sorted(glob.iglob(spec, recursive=True))
+        else:
+            yield spec
+
+
+@contextmanager
+def _load(source: Any, options: BatchOptions, read: bool) -> Iterator[tuple[Any, str | None]]:
+    """Prepare one input for extraction.
+
+    Re-raises an error from fetching the input, and reads a file when its
+    bytes are needed (``read``) or must be hashed; large files are mapped
+    rather than copied into memory (see ``mapping.read_file``).
+
+    Yields:
+        Tuple of (source to extract from, content hash if checksums are on),
+        valid until the context exits
+    """
+    if isinstance(source, Exception):
+        raise source
+    if isinstance(source, Path) and (read or options.checksum):
+        with read_file(source) as content:
+            yield content, content_hash(content) if options.checksum else None
+        return
+    yield source, content_hash(source) if options.checksum else None
+
+
+def _extract_record(key: str, source: Any, options: BatchOptions) -> dict[str, Any]:
+    """Run one extraction and turn its outcome into a result record."""
+    if options.rows:
+        return _extract_rows(key, source, options)
+    extract = partial(
+        extract_doc_numbers_streaming if options.stream else extract_doc_numbers,
+        policy=options.policy,
+    )
+    start = time.perf_counter()
+    cached = False
+    digest = None
+    try:
+        with _load(source, options, read=options.cache_path is not None) as (source, digest):
+            if options.cache_path:
+                doc_numbers, cached = _get_cache(options.cache_path).extract(
+                    source, extract, options.policy.fingerprint
+                )
+            else:
+                doc_numbers = extract(source)
+        error = message = None
+    except Exception as e:
+        doc_numbers = []
+        error, message = type(e).__name__, str(e)
+    record = {
+        "path": key,
+        "doc_numbers": doc_numbers,
+        "error": error,
+        "message": message,
+        "cached": cached,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    if options.checksum:
+        record["hash"] = digest
+    return record
+
+
+def _extract_rows(key: str, source: Any, options: BatchOptions) -> dict[str, Any]:
+    """Like ``_extract_record``, but with sink rows in place of doc-numbers."""
+    extract = extract_records_streaming if options.stream else extract_records
+    start = time.perf_counter()
+    digest = None
+    try:
+        with _load(source, options, read=False) as (source, digest):
+            rows = record_rows(key, extract(source, policy=options.policy))
+        error = message = None
+    except Exception as e:
+        rows = []
+        error, message = type(e).__name__, str(e)
+    record = {
+        "path": key,
+        "rows": rows,
+        "error": error,
+        "message": message,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    if options.checksum:
+        record["hash"] = digest
+    return record
+
+
+def process_file(path: str, options: BatchOptions = BatchOptions()) -> dict[str, Any]:
+    """Extract doc-numbers from one file into a result record.
+
+    Failures never propagate; they become error records so one bad file
+    cannot abort a batch run.
+
+    Args:
+        path: Path of the XML file
+        options: Extraction settings for this run
+
+    Returns:
+        Record with path, doc_numbers (or rows), error class, message, cached
+        and elapsed_ms
+    """
+    return _extract_record(path, Path(path), options)
+
+
+def process_document(
+    key: str, content: bytes | Exception, options: BatchOptions = BatchOptions()
+) -> dict[str, Any]:
+    """Extract doc-numbers from one in-memory document into a result record.
+
+    Args:
+        key: Identifier reported as the record's path (e.g. ``dump.xml#12``)
+        content: Raw XML bytes of the document, or the error raised while
+            fetching them, which is reported as the record's error
+        options: Extraction settings for this run
+
+    Returns:
+        Record in the same shape as ``process_file``
+    """
+    return _extract_record(key, content, options)
+
+
+def iter_split_documents(
+    items: Iterable[str | tuple[str, bytes | Exception]],
+) -> Iterator[str | tuple[str, bytes | Exception]]:
+    """Split each concatenated dump file into keyed documents.
+
+    Args:
+        items: Paths of files holding concatenated XML documents, or
+            ``(key, content)`` pairs from ``storage.prefetch``
+
+    Yields:
+        ``("<key>#<index>", document_bytes)`` pairs. An input that cannot be
+        read at all is yielded unchanged so a worker reports the read error;
+        one that fails part way is reported once, as ``("<key>#<index>",
+        error)`` for the rest of the file from the first unread document
+    """
+    for item in items:
+        if isinstance(item, str):
+            key, source = item, item
+        else:
+            key, content = item
+            if isinstance(content, Exception):
+                yield item
+                continue
+            source = io.BytesIO(content)
+        index = 0
+        try:
+            for document in split_documents(source):
+                yield f"{key}#{index}", document
+                index += 1
+        except (OSError, CompressionError) as e:
+            # Documents already yielded must not be extracted again
+            yield (f"{key}#{index}", e) if index else item
+
+
+def _process_chunk(items: list[Any], options: BatchOptions) -> list[dict[str, Any]]:
+    """Process a chunk of file paths or (key, content) documents in a worker."""
+    return [
+        process_file(item, options) if isinstance(item, str) else process_document(*item, options)
+        for item in items
+    ]
+
+
+def _warm_up() -> None:
+    """Initialise lxml and the worker's thread-local parser before real work."""
+    extract_doc_numbers(b"<root/>")
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """Split an iterable into lists of at most ``size`` items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bounded_map(
+    executor: Executor,
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_pending: int,
+) -> Iterator[Any]:
+    """Like ``executor.map``, but only keeps ``max_pending`` tasks in flight.
+
+    ``Executor.map`` submits every item up front, which holds the whole
+    input (and all results) in memory for multi-million item runs.
+
+    Args:
+        executor: Executor to submit work to
+        fn: Picklable callable applied to each item
+        items: Items to process, consumed lazily
+        max_pending: Maximum number of submitted but unconsumed tasks
+
+    Yields:
+        Results in input order
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def run_batch(
+    paths: Iterable[str | tuple[str, bytes | Exception]],
+    workers: int | None = None,
+    chunk_size: int = 64,
+    options: BatchOptions = BatchOptions(),
+) -> Iterator[dict[str, Any]]:
+    """Extract doc-numbers from many files using a process pool.
+
+    Files are sent to workers in chunks to amortise inter-process overhead;
+    results come back in input order as soon as each chunk is done.
+
+    Args:
+        paths: File paths, or ``(key, content)`` documents from
+            ``iter_split_documents`` or ``storage.prefetch``, consumed lazily
+        workers: Number of worker processes (defaults to CPU count);
+            1 processes everything in the current process
+        chunk_size: Number of files per task sent to a worker
+        options: Extraction settings shipped to every worker
+
+    Yields:
+        One result record per input file or document (see ``process_file``)
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunked(paths, chunk_size)
+    process_chunk = partial(_process_chunk, options=options)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from process_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm_up) as executor:
+        for records in bounded_map(executor, process_chunk, chunks, max_pending=workers * 2):
+            yield from records
@@ -0,0 +1,235 @@
+"""Content-addressed result cache for repeated documents.
+
+Results are keyed by a BLAKE2b hash of the raw XML bytes plus the
+fingerprint of the priority policy they were ordered with, so byte-identical
+re-ingests skip parsing entirely. An in-process LRU bounded by entry count
+and approximate size sits in front of an optional SQLite store that several
+processes (uvicorn workers, batch workers, CLI runs) can share.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import BinaryIO
+
+from .extractor import extract_doc_numbers
+from .priority import DEFAULT_POLICY
+
+# Identifies the ordering rules results were computed with; part of every key
+DEFAULT_PRIORITY_CONFIG = DEFAULT_POLICY.fingerprint
+
+# Rough per-entry bookkeeping overhead (key, list, OrderedDict node) in bytes
+_ENTRY_OVERHEAD = 200
+
+
+def content_key(content: bytes | bytearray | memoryview | BinaryIO, config: str) -> str:
+    """Hash raw XML bytes together with the priority configuration.
+
+    Args:
+        content: Raw XML bytes, or a binary file hashed in chunks from its
+            current position to its end
+        config: Priority configuration identifier (``PriorityPolicy.fingerprint``)
+
+    Returns:
+        Hex digest identifying this document under this configuration
+    """
+    if isinstance(content, bytes | bytearray | memoryview):
+        digest = hashlib.blake2b(content, digest_size=16)
+    else:
+        digest = hashlib.file_digest(content, lambda: hashlib.blake2b(digest_size=16))
+    digest.update(b"\0" + config.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _entry_size(doc_numbers: list[str]) -> int:
+    """Approximate memory held by one cached result."""
+    return _ENTRY_OVERHEAD + sum(len(doc_number) + 50 for doc_number in doc_numbers)
+
+
+class DiskStore:
+    """SQLite-backed result store shared between processes.
+
+    Uses WAL mode so readers never block the single writer, and one
+    connection per thread. Once ``max_entries`` is exceeded the oldest
+    entries are pruned.
+    """
+
+    def __init__(self, path: str | os.PathLike, max_entries: int = 1_000_000):
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, doc_numbers TEXT)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> list[str] | None:
+        """Return the stored result for ``key``, or None."""
+        row = (
+            self._connection()
+            .execute("SELECT doc_numbers FROM results WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, doc_numbers: list[str]) -> None:
+        """Store a result, pruning the oldest entries now and then."""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, doc_numbers) VALUES (?, ?)",
+                (key, json.dumps(doc_numbers)),
+            )
+            self._puts += 1
+            if self._puts % 1000 == 0:
+                conn.execute(
+                    "DELETE FROM results WHERE rowid <= (SELECT MAX(rowid) FROM results) - ?",
+                    (self.max_entries,),
+                )
+
+
+class ResultCache:
+    """LRU result cache with an optional shared on-disk tier.
+
+    Thread-safe. Only successful extractions are cached; errors are
+    re-raised every time.
+
+    Example:
+        >>> cache = ResultCache(max_entries=100)
+        >>> cache.extract(b"<root><document-id><doc-number>1</doc-number></document-id></root>")
+        (['1'], False)
+        >>> cache.extract(b"<root><document-id><doc-number>1</doc-number></document-id></root>")
+        (['1'], True)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        path: str | os.PathLike | None = None,
+        config: str = DEFAULT_PRIORITY_CONFIG,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.config = config
+        self.disk = DiskStore(path) if path else None
+        self._entries: OrderedDict[str, list[str]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> list[str] | None:
+        """Look up a result in memory, then on disk."""
+        with self._lock:
+            doc_numbers = self._entries.get(key)
+            if doc_numbers is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return doc_numbers
+
+        if self.disk is not None:
+            doc_numbers = self.disk.get(key)
+            if doc_numbers is not None:
+                self._remember(key, doc_numbers)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return doc_numbers
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, doc_numbers: list[str]) -> None:
+        """Store a result in memory and, if configured, on disk."""
+        self._remember(key, doc_numbers)
+        if self.disk is not None:
+            self.disk.put(key, doc_numbers)
+
+    def _remember(self, key: str, doc_numbers: list[str]) -> None:
+        """Insert into the LRU, evicting least recently used entries."""
+        size = _entry_size(doc_numbers)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _entry_size(previous)
+            self._entries[key] = doc_numbers
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _entry_size(evicted)
+                self.evictions += 1
+
+    def lookup(
+        self, content: bytes | bytearray | memoryview | BinaryIO, config: str | None = None
+    ) -> tuple[str, list[str] | None]:
+        """Hash ``content`` and look it up.
+
+        Args:
+            content: Raw XML bytes, or a binary file read to its end
+            config: Priority configuration of the lookup, if not the cache's own
+
+        Returns:
+            Tuple of (cache key, cached doc-numbers or None on a miss)
+        """
+        key = content_key(content, config or self.config)
+        doc_numbers = self.get(key)
+        return key, list(doc_numbers) if doc_numbers is not None else None
+
+    def extract(
+        self,
+        content: bytes | bytearray | memoryview,
+        extract: Callable[[bytes], list[str]] = extract_doc_numbers,
+        config: str | None = None,
+    ) -> tuple[list[str], bool]:
+        """Return cached doc-numbers for ``content``, extracting on a miss.
+
+        Args:
+            content: Raw XML bytes
+            extract: Extraction function used on a miss
+            config: Priority configuration ``extract`` orders results by, if
+                not the cache's own
+
+        Returns:
+            Tuple of (doc-numbers, whether the result came from the cache)
+        """
+        key, doc_numbers = self.lookup(content, config)
+        if doc_numbers is not None:
+            return doc_numbers, True
+
+        doc_numbers = extract(content)
+        self.put(key, list(doc_numbers))
+        return doc_numbers, False
+
+    def stats(self) -> dict[str, int | float]:
+        """Counters for monitoring: hits, misses, hit rate, evictions and size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,244 @@
+"""Transparent decompression of gzip, bzip2 and zstd input.
+
+Archived patent XML is usually stored compressed. The format is detected
+from the first bytes of the content, never from a file name, and the data is
+decompressed as it is read: a size limit applies to the decompressed bytes
+as they stream, so a decompression bomb is stopped after ``max_size`` bytes
+instead of being inflated into memory first.
+
+zstd needs the optional ``zstandard`` package
+(``pip install 'xml-extractor[zstd]'``); gzip and bzip2 use the standard
+library.
+"""
+
+import bz2
+import gzip
+import io
+import os
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import BinaryIO
+
+from .exceptions import CompressionError, InputTooLargeError
+
+GZIP = "gzip"
+BZIP2 = "bzip2"
+ZSTD = "zstd"
+
+# Leading bytes of each format; none of them can start an XML document
+MAGIC = {GZIP: b"\x1f\x8b", BZIP2: b"BZh", ZSTD: b"\x28\xb5\x2f\xfd"}
+MAGIC_SIZE = max(len(magic) for magic in MAGIC.values())
+
+# Decompressed bytes produced per read when reading everything
+CHUNK_SIZE = 256 * 1024
+
+PathOrStream = str | os.PathLike | BinaryIO
+
+
+def detect(prefix: bytes) -> str | None:
+    """Name the compression format of content starting with ``prefix``.
+
+    Args:
+        prefix: At least the first ``MAGIC_SIZE`` bytes of the content
+
+    Returns:
+        ``"gzip"``, ``"bzip2"`` or ``"zstd"``, or None for uncompressed content
+    """
+    for name, magic in MAGIC.items():
+        if prefix.startswith(magic):
+            return name
+    return None
+
+
+def too_large(limit: int) -> InputTooLargeError:
+    """The error for content above ``limit`` bytes."""
+    return InputTooLargeError(f"Input exceeds {limit} bytes once decompressed", limit)
+
+
+class DecompressingReader(io.RawIOBase):
+    """Read-only binary stream of the decompressed content of another stream.
+
+    Every read is bounded, so memory use does not depend on the compression
+    ratio, and reading past ``max_size`` decompressed bytes raises.
+
+    Args:
+        stream: Binary stream positioned at the start of the compressed data
+        fmt: Format from ``detect``; None passes ``stream`` through, which
+            only enforces the size limit
+        max_size: Largest number of bytes that may be read; None for no limit
+        close_stream: Also close ``stream`` when the reader is closed
+
+    Raises:
+        CompressionError: If the format is zstd and zstandard is not installed
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        fmt: str | None,
+        max_size: int | None = None,
+        close_stream: bool = False,
+    ):
+        self.format = fmt
+        self.max_size = max_size
+        self.size = 0
+        self._stream = stream
+        self._close_stream = close_stream
+        self._errors: tuple[type[Exception], ...] = (OSError, EOFError, zlib.error)
+        if fmt is None:
+            self._reader = stream
+        elif fmt == GZIP:
+            self._reader = gzip.GzipFile(fileobj=stream, mode="rb")
+        elif fmt == BZIP2:
+            self._reader = bz2.BZ2File(stream)
+        else:
+            try:
+                import zstandard
+            except ImportError as e:
+                raise CompressionError(
+                    "zstd input needs the zstandard package: pip install 'xml-extractor[zstd]'"
+                ) from e
+            self._reader = zstandard.ZstdDecompressor().stream_reader(
+                stream, read_across_frames=True, closefd=False
+            )
+            self._errors += (zstandard.ZstdError,)
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to ``size`` decompressed bytes; all of them if negative.
+
+        Raises:
+            CompressionError: If the compressed data is corrupt
+            InputTooLargeError: If more than ``max_size`` bytes have been read
+        """
+        if size is None or size < 0:
+            return self.readall()
+        if self.format is None:
+            data = self._reader.read(size)
+        else:
+            try:
+                data = self._reader.read(size)
+            except self._errors as e:
+                raise CompressionError(f"Failed to decompress {self.format} input: {e}") from e
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise too_large(self.max_size)
+        return data
+
+    def readall(self) -> bytes:
+        chunks = []
+        while chunk := self.read(CHUNK_SIZE):
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._reader is not self._stream:
+                self._reader.close()
+            if self._close_stream:
+                self._stream.close()
+        finally:
+            super().close()
+
+
+def decompress(
+    data: bytes | bytearray | memoryview, max_size: int | None = None
+) -> bytes | bytearray | memoryview:
+    """Decompress in-memory content if it is compressed.
+
+    Args:
+        data: Raw content, compressed or not
+        max_size: Largest size accepted in bytes, after decompression; None
+            for no limit
+
+    Returns:
+        The decompressed bytes, or ``data`` itself if it is not compressed
+
+    Raises:
+        CompressionError: If compressed data is corrupt or unsupported
+        InputTooLargeError: If the content exceeds ``max_size``
+    """
+    fmt = detect(bytes(data[:MAGIC_SIZE]))
+    if fmt is None:
+        if max_size is not None and len(data) > max_size:
+            raise too_large(max_size)
+        return data
+    with DecompressingReader(io.BytesIO(data), fmt, max_size) as reader:
+        return reader.read()
+
+
+def _peek(stream: BinaryIO) -> tuple[bytes, BinaryIO]:
+    """Read the first bytes of a stream without consuming them.
+
+    Returns:
+        Tuple of (prefix, stream to read from instead of ``stream``)
+    """
+    if hasattr(stream, "peek"):
+        return stream.peek(MAGIC_SIZE)[:MAGIC_SIZE], stream
+    if stream.seekable():
+        position = stream.tell()
+        prefix = stream.read(MAGIC_SIZE)
+        stream.seek(position)
+        return prefix, stream
+    stream = io.BufferedReader(stream)
+    return stream.peek(MAGIC_SIZE)[:MAGIC_SIZE], stream
+
+
+@contextmanager
+def open_stream(source: PathOrStream, max_size: int | None = None) -> Iterator[PathOrStream]:
+    """Prepare a file for lxml, decompressing it if it is compressed.
+
+    An uncompressed path is yielded unchanged, because lxml reads files
+    itself faster than through a Python stream; its size is checked up
+    front. Compressed files, and streams under a size limit, are yielded as
+    a ``DecompressingReader``. A stream passed in is never closed.
+
+    Args:
+        source: Path or binary file object
+        max_size: Largest size accepted in bytes, after decompression; None
+            for no limit
+
+    Yields:
+        What to hand to ``etree.parse`` or ``etree.iterparse``
+
+    Raises:
+        CompressionError: If compressed data is corrupt or unsupported
+        InputTooLargeError: If the content exceeds ``max_size``
+    """
+    if isinstance(source, str | os.PathLike):
+        # Raw descriptor calls: this runs for every plain file in a batch
+        fd = os.open(source, os.O_RDONLY)
+        try:
+            fmt = detect(os.read(fd, MAGIC_SIZE))
+            if fmt is None and max_size is not None and os.fstat(fd).st_size > max_size:
+                raise too_large(max_size)
+        finally:
+            os.close(fd)
+        if fmt is None:
+            yield source
+            return
+        file = open(source, "rb")
+        try:
+            reader = DecompressingReader(file, fmt, max_size, close_stream=True)
+        except BaseException:
+            file.close()
+            raise
+    else:
+        prefix, source = _peek(source)
+        fmt = detect(prefix)
+        if fmt is None and max_size is None:
+            yield source
+            return
+        reader = DecompressingReader(source, fmt, max_size)
+    with reader:
+        yield reader
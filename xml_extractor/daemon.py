@@ -0,0 +1,207 @@
+"""Persistent extraction daemon on a Unix domain socket, and its client.
+
+Starting the interpreter and importing lxml dominates the cost of one
+``xml-extractor`` call on a small file. ``xml-extractor serve`` keeps a
+process with warm parsers (and optionally a result cache) listening on a
+socket; ``xml-extractor --socket PATH`` then sends the document there
+instead of importing the extraction stack, and this module is all the
+client loads besides the standard library.
+
+Protocol: a request is one JSON line, followed by ``size`` raw document
+bytes when it carries the document itself; the response is one JSON line.
+A connection may carry any number of requests. Request fields:
+
+- ``path``: file for the daemon to read, or ``size``: bytes that follow
+- ``policy``: priority policy spec (default: the daemon's)
+- ``records``: answer with one record per document-id
+- ``stream``: use streaming extraction
+
+Responses are ``{"doc_numbers": [...]}``, ``{"records": [...]}`` or
+``{"error": type name, "message": ..., "extraction": bool}``, where
+``extraction`` tells extraction errors from unexpected ones.
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+from pathlib import Path
+from typing import Any
+
+from .exceptions import ExtractionError
+
+# Longest request line accepted; larger ones close the connection
+MAX_HEADER_SIZE = 64 * 1024
+
+# Seconds a client waits for the daemon's answer
+DEFAULT_TIMEOUT = 300.0
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answer the requests of one connection until the client closes it."""
+
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline(MAX_HEADER_SIZE + 1)
+            if not line:
+                return
+            try:
+                if len(line) > MAX_HEADER_SIZE or not line.endswith(b"\n"):
+                    raise ValueError("Request line is too long or incomplete")
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+                body = None
+                if "size" in request:
+                    body = self.rfile.read(int(request["size"]))
+                    if len(body) != int(request["size"]):
+                        raise ValueError("Connection closed before the document was sent")
+            except ValueError as e:
+                # The stream can no longer be framed: answer and hang up
+                self._respond({"error": type(e).__name__, "message": str(e), "extraction": False})
+                return
+            self._respond(self.server.answer(request, body))
+
+    def _respond(self, response: dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class ExtractionServer(socketserver.ThreadingUnixStreamServer):
+    """Socket server answering extraction requests with warm parsers.
+
+    Each connection is served on its own thread; the extractor keeps one
+    parser per thread and the result cache, if any, is shared.
+
+    Args:
+        socket_path: Path of the Unix domain socket to create
+        policy: Default priority policy spec for requests that name none
+        cache_path: SQLite result cache file, or None for no cache
+
+    Raises:
+        OSError: If another daemon is already listening on ``socket_path``
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str | os.PathLike,
+        policy: str | None = None,
+        cache_path: str | os.PathLike | None = None,
+    ):
+        # The extraction stack is only imported by the daemon itself
+        from .cache import ResultCache
+        from .extractor import Extractor
+        from .priority import parse_policy
+
+        self.policy = parse_policy(policy)
+        self.extractor = Extractor(fast_path=True)
+        self.cache = ResultCache(path=cache_path) if cache_path else None
+        self.socket_path = os.fspath(socket_path)
+        _remove_stale_socket(self.socket_path)
+        super().__init__(self.socket_path, _Handler)
+        # Only the owner may submit requests (and so make the daemon read files)
+        os.chmod(self.socket_path, 0o600)
+
+    def answer(self, request: dict[str, Any], body: bytes | None) -> dict[str, Any]:
+        """Extract one request's document; errors become error responses."""
+        try:
+            return self._extract(request, body)
+        except Exception as e:
+            return {
+                "error": type(e).__name__,
+                "message": str(e),
+                "extraction": isinstance(e, ExtractionError),
+            }
+
+    def _extract(self, request: dict[str, Any], body: bytes | None) -> dict[str, Any]:
+        from .extractor import extract_records
+        from .priority import parse_policy
+        from .streaming import extract_doc_numbers_streaming, extract_records_streaming
+
+        policy = parse_policy(request["policy"]) if request.get("policy") else self.policy
+        stream = bool(request.get("stream"))
+        if body is None:
+            if "path" not in request:
+                raise ValueError("Request needs a path or a size")
+            path = Path(request["path"])
+            # Streaming reads the file itself; otherwise the scanner needs bytes
+            source = path if stream else path.read_bytes()
+        else:
+            source = io.BytesIO(body) if stream else body
+
+        if request.get("records"):
+            extract_all = extract_records_streaming if stream else extract_records
+            records = extract_all(source, policy=policy)
+            return {"records": [record._asdict() for record in records]}
+
+        if stream:
+            return {"doc_numbers": extract_doc_numbers_streaming(source, policy=policy)}
+        if self.cache is None:
+            return {"doc_numbers": self.extractor.extract_doc_numbers(source, policy=policy)}
+
+        def extract(content: bytes) -> list[str]:
+            return self.extractor.extract_doc_numbers(content, policy=policy)
+
+        doc_numbers, _ = self.cache.extract(source, extract, policy.fingerprint)
+        return {"doc_numbers": doc_numbers}
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Delete a socket file left behind by a daemon that is no longer running.
+
+    Raises:
+        OSError: If a daemon is still listening on it
+    """
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise OSError(f"A daemon is already listening on {socket_path}")
+
+
+def request(
+    socket_path: str | os.PathLike,
+    fields: dict[str, Any],
+    body: bytes | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> dict[str, Any]:
+    """Send one request to a running daemon and return its response.
+
+    Args:
+        socket_path: The daemon's socket
+        fields: Request fields (see the module docstring); ``size`` is set
+            from ``body``
+        body: Document bytes, when the daemon is not to read ``path``
+        timeout: Seconds to wait for the answer
+
+    Returns:
+        The decoded response
+
+    Raises:
+        OSError: If no daemon is listening, or the connection fails
+    """
+    if body is not None:
+        fields = {**fields, "size": len(body)}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(os.fspath(socket_path))
+        sock.sendall(json.dumps(fields).encode("utf-8") + b"\n" + (body or b""))
+        with sock.makefile("rb") as response:
+            line = response.readline()
+    if not line:
+        raise ConnectionError("The daemon closed the connection without answering")
+    return json.loads(line)
@@ -0,0 +1,239 @@
+"""Corpus-wide deduplication of doc-numbers for batch runs.
+
+Family members of a patent repeat the same doc-numbers across thousands of
+documents. ``xml-extractor batch --dedup`` keeps each doc-number only in the
+first document that mentions it (in input order) and reports, for every
+later document, which earlier document each dropped doc-number was first
+seen in. Repeats within one document are left alone, and the doc-numbers
+that are kept stay in the document's priority order.
+
+Memory is bounded by a budget rather than by the corpus. Doc-numbers seen
+recently are held in a dict; when it outgrows its share of the budget it
+is spilled, in key order, to a SQLite table, and the spilled keys are added
+to a fixed-size Bloom filter. A doc-number missing from the dict is looked
+up on disk only when the filter says it may be there, so new doc-numbers,
+the common case, rarely touch the disk, and the answer is always exact: a
+false positive costs one lookup, never a wrong result.
+
+Spilled entries are committed by ``checkpoint`` only, so a state file kept
+next to a batch manifest always matches the manifest's last checkpoint and
+a resumed run redoes exactly the documents the manifest does.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+from collections.abc import Iterable
+
+# Default memory budget of the seen-set, Bloom filter and SQLite page cache
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Shares of the budget given to the Bloom filter and the SQLite page cache;
+# the in-memory set gets the rest
+BLOOM_SHARE = 1 / 4
+PAGE_CACHE_SHARE = 1 / 8
+
+# Bloom filter probes per key
+BLOOM_HASHES = 3
+
+# Smallest Bloom filter, in bytes
+_MIN_BLOOM_BYTES = 1024
+
+# Estimated bytes of one dict entry besides its key: the hash table slot
+# and its spare capacity
+_ENTRY_OVERHEAD = 64
+
+# Keys per ``IN (...)`` lookup, below SQLite's variable limit
+_LOOKUP_BATCH = 500
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS seen "
+    "(doc_number TEXT PRIMARY KEY, source TEXT NOT NULL) WITHOUT ROWID"
+)
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter over strings, valid within one process.
+
+    Probes come from the built-in string hash (double hashing of its two
+    halves), which is salted per process; the filter is rebuilt from the
+    spilled keys whenever a state file is reopened.
+    """
+
+    def __init__(self, size: int):
+        self._bits = bytearray(max(size, _MIN_BLOOM_BYTES))
+        self._size = len(self._bits) * 8
+
+    def _positions(self, key: str) -> Iterable[int]:
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return ((h1 + i * h2) % self._size for i in range(BLOOM_HASHES))
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class Deduplicator:
+    """Exact set of the doc-numbers seen so far, with where each was first seen.
+
+    Meant for the one process that writes a batch run's output, which sees
+    documents in input order.
+
+    Args:
+        path: State file to keep between runs; None for a temporary file
+            deleted by ``close``
+        memory_budget: Approximate bytes of memory to use
+        reset: Forget the state recorded in ``path``
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        reset: bool = False,
+    ):
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="xml-extractor-dedup-", suffix=".sqlite")
+            os.close(fd)
+        self.path = os.fspath(path)
+        self.memory_budget = memory_budget
+        self._set_budget = int(memory_budget * (1 - BLOOM_SHARE - PAGE_CACHE_SHARE))
+        self._memory: dict[str, str] = {}
+        self._memory_bytes = 0
+        self._sources: set[str] = set()
+        self._bloom = _BloomFilter(int(memory_budget * BLOOM_SHARE))
+        self.documents = self.distinct = self.duplicates = self.spills = self.probes = 0
+
+        self._conn = sqlite3.connect(self.path)
+        page_cache_kib = max(1, int(memory_budget * PAGE_CACHE_SHARE) // 1024)
+        self._conn.execute(f"PRAGMA cache_size=-{page_cache_kib}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+            if reset:
+                self._conn.execute("DELETE FROM seen")
+        for (doc_number,) in self._conn.execute("SELECT doc_number FROM seen"):
+            self._bloom.add(doc_number)
+            self.distinct += 1
+        self._on_disk = self.distinct > 0
+
+    def add(self, source: str, doc_numbers: Iterable[str]) -> dict[str, str]:
+        """Record one document's doc-numbers.
+
+        Args:
+            source: Document name (file path, URI or ``path#n`` for split dumps)
+            doc_numbers: The document's doc-numbers
+
+        Returns:
+            Doc-numbers first seen in another document, mapped to that
+            document, in the order of ``doc_numbers``
+        """
+        self.documents += 1
+        unique = dict.fromkeys(doc_numbers)
+        first: dict[str, str] = {}
+        on_disk = []
+        for doc_number in unique:
+            seen_in = self._memory.get(doc_number)
+            if seen_in is not None:
+                first[doc_number] = seen_in
+            elif self._on_disk and doc_number in self._bloom:
+                on_disk.append(doc_number)
+        if on_disk:
+            first.update(self._lookup(on_disk))
+
+        new = [doc_number for doc_number in unique if doc_number not in first]
+        if new:
+            self.distinct += len(new)
+            if source not in self._sources:
+                self._sources.add(source)
+                self._memory_bytes += sys.getsizeof(source)
+            for doc_number in new:
+                self._memory[doc_number] = source
+                self._memory_bytes += sys.getsizeof(doc_number) + _ENTRY_OVERHEAD
+            if self._memory_bytes > self._set_budget:
+                self._spill()
+
+        # A source seen again (such as a changed file on resume) does not
+        # duplicate itself
+        duplicates = {
+            doc_number: first[doc_number]
+            for doc_number in unique
+            if doc_number in first and first[doc_number] != source
+        }
+        self.duplicates += len(duplicates)
+        return duplicates
+
+    def _lookup(self, doc_numbers: list[str]) -> dict[str, str]:
+        """First sources of spilled doc-numbers; absent ones are Bloom false positives."""
+        found = {}
+        for start in range(0, len(doc_numbers), _LOOKUP_BATCH):
+            batch = doc_numbers[start : start + _LOOKUP_BATCH]
+            self.probes += len(batch)
+            placeholders = ",".join("?" * len(batch))
+            found.update(
+                self._conn.execute(
+                    f"SELECT doc_number, source FROM seen WHERE doc_number IN ({placeholders})",
+                    batch,
+                )
+            )
+        return found
+
+    def _spill(self) -> None:
+        """Move the in-memory entries to the state file, uncommitted."""
+        if not self._memory:
+            return
+        # Sorted keys fill each B-tree page in one pass instead of at random
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO seen (doc_number, source) VALUES (?, ?)",
+            sorted(self._memory.items()),
+        )
+        for doc_number in self._memory:
+            self._bloom.add(doc_number)
+        self._memory = {}
+        self._sources = set()
+        self._memory_bytes = 0
+        self._on_disk = True
+        self.spills += 1
+
+    def checkpoint(self) -> None:
+        """Write everything recorded so far to the state file and commit it."""
+        self._spill()
+        self._conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        """Documents added, distinct and duplicate doc-numbers, spills and disk lookups."""
+        return {
+            "documents": self.documents,
+            "distinct": self.distinct,
+            "duplicates": self.duplicates,
+            "spills": self.spills,
+            "probes": self.probes,
+        }
+
+    def close(self) -> None:
+        """Close the state file, dropping what was not checkpointed.
+
+        A temporary state file is deleted.
+        """
+        self._conn.close()
+        if self._temporary:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.unlink(self.path + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self) -> "Deduplicator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
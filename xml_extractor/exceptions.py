@@ -17,3 +17,39 @@ class InvalidDocumentError(ExtractionError):
     """Raised when document structure is unexpected."""
 
     pass
+
+
+class EncodingError(XMLParseError):
+    """Raised when XML bytes are invalid in their declared or detected encoding."""
+
+    pass
+
+
+class StorageError(ExtractionError):
+    """Raised when an input object cannot be listed or read.
+
+    Attributes:
+        status: HTTP status of the failed request, if there was a response
+    """
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class CompressionError(XMLParseError):
+    """Raised when compressed input is corrupt or its format is unsupported."""
+
+    pass
+
+
+class InputTooLargeError(ExtractionError):
+    """Raised when a document exceeds the size limit once decompressed.
+
+    Attributes:
+        limit: The size limit in bytes
+    """
+
+    def __init__(self, message: str, limit: int):
+        super().__init__(message)
+        self.limit = limit
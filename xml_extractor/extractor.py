@@ -1,10 +1,23 @@
 """Core extraction logic for doc-number values."""
 
-from .parser import parse_xml
+import threading
+from time import perf_counter_ns
+from typing import NamedTuple
+
+from lxml import etree
+
+from . import instrumentation
+from .compression import decompress
+from .parser import XMLSource, new_parser, parse_xml
+from .priority import DEFAULT_POLICY, PriorityPolicy
+from .scanner import scan_document_ids
 
 
 def get_priority(format_value: str | None) -> int:
-    """Get priority value for a format attribute.
+    """Get priority value for a format attribute under the default policy.
+
+    Kept for compatibility; ``PriorityPolicy.priority`` also matches on
+    ``load-source`` and supports other orders.
 
     Args:
         format_value: The format attribute value (e.g., 'epo', 'patent-office')
@@ -12,23 +25,294 @@ def get_priority(format_value: str | None) -> int:
     Returns:
         Priority integer (lower is higher priority)
     """
-    priority_map = {
-        "epo": 0,
-        "patent-office": 1,
-    }
-    if format_value is None:
-        return 3
-    return priority_map.get(format_value, 2)
+    return DEFAULT_POLICY.priority(format_value)
+
+
+class DocumentIdRecord(NamedTuple):
+    """Everything extracted from one ``document-id`` element.
+
+    Text fields are stripped; missing or empty values are None.
+
+    Attributes:
+        doc_number: Text of the first ``doc-number`` child
+        format: ``format`` attribute (e.g. 'epo', 'patent-office')
+        country: Text of the first ``country`` child
+        kind: Text of the first ``kind`` child
+        date: Text of the first ``date`` child
+        mxw_id: ``mxw-id`` attribute
+        load_source: ``load-source`` attribute
+        ucid: ``ucid`` of the enclosing ``application-reference``, if any
+        priority: Priority under the extraction's ``PriorityPolicy`` (lower is
+            higher priority)
+        position: Index of the element among all document-ids, in document order
+    """
+
+    doc_number: str
+    format: str | None
+    country: str | None
+    kind: str | None
+    date: str | None
+    mxw_id: str | None
+    load_source: str | None
+    ucid: str | None
+    priority: int
+    position: int
+
+
+# Child elements read into a record, by index in the values list
+_CHILD_FIELDS = {"doc-number": 0, "country": 1, "kind": 2, "date": 3}
+_MISSING = object()
+
+
+def _clean(text: str | None) -> str | None:
+    """Strip text, mapping missing and blank values to None."""
+    if text is _MISSING or text is None:
+        return None
+    return text.strip() or None
+
+
+def read_document_id(
+    element: etree._Element, position: int, policy: PriorityPolicy = DEFAULT_POLICY
+) -> DocumentIdRecord | None:
+    """Build the record for one ``document-id`` element.
+
+    The element's children are scanned once; for each field the first
+    matching child wins, as with ``./doc-number`` in XPath.
+
+    Args:
+        element: A ``document-id`` element
+        position: Its index among all document-ids in the document
+        policy: Rules that assign the record's priority
+
+    Returns:
+        The record, or None if the element has no non-empty doc-number
+    """
+    values = [_MISSING, _MISSING, _MISSING, _MISSING]
+    for child in element:
+        index = _CHILD_FIELDS.get(child.tag)
+        if index is not None and values[index] is _MISSING:
+            values[index] = child.text
+
+    doc_number = _clean(values[0])
+    if doc_number is None:
+        return None
+
+    parent = element.getparent()
+    if parent is not None and parent.tag != "application-reference":
+        parent = next(parent.iterancestors("application-reference"), None)
+    format_value = element.get("format")
+    load_source = element.get("load-source")
+    return DocumentIdRecord(
+        doc_number,
+        format_value,
+        _clean(values[1]),
+        _clean(values[2]),
+        _clean(values[3]),
+        element.get("mxw-id"),
+        load_source,
+        parent.get("ucid") if parent is not None else None,
+        policy.priority(format_value, load_source),
+        position,
+    )
+
+
+class Extractor:
+    """Reusable doc-number extractor.
+
+    Holds one recover-mode parser and one set of compiled XPath evaluators
+    per thread, so repeated extractions skip parser construction and XPath
+    compilation. A single instance can be shared by any number of threads.
+
+    With ``fast_path=True``, ``extract_doc_numbers`` first tries the
+    byte-level scanner (``scanner.scan_document_ids``) on in-memory input
+    and only builds a tree for documents the scanner cannot vouch for,
+    such as namespaced, commented or malformed ones. The result is the
+    same either way.
+
+    Args:
+        fast_path: Try the byte-level scanner before building a tree
+
+    Example:
+        >>> extractor = Extractor()
+        >>> extractor.extract_doc_numbers(b'<root><document-id><doc-number>1</doc-number>'
+        ...                               b'</document-id></root>')
+        ['1']
+    """
+
+    def __init__(self, fast_path: bool = False):
+        self.fast_path = fast_path
+        self._local = threading.local()
+
+    def _state(self) -> threading.local:
+        """Return this thread's parser and XPath evaluator, creating them once."""
+        state = self._local
+        if not hasattr(state, "parser"):
+            state.parser = new_parser()
+            # Use XPath to handle potential namespaces
+            state.find_document_ids = etree.XPath(".//document-id")
+        return state
+
+    def extract_records(
+        self,
+        xml_content: XMLSource,
+        max_size: int | None = None,
+        policy: PriorityPolicy = DEFAULT_POLICY,
+    ) -> list[DocumentIdRecord]:
+        """Extract a record for every document-id in priority order.
+
+        Args:
+            xml_content: XML text, raw XML bytes, a path, or a binary file object,
+                optionally compressed
+            max_size: Largest document accepted, in bytes after decompression;
+                None for no limit
+            policy: Rules that order the document-ids
+
+        Returns:
+            Records ordered by priority, then document order
+        """
+        state = self._state()
+
+        # Parse XML
+        root = parse_xml(xml_content, parser=state.parser, max_size=max_size)
+
+        recorder = instrumentation.recorder
+        if recorder is None:
+            return order_records(self._locate(state, root, policy))
+
+        start = perf_counter_ns()
+        records = self._locate(state, root, policy)
+        start = instrumentation.lap(recorder, "locate", start)
+        records = order_records(records)
+        instrumentation.lap(recorder, "sort", start)
+        return records
+
+    def extract_doc_numbers(
+        self,
+        xml_content: XMLSource,
+        max_size: int | None = None,
+        policy: PriorityPolicy = DEFAULT_POLICY,
+    ) -> list[str]:
+        """Extract doc-number values from XML in priority order.
+
+        Args:
+            xml_content: XML text, raw XML bytes, a path, or a binary file object,
+                optionally compressed
+            max_size: Largest document accepted, in bytes after decompression;
+                None for no limit
+            policy: Rules that order the document-ids
+
+        Returns:
+            List of doc-number values in priority order
+        """
+        if self.fast_path and isinstance(xml_content, str | bytes | bytearray):
+            xml_content, doc_numbers = self._scan(xml_content, max_size, policy)
+            if doc_numbers is not None:
+                return doc_numbers
+        records = self.extract_records(xml_content, max_size, policy)
+        return [record.doc_number for record in records]
+
+    @staticmethod
+    def _scan(
+        xml_content: str | bytes | bytearray, max_size: int | None, policy: PriorityPolicy
+    ) -> tuple[bytes | bytearray, list[str] | None]:
+        """Try the byte-level scanner.
+
+        Returns:
+            Tuple of (the uncompressed bytes, to parse if the scanner gave
+            up; doc-numbers in priority order, or None if it gave up)
+        """
+        recorder = instrumentation.recorder
+        start = perf_counter_ns() if recorder is not None else 0
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode("utf-8")
+            if recorder is not None:
+                start = instrumentation.lap(recorder, "decode", start)
+        content = decompress(xml_content, max_size)
+        if recorder is not None and content is not xml_content:
+            start = instrumentation.lap(recorder, "decode", start)
+
+        found = scan_document_ids(content)
+        if found is None:
+            return content, None
+        if recorder is not None:
+            start = instrumentation.lap(recorder, "locate", start)
+        buckets: dict[int, list[str]] = {}
+        priority = policy.priority
+        for doc_number, format_value, load_source in found:
+            bucket = buckets.get(key := priority(format_value, load_source))
+            if bucket is None:
+                bucket = buckets[key] = []
+            bucket.append(doc_number)
+        doc_numbers = [doc_number for key in sorted(buckets) for doc_number in buckets[key]]
+        if recorder is not None:
+            instrumentation.lap(recorder, "sort", start)
+        return content, doc_numbers
+
+    @staticmethod
+    def _locate(
+        state: threading.local, root: etree._Element, policy: PriorityPolicy
+    ) -> list[DocumentIdRecord]:
+        """Read the record of every document-id under root, in document order."""
+        records = []
+        for position, element in enumerate(state.find_document_ids(root)):
+            record = read_document_id(element, position, policy)
+            if record is not None:
+                records.append(record)
+        return records
+
+
+_default_extractor = Extractor()
+
+
+def extract_records(
+    xml_content: XMLSource,
+    max_size: int | None = None,
+    policy: PriorityPolicy = DEFAULT_POLICY,
+) -> list[DocumentIdRecord]:
+    """Extract a record for every document-id, in the same order as ``extract_doc_numbers``.
+
+    Thin wrapper over a shared default ``Extractor`` instance.
+
+    Args:
+        xml_content: XML text, raw XML bytes, a path, or a binary file object,
+            optionally compressed
+        max_size: Largest document accepted, in bytes after decompression;
+            None for no limit
+        policy: Rules that order the document-ids
+
+    Returns:
+        List of DocumentIdRecord in priority order
+
+    Example:
+        >>> records = extract_records(
+        ...     '<application-reference ucid="US-1-A"><document-id format="epo">'
+        ...     '<country>US</country><doc-number>1</doc-number><kind>A</kind>'
+        ...     '</document-id></application-reference>'
+        ... )
+        >>> records[0].doc_number, records[0].country, records[0].ucid
+        ('1', 'US', 'US-1-A')
+    """
+    return _default_extractor.extract_records(xml_content, max_size, policy)
 
 
-def extract_doc_numbers(xml_content: str) -> list[str]:
+def extract_doc_numbers(
+    xml_content: XMLSource,
+    max_size: int | None = None,
+    policy: PriorityPolicy = DEFAULT_POLICY,
+) -> list[str]:
     """Extract doc-number values from XML in priority order.
 
+    Thin wrapper over a shared default ``Extractor`` instance.
+
     Args:
-        xml_content: String containing XML content
+        xml_content: XML text, raw XML bytes, a path, or a binary file object,
+            optionally compressed
+        max_size: Largest document accepted, in bytes after decompression;
+            None for no limit
+        policy: Rules that order the document-ids
 
     Returns:
-        List of doc-number values in priority order:
+        List of doc-number values in priority order; under the default policy:
         1. format="epo" first
         2. format="patent-office" second
         3. Other formats third
@@ -46,39 +330,32 @@ def extract_doc_numbers(xml_content: str) -> list[str]:
         >>> extract_doc_numbers(xml)
         ['999000888', '66667777']
     """
-    # Parse XML
-    root = parse_xml(xml_content)
+    return _default_extractor.extract_doc_numbers(xml_content, max_size, policy)
 
-    # Find all document-id elements
-    # Use XPath to handle potential namespaces
-    document_ids = root.xpath(".//document-id")
 
-    # Extract doc-numbers with their format and order
-    doc_data: list[tuple[str, int, int]] = []
+def order_records(records: list[DocumentIdRecord]) -> list[DocumentIdRecord]:
+    """Order records by priority, keeping document order within each priority.
 
-    for idx, doc_id in enumerate(document_ids):
-        # Get format attribute
-        format_value = doc_id.get("format")
+    Records are grouped into one bucket per priority in a single pass, so
+    ordering is linear in the number of records; only the few distinct
+    priorities are sorted.
 
-        # Find doc-number child element
-        doc_number_elements = doc_id.xpath("./doc-number")
-
-        if not doc_number_elements:
-            continue
-
-        # Get text content and clean it
-        doc_number = doc_number_elements[0].text
-
-        if doc_number:
-            doc_number = doc_number.strip()
-
-            # Skip empty values
-            if doc_number:
-                priority = get_priority(format_value)
-                doc_data.append((doc_number, priority, idx))
-
-    # Sort by priority, then by document order
-    doc_data.sort(key=lambda x: (x[1], x[2]))
+    Args:
+        records: Records in document order
 
-    # Return just the doc-numbers
-    return [doc_num for doc_num, _, _ in doc_data]
+    Returns:
+        The records in priority order; ``records`` itself if they all share
+        one priority
+    """
+    buckets: dict[int, list[DocumentIdRecord]] = {}
+    for record in records:
+        bucket = buckets.get(record.priority)
+        if bucket is None:
+            bucket = buckets[record.priority] = []
+        bucket.append(record)
+    if len(buckets) <= 1:
+        return records
+    ordered: list[DocumentIdRecord] = []
+    for priority in sorted(buckets):
+        ordered.extend(buckets[priority])
+    return ordered
@@ -0,0 +1,174 @@
+"""Reverse index from doc-number to the documents that mention it.
+
+Built during batch extraction (``xml-extractor batch --index FILE``) and
+queried by ``xml-extractor lookup`` and ``GET /lookup/{doc_number}``. The
+index is a SQLite file: each source name is stored once, and postings
+(doc-number, source, position, priority, format) live in a ``WITHOUT
+ROWID`` table clustered by doc-number, so a lookup is one B-tree descent
+over memory-mapped pages.
+
+Updates are incremental: indexing a source replaces whatever was recorded
+for it before, so re-running a batch over new or changed files only
+rewrites their postings. WAL mode lets readers keep answering while a
+batch writes.
+"""
+
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from typing import NamedTuple
+
+# Bytes of the file mapped into memory by readers
+MMAP_SIZE = 1 << 30
+
+# Sources written per transaction by ``add``
+DEFAULT_COMMIT_EVERY = 1000
+
+# Largest number of postings returned for one doc-number by default
+DEFAULT_LIMIT = 1000
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS sources (id INTEGER PRIMARY KEY, source TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS postings (doc_number TEXT NOT NULL, source_id INTEGER NOT NULL, "
+    "position INTEGER NOT NULL, priority INTEGER NOT NULL, format TEXT, "
+    "PRIMARY KEY (doc_number, source_id, position)) WITHOUT ROWID",
+    # Finds a source's postings when it is re-indexed
+    "CREATE INDEX IF NOT EXISTS postings_source ON postings (source_id)",
+)
+
+_LOOKUP = (
+    "SELECT sources.source, postings.priority, postings.position, postings.format "
+    "FROM postings JOIN sources ON sources.id = postings.source_id "
+    "WHERE postings.doc_number = ? ORDER BY sources.source, postings.position LIMIT ?"
+)
+
+
+class IndexEntry(NamedTuple):
+    """One mention of a doc-number in a source document."""
+
+    source: str
+    priority: int
+    position: int
+    format: str | None
+
+
+class DocNumberIndex:
+    """Reverse index stored in a SQLite file.
+
+    One connection is opened per thread, so an instance can be shared by
+    threads. Writes (``add``) are meant for one process at a time, such as
+    the batch run building the index; any number of processes may read.
+
+    Args:
+        path: Index file; created if missing unless ``readonly``
+        readonly: Open for lookups only
+        commit_every: Sources ``add`` writes per transaction
+
+    Raises:
+        sqlite3.OperationalError: If ``readonly`` and the file does not exist
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        readonly: bool = False,
+        commit_every: int = DEFAULT_COMMIT_EVERY,
+    ):
+        self.path = os.fspath(path)
+        self.readonly = readonly
+        self.commit_every = commit_every
+        self._pending = 0
+        self._local = threading.local()
+        if not readonly:
+            with self._connection() as conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+        else:
+            # Fail now rather than on the first lookup
+            self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.readonly:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, timeout=30)
+            else:
+                conn = sqlite3.connect(self.path, timeout=30)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def add(self, source: str, rows: Iterable[tuple]) -> None:
+        """Record the doc-numbers of one source, replacing its previous postings.
+
+        Changes are committed every ``commit_every`` sources and by ``flush``.
+
+        Args:
+            source: Source name (file path, URI or ``path#n`` for split dumps)
+            rows: Sink rows ``(source, priority, position, doc_number, format)``
+                of the source; none to forget it
+        """
+        conn = self._connection()
+        (source_id,) = conn.execute(
+            "INSERT INTO sources (source) VALUES (?) "
+            "ON CONFLICT (source) DO UPDATE SET source = excluded.source RETURNING id",
+            (source,),
+        ).fetchone()
+        conn.execute("DELETE FROM postings WHERE source_id = ?", (source_id,))
+        # A doc-number repeated at one position cannot happen; OR IGNORE is
+        # only a guard against rows of another shape
+        conn.executemany(
+            "INSERT OR IGNORE INTO postings "
+            "(doc_number, source_id, position, priority, format) VALUES (?, ?, ?, ?, ?)",
+            (
+                (doc_number, source_id, position, priority, doc_format)
+                for _, priority, position, doc_number, doc_format in rows
+            ),
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit the sources added since the last commit."""
+        self._connection().commit()
+        self._pending = 0
+
+    def lookup(self, doc_number: str, limit: int = DEFAULT_LIMIT) -> list[IndexEntry]:
+        """Every recorded mention of a doc-number.
+
+        Args:
+            doc_number: Doc-number as extracted (stripped of white space)
+            limit: Largest number of entries returned
+
+        Returns:
+            Entries ordered by source, then position in the source
+        """
+        rows = self._connection().execute(_LOOKUP, (doc_number, limit)).fetchall()
+        return [IndexEntry(*row) for row in rows]
+
+    def stats(self) -> dict[str, int]:
+        """Numbers of indexed sources and postings."""
+        conn = self._connection()
+        (sources,) = conn.execute("SELECT COUNT(*) FROM sources").fetchone()
+        (postings,) = conn.execute("SELECT COUNT(*) FROM postings").fetchone()
+        return {"sources": sources, "postings": postings}
+
+    def close(self) -> None:
+        """Commit pending changes and close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            if not self.readonly:
+                conn.commit()
+            conn.close()
+            self._local.conn = None
+
+    def __enter__(self) -> "DocNumberIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
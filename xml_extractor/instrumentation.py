@@ -0,0 +1,58 @@
+"""Optional timing hooks for the extraction stages.
+
+Nothing is measured until a recorder is installed with ``set_recorder``;
+until then each hook costs a single global lookup. Durations come from the
+monotonic ``time.perf_counter_ns`` clock.
+
+Stages:
+    read: Reading input bytes (done by callers such as the API)
+    decode: Turning text or compressed input into the bytes handed to lxml
+    parse: Building the tree (or, when streaming, parsing and locating together)
+    locate: Finding document-id elements and reading their doc-numbers
+    sort: Ordering doc-numbers by priority
+    serialize: Encoding results for output (done by callers)
+
+Events:
+    recovered_parse: A document parsed only thanks to lxml's recover mode
+"""
+
+from time import perf_counter_ns
+from typing import Protocol
+
+STAGES = ("read", "decode", "parse", "locate", "sort", "serialize")
+
+
+class Recorder(Protocol):
+    """Receives stage timings and events; must be thread-safe."""
+
+    def observe(self, stage: str, duration_ns: int) -> None:
+        """Record that ``stage`` took ``duration_ns`` nanoseconds."""
+
+    def count(self, event: str) -> None:
+        """Record one occurrence of ``event``."""
+
+
+# The installed recorder; hooks read this module attribute directly
+recorder: Recorder | None = None
+
+
+def set_recorder(new_recorder: Recorder | None) -> None:
+    """Install a recorder for this process, or remove it with None."""
+    global recorder
+    recorder = new_recorder
+
+
+def lap(active: Recorder, stage: str, start: int) -> int:
+    """Record the time since ``start`` against ``stage``.
+
+    Args:
+        active: Recorder to report to
+        stage: Stage name from ``STAGES``
+        start: ``perf_counter_ns`` value when the stage began
+
+    Returns:
+        The current ``perf_counter_ns`` value, for timing the next stage
+    """
+    now = perf_counter_ns()
+    active.observe(stage, now - start)
+    return now
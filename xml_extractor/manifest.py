@@ -0,0 +1,275 @@
+"""Append-only manifest of finished batch inputs, for resuming long runs.
+
+Each line records one input as tab-separated fields::
+
+    key  content-hash  stat  status  offset
+
+``stat`` is ``<size>:<mtime_ns>`` for local files and ``-`` for documents
+that arrived as bytes (downloads, split dumps). ``offset`` is the size of
+the output file at the checkpoint that recorded the line: output is flushed
+and fsynced before the manifest lines describing it are written, so after a
+crash the output is truncated to the last offset and everything after it is
+processed again.
+
+On resume, a local file is skipped while its size and mtime are unchanged;
+other documents are skipped while their content hash is unchanged. Lookups
+hit an in-memory set of 64-bit digests of (key, stat or hash). The digests
+are also appended to a binary ``<manifest>.idx`` sidecar at each checkpoint,
+so resuming loads them with one read instead of parsing every text line;
+the sidecar is rebuilt from the text whenever it is missing or behind.
+"""
+
+import hashlib
+import os
+import struct
+import time
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+HEADER = b"#key\thash\tstat\tstatus\toffset\n"
+
+# Placeholder for a field with no value
+NONE = "-"
+
+# Fingerprint of a local file that could not be stat'ed
+MISSING = "missing"
+
+# Sidecar header: magic and the length of the manifest its digests cover
+_INDEX_HEADER = struct.Struct("<8sQ")
+_INDEX_MAGIC = b"XEMIDX1\0"
+
+# Bytes read from the end of the manifest to find its last complete line
+_TAIL = 64 * 1024
+
+
+def content_hash(content: bytes) -> str:
+    """Hex digest identifying a document's content."""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def file_stat(path: str) -> str:
+    """Cheap change detector for a local file: ``<size>:<mtime_ns>``."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return MISSING
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _escape(key: str) -> str:
+    """Make a key safe to store in a tab-separated line."""
+    return key.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def _digest(key: bytes, fingerprint: bytes) -> int:
+    """64-bit digest of an escaped key and its stat or content hash."""
+    return int.from_bytes(hashlib.blake2b(key + b"\t" + fingerprint, digest_size=8).digest())
+
+
+def _line_digest(line: bytes) -> int:
+    """Digest of one manifest line, as ``_digest`` computes it for a lookup."""
+    key, digest, stat, _ = line.split(b"\t", 3)
+    return _digest(key, digest if stat == b"-" else stat)
+
+
+class Manifest:
+    """Completed inputs of a batch run, checkpointed to an append-only file.
+
+    Use ``filter`` on the inputs before they are processed, ``complete``
+    for every result record in input order, and ``commit`` once the output
+    holding those results has been synced.
+
+    Args:
+        path: Manifest file; created if missing
+        resume: Load existing entries to skip finished inputs; otherwise the
+            file is started afresh
+        checkpoint_records: Completed inputs per checkpoint
+        checkpoint_seconds: Longest time between checkpoints
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        resume: bool = True,
+        checkpoint_records: int = 10_000,
+        checkpoint_seconds: float = 5.0,
+    ):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.checkpoint_records = checkpoint_records
+        self.checkpoint_seconds = checkpoint_seconds
+        self._index: set[int] = set()
+        self.end = 0
+        self.skipped = 0
+        self._inflight: deque[tuple[str, str]] = deque()
+        self._lines: list[str] = []
+        self._digests = array("Q")
+        self._last_commit = time.monotonic()
+
+        self.length = covered = 0
+        if resume and self.path.exists():
+            self.length, covered = self._load()
+        self._file = open(self.path, "r+b" if self.length else "wb")
+        if self.length:
+            # Drop a line torn by a crash mid-write
+            self._file.truncate(self.length)
+            self._file.seek(self.length)
+        else:
+            self._file.write(HEADER)
+            self.length = len(HEADER)
+        if covered != self.length:
+            # Bring the sidecar up to date so the next resume skips the text
+            self._write_index(array("Q", self._index))
+        self._index_file = open(self.index_path, "r+b")
+        self._index_file.seek(0, os.SEEK_END)
+
+    def _load(self) -> tuple[int, int]:
+        """Load the index and last offset.
+
+        Returns:
+            Tuple of (length of the complete lines, length covered by the sidecar)
+        """
+        with open(self.path, "rb") as file:
+            size = file.seek(0, os.SEEK_END)
+            tail_start = max(0, size - _TAIL)
+            file.seek(tail_start)
+            tail = file.read()
+            length = tail_start + tail.rfind(b"\n") + 1
+            if length <= 0:
+                return 0, 0
+            last = tail[: length - tail_start - 1].rpartition(b"\n")[2]
+            if not last.startswith(b"#"):
+                self.end = int(last.rpartition(b"\t")[2])
+
+            covered = position = self._read_index(length)
+            file.seek(position)
+            for line in file:
+                if position >= length:
+                    break
+                position += len(line)
+                if not line.startswith(b"#"):
+                    self._index.add(_line_digest(line))
+        return length, covered
+
+    def _read_index(self, length: int) -> int:
+        """Load sidecar digests; returns how much of the manifest they cover."""
+        try:
+            with open(self.index_path, "rb") as file:
+                magic, covered = _INDEX_HEADER.unpack(file.read(_INDEX_HEADER.size))
+                data = file.read()
+        except (OSError, struct.error):
+            return 0
+        if magic != _INDEX_MAGIC or covered > length:
+            return 0
+        digests = array("Q")
+        # A crash mid-append can leave a partial digest
+        digests.frombytes(data[: len(data) - len(data) % digests.itemsize])
+        self._index = set(digests)
+        return covered
+
+    def _write_index(self, digests: array) -> None:
+        """Replace the sidecar with ``digests`` covering the whole manifest."""
+        temporary = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(temporary, "wb") as file:
+            file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, self.length))
+            file.write(digests.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.index_path)
+
+    def __len__(self) -> int:
+        """Number of distinct (input, stat or hash) pairs recorded."""
+        return len(self._index)
+
+    def is_finished(self, key: str, fingerprint: str) -> bool:
+        """Whether ``key`` was recorded with the same stat or content hash."""
+        return _digest(_escape(key).encode(), fingerprint.encode()) in self._index
+
+    def filter(self, items: Iterable[str | tuple[str, Any]]) -> Iterator[str | tuple[str, Any]]:
+        """Drop finished inputs and remember the fingerprints of the rest.
+
+        Args:
+            items: File paths or ``(key, content)`` documents, as for ``run_batch``
+
+        Yields:
+            The inputs that still need processing, in order
+        """
+        for item in items:
+            if isinstance(item, str):
+                key = item
+                stat = fingerprint = file_stat(item)
+            else:
+                key, content = item
+                stat = NONE
+                fingerprint = None if isinstance(content, Exception) else content_hash(content)
+            if fingerprint is not None and self.is_finished(key, fingerprint):
+                self.skipped += 1
+                continue
+            self._inflight.append((key, stat))
+            yield item
+
+    def complete(self, record: dict[str, Any]) -> None:
+        """Queue the manifest line for a result of an input passed through ``filter``."""
+        key, stat = self._inflight.popleft()
+        if key != record["path"]:
+            raise ValueError(f"Result for {record['path']!r} arrived in place of {key!r}")
+        digest = record.get("hash") or NONE
+        status = "ok" if record["error"] is None else "error"
+        escaped = _escape(key)
+        self._lines.append(f"{escaped}\t{digest}\t{stat}\t{status}\t")
+        self._digests.append(_digest(escaped.encode(), (digest if stat == NONE else stat).encode()))
+
+    @property
+    def due(self) -> bool:
+        """Whether enough results are queued, or enough time passed, to checkpoint."""
+        return bool(self._lines) and (
+            len(self._lines) >= self.checkpoint_records
+            or time.monotonic() - self._last_commit >= self.checkpoint_seconds
+        )
+
+    def commit(self, offset: int) -> None:
+        """Write and fsync the queued lines; call once output up to ``offset`` is synced."""
+        if self._lines:
+            data = "".join(f"{line}{offset}\n" for line in self._lines).encode()
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.length += len(data)
+            self._lines.clear()
+
+            # Digests first, then the covered length, so the sidecar never
+            # claims lines whose digests are missing
+            self._index_file.write(self._digests.tobytes())
+            self._index_file.flush()
+            os.fsync(self._index_file.fileno())
+            os.pwrite(self._index_file.fileno(), _INDEX_HEADER.pack(_INDEX_MAGIC, self.length), 0)
+            os.fsync(self._index_file.fileno())
+            self._index.update(self._digests)
+            self._digests = array("Q")
+        self.end = offset
+        self._last_commit = time.monotonic()
+
+    def close(self) -> None:
+        """Close the files; queued lines that were never committed are dropped."""
+        self._file.close()
+        self._index_file.close()
+
+
+def rewind_output(path: str | Path, offset: int) -> None:
+    """Cut an output file back to the last checkpoint before appending to it.
+
+    Raises:
+        ValueError: If the file is shorter than ``offset``, i.e. it is not
+            the output the manifest describes
+    """
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if size < offset:
+        raise ValueError(
+            f"{path} holds {size} bytes but the manifest records {offset}; "
+            "it is not the output of the run being resumed"
+        )
+    if size > offset:
+        os.truncate(path, offset)
@@ -1,26 +1,182 @@
 """XML parsing utilities."""
 
+import os
+import threading
+from time import perf_counter_ns
+from typing import BinaryIO
+
 from lxml import etree
 
-from .exceptions import XMLParseError
+from . import instrumentation
+from .compression import decompress, open_stream
+from .exceptions import CompressionError, EncodingError, InputTooLargeError, XMLParseError
+
+# Anything lxml can read without us decoding it first. A ``str`` is always
+# treated as XML text; pass a ``Path`` to read from the filesystem. Bytes,
+# paths and file objects may also hold gzip, bzip2 or zstd compressed XML.
+XMLSource = str | bytes | bytearray | memoryview | os.PathLike | BinaryIO
+
+_ENCODING_ERRORS = frozenset(
+    {
+        etree.ErrorTypes.ERR_INVALID_ENCODING,
+        etree.ErrorTypes.ERR_UNKNOWN_ENCODING,
+        etree.ErrorTypes.ERR_UNSUPPORTED_ENCODING,
+    }
+)
+
+
+# Bytes pushed to the parser per call when parsing a file object
+FEED_CHUNK_SIZE = 64 * 1024
+
+_local = threading.local()
+
+
+def new_parser() -> etree.XMLParser:
+    """Create the lenient parser used for all extraction.
+
+    Returns:
+        XMLParser in recover mode, so malformed XML is salvaged
+    """
+    return etree.XMLParser(recover=True)
+
+
+def get_parser() -> etree.XMLParser:
+    """Return this thread's reusable parser.
+
+    lxml parsers must not be used by two threads at once, but can be reused
+    for any number of documents within one thread.
+
+    Returns:
+        Thread-local XMLParser in recover mode
+    """
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = new_parser()
+    return parser
+
+
+def _check_encoding(error_log: etree._ListErrorLog) -> None:
+    """Raise EncodingError if the parser had to skip undecodable bytes.
 
+    Recover mode silently drops invalid byte sequences, which would mangle
+    doc-numbers instead of rejecting the document.
 
-def parse_xml(xml_content: str) -> etree._Element:
+    Args:
+        error_log: Error log of a parser that has just finished a document
+
+    Raises:
+        EncodingError: If lxml reported an encoding error
+    """
+    for entry in error_log:
+        if entry.type in _ENCODING_ERRORS:
+            raise EncodingError(f"Failed to decode XML: {entry.message.strip()}")
+
+
+def _feed(stream: BinaryIO, parser: etree.XMLParser) -> tuple[etree._Element | None, int]:
+    """Push a binary stream through ``parser`` one chunk at a time.
+
+    Only the current chunk and the partial tree are held in memory, and an
+    error raised by ``stream.read`` (such as a size limit) stops parsing
+    at once.
+
+    Returns:
+        Tuple of (root element or None if recovery left none, nanoseconds
+        spent reading the stream)
+    """
+    read_ns = 0
+    try:
+        while True:
+            before = perf_counter_ns()
+            chunk = stream.read(FEED_CHUNK_SIZE)
+            read_ns += perf_counter_ns() - before
+            if not chunk:
+                break
+            parser.feed(chunk)
+    except BaseException:
+        # Leave the reusable parser ready for its next document
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        raise
+    return parser.close(), read_ns
+
+
+def parse_xml(
+    xml_content: XMLSource,
+    parser: etree.XMLParser | None = None,
+    max_size: int | None = None,
+) -> etree._Element:
     """Parse XML content into an element tree.
 
+    Bytes, memoryviews, paths and binary file objects are handed to lxml
+    as-is, so no decoded copy is made and the encoding from the XML
+    declaration (or BOM) is honoured. ``str`` input is encoded as UTF-8.
+    File objects are fed to the parser in ``FEED_CHUNK_SIZE`` chunks, so
+    they are never held in memory whole. Compressed input (gzip, bzip2 or
+    zstd, detected from its magic bytes) is decompressed first; paths and
+    file objects are decompressed chunk by chunk as they are parsed.
+
     Args:
-        xml_content: String containing XML content
+        xml_content: XML text, raw XML bytes, a path, or a binary file object
+        parser: Parser to use; defaults to this thread's reusable parser
+        max_size: Largest document accepted, in bytes after decompression;
+            None for no limit
 
     Returns:
         Parsed XML element tree
 
     Raises:
+        EncodingError: If the bytes are invalid in the document's encoding
+        CompressionError: If compressed input is corrupt or unsupported
+        InputTooLargeError: If the document exceeds ``max_size``
         XMLParseError: If XML cannot be parsed
     """
+    recorder = instrumentation.recorder
+    start = perf_counter_ns() if recorder is not None else 0
+
+    # Use lxml's lenient parser to handle malformed XML
+    if parser is None:
+        parser = get_parser()
     try:
-        # Use lxml's lenient parser to handle malformed XML
-        parser = etree.XMLParser(recover=True)
-        root = etree.fromstring(xml_content.encode("utf-8"), parser=parser)
-        return root
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode("utf-8")
+            if recorder is not None:
+                start = instrumentation.lap(recorder, "decode", start)
+        if isinstance(xml_content, bytes | bytearray | memoryview):
+            content = decompress(xml_content, max_size)
+            if recorder is not None and content is not xml_content:
+                start = instrumentation.lap(recorder, "decode", start)
+            # lxml 6 parses any bytes-like buffer in place, mapped files included
+            root = etree.fromstring(content, parser=parser)
+            error_log = parser.error_log
+        else:
+            with open_stream(xml_content, max_size) as stream:
+                if isinstance(stream, str | os.PathLike):
+                    # Uncompressed files are read by lxml itself
+                    root = etree.parse(stream, parser=parser).getroot()
+                    error_log = parser.error_log
+                else:
+                    root, read_ns = _feed(stream, parser)
+                    # Feeding keeps its own log
+                    error_log = parser.feed_error_log
+                    if recorder is not None:
+                        # Reading (and decompressing) the stream is not parsing
+                        recorder.observe("read", read_ns)
+                        start += read_ns
+    except (CompressionError, InputTooLargeError):
+        raise
     except Exception as e:
         raise XMLParseError(f"Failed to parse XML: {e}") from e
+
+    if recorder is not None:
+        instrumentation.lap(recorder, "parse", start)
+        if error_log:
+            recorder.count("recovered_parse")
+
+    _check_encoding(error_log)
+
+    # Recovery can discard everything and leave no root element at all
+    if root is None:
+        raise XMLParseError("Failed to parse XML: no root element could be recovered")
+    return root
@@ -0,0 +1,201 @@
+"""Configurable ordering of document-ids by their attributes.
+
+A ``PriorityPolicy`` ranks each ``document-id`` by its ``format`` and
+``load-source`` attributes. It is written as a spec string of
+comma-separated levels, highest priority first::
+
+    epo,patent-office,other,none
+
+Each level lists alternatives separated by ``|``. An alternative is either
+a bare format value, or ``attribute=value`` conditions on ``format`` and
+``load-source`` joined by ``+``, all of which must hold::
+
+    load-source=docdb+format=epo|original,epo,other,none
+
+The keywords ``other`` and ``none`` catch document-ids that no earlier
+level matched: ``other`` those with a format attribute, ``none`` those
+without. A document-id matched by nothing gets the priority after the last
+level. The first matching level wins.
+
+Each combination of attribute values is resolved against the rules the
+first time it is looked up and remembered in a table, so later lookups are
+a dictionary hit; compiling a policy only parses its spec. The canonical
+spec (``fingerprint``) identifies the ordering in result cache keys.
+"""
+
+from functools import lru_cache
+
+FORMAT = "format"
+LOAD_SOURCE = "load-source"
+ATTRIBUTES = (FORMAT, LOAD_SOURCE)
+
+OTHER = "other"
+NONE = "none"
+
+DEFAULT_SPEC = "epo,patent-office,other,none"
+
+# Bounds on policies read from requests
+MAX_LEVELS = 64
+MAX_ALTERNATIVES = 64
+MAX_SPEC_LENGTH = 4096
+
+# Attribute-value combinations remembered per policy; beyond that,
+# priorities are computed from the rules on every lookup
+_TABLE_SIZE = 4096
+
+# One alternative: required (format, load-source) values, None where unconstrained
+_Condition = tuple[str | None, str | None]
+
+
+def _parse_condition(text: str) -> _Condition:
+    """Parse one ``+``-joined alternative of a level."""
+    values: dict[str, str] = {}
+    for part in text.split("+"):
+        name, sep, value = part.partition("=")
+        if not sep:
+            name, value = FORMAT, name
+        name, value = name.strip(), value.strip()
+        if name not in ATTRIBUTES:
+            raise ValueError(
+                f"Unknown attribute {name!r} in priority policy; use {' or '.join(ATTRIBUTES)}"
+            )
+        if not value:
+            raise ValueError(f"Empty value for {name!r} in priority policy")
+        if name in values:
+            raise ValueError(f"Attribute {name!r} appears twice in {text!r}")
+        values[name] = value
+    return values.get(FORMAT), values.get(LOAD_SOURCE)
+
+
+def _render_condition(condition: _Condition) -> str:
+    """Canonical spec text of one alternative."""
+    format_value, load_source = condition
+    if load_source is None:
+        return format_value
+    if format_value is None:
+        return f"{LOAD_SOURCE}={load_source}"
+    return f"{FORMAT}={format_value}+{LOAD_SOURCE}={load_source}"
+
+
+class PriorityPolicy:
+    """Ordering rules for document-ids, with a table of resolved lookups.
+
+    Instances are immutable and picklable, so one can be shared by threads
+    and shipped to worker processes.
+
+    Args:
+        spec: Levels, highest priority first (see the module docstring)
+
+    Raises:
+        ValueError: If the spec is empty, too long or malformed
+
+    Example:
+        >>> policy = PriorityPolicy("docdb|original,epo,other,none")
+        >>> policy.priority("original"), policy.priority("epo"), policy.priority(None)
+        (0, 1, 3)
+    """
+
+    def __init__(self, spec: str = DEFAULT_SPEC):
+        if len(spec) > MAX_SPEC_LENGTH:
+            raise ValueError(f"Priority policy is longer than {MAX_SPEC_LENGTH} characters")
+        levels: list[list[_Condition]] = []
+        canonical: list[str] = []
+        other = none = None
+        for index, level in enumerate(spec.split(",")):
+            alternatives = [alternative.strip() for alternative in level.split("|")]
+            if alternatives in ([OTHER], [NONE]):
+                keyword = alternatives[0]
+                if (other if keyword == OTHER else none) is not None:
+                    raise ValueError(f"{keyword!r} appears twice in priority policy")
+                if keyword == OTHER:
+                    other = index
+                else:
+                    none = index
+                levels.append([])
+                canonical.append(keyword)
+                continue
+            conditions = [_parse_condition(alternative) for alternative in alternatives]
+            levels.append(conditions)
+            canonical.append("|".join(_render_condition(condition) for condition in conditions))
+        if len(levels) > MAX_LEVELS:
+            raise ValueError(f"Priority policy has more than {MAX_LEVELS} levels")
+        if sum(len(level) for level in levels) > MAX_ALTERNATIVES:
+            raise ValueError(f"Priority policy has more than {MAX_ALTERNATIVES} alternatives")
+
+        self.levels = len(levels)
+        self.fingerprint = ",".join(canonical)
+        self.uses_load_source = any(
+            condition[1] is not None for level in levels for condition in level
+        )
+        self._rules = [
+            (condition, index) for index, level in enumerate(levels) for condition in level
+        ]
+        self._other = self.levels if other is None else other
+        self._none = self.levels if none is None else none
+        # Filled on first lookup of each combination: resolving every
+        # combination the rules mention up front grows with their square
+        self._table: dict = {}
+
+    def _resolve(self, format_value: str | None, load_source: str | None) -> int:
+        """Apply the rules in order."""
+        for (want_format, want_source), index in self._rules:
+            if (want_format is None or want_format == format_value) and (
+                want_source is None or want_source == load_source
+            ):
+                return index
+        return self._none if format_value is None else self._other
+
+    def _remember(self, format_value: str | None, load_source: str | None) -> int:
+        """Resolve a combination and add it to the table while there is room."""
+        priority = self._resolve(format_value, load_source)
+        if len(self._table) < _TABLE_SIZE:
+            key = (format_value, load_source) if self.uses_load_source else format_value
+            self._table[key] = priority
+        return priority
+
+    def priority(self, format_value: str | None, load_source: str | None = None) -> int:
+        """Priority of a document-id; lower is higher priority.
+
+        Args:
+            format_value: Its ``format`` attribute, or None
+            load_source: Its ``load-source`` attribute, or None
+
+        Returns:
+            Index of the first matching level, or ``levels`` if none matched
+        """
+        key = (format_value, load_source) if self.uses_load_source else format_value
+        try:
+            return self._table[key]
+        except KeyError:
+            return self._remember(format_value, load_source)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, PriorityPolicy) and other.fingerprint == self.fingerprint
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
+
+    def __repr__(self) -> str:
+        return f"PriorityPolicy({self.fingerprint!r})"
+
+    def __reduce__(self):
+        # Rebuild from the spec rather than pickling the table
+        return PriorityPolicy, (self.fingerprint,)
+
+
+DEFAULT_POLICY = PriorityPolicy()
+
+
+@lru_cache(maxsize=128)
+def parse_policy(spec: str | None) -> PriorityPolicy:
+    """Compile a spec, reusing the policy compiled for an identical spec.
+
+    Args:
+        spec: Policy spec; None or blank for the default policy
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    if spec is None or not spec.strip():
+        return DEFAULT_POLICY
+    return PriorityPolicy(spec)
@@ -0,0 +1,294 @@
+"""Byte-level scanner for doc-numbers, used as a fast path before lxml.
+
+Building a full lxml tree and walking it is overkill when all that is
+needed are the ``format`` and ``load-source`` attributes and first
+``doc-number`` child of each
+``document-id``. ``scan_document_ids`` jumps from one ``<document-id`` to
+the next with ``bytes.find`` and reads each element with one precompiled
+pattern, and returns None whenever it cannot vouch for giving the same
+answer as the recover-mode tree path. Callers then fall back to
+``parse_xml``.
+
+The markup between the root start tag and the last ``document-id`` is
+checked: every ``<`` must start a well-formed tag, CDATA section, comment
+or processing instruction, every ``&`` a predefined entity or character
+reference, and the root element must stay open. Whatever follows the last
+``document-id`` cannot change the result and is only checked to be valid
+UTF-8. The scanner gives up on:
+
+- encodings other than UTF-8, and DOCTYPE declarations (which can define
+  entities and default attributes)
+- default namespace declarations, which take ``document-id`` out of the
+  null namespace, and prefixed element names inside a ``document-id``
+- comments and processing instructions inside a ``document-id``, or
+  around one
+- ``document-id`` elements whose children are not all text-only elements
+- anything malformed in the part it reads
+"""
+
+import re
+from functools import lru_cache
+
+_BOM = b"\xef\xbb\xbf"
+
+_SPACE = rb"[ \t\r\n]"
+_NAME = rb"[A-Za-z_][\w.:-]*"
+# Element names inside a document-id may not have a namespace prefix
+_LOCAL_NAME = rb"[A-Za-z_][\w.-]*"
+_ATTRIBUTES = (
+    rb"(?:" + _SPACE + rb"+" + _NAME + _SPACE + rb"*=" + _SPACE + rb"*(?:\"[^\"<]*\"|'[^'<]*'))*"
+    rb"" + _SPACE + rb"*"
+)
+# Attributes inside a document-id, where namespace declarations are not accepted
+_LOCAL_ATTRIBUTES = _ATTRIBUTES.replace(rb"+" + _NAME, rb"+(?!xmlns)" + _NAME)
+# Character data of a text-only element
+_TEXT = rb"[^<]*(?:<!\[CDATA\[.*?\]\]>[^<]*)*"
+
+# One markup token
+_MARKUP = re.compile(
+    rb"<(?:" + _NAME + _ATTRIBUTES + rb"/?>"
+    rb"|/" + _NAME + _SPACE + rb"*>"
+    rb"|!\[CDATA\[.*?\]\]>|!--.*?-->|\?.*?\?>)",
+    re.S,
+)
+
+# Optional declaration, then comments, PIs and white space, then the root
+# start tag. Groups: 1 declaration, 2 root name, 3 root attributes, 4 "/"
+_PROLOG = re.compile(
+    rb"(<\?xml" + _SPACE + rb".*?\?>)?"
+    rb"(?:" + _SPACE + rb"|<!--.*?-->|<\?.*?\?>)*"
+    rb"<(" + _NAME + rb")(" + _ATTRIBUTES + rb")(/?)>",
+    re.S,
+)
+
+# A document-id whose children are all text-only elements. Groups:
+# 1 attributes, 2 "/" if empty, 3 a child before the first doc-number,
+# 4 text of the first doc-number, 5 a child after it
+_DOCUMENT_ID = re.compile(
+    rb"<document-id(" + _LOCAL_ATTRIBUTES + rb")(?:(/)>|>"
+    # Children before the first doc-number
+    rb"(?:[^<]*<(?!doc-number[ \t\r\n/>])("
+    + _LOCAL_NAME
+    + rb")"
+    + _LOCAL_ATTRIBUTES
+    + rb"(?:/>|>"
+    + _TEXT
+    + rb"</\3"
+    + _SPACE
+    + rb"*>))*"
+    # The first doc-number and the children after it
+    rb"(?:[^<]*<doc-number"
+    + _LOCAL_ATTRIBUTES
+    + rb"(?:/>|>("
+    + _TEXT
+    + rb")</doc-number"
+    + _SPACE
+    + rb"*>)"
+    rb"(?:[^<]*<("
+    + _LOCAL_NAME
+    + rb")"
+    + _LOCAL_ATTRIBUTES
+    + rb"(?:/>|>"
+    + _TEXT
+    + rb"</\5"
+    + _SPACE
+    + rb"*>))*)?"
+    rb"[^<]*</document-id" + _SPACE + rb"*>)",
+    re.S,
+)
+
+_ATTRIBUTE = re.compile(
+    _SPACE + rb"+(" + _NAME + rb")" + _SPACE + rb"*=" + _SPACE + rb"*(?:\"([^\"]*)\"|'([^']*)')"
+)
+
+_CDATA = re.compile(rb"<!\[CDATA\[(.*?)\]\]>", re.S)
+
+# An XML declaration anywhere but at the very start is an error
+_DECLARATION = re.compile(rb"<\?xml" + _SPACE)
+
+_DEFAULT_NAMESPACE = re.compile(rb"xmlns" + _SPACE + rb"*=")
+
+_ENCODING = re.compile(rb"encoding" + _SPACE + rb"*=" + _SPACE + rb"*[\"']([A-Za-z0-9._-]+)[\"']")
+
+_REFERENCE = re.compile(rb"&(?:(amp|lt|gt|quot|apos)|#([0-9]+)|#x([0-9a-fA-F]+));")
+
+_PREDEFINED = {b"amp": b"&", b"lt": b"<", b"gt": b">", b"quot": b'"', b"apos": b"'"}
+
+# Bytes that are never valid in XML text
+_CONTROL = re.compile(rb"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Bytes after which character data needs more than decoding
+_SPECIAL = re.compile(rb"[\x00-\x08\x0b\x0c\x0e-\x1f\r&\]]")
+
+_NO_ATTRIBUTES = (None, None)
+
+_NAME_CHARS = frozenset(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.:-")
+
+
+class _Unsupported(Exception):
+    """The document needs the tree path to be extracted faithfully."""
+
+
+def _character(match: re.Match) -> bytes:
+    """Replacement bytes for one entity or character reference."""
+    name, decimal, hexadecimal = match.groups()
+    if name is not None:
+        return _PREDEFINED[name]
+    code = int(decimal) if decimal is not None else int(hexadecimal, 16)
+    if not (
+        code in (0x9, 0xA, 0xD)
+        or 0x20 <= code <= 0xD7FF
+        or 0xE000 <= code <= 0xFFFD
+        or 0x10000 <= code <= 0x10FFFF
+    ):
+        raise _Unsupported
+    return chr(code).encode("utf-8")
+
+
+def _value(raw: bytes, attribute: bool = False) -> str:
+    """Decode character data or an attribute value as the XML parser would.
+
+    Line ends are normalized to ``\\n`` and, in attribute values, white
+    space to spaces, before references are replaced.
+    """
+    if _CONTROL.search(raw) or b"]]>" in raw:
+        raise _Unsupported
+    if b"\r" in raw:
+        raw = raw.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    if attribute:
+        raw = raw.replace(b"\t", b" ").replace(b"\n", b" ")
+    if b"&" in raw:
+        raw = _REFERENCE.sub(_character, raw)
+    return raw.decode("utf-8")
+
+
+def _text(raw: bytes) -> str:
+    """Decode the content of a text-only element, CDATA sections included."""
+    if b"<" not in raw:
+        return _value(raw)
+    pieces = []
+    position = 0
+    for match in _CDATA.finditer(raw):
+        pieces.append(_value(raw[position : match.start()]))
+        cdata = match.group(1)
+        if _CONTROL.search(cdata):
+            raise _Unsupported
+        pieces.append(cdata.replace(b"\r\n", b"\n").replace(b"\r", b"\n").decode("utf-8"))
+        position = match.end()
+    pieces.append(_value(raw[position:]))
+    return "".join(pieces)
+
+
+@lru_cache(maxsize=256)
+def _attributes(attributes: bytes) -> tuple[str | None, str | None]:
+    """The ``format`` and ``load-source`` values among a document-id's attributes.
+
+    Cached: the same few attribute strings repeat throughout a corpus.
+    """
+    names = set()
+    values: dict[bytes, str] = {}
+    for match in _ATTRIBUTE.finditer(attributes):
+        name = match.group(1)
+        if name in names:
+            raise _Unsupported
+        names.add(name)
+        if name in (b"format", b"load-source"):
+            raw = match.group(2) if match.group(2) is not None else match.group(3)
+            values[name] = _value(raw, attribute=True)
+    return values.get(b"format"), values.get(b"load-source")
+
+
+def _check_markup(content: bytes | bytearray, start: int, end: int, root: bytes) -> None:
+    """Check the markup before a document-id.
+
+    Every ``<`` in the range must start a token that ends in it, no default
+    namespace may be declared, and the root element must not be closed.
+    """
+    tokens = _MARKUP.findall(content, start, end)
+    hidden = 0
+    for token in tokens:
+        marker = token[1]
+        if marker == 0x2F:  # "/"
+            if token[2:].rstrip(b"> \t\r\n") == root:
+                raise _Unsupported
+        elif marker in (0x21, 0x3F):  # "!" or "?"
+            hidden += token.count(b"<") - 1
+        elif b"xmlns" in token and _DEFAULT_NAMESPACE.search(token):
+            raise _Unsupported
+    if content.count(b"<", start, end) != len(tokens) + hidden:
+        raise _Unsupported
+
+
+def _scan(content: bytes | bytearray) -> list[tuple[str, str | None, str | None]]:
+    """Body of ``scan_document_ids``; raises _Unsupported to fall back."""
+    if not content.isascii():
+        try:
+            content.decode("utf-8")
+        except UnicodeDecodeError:
+            raise _Unsupported from None
+
+    begin = len(_BOM) if content.startswith(_BOM) else 0
+    prolog = _PROLOG.match(content, begin)
+    if prolog is None:
+        raise _Unsupported
+    declaration, root, attributes, empty = prolog.groups()
+    if _DECLARATION.search(content, prolog.start(1) + 1 if declaration else begin, prolog.end()):
+        raise _Unsupported
+    if declaration is not None:
+        encoding = _ENCODING.search(declaration)
+        if encoding is not None and encoding.group(1).lower() not in (b"utf-8", b"utf8"):
+            raise _Unsupported
+    if root == b"document-id" or _DEFAULT_NAMESPACE.search(attributes):
+        raise _Unsupported
+
+    found: list[tuple[str, str | None, str | None]] = []
+    find = content.find
+    checked = position = prolog.end()
+    while (position := find(b"<document-id", position)) != -1:
+        element = _DOCUMENT_ID.match(content, position)
+        if element is None:
+            if content[position + 12 : position + 13] and content[position + 12] in _NAME_CHARS:
+                # Another element whose name starts with "document-id"
+                position += 12
+                continue
+            raise _Unsupported
+        if empty:
+            # Content after an empty root element is not part of the document
+            raise _Unsupported
+        if find(b"<", checked, position) != -1:
+            _check_markup(content, checked, position, root)
+        end = element.end()
+        if find(b"&", checked, end) != -1:
+            if content.count(b"&", checked, end) != len(_REFERENCE.findall(content, checked, end)):
+                raise _Unsupported
+
+        id_attributes, raw = element.group(1, 4)
+        doc_format, load_source = (
+            _attributes(bytes(id_attributes)) if id_attributes else _NO_ATTRIBUTES
+        )
+        if raw:
+            text = _text(raw).strip()
+            if text:
+                found.append((text, doc_format, load_source))
+        checked = position = end
+    return found
+
+
+def scan_document_ids(
+    content: bytes | bytearray,
+) -> list[tuple[str, str | None, str | None]] | None:
+    """Read the doc-number, format and load-source of every document-id from raw bytes.
+
+    Args:
+        content: Uncompressed XML bytes
+
+    Returns:
+        ``(doc_number, format, load_source)`` for each document-id with a non-empty
+        doc-number, in document order, with the doc-number stripped as the
+        tree path strips it; or None if the document must go through the
+        tree path instead
+    """
+    try:
+        return _scan(content)
+    except _Unsupported:
+        return None
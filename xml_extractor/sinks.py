@@ -0,0 +1,371 @@
+"""Buffered, sharded output sinks for extraction results.
+
+Every sink receives rows of ``(source, priority, position, doc_number,
+format)``, one per doc-number, in batches. CSV and NDJSON output can be
+gzip-compressed; Parquet output needs the optional ``pyarrow`` package.
+
+Shards roll over once a shard holds ``max_records`` rows or roughly
+``max_bytes`` bytes (uncompressed for CSV/NDJSON, on disk for Parquet).
+With either limit set, shards are named ``<stem>-00000<suffixes>``,
+``<stem>-00001<suffixes>`` and so on next to the requested path.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, BinaryIO
+
+ROW_FIELDS = ("source", "priority", "position", "doc_number", "format")
+
+Row = tuple[str, int, int, str, str | None]
+
+SINK_KINDS = ("csv", "ndjson", "parquet")
+
+# Write buffer for text sinks; rows are encoded a whole batch at a time
+BUFFER_SIZE = 1024 * 1024
+
+
+def shard_path(path: Path, index: int) -> Path:
+    """Insert a shard number before all suffixes (``out.csv.gz`` -> ``out-00003.csv.gz``)."""
+    suffixes = "".join(path.suffixes)
+    stem = path.name[: len(path.name) - len(suffixes)] if suffixes else path.name
+    return path.with_name(f"{stem}-{index:05d}{suffixes}")
+
+
+class Sink(ABC):
+    """Base class handling shard rollover; subclasses encode and write rows.
+
+    Args:
+        path: Output file, or None for stdout (text sinks only, never sharded)
+        max_records: Rows per shard before rolling over, if any
+        max_bytes: Approximate bytes per shard before rolling over, if any
+        batch_size: Rows queued before they are encoded and written
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None,
+        max_records: int | None = None,
+        max_bytes: int | None = None,
+        batch_size: int = 10_000,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self._pending: list[Row] = []
+        self.sharded = path is not None and bool(max_records or max_bytes)
+        self.shards: list[Path] = []
+        self.rows_written = 0
+        self._shard_records = 0
+        self._open = False
+
+    def _next_path(self) -> Path | None:
+        """Path of the next shard to open."""
+        if not self.sharded:
+            return self.path
+        return shard_path(self.path, len(self.shards))
+
+    def write_rows(self, rows: list[Row]) -> None:
+        """Queue rows for writing; they are encoded in batches of ``batch_size``."""
+        self._pending.extend(rows)
+        if len(self._pending) >= self.batch_size:
+            self._drain()
+
+    def _drain(self) -> None:
+        """Write all queued rows, rolling over to new shards as limits are reached."""
+        rows, self._pending = self._pending, []
+        while rows:
+            if not self._open:
+                self._start_shard()
+
+            batch = rows
+            if self.max_records:
+                batch = rows[: self.max_records - self._shard_records]
+            self._write(batch)
+            rows = rows[len(batch) :]
+            self._shard_records += len(batch)
+            self.rows_written += len(batch)
+
+            if self.sharded and (
+                (self.max_records and self._shard_records >= self.max_records)
+                or (self.max_bytes and self._shard_size() >= self.max_bytes)
+            ):
+                self._close_shard()
+                self._open = False
+
+    def _start_shard(self) -> None:
+        """Open the next shard, creating its directory if needed."""
+        path = self._next_path()
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.shards.append(path)
+        self._open_shard(path)
+        self._open = True
+        self._shard_records = 0
+
+    def close(self) -> None:
+        """Flush and close the current shard.
+
+        A sink that never received rows still leaves one empty shard (with
+        its header or schema), so downstream loaders always find a file.
+        """
+        self._drain()
+        if not self._open and not self.shards and self.path is not None:
+            self._start_shard()
+        if self._open:
+            self._close_shard()
+            self._open = False
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @abstractmethod
+    def _open_shard(self, path: Path | None) -> None:
+        """Start writing to ``path``, or to stdout for None."""
+
+    @abstractmethod
+    def _write(self, rows: list[Row]) -> None:
+        """Encode and write a batch of rows to the open shard."""
+
+    @abstractmethod
+    def _shard_size(self) -> int:
+        """Bytes written to the open shard so far, as compared with ``max_bytes``."""
+
+    @abstractmethod
+    def _close_shard(self) -> None:
+        """Finish and close the open shard."""
+
+
+class TextSink(Sink):
+    """Shared file handling for the line-based sinks.
+
+    Args:
+        compress: gzip-compress each shard
+        append: Add to an existing file instead of replacing it; the header
+            is only written to an empty file
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None,
+        compress: bool = False,
+        append: bool = False,
+        **limits: Any,
+    ):
+        super().__init__(path, **limits)
+        self.compress = compress
+        self.append = append
+        self._file: BinaryIO | None = None
+        self._raw: BinaryIO | None = None
+        self._size = 0
+
+    def _open_shard(self, path: Path | None) -> None:
+        mode = "ab" if self.append else "wb"
+        self._raw = open(path, mode, buffering=BUFFER_SIZE) if path is not None else None
+        target = self._raw if self._raw is not None else sys.stdout.buffer
+        # Level 6 is zlib's default trade-off; gzip's own default of 9 is far slower
+        self._file = (
+            gzip.GzipFile(fileobj=target, mode="wb", compresslevel=6) if self.compress else target
+        )
+        self._size = 0
+        if self._raw is None or self._raw.tell() == 0:
+            self._write_bytes(self._header())
+
+    def sync(self) -> int:
+        """Write all queued rows and fsync the file.
+
+        Only for uncompressed, unsharded file output, where the file size
+        then marks a row boundary (used for resume checkpoints).
+
+        Returns:
+            Size of the file in bytes
+        """
+        if self.compress or self.sharded or self.path is None:
+            raise ValueError("Only an uncompressed, unsharded output file can be synced")
+        self._drain()
+        if not self._open:
+            self._start_shard()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        return self._raw.tell()
+
+    def _write_bytes(self, data: bytes) -> None:
+        self._file.write(data)
+        self._size += len(data)
+
+    def _write(self, rows: list[Row]) -> None:
+        self._write_bytes(self._encode(rows))
+
+    def _shard_size(self) -> int:
+        return self._size
+
+    def _close_shard(self) -> None:
+        if self.compress:
+            # Writes the gzip trailer; the underlying file stays open
+            self._file.close()
+        if self._raw is not None:
+            self._raw.close()
+        else:
+            sys.stdout.buffer.flush()
+
+    def _header(self) -> bytes:
+        return b""
+
+    @abstractmethod
+    def _encode(self, rows: list[Row]) -> bytes:
+        """Encode a batch of rows as lines."""
+
+
+class CSVSink(TextSink):
+    """CSV with a header row in every shard; a missing format is an empty field."""
+
+    def _header(self) -> bytes:
+        return self._encode([ROW_FIELDS])
+
+    def _encode(self, rows: list[Row]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+
+class NDJSONSink(TextSink):
+    """One JSON object per row."""
+
+    def _encode(self, rows: list[Row]) -> bytes:
+        return "".join(
+            json.dumps(dict(zip(ROW_FIELDS, row, strict=True))) + "\n" for row in rows
+        ).encode("utf-8")
+
+
+class ParquetSink(Sink):
+    """Parquet files written one row group at a time.
+
+    Args:
+        row_group_size: Rows buffered before a row group is written
+        compression: Parquet column compression codec
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        row_group_size: int = 100_000,
+        compression: str = "snappy",
+        **limits: Any,
+    ):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Parquet output requires pyarrow: pip install 'xml-extractor[parquet]'"
+            ) from e
+        if path is None:
+            raise ValueError("Parquet output needs a file path")
+
+        super().__init__(path, **limits)
+        self._pa = pa
+        self._pq = pq
+        self.schema = pa.schema(
+            [
+                ("source", pa.string()),
+                ("priority", pa.int8()),
+                ("position", pa.int64()),
+                ("doc_number", pa.string()),
+                ("format", pa.string()),
+            ]
+        )
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._writer = None
+        self._current: Path | None = None
+        self._row_group: list[Row] = []
+
+    def _open_shard(self, path: Path | None) -> None:
+        self._writer = self._pq.ParquetWriter(path, self.schema, compression=self.compression)
+        self._current = path
+
+    def _write(self, rows: list[Row]) -> None:
+        self._row_group.extend(rows)
+        while len(self._row_group) >= self.row_group_size:
+            self._flush(self.row_group_size)
+
+    def _flush(self, count: int | None = None) -> None:
+        """Write up to ``count`` buffered rows (default all) as one row group."""
+        rows = self._row_group[:count]
+        self._row_group = self._row_group[len(rows) :]
+        if not rows:
+            return
+        columns = list(zip(*rows, strict=True))
+        self._writer.write_table(
+            self._pa.Table.from_arrays(
+                [
+                    self._pa.array(column, type=field.type)
+                    for column, field in zip(columns, self.schema, strict=True)
+                ],
+                schema=self.schema,
+            )
+        )
+
+    def _shard_size(self) -> int:
+        # Only finished row groups are on disk
+        return self._current.stat().st_size
+
+    def _close_shard(self) -> None:
+        self._flush()
+        self._writer.close()
+        self._writer = None
+
+
+def open_sink(
+    kind: str,
+    path: str | Path | None,
+    compress: bool = False,
+    max_records: int | None = None,
+    max_bytes: int | None = None,
+    append: bool = False,
+) -> Sink:
+    """Create a sink by name.
+
+    Args:
+        kind: One of ``SINK_KINDS``
+        path: Output file, or None for stdout (not for Parquet)
+        compress: gzip-compress CSV/NDJSON output (Parquet always uses snappy)
+        max_records: Rows per shard before rolling over, if any
+        max_bytes: Approximate bytes per shard before rolling over, if any
+        append: Add CSV/NDJSON rows to an existing file (not for Parquet)
+
+    Returns:
+        The sink; use it as a context manager or call ``close``
+
+    Raises:
+        ValueError: For an unknown kind, Parquet to stdout or appending to Parquet
+        ImportError: For Parquet without pyarrow installed
+    """
+    limits = {"max_records": max_records, "max_bytes": max_bytes}
+    if kind == "csv":
+        return CSVSink(path, compress=compress, append=append, **limits)
+    if kind == "ndjson":
+        return NDJSONSink(path, compress=compress, append=append, **limits)
+    if kind == "parquet":
+        if append:
+            raise ValueError("Parquet output cannot be appended to")
+        return ParquetSink(path, **limits)
+    raise ValueError(f"Unknown sink: {kind!r} (expected one of {', '.join(SINK_KINDS)})")
+
+
+def record_rows(source: str, records: Iterable[Any]) -> list[Row]:
+    """Turn DocumentIdRecords into sink rows for one source."""
+    return [
+        (source, record.priority, record.position, record.doc_number, record.format)
+        for record in records
+    ]
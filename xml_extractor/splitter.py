@@ -0,0 +1,71 @@
+"""Splitter for files holding many concatenated XML documents.
+
+Bulk feeds (USPTO/EPO weekly dumps) ship thousands of complete documents,
+each with its own ``<?xml ...?>`` declaration, back to back in one file.
+The splitter finds those boundaries with a byte search over large buffered
+reads, without parsing anything, and yields each document's bytes.
+Compressed dumps are decompressed as they are read.
+"""
+
+import os
+import re
+from collections.abc import Iterator
+from typing import BinaryIO
+
+from .compression import open_stream
+
+# An XML declaration; the trailing whitespace excludes PIs like <?xml-stylesheet
+DECLARATION = re.compile(rb"<\?xml\s")
+# Longest prefix of a declaration that can straddle two reads
+_OVERLAP = len(b"<?xml ") - 1
+_NON_SPACE = re.compile(rb"\S")
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def split_documents(
+    source: str | os.PathLike | BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yield each XML document from a file of concatenated documents.
+
+    A new document starts at every XML declaration after the first byte.
+    Memory use is bounded by ``chunk_size`` plus the largest single
+    document. Whitespace-only fragments between documents are skipped.
+
+    Args:
+        source: Path or binary file object of the concatenated dump, which
+            may be gzip, bzip2 or zstd compressed
+        chunk_size: Number of bytes read per I/O call
+
+    Yields:
+        Raw bytes of each document, ready for ``extract_doc_numbers``
+    """
+    if isinstance(source, str | os.PathLike):
+        with open(source, "rb") as file:
+            yield from split_documents(file, chunk_size)
+        return
+
+    buffer = bytearray()
+    scan_from = 1
+    with open_stream(source) as stream:
+        while chunk := stream.read(chunk_size):
+            buffer += chunk
+            start = 0
+            while match := DECLARATION.search(buffer, scan_from):
+                yield from _document(buffer, start, match.start())
+                start = match.start()
+                scan_from = start + 1
+            if start:
+                del buffer[:start]
+            # Re-scan only the tail that may hold a partial declaration
+            scan_from = max(1, len(buffer) - _OVERLAP)
+    yield from _document(buffer, 0, len(buffer))
+
+
+def _document(buffer: bytearray, start: int, end: int) -> Iterator[bytes]:
+    """Yield ``buffer[start:end]`` as bytes unless it is only whitespace."""
+    if _NON_SPACE.search(buffer, start, end):
+        # Slice through a memoryview so the document is copied only once
+        with memoryview(buffer) as view:
+            document = bytes(view[start:end])
+        yield document
@@ -0,0 +1,447 @@
+"""Object sources for input XML: the local filesystem or Google Cloud Storage.
+
+Batch inputs may be ``gs://bucket/prefix`` or ``file:///dir/prefix`` URIs;
+each scheme in ``SOURCES`` opens the ``ObjectSource`` that lists and reads
+its objects. GCS objects are listed and downloaded through the JSON API over
+plain HTTP(S), without a client library. Set ``STORAGE_EMULATOR_HOST`` (e.g.
+``localhost:4443``) to use a local emulator such as fake-gcs-server, or
+``GOOGLE_OAUTH_ACCESS_TOKEN`` to read private buckets on storage.googleapis.com.
+
+Requests reuse keep-alive connections from a per-bucket pool and are retried
+with exponential backoff and full jitter on transient failures (connection
+errors, timeouts, HTTP 408/429/5xx). ``prefetch`` keeps a bounded number of
+downloads running ahead of the consumer, so downloading overlaps parsing.
+"""
+
+import http.client
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Protocol, TypeVar
+from urllib.parse import quote, unquote, urlencode, urlsplit
+
+from .exceptions import InputTooLargeError, StorageError
+
+GCS_ENDPOINT = "https://storage.googleapis.com"
+
+# Statuses GCS documents as retryable
+TRANSIENT_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+DEFAULT_CONCURRENCY = 8
+
+# Idle connections kept per bucket; above the download concurrency, every
+# extra request would open (and later close) a fresh connection
+POOL_SIZE = 64
+
+T = TypeVar("T")
+
+
+class ObjectSource(Protocol):
+    """A flat namespace of objects addressed by ``/``-separated keys."""
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        """Yield the keys starting with ``prefix``, in a deterministic order."""
+
+    def read(self, key: str, max_size: int | None = None) -> bytes:
+        """Return the full content of one object.
+
+        Raises:
+            InputTooLargeError: If the object is larger than ``max_size`` bytes
+        """
+
+    def uri(self, key: str) -> str:
+        """Return the name reported for ``key`` in results."""
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed request is worth retrying."""
+    if isinstance(error, StorageError):
+        return error.status in TRANSIENT_STATUSES
+    # Refused/reset connections, timeouts and truncated responses
+    return isinstance(error, OSError | http.client.HTTPException)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    After failed attempt ``n`` (counting from 0) the caller sleeps for a
+    random time between 0 and ``min(max_delay, base_delay * 2**n)`` seconds,
+    so clients that failed together do not retry in lockstep.
+
+    Attributes:
+        attempts: Total number of attempts, including the first
+        base_delay: Upper bound of the first delay, in seconds
+        max_delay: Cap on the upper bound of any delay, in seconds
+    """
+
+    attempts: int = 5
+    base_delay: float = 0.1
+    max_delay: float = 10.0
+
+    def delay(self, attempt: int) -> float:
+        """Random delay after failed attempt ``attempt``."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Call ``fn``, retrying transient failures.
+
+        Raises:
+            Exception: The last error, once attempts run out or the error is
+                not transient
+        """
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.attempts or not is_transient(e):
+                    raise
+            time.sleep(self.delay(attempt - 1))
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections to one host, shared between threads.
+
+    Any number of requests may run at once; after a request its connection
+    is kept for reuse unless ``size`` connections are already idle. A
+    connection that fails mid-request is closed, never reused.
+
+    Args:
+        endpoint: Base URL such as ``https://storage.googleapis.com``;
+            ``host:port`` alone means plain HTTP
+        size: Maximum number of idle connections kept open
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, endpoint: str, size: int = POOL_SIZE, timeout: float = 60.0):
+        parts = urlsplit(endpoint if "://" in endpoint else f"http://{endpoint}")
+        self._connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str] | None = None,
+        max_size: int | None = None,
+    ) -> tuple[int, bytes]:
+        """Send one request and read the whole response.
+
+        Args:
+            method: HTTP method
+            path: Request path and query
+            headers: Request headers
+            max_size: Largest successful response body to read, in bytes;
+                a larger one is abandoned as soon as its length or its first
+                ``max_size + 1`` bytes show it is too large
+
+        Returns:
+            Tuple of (HTTP status, body)
+
+        Raises:
+            OSError: On connection failures and timeouts
+            http.client.HTTPException: On malformed or truncated responses
+            InputTooLargeError: If the body is larger than ``max_size``
+        """
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connection_class(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request(method, path, headers=headers or {})
+            response = connection.getresponse()
+            if max_size is None or response.status >= 400:
+                body = response.read()
+            elif response.length is not None and response.length > max_size:
+                raise InputTooLargeError(f"Response of {response.length} bytes", max_size)
+            else:
+                body = response.read(max_size + 1)
+                if len(body) > max_size:
+                    raise InputTooLargeError("Response", max_size)
+        except BaseException:
+            # Also drops a connection with the rest of a body left unread
+            connection.close()
+            raise
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+        return response.status, body
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class GCSSource:
+    """Objects in one GCS bucket, read through the JSON API.
+
+    Args:
+        bucket: Bucket name
+        endpoint: API base URL (default: ``STORAGE_EMULATOR_HOST`` if set,
+            else storage.googleapis.com)
+        token: OAuth access token (default: ``GOOGLE_OAUTH_ACCESS_TOKEN``);
+            without one, requests are anonymous
+        retry: Retry policy for every request
+        pool_size: Idle connections kept for reuse
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint: str | None = None,
+        token: str | None = None,
+        retry: RetryPolicy = RetryPolicy(),
+        pool_size: int = POOL_SIZE,
+        timeout: float = 60.0,
+    ):
+        self.bucket = bucket
+        self.endpoint = endpoint or emulator_host() or GCS_ENDPOINT
+        token = token if token is not None else os.environ.get("GOOGLE_OAUTH_ACCESS_TOKEN")
+        self._headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.retry = retry
+        self._pool = ConnectionPool(self.endpoint, pool_size, timeout)
+        self._objects = f"/storage/v1/b/{quote(bucket, safe='')}/o"
+
+    def _get(self, path: str, name: str, max_size: int | None = None) -> bytes:
+        """GET an API path with retries; ``name`` is used in error messages."""
+
+        def attempt() -> bytes:
+            try:
+                status, body = self._pool.request("GET", path, self._headers, max_size)
+            except InputTooLargeError as e:
+                raise InputTooLargeError(f"{name}: larger than {e.limit} bytes", e.limit) from None
+            if status >= 400:
+                raise StorageError(f"{name}: HTTP {status}", status)
+            return body
+
+        return self.retry.call(attempt)
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        """Yield object names starting with ``prefix``, in lexicographic order.
+
+        Raises:
+            StorageError: If a listing page cannot be fetched
+        """
+        query = {"prefix": prefix, "fields": "items(name),nextPageToken"}
+        while True:
+            page = json.loads(self._get(f"{self._objects}?{urlencode(query)}", self.uri(prefix)))
+            for item in page.get("items", []):
+                yield item["name"]
+            if not page.get("nextPageToken"):
+                return
+            query["pageToken"] = page["nextPageToken"]
+
+    def read(self, key: str, max_size: int | None = None) -> bytes:
+        """Download one object.
+
+        Args:
+            key: Object name
+            max_size: Size limit in bytes, enforced while downloading
+
+        Raises:
+            StorageError: If the object is missing, access is denied, or
+                transient failures outlast the retry policy
+            InputTooLargeError: If the object is larger than ``max_size``
+        """
+        return self._get(
+            f"{self._objects}/{quote(key, safe='')}?alt=media", self.uri(key), max_size
+        )
+
+    def uri(self, key: str) -> str:
+        return f"gs://{self.bucket}/{key}"
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class FileSystemSource:
+    """Files below a root directory, keyed by their ``/``-separated relative path.
+
+    Args:
+        root: Directory holding the objects
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root).absolute()
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        # Only walk the directory part of the prefix
+        start = self.root / prefix.rpartition("/")[0]
+        for dirpath, dirnames, filenames in os.walk(start):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                key = (Path(dirpath) / filename).relative_to(self.root).as_posix()
+                if key.startswith(prefix):
+                    yield key
+
+    def read(self, key: str, max_size: int | None = None) -> bytes:
+        with open(self.root / key, "rb") as file:
+            if max_size is None:
+                return file.read()
+            content = file.read(max_size + 1)
+        if len(content) > max_size:
+            raise InputTooLargeError(f"{self.uri(key)}: larger than {max_size} bytes", max_size)
+        return content
+
+    def uri(self, key: str) -> str:
+        return (self.root / key).as_uri()
+
+
+def emulator_host() -> str | None:
+    """The emulator endpoint from ``STORAGE_EMULATOR_HOST``, if set."""
+    return os.environ.get("STORAGE_EMULATOR_HOST") or None
+
+
+def is_uri(spec: str) -> bool:
+    """Whether an input spec names objects in a source rather than local files."""
+    return urlsplit(spec).scheme in SOURCES
+
+
+def split_uri(uri: str) -> tuple[str, str]:
+    """Split ``gs://bucket/key`` into (bucket, key), or ``file:///path`` into ("", path).
+
+    Raises:
+        ValueError: If ``uri`` is not a ``gs://`` URI with a bucket or a
+            ``file://`` URI on the local host
+    """
+    parts = urlsplit(uri)
+    if parts.scheme == "gs" and parts.netloc:
+        return parts.netloc, parts.path.removeprefix("/")
+    if parts.scheme == "file" and parts.netloc in ("", "localhost"):
+        return "", unquote(parts.path).removeprefix("/")
+    raise ValueError(f"Not a gs://bucket/key or file:///path URI: {uri!r}")
+
+
+# One source per (bucket, endpoint), so connections are pooled across calls
+_buckets: dict[tuple[str, str | None], GCSSource] = {}
+_buckets_lock = threading.Lock()
+
+
+def open_bucket(bucket: str) -> GCSSource:
+    """Return the shared source for ``bucket`` at the current endpoint."""
+    key = (bucket, emulator_host())
+    with _buckets_lock:
+        source = _buckets.get(key)
+        if source is None:
+            source = _buckets[key] = GCSSource(bucket)
+        return source
+
+
+def _open_root(location: str) -> FileSystemSource:
+    """The local filesystem, keyed by absolute path without the leading ``/``."""
+    return FileSystemSource("/")
+
+
+# Opens the source for the location (bucket) part of a URI, by scheme
+SOURCES: dict[str, Callable[[str], ObjectSource]] = {
+    "gs": open_bucket,
+    "file": _open_root,
+}
+
+
+def open_source(uri: str) -> tuple[ObjectSource, str]:
+    """Return the source holding the objects a URI names, and the key in it.
+
+    Raises:
+        ValueError: If ``uri`` does not name a known source
+    """
+    location, key = split_uri(uri)
+    return SOURCES[urlsplit(uri).scheme](location), key
+
+
+def list_uris(uri: str, pattern: str = "*.xml") -> Iterator[str]:
+    """Expand a URI prefix into the URIs of matching objects.
+
+    Args:
+        uri: Source and key prefix to list, such as ``gs://bucket/prefix``
+        pattern: Pattern the object's name must match, as for local directories
+
+    Yields:
+        URIs of the same scheme, in the source's order
+
+    Raises:
+        StorageError: If the bucket cannot be listed
+    """
+    source, prefix = open_source(uri)
+    for key in source.list(prefix):
+        # Skip the empty placeholder objects consoles create for "folders"
+        if not key.endswith("/") and PurePosixPath(key).match(pattern):
+            yield source.uri(key)
+
+
+def read_uri(uri: str, max_size: int | None = None) -> bytes:
+    """Read the object a URI names from its source.
+
+    Raises:
+        InputTooLargeError: If the object is larger than ``max_size`` bytes
+    """
+    source, key = open_source(uri)
+    return source.read(key, max_size)
+
+
+def prefetch(
+    items: Iterable[str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    fetch: Callable[[str], bytes] = read_uri,
+) -> Iterator[str | tuple[str, bytes | Exception]]:
+    """Download object URIs ahead of the consumer; pass local paths through.
+
+    At most ``concurrency`` downloads run at once, and at most
+    ``2 * concurrency`` items wait for the consumer, which bounds memory.
+
+    Args:
+        items: Local paths and object URIs, consumed lazily
+        concurrency: Number of download threads
+        fetch: Function downloading one URI
+
+    Yields:
+        Local paths unchanged and ``(uri, content)`` pairs for URIs, in input
+        order; a download that fails is yielded as ``(uri, exception)`` so
+        the caller can report it for that item alone
+    """
+
+    def download(uri: str) -> tuple[str, bytes | Exception]:
+        try:
+            return uri, fetch(uri)
+        except Exception as e:
+            return uri, e
+
+    def ready() -> bool:
+        return bool(pending) and (
+            len(pending) > 2 * concurrency or not isinstance(pending[0], Future)
+        )
+
+    pending: deque = deque()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="prefetch")
+    try:
+        for item in items:
+            pending.append(executor.submit(download, item) if is_uri(item) else item)
+            while ready():
+                head = pending.popleft()
+                yield head.result() if isinstance(head, Future) else head
+        while pending:
+            head = pending.popleft()
+            yield head.result() if isinstance(head, Future) else head
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
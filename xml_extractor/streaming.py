@@ -0,0 +1,228 @@
+"""Streaming extraction for documents too large to hold as a full tree."""
+
+import io
+import os
+from collections.abc import Iterator
+from itertools import chain
+from time import perf_counter_ns
+from typing import BinaryIO
+
+from lxml import etree
+
+from . import instrumentation
+from .compression import open_stream
+from .exceptions import CompressionError, InputTooLargeError, XMLParseError
+from .extractor import DocumentIdRecord, order_records, read_document_id
+from .mapping import BufferReader
+from .parser import _check_encoding
+from .priority import DEFAULT_POLICY, PriorityPolicy
+
+StreamSource = str | bytes | bytearray | memoryview | os.PathLike | BinaryIO
+
+
+def _release(element: etree._Element) -> None:
+    """Free a finished element and everything parsed before it.
+
+    Clears the element itself, then deletes the earlier siblings of the
+    element and of each of its ancestors, so the partial tree only ever
+    holds the path from the root to the current position.
+
+    Args:
+        element: Element whose end event has just been handled
+    """
+    element.clear(keep_tail=True)
+    for node in chain((element,), element.iterancestors()):
+        parent = node.getparent()
+        if parent is None:
+            break
+        while node.getprevious() is not None:
+            del parent[0]
+
+
+def _record_batches(
+    source: StreamSource, max_size: int | None, policy: PriorityPolicy
+) -> Iterator[list[DocumentIdRecord]]:
+    """Parse XML incrementally, yielding its records in document order.
+
+    A batch holds the records of one outermost ``document-id`` (it and any
+    nested in it) and is yielded as soon as that element ends. The parse
+    and encoding checks of ``extract_records_streaming`` run once the
+    document ends, after the last batch.
+    """
+    recorder = instrumentation.recorder
+    start = perf_counter_ns() if recorder is not None else 0
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    elif isinstance(source, bytearray | memoryview):
+        # Mapped files are read in chunks rather than copied whole
+        source = BufferReader(source)
+
+    batch: list[DocumentIdRecord] = []
+    # Positions are assigned on start events so nested document-ids keep
+    # the same document order as the tree-based XPath search
+    open_positions: list[int] = []
+    position = 0
+    # A nested document-id ends, and is recorded, before its enclosing one
+    nested = False
+
+    try:
+        with open_stream(source, max_size) as stream:
+            context = etree.iterparse(
+                stream, events=("start", "end"), tag="document-id", recover=True
+            )
+            for event, element in context:
+                if event == "start":
+                    open_positions.append(position)
+                    position += 1
+                    continue
+
+                idx = open_positions.pop()
+
+                # The tree path searches descendants only, never the root itself
+                if element.getparent() is None:
+                    continue
+
+                record = read_document_id(element, idx, policy)
+                if record is not None:
+                    batch.append(record)
+                    nested = nested or bool(open_positions)
+
+                # An enclosing document-id still needs its own children
+                if not open_positions:
+                    _release(element)
+                    if batch:
+                        if nested:
+                            batch.sort(key=lambda record: record.position)
+                            nested = False
+                        yield batch
+                        batch = []
+    except (CompressionError, InputTooLargeError):
+        raise
+    except Exception as e:
+        raise XMLParseError(f"Failed to parse XML: {e}") from e
+
+    # Records nested in a root document-id end with the document
+    if batch:
+        batch.sort(key=lambda record: record.position)
+        yield batch
+
+    if recorder is not None:
+        # Parsing and locating are interleaved, so both count as parse
+        instrumentation.lap(recorder, "parse", start)
+        if context.error_log:
+            recorder.count("recovered_parse")
+
+    _check_encoding(context.error_log)
+
+    if context.root is None:
+        raise XMLParseError("Failed to parse XML: no root element could be recovered")
+
+
+def extract_records_streaming(
+    source: StreamSource,
+    max_size: int | None = None,
+    policy: PriorityPolicy = DEFAULT_POLICY,
+) -> list[DocumentIdRecord]:
+    """Extract document-id records from XML without building the whole tree.
+
+    Uses ``etree.iterparse`` in recover mode and only reacts to
+    ``document-id`` events. Each finished ``document-id`` is reduced to its
+    record, then released together with its earlier siblings, so peak
+    memory stays flat no matter how large the input is. Ancestors stay in
+    the partial tree, so the enclosing ``application-reference`` ucid is
+    still available. Compressed input (gzip, bzip2 or zstd) is decompressed
+    as it is parsed, so memory stays flat for it too.
+
+    Args:
+        source: Filename, path, binary file object, or raw XML bytes,
+            optionally compressed
+        max_size: Largest document accepted, in bytes after decompression;
+            None for no limit
+        policy: Rules that order the document-ids
+
+    Returns:
+        Records in the same priority order as ``extract_records``
+
+    Raises:
+        EncodingError: If the bytes are invalid in the document's encoding
+        CompressionError: If compressed input is corrupt or unsupported
+        InputTooLargeError: If the document exceeds ``max_size``
+        XMLParseError: If XML cannot be parsed
+    """
+    records = [record for batch in _record_batches(source, max_size, policy) for record in batch]
+    recorder = instrumentation.recorder
+    start = perf_counter_ns() if recorder is not None else 0
+    records = order_records(records)
+    if recorder is not None:
+        instrumentation.lap(recorder, "sort", start)
+    return records
+
+
+def iter_doc_numbers_streaming(
+    source: StreamSource,
+    max_size: int | None = None,
+    policy: PriorityPolicy = DEFAULT_POLICY,
+) -> Iterator[list[str]]:
+    """Yield doc-numbers in priority order while the XML is still being parsed.
+
+    Document-ids of the policy's first level come first and keep document
+    order, so their doc-numbers are yielded as soon as each outermost
+    ``document-id`` ends. The others can only be placed once the whole
+    document has been read and are yielded last, in one group. Joined, the
+    groups equal ``extract_doc_numbers_streaming``.
+
+    Args:
+        source: Filename, path, binary file object, or raw XML bytes,
+            optionally compressed
+        max_size: Largest document accepted, in bytes after decompression;
+            None for no limit
+        policy: Rules that order the document-ids
+
+    Yields:
+        Non-empty lists of doc-numbers
+
+    Raises:
+        EncodingError: If the bytes are invalid in the document's encoding
+        CompressionError: If compressed input is corrupt or unsupported
+        InputTooLargeError: If the document exceeds ``max_size``
+        XMLParseError: If XML cannot be parsed; any of these may come after
+            some groups have been yielded
+    """
+    rest: list[DocumentIdRecord] = []
+    for batch in _record_batches(source, max_size, policy):
+        first = [record.doc_number for record in batch if record.priority == 0]
+        if first:
+            yield first
+        rest.extend(record for record in batch if record.priority != 0)
+    if rest:
+        yield [record.doc_number for record in order_records(rest)]
+
+
+def extract_doc_numbers_streaming(
+    source: StreamSource,
+    max_size: int | None = None,
+    policy: PriorityPolicy = DEFAULT_POLICY,
+) -> list[str]:
+    """Extract doc-number values from XML without building the whole tree.
+
+    Projection of ``extract_records_streaming``; see there for details.
+
+    Args:
+        source: Filename, path, binary file object, or raw XML bytes,
+            optionally compressed
+        max_size: Largest document accepted, in bytes after decompression;
+            None for no limit
+        policy: Rules that order the document-ids
+
+    Returns:
+        List of doc-number values in the same priority order as
+        ``extract_doc_numbers``
+
+    Raises:
+        EncodingError: If the bytes are invalid in the document's encoding
+        CompressionError: If compressed input is corrupt or unsupported
+        InputTooLargeError: If the document exceeds ``max_size``
+        XMLParseError: If XML cannot be parsed
+    """
+    return [record.doc_number for record in extract_records_streaming(source, max_size, policy)]